@@ -103,10 +103,10 @@ def register_goals():
 
   # Cleaning.
   invalidate = task(name='invalidate', action=Invalidator)
-  invalidate.install().with_description('Invalidate all targets.')
+  invalidate.install().with_description('Invalidate all targets.').as_exclusive()
 
   clean_all = task(name='clean-all', action=Cleaner).install()
-  clean_all.with_description('Clean all build output.')
+  clean_all.with_description('Clean all build output.').as_exclusive()
   clean_all.install(invalidate, first=True)
 
   class AsyncCleaner(Cleaner):
@@ -116,7 +116,7 @@ def register_goals():
       print('Please update your usages to `clean-all`.', file=sys.stderr)
       super(AsyncCleaner, self).execute()
   clean_all_async = task(name='clean-all-async', action=AsyncCleaner).install().with_description(
-      '[deprecated] Clean all build output in a background process.')
+      '[deprecated] Clean all build output in a background process.').as_exclusive()
   clean_all_async.install(invalidate, first=True)
 
   # Reporting.
@@ -392,7 +392,66 @@ class IvyUtils(object):
                   genmap.add((target, conf), confdir).append(f)
                   genmap.add((org, name, conf), confdir).append(f)
 
+  # Ivy writes the resolution files of a module - its resolved ivy.xml, properties and the xml
+  # reports read back by `parse_xml_report` - to fixed paths in the cache dir, so resolves of the
+  # same module must not overlap.  Resolves of different modules may, but only when the artifacts
+  # they share in the repository cache are guarded by one of ivy's artifact lock strategies (see
+  # build-support/ivy/ivysettings.xml).  Otherwise all ivy runs are serialized by `ivy_lock`.
   ivy_lock = threading.RLock()
+  _module_locks = defaultdict(threading.RLock)
+  _module_locks_lock = threading.Lock()
+
+  _ARTIFACT_LOCK_STRATEGIES = frozenset(['artifact-lock', 'artifact-lock-nio'])
+  _locks_artifacts_by_settings = {}
+  _locks_artifacts_lock = threading.Lock()
+
+  # Guards the well-known ivy.xml symlink shared by all resolves.
+  _ivyxml_symlink_lock = threading.Lock()
+
+  @classmethod
+  def module_lock(cls, targets):
+    """Returns the lock that serializes ivy runs for the module generated for the given targets."""
+    with cls._module_locks_lock:
+      return cls._module_locks[cls.identify(targets)]
+
+  @classmethod
+  def locks_artifacts(cls, ivy_settings):
+    """Returns True if the given ivysettings.xml guards every repository cache with artifact locks.
+
+    Ivy's built in settings, used when ivy_settings is None, do not lock the cache.
+
+    :param string ivy_settings: The path of an ivysettings.xml file or None.
+    """
+    if not ivy_settings:
+      return False
+    with cls._locks_artifacts_lock:
+      if ivy_settings not in cls._locks_artifacts_by_settings:
+        cls._locks_artifacts_by_settings[ivy_settings] = cls._parse_locks_artifacts(ivy_settings)
+      return cls._locks_artifacts_by_settings[ivy_settings]
+
+  @classmethod
+  def _parse_locks_artifacts(cls, ivy_settings):
+    try:
+      root = xml.etree.ElementTree.parse(ivy_settings).getroot()
+    except (IOError, xml.etree.ElementTree.ParseError):
+      return False
+
+    caches = root.findall('caches')
+    if not caches:
+      return False
+    for caches_element in caches:
+      default_strategy = caches_element.get('lockStrategy')
+      if default_strategy not in cls._ARTIFACT_LOCK_STRATEGIES:
+        return False
+      for cache in caches_element.findall('cache'):
+        if cache.get('lockStrategy', default_strategy) not in cls._ARTIFACT_LOCK_STRATEGIES:
+          return False
+    return True
+
+  def _exec_lock(self, ivy, targets):
+    if self.locks_artifacts(ivy.ivy_settings):
+      return self.module_lock(targets)
+    return IvyUtils.ivy_lock
 
   def exec_ivy(self,
                target_workdir,
@@ -436,7 +495,7 @@ class IvyUtils(object):
           raise
       os.symlink(src, dest)
 
-    with IvyUtils.ivy_lock:
+    with self._exec_lock(ivy, targets):
       self._generate_ivy(targets, jars, excludes, ivyxml, confs_to_resolve)
       runner = ivy.runner(jvm_options=self._jvm_options, args=ivy_args)
       try:
@@ -447,7 +506,8 @@ class IvyUtils(object):
         # Symlink to the current ivy.xml file (useful for IDEs that read it).
         if symlink_ivyxml:
           ivyxml_symlink = os.path.join(self._workdir, 'ivy.xml')
-          safe_link(ivyxml, ivyxml_symlink)
+          with self._ivyxml_symlink_lock:
+            safe_link(ivyxml, ivyxml_symlink)
 
         if result != 0:
           raise TaskError('Ivy returned %d' % result)
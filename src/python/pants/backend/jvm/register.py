@@ -96,7 +96,7 @@ def build_file_aliases():
 # TODO https://github.com/pantsbuild/pants/issues/604 register_goals
 def register_goals():
   ng_killall = task(name='ng-killall', action=NailgunKillall)
-  ng_killall.install().with_description('Kill running nailgun servers.')
+  ng_killall.install().with_description('Kill running nailgun servers.').as_exclusive()
 
   Goal.by_name('invalidate').install(ng_killall, first=True)
   Goal.by_name('clean-all').install(ng_killall, first=True)
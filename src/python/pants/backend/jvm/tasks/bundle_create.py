@@ -13,6 +13,7 @@ from pants.backend.jvm.targets.jvm_binary import JvmApp, JvmBinary
 from pants.backend.jvm.tasks.jvm_binary_task import JvmBinaryTask
 from pants.base.build_environment import get_buildroot
 from pants.fs import archive
+from pants.fs.materialize import materialize_tree
 from pants.util.dirutil import safe_mkdir
 
 
@@ -28,13 +29,21 @@ class BundleCreate(JvmBinaryTask):
              help='Create an archive of this type from the bundle.')
     register('--archive-prefix', action='store_true', default=False,
              help='If --archive is specified, use the target basename as the path prefix.')
+    register('--archive-workers', type=int, default=1,
+             help='If --archive is specified, compress archive entries on this many threads.')
+    register('--symlink', action='store_true', default=False,
+             help='Symlink jars and bundle files into the bundle instead of materializing them. '
+                  'Symlinked bundles are cheaper to create but cannot be moved off this machine.')
 
   def __init__(self, *args, **kwargs):
     super(BundleCreate, self).__init__(*args, **kwargs)
     self._outdir = self.context.config.getdefault('pants_distdir')
     self._prefix = self.get_options().archive_prefix
     self._archiver_type = self.get_options().archive
+    self._archive_workers = self.get_options().archive_workers
     self._create_deployjar = self.get_options().deployjar
+    self._symlink = self.get_options().symlink
+    self._pants_workdir = os.path.realpath(self.context.options.for_global_scope().pants_workdir)
 
   class App(object):
     """A uniform interface to an app."""
@@ -51,7 +60,8 @@ class BundleCreate(JvmBinaryTask):
       self.basename = target.basename
 
   def execute(self):
-    archiver = archive.archiver(self._archiver_type) if self._archiver_type else None
+    archiver = (archive.archiver(self._archiver_type, workers=self._archive_workers)
+                if self._archiver_type else None)
     for target in self.context.target_roots:
       for app in map(self.App, filter(self.App.is_app, [target])):
         basedir = self.bundle(app)
@@ -64,6 +74,23 @@ class BundleCreate(JvmBinaryTask):
           )
           self.context.log.info('created %s' % os.path.relpath(archivepath, get_buildroot()))
 
+  def _add_file(self, src, dst):
+    if self._symlink:
+      try:
+        os.symlink(src, dst)
+      except OSError as e:
+        self.context.log.error("Unable to create symlink: {0} -> {1}".format(src, dst))
+        raise e
+    else:
+      # Only files pants owns are hardlinked: pants never rewrites those in place without unsharing
+      # them first.  Anything else, like ivy cache jars and source files, is cloned or copied so
+      # that writes into the bundle can't change it.
+      materialize_tree(src, dst, allow_hardlink=self._is_pants_owned(src))
+
+  def _is_pants_owned(self, path):
+    relpath = os.path.relpath(os.path.realpath(path), self._pants_workdir)
+    return relpath != os.pardir and not relpath.startswith(os.pardir + os.sep)
+
   def bundle(self, app):
     """Create a self-contained application bundle.
 
@@ -71,13 +98,6 @@ class BundleCreate(JvmBinaryTask):
     """
     assert(isinstance(app, BundleCreate.App))
 
-    def verbose_symlink(src, dst):
-      try:
-        os.symlink(src, dst)
-      except OSError as e:
-        self.context.log.error("Unable to create symlink: {0} -> {1}".format(src, dst))
-        raise e
-
     bundle_dir = os.path.join(self._outdir, '%s-bundle' % app.basename)
     self.context.log.info('creating %s' % os.path.relpath(bundle_dir, get_buildroot()))
 
@@ -98,7 +118,8 @@ class BundleCreate(JvmBinaryTask):
         if generated:
           for base_dir, internal_jars in generated.items():
             for internal_jar in internal_jars:
-              verbose_symlink(os.path.join(base_dir, internal_jar), os.path.join(lib_dir, internal_jar))
+              self._add_file(os.path.join(base_dir, internal_jar),
+                             os.path.join(lib_dir, internal_jar))
               classpath.add(internal_jar)
 
       app.binary.walk(add_jars, lambda t: t != app.binary)
@@ -106,7 +127,7 @@ class BundleCreate(JvmBinaryTask):
       # Add external dependencies to the bundle.
       for basedir, external_jar in self.list_external_jar_dependencies(app.binary):
         path = os.path.join(basedir, external_jar)
-        verbose_symlink(path, os.path.join(lib_dir, external_jar))
+        self._add_file(path, os.path.join(lib_dir, external_jar))
         classpath.add(external_jar)
 
     bundle_jar = os.path.join(bundle_dir, '%s.jar' % app.binary.basename)
@@ -121,6 +142,6 @@ class BundleCreate(JvmBinaryTask):
       for path, relpath in bundle.filemap.items():
         bundle_path = os.path.join(bundle_dir, relpath)
         safe_mkdir(os.path.dirname(bundle_path))
-        verbose_symlink(path, bundle_path)
+        self._add_file(path, bundle_path)
 
     return bundle_dir
@@ -6,19 +6,34 @@ from __future__ import (nested_scopes, generators, division, absolute_import, wi
                         print_function, unicode_literals)
 
 import os
+import tempfile
 
 from twitter.common.collections import OrderedSet
 
+from pants.backend.jvm.tasks.checkstyle_report import log_messages, parse_report
 from pants.backend.jvm.tasks.jvm_tool_task_mixin import JvmToolTaskMixin
 from pants.backend.jvm.tasks.nailgun_task import NailgunTask
+from pants.base.build_environment import get_buildroot
+from pants.base.build_invalidator import BuildInvalidator, CacheKey
 from pants.base.exceptions import TaskError
+from pants.base.hash_utils import hash_all, hash_file
 from pants.base.target import Target
+from pants.base.worker_pool import Work
+from pants.base.workunit import WorkUnit
+from pants.cache.artifact_cache import call_insert, call_use_cached_files
 from pants.option.options import Options
 from pants.process.xargs import Xargs
-from pants.util.dirutil import safe_open
+from pants.util.dirutil import safe_mkdir, safe_open
 
 
 class Checkstyle(NailgunTask, JvmToolTaskMixin):
+  """Checks java source files with checkstyle.
+
+  Sources that checkstyle finds nothing to report about are remembered per file, and are only
+  checked again once their contents, the checkstyle configuration, its properties (and any files
+  they name, like a suppressions file) or the checkstyle tool itself change.  Those results are
+  shared through the artifact cache when one is configured.
+  """
 
   _CHECKSTYLE_MAIN = 'com.puppycrawl.tools.checkstyle.Main'
 
@@ -38,8 +53,14 @@ class Checkstyle(NailgunTask, JvmToolTaskMixin):
     register('--confs', default=['default'],
              help='One or more ivy configurations to resolve for this target. This parameter is '
                   'not intended for general use. ')
+    register('--workers', type=int, default=1,
+             help='Check sources in up to this many concurrent checkstyle runs.')
     cls.register_jvm_tool(register, 'checkstyle')
 
+  def __init__(self, *args, **kwargs):
+    super(Checkstyle, self).__init__(*args, **kwargs)
+    self.setup_artifact_cache()
+
   @property
   def config_section(self):
     return self._CONFIG_SECTION
@@ -56,16 +77,35 @@ class Checkstyle(NailgunTask, JvmToolTaskMixin):
     if self.get_options().skip:
       return
     targets = self.context.targets(self._is_checked)
-    with self.invalidated(targets) as invalidation_check:
-      invalid_targets = []
-      for vt in invalidation_check.invalid_vts:
-        invalid_targets.extend(vt.targets)
-      sources = self.calculate_sources(invalid_targets)
-      if sources:
-        result = self.checkstyle(sources, invalid_targets)
-        if result != 0:
-          raise TaskError('java {main} ... exited non-zero ({result})'.format(
-            main=self._CHECKSTYLE_MAIN, result=result))
+    sources = sorted(self.calculate_sources(targets))
+    if not sources:
+      return
+
+    fingerprint = self._fingerprint()
+    cache_keys = dict((source, self._cache_key(source, fingerprint)) for source in sources)
+    invalidator = BuildInvalidator(os.path.join(self.workdir, 'checked'))
+    invalid_sources = [source for source in sources if invalidator.needs_update(cache_keys[source])]
+    if invalid_sources and self.artifact_cache_reads_enabled():
+      cached_sources = self._check_artifact_cache([cache_keys[source] for source in invalid_sources])
+      for source in invalid_sources:
+        if cache_keys[source] in cached_sources:
+          invalidator.update(cache_keys[source])
+      invalid_sources = [source for source in invalid_sources
+                         if cache_keys[source] not in cached_sources]
+    if not invalid_sources:
+      return
+
+    self.context.log.info('Checking {invalid} of {count} java sources.'.format(
+      invalid=len(invalid_sources), count=len(sources)))
+    result, clean_sources = self.checkstyle(invalid_sources, targets)
+    for source in clean_sources:
+      invalidator.update(cache_keys[source])
+    if clean_sources and self.artifact_cache_writes_enabled():
+      self._update_artifact_cache([cache_keys[source] for source in clean_sources])
+
+    if result != 0:
+      raise TaskError('java {main} ... exited non-zero ({result})'.format(
+        main=self._CHECKSTYLE_MAIN, result=result))
 
   def calculate_sources(self, targets):
     sources = set()
@@ -74,14 +114,60 @@ class Checkstyle(NailgunTask, JvmToolTaskMixin):
                      if source.endswith(self._JAVA_SOURCE_EXTENSION))
     return sources
 
+  def _fingerprint(self):
+    """Fingerprints everything besides a source itself that can change what is reported for it."""
+    with open(self.get_options().configuration, 'rb') as fp:
+      fingerprint = [fp.read()]
+    for key, value in sorted(self.get_options().properties.items()):
+      fingerprint.append('{key}={value}'.format(key=key, value=value))
+      # Properties commonly name files, like the suppressions file, whose contents matter too.
+      if os.path.isfile(value):
+        fingerprint.append(hash_file(value))
+    fingerprint.extend(hash_file(path) for path in self.tool_classpath('checkstyle'))
+    return hash_all(fingerprint)
+
+  def _cache_key(self, source, fingerprint):
+    # Sources are keyed by a digest of their path, since the invalidator's ids must be filenames.
+    return CacheKey(id=hash_all([source]),
+                    hash=hash_all([hash_file(os.path.join(get_buildroot(), source)), fingerprint]),
+                    num_chunking_units=1)
+
+  def _marker_file(self, cache_key):
+    return os.path.join(self.workdir, 'clean', cache_key.id)
+
+  def _check_artifact_cache(self, cache_keys):
+    """Returns the subset of cache_keys that the artifact cache has clean results for."""
+    cache = self.get_artifact_cache()
+    results = self.context.subproc_map(call_use_cached_files,
+                                       [(cache, cache_key) for cache_key in cache_keys])
+    return set(cache_key for cache_key, cached in zip(cache_keys, results) if cached)
+
+  def _update_artifact_cache(self, cache_keys):
+    """Records clean results for cache_keys in the artifact cache, in the background."""
+    args_tuples = []
+    for cache_key in cache_keys:
+      # The cached artifact is just a marker; its presence under the key is the result.
+      marker_file = self._marker_file(cache_key)
+      with safe_open(marker_file, 'w') as fp:
+        fp.write(cache_key.hash)
+      args_tuples.append((self.get_artifact_cache(), cache_key, [marker_file],
+                          self.get_options().overwrite_cache_artifacts))
+    work = Work(lambda x: self.context.subproc_map(call_insert, x), [(args_tuples,)], 'insert')
+    self.context.submit_background_work_chain([work], parent_workunit_name='cache')
+
   def checkstyle(self, sources, targets):
+    """Checks sources in concurrent shards of up to --workers checkstyle runs.
+
+    :returns: A pair of the first non-zero checkstyle exit code (or 0) and the list of sources
+      checkstyle reported nothing about.
+    """
     compile_classpath = self.context.products.get_data('compile_classpath')
     union_classpath = OrderedSet(self.tool_classpath('checkstyle'))
     union_classpath.update(jar for conf, jar in compile_classpath if conf in self.get_options().confs)
 
     args = [
       '-c', self.get_options().configuration,
-      '-f', 'plain'
+      '-f', 'xml'
     ]
 
     if self.get_options().properties:
@@ -91,11 +177,34 @@ class Checkstyle(NailgunTask, JvmToolTaskMixin):
           pf.write('{key}={value}\n'.format(key=k, value=v))
       args.extend(['-p', properties_file])
 
-    # We've hit known cases of checkstyle command lines being too long for the system so we guard
-    # with Xargs since checkstyle does not accept, for example, @argfile style arguments.
-    def call(xargs):
-      return self.runjava(classpath=union_classpath, main=self._CHECKSTYLE_MAIN,
-                          args=args + xargs, workunit_name='checkstyle')
-    checks = Xargs(call)
-
-    return checks.execute(sources)
+    results_dir = os.path.join(self.workdir, 'results')
+    safe_mkdir(results_dir, clean=True)
+    workers = max(1, self.get_options().workers)
+    runjava = self.concurrent_runjava(workers)
+    messages = []  # Appended to from concurrent shards; list.extend is atomic.
+    checked_sources = []
+
+    with self.context.new_workunit(name='checkstyle', labels=[WorkUnit.MULTITOOL]) as workunit:
+      # We've hit known cases of checkstyle command lines being too long for the system so we guard
+      # with Xargs since checkstyle does not accept, for example, @argfile style arguments.
+      def call(xargs):
+        self.context.run_tracker.register_thread(workunit)
+        fd, xml_report = tempfile.mkstemp(dir=results_dir, suffix='.xml')
+        os.close(fd)
+        result = runjava(classpath=union_classpath, main=self._CHECKSTYLE_MAIN,
+                         args=args + ['-o', xml_report] + xargs, workunit_name='checkstyle')
+        try:
+          messages.extend(parse_report(xml_report))
+          checked_sources.extend(xargs)
+        except TaskError as e:
+          # Without a report no source can be marked clean, but the exit code still counts.
+          self.context.log.warn(str(e))
+          if result == 0:
+            result = 1
+        return result
+      checks = Xargs(call, parallelism=workers, fail_fast=False)
+      result = checks.execute(sources)
+
+    log_messages(self.context.log, messages)
+    reported_sources = set(message.source for message in messages)
+    return result, [source for source in checked_sources if source not in reported_sources]
@@ -0,0 +1,59 @@
+# coding=utf-8
+# Copyright 2014 Pants project contributors (see CONTRIBUTORS.md).
+# Licensed under the Apache License, Version 2.0 (see LICENSE).
+
+from __future__ import (nested_scopes, generators, division, absolute_import, with_statement,
+                        print_function, unicode_literals)
+
+from collections import namedtuple
+import os
+from xml.dom import minidom
+from xml.parsers.expat import ExpatError
+
+from pants.base.build_environment import get_buildroot
+from pants.base.exceptions import TaskError
+
+
+# A single problem a style checker reported about a source file.
+Message = namedtuple('Message', ['source', 'line', 'severity', 'text'])
+
+
+def parse_report(xml_report):
+  """Returns the messages in a checkstyle format xml report, in the order they were reported.
+
+  Both checkstyle and scalastyle can write their results in this format.
+
+  :param string xml_report: The path of the report file.
+  :returns: A list of :class:`Message`, with sources relative to the build root.
+  :raises: :class:`TaskError` if the report is missing or malformed.
+  """
+  try:
+    document = minidom.parse(xml_report)
+  except (IOError, ExpatError) as e:
+    raise TaskError('Failed to read style report {file}: {error}'.format(file=xml_report, error=e))
+
+  messages = []
+  for file_element in document.getElementsByTagName('file'):
+    source = os.path.relpath(os.path.join(get_buildroot(), file_element.getAttribute('name')),
+                             get_buildroot())
+    for error_element in file_element.getElementsByTagName('error'):
+      line = error_element.getAttribute('line')
+      messages.append(Message(source=source,
+                              line=int(line) if line else 0,
+                              severity=error_element.getAttribute('severity'),
+                              text=error_element.getAttribute('message')))
+  return messages
+
+
+def log_messages(log, messages):
+  """Logs messages sorted by source and line, so runs in any order log them the same way.
+
+  :param log: The logger to log to.
+  :param messages: An iterable of :class:`Message`.
+  """
+  for message in sorted(messages):
+    text = '{source}:{line}: {severity}: {text}'.format(**message._asdict())
+    if message.severity == 'error':
+      log.error(text)
+    else:
+      log.warn(text)
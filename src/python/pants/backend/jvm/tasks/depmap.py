@@ -5,8 +5,10 @@
 from __future__ import (nested_scopes, generators, division, absolute_import, with_statement,
                         print_function, unicode_literals)
 from collections import defaultdict
+import hashlib
 import json
 import os
+import uuid
 
 from twitter.common.collections import OrderedSet
 
@@ -18,6 +20,161 @@ from pants.backend.jvm.targets.jar_dependency import JarDependency
 from pants.backend.jvm.targets.scala_library import ScalaLibrary
 from pants.base.build_environment import get_buildroot
 from pants.base.exceptions import TaskError
+from pants.base.fingerprint_strategy import FingerprintStrategy
+from pants.util.dirutil import safe_delete, safe_mkdir
+
+
+def _sha1(values):
+  return hashlib.sha1('\0'.join(unicode(value) for value in values).encode('utf-8')).hexdigest()
+
+
+class ProjectInfoFingerprintStrategy(FingerprintStrategy):
+  """A FingerprintStrategy that fingerprints just the parts of a target its project info shows.
+
+  The project info of a target shows its dependencies but none of theirs, other than the jars of
+  jar libraries, so this fingerprint covers exactly that much of them.  Only the paths of sources
+  are fingerprinted, not their contents, so fingerprinting a large graph reads no source files.
+  """
+
+  def compute_fingerprint(self, target):
+    values = [type(target).__name__, target.address.spec, target.is_test, target.is_codegen]
+    if target.has_sources():
+      values.append(target.target_base)
+      values.extend(target.sources_relative_to_buildroot())
+    if target.is_jar_library:
+      values.extend(Depmap._jar_id(jar) for jar in target.jar_dependencies)
+    # The order of dependencies is the order they are listed in.
+    for dep in target.dependencies:
+      values.append(dep.address.spec)
+      if dep.is_jar_library:
+        values.extend(Depmap._jar_id(jar) for jar in dep.jar_dependencies)
+    if isinstance(target, ScalaLibrary):
+      values.extend(dep.address.spec for dep in target.java_sources)
+    return _sha1(values)
+
+  def __hash__(self):
+    return hash(type(self))
+
+  def __eq__(self, other):
+    return type(self) == type(other)
+
+
+class ProjectInfoCache(object):
+  """Caches the encoded project info of targets between runs.
+
+  The info is stored in a single data file with an index of where each target's info lies in it,
+  so caching the info of a large graph creates a couple of files rather than one per target.  Each
+  run writes a new data file holding just the info it used and then swaps in an index pointing at
+  it, so the cache never outgrows the last run and a run that fails part way leaves the previous
+  cache intact.
+  """
+
+  _INDEX = 'index.json'
+
+  def __init__(self, cache_dir):
+    """
+    :param string cache_dir: The directory to cache project info under.
+    """
+    self._cache_dir = cache_dir
+    self._index = {}
+    self._data = None
+    self._new_index = {}
+    self._new_data_name = None
+    self._new_data = None
+
+  def open(self):
+    safe_mkdir(self._cache_dir)
+    try:
+      with open(os.path.join(self._cache_dir, self._INDEX)) as fp:
+        index = json.load(fp)
+      self._data = open(os.path.join(self._cache_dir, index['data']), 'rb')
+      self._index = index['targets']
+    except (IOError, KeyError, ValueError):
+      self._index = {}
+    self._new_data_name = '{0}.data'.format(uuid.uuid4().hex)
+    self._new_data = open(os.path.join(self._cache_dir, self._new_data_name), 'wb')
+
+  def get(self, target_id, key):
+    """Returns the info cached for the given target under key, or None if there is none."""
+    entry = self._index.get(target_id)
+    if not entry or entry[0] != key:
+      return None
+    _, offset, length = entry
+    self._data.seek(offset)
+    encoded_info = self._data.read(length)
+    self._append(target_id, key, encoded_info)
+    return encoded_info.decode('utf-8')
+
+  def put(self, target_id, key, encoded_info):
+    """Caches the given info for the target under key."""
+    self._append(target_id, key, encoded_info.encode('utf-8'))
+
+  def _append(self, target_id, key, encoded_info):
+    self._new_index[target_id] = (key, self._new_data.tell(), len(encoded_info))
+    self._new_data.write(encoded_info)
+
+  def commit(self):
+    """Replaces the info cached by the previous run with the info used by this one."""
+    self._new_data.close()
+    index_path = os.path.join(self._cache_dir, self._INDEX)
+    tmp_index_path = '{0}.{1}'.format(index_path, self._new_data_name)
+    with open(tmp_index_path, 'w') as fp:
+      fp.write(json.dumps(dict(data=self._new_data_name, targets=self._new_index)))
+    os.rename(tmp_index_path, index_path)
+    if self._data:
+      self._data.close()
+      safe_delete(self._data.name)
+
+  def abort(self):
+    """Discards the info used by this run, leaving the previous run's cache in place."""
+    self._new_data.close()
+    safe_delete(os.path.join(self._cache_dir, self._new_data_name))
+    if self._data:
+      self._data.close()
+
+
+def _encode_json(value, formatted, depth):
+  """Encodes value as json.dumps would when encoding it nested depth objects deep."""
+  if formatted:
+    return json.dumps(value, indent=4, separators=(',', ': ')).replace('\n', '\n' + '    ' * depth)
+  else:
+    return json.dumps(value)
+
+
+def _json_object_chunks(members, formatted, depth=0):
+  """Yields the text of a JSON object as json.dumps would encode it, one member at a time.
+
+  :param members: An iterable of (key, chunks) pairs, where chunks is an iterable of the text of
+    the member's value, encoded depth + 1 objects deep.
+  :param bool formatted: ``True`` to encode as json.dumps does with an indent of 4.
+  :param int depth: How many objects deep this object is.
+  """
+  if formatted:
+    member_indent = '\n' + '    ' * (depth + 1)
+    first, separator, close = member_indent, ',' + member_indent, '\n' + '    ' * depth + '}'
+  else:
+    first, separator, close = '', ', ', '}'
+
+  yield '{'
+  empty = True
+  for key, chunks in members:
+    yield (first if empty else separator) + json.dumps(key) + ': '
+    for chunk in chunks:
+      yield chunk
+    empty = False
+  yield '}' if empty else close
+
+
+def _lines(chunks):
+  """Regroups the given chunks of text into lines."""
+  pending = ''
+  for chunk in chunks:
+    lines = (pending + chunk).split('\n')
+    pending = lines.pop()
+    for line in lines:
+      yield line
+  if pending:
+    yield pending
 
 
 # Changing the behavior of this task may affect the IntelliJ Pants plugin
@@ -137,20 +294,21 @@ class Depmap(ConsoleTask):
     def output_dep(dep, indent):
       return "%s%s" % (indent * "  ", dep)
 
-    def output_deps(dep, indent=0, outputted=set()):
+    def output_deps(dep, indent, outputted):
       dep_id, _ = self._dep_id(dep)
       if dep_id in outputted:
-        return [output_dep("*%s" % dep_id, indent)] if not self.is_minimal else []
+        if not self.is_minimal:
+          yield output_dep("*%s" % dep_id, indent)
       else:
-        output = []
         if not self.is_external_only:
-          output += [output_dep(dep_id, indent)]
+          yield output_dep(dep_id, indent)
           outputted.add(dep_id)
           indent += 1
 
         if self._is_jvm(dep) or isinstance(dep, Dependencies):
           for internal_dep in dep.dependencies:
-            output += output_deps(internal_dep, indent, outputted)
+            for line in output_deps(internal_dep, indent, outputted):
+              yield line
 
         if not self.is_internal_only:
           if self._is_jvm(dep):
@@ -159,10 +317,9 @@ class Depmap(ConsoleTask):
               if not internal:
                 if jar_dep_id not in outputted or (not self.is_minimal
                                                    and not self.is_external_only):
-                  output += [output_dep(jar_dep_id, indent)]
+                  yield output_dep(jar_dep_id, indent)
                   outputted.add(jar_dep_id)
-        return output
-    return output_deps(target)
+    return output_deps(target, 0, set())
 
   def _output_digraph(self, target):
     color_by_type = {}
@@ -218,8 +375,11 @@ class Depmap(ConsoleTask):
     return header + graph_attr + output_deps(set(), target) + ['}']
 
   def project_info_output(self, targets):
-    targets_map = {}
-    resource_target_map = {}
+    """Returns the lines of the project info for the given targets as JSON, a target at a time.
+
+    The info for each target is cached under the fingerprint of everything it shows, so only the
+    info for targets that changed since the last run is computed again.
+    """
     ivy_jar_products = self.context.products.get_data('ivy_jar_products') or {}
     # This product is a list for historical reasons (exclusives groups) but in practice should
     # have either 0 or 1 entries.
@@ -233,39 +393,51 @@ class Depmap(ConsoleTask):
     else:
       ivy_info = None
 
+    project_targets = OrderedSet()
+    for target in targets:
+      project_targets.add(target)
+      if isinstance(target, ScalaLibrary):
+        project_targets.update(target.java_sources)
+
+    resource_target_map = {}
+    for target in project_targets:
+      for dep in target.dependencies:
+        if isinstance(dep, Resources):
+          resource_target_map[dep] = target
+
+    def get_target_type(target):
+      if target.is_test:
+        return Depmap.SourceRootTypes.TEST
+      else:
+        if (isinstance(target, Resources) and
+            target in resource_target_map and
+            resource_target_map[target].is_test):
+          return Depmap.SourceRootTypes.TEST_RESOURCE
+        elif isinstance(target, Resources):
+          return Depmap.SourceRootTypes.RESOURCE
+        else:
+          return Depmap.SourceRootTypes.SOURCE
+
     ivy_jar_memo = {}
-    def process_target(current_target):
+    def get_transitive_jars(jar_lib):
+      if not ivy_info:
+        return OrderedSet()
+      transitive_jars = OrderedSet()
+      for jar in jar_lib.jar_dependencies:
+        transitive_jars.update(ivy_info.get_jars_for_ivy_module(jar, memo=ivy_jar_memo))
+      return transitive_jars
+
+    def target_info(current_target, target_type, pants_target_type):
       """
       :type current_target:pants.base.target.Target
       """
-      def get_target_type(target):
-        if target.is_test:
-          return Depmap.SourceRootTypes.TEST
-        else:
-          if (isinstance(target, Resources) and
-              target in resource_target_map and
-              resource_target_map[target].is_test):
-            return Depmap.SourceRootTypes.TEST_RESOURCE
-          elif isinstance(target, Resources):
-            return Depmap.SourceRootTypes.RESOURCE
-          else:
-            return Depmap.SourceRootTypes.SOURCE
-
-      def get_transitive_jars(jar_lib):
-        if not ivy_info:
-          return OrderedSet()
-        transitive_jars = OrderedSet()
-        for jar in jar_lib.jar_dependencies:
-          transitive_jars.update(ivy_info.get_jars_for_ivy_module(jar, memo=ivy_jar_memo))
-        return transitive_jars
-
       info = {
         'targets': [],
         'libraries': [],
         'roots': [],
-        'target_type': get_target_type(current_target),
+        'target_type': target_type,
         'is_code_gen': current_target.is_codegen,
-        'pants_target_type': self._get_pants_target_alias(type(current_target))
+        'pants_target_type': pants_target_type
       }
 
       target_libraries = set()
@@ -278,13 +450,10 @@ class Depmap(ConsoleTask):
             target_libraries.add(jar)
           # Add all the jars pulled in by this jar_library
           target_libraries.update(get_transitive_jars(dep))
-        if isinstance(dep, Resources):
-          resource_target_map[dep] = current_target
 
       if isinstance(current_target, ScalaLibrary):
         for dep in current_target.java_sources:
           info['targets'].append(self._address(dep.address))
-          process_target(dep)
 
       info['roots'] = map(lambda (source_root, package_prefix): {
         'source_root': source_root,
@@ -292,19 +461,57 @@ class Depmap(ConsoleTask):
       }, self._source_roots_for_target(current_target))
 
       info['libraries'] = [self._jar_id(lib) for lib in target_libraries]
-      targets_map[self._address(current_target.address)] = info
+      return info
+
+    fingerprint_strategy = ProjectInfoFingerprintStrategy()
+    # Everything outside of the targets themselves that their info depends upon.
+    run_data = [get_buildroot(), self.format, self._ivy_info_fingerprint(ivy_info)]
+    cache = ProjectInfoCache(os.path.join(self.workdir, 'project_info'))
+
+    def target_members():
+      cache.open()
+      try:
+        for target in project_targets:
+          target_type = get_target_type(target)
+          pants_target_type = self._get_pants_target_alias(type(target))
+          key = _sha1([target.invalidation_hash(fingerprint_strategy),
+                       target_type,
+                       pants_target_type] + run_data)
+          encoded_info = cache.get(target.id, key)
+          if encoded_info is None:
+            info = target_info(target, target_type, pants_target_type)
+            encoded_info = _encode_json(info, self.format, depth=2)
+            cache.put(target.id, key, encoded_info)
+          yield self._address(target.address), (encoded_info,)
+      except:
+        cache.abort()
+        raise
+      else:
+        cache.commit()
 
-    for target in targets:
-      process_target(target)
+    def library_members():
+      for jar_id, paths in self._resolve_jars_info().items():
+        yield jar_id, (_encode_json(paths, self.format, depth=2),)
 
-    graph_info = {
-      'targets': targets_map,
-      'libraries': self._resolve_jars_info()
-    }
+    chunks = _json_object_chunks([('targets', _json_object_chunks(target_members(),
+                                                                  self.format, depth=1)),
+                                  ('libraries', _json_object_chunks(library_members(),
+                                                                    self.format, depth=1))],
+                                 self.format)
     if self.format:
-      return json.dumps(graph_info, indent=4, separators=(',', ': ')).splitlines()
+      return _lines(chunks)
     else:
-      return [json.dumps(graph_info)]
+      # Unformatted project info must come out as a single line.
+      return [''.join(chunks)]
+
+  @staticmethod
+  def _ivy_info_fingerprint(ivy_info):
+    if not ivy_info:
+      return None
+    return _sha1('%s<-%s' % (Depmap._jar_id(ref),
+                             ','.join(sorted(Depmap._jar_id(caller)
+                                             for caller in ivy_info.modules_by_ref[ref].callers)))
+                 for ref in sorted(ivy_info.modules_by_ref))
 
   def _resolve_jars_info(self):
     mapping = defaultdict(list)
@@ -332,7 +539,16 @@ class Depmap(ConsoleTask):
     """
     :type target:pants.base.target.Target
     """
-    def root_package_prefix(source_file):
-      source = os.path.dirname(source_file)
-      return os.path.join(get_buildroot(), target.target_base, source), source.replace(os.sep, '.')
-    return set(map(root_package_prefix, target.sources_relative_to_source_root()))
+    if not target.has_sources():
+      return set()
+    # All the sources in a directory share a package, so each directory is only resolved once.
+    target_base = target.target_base
+    source_root = os.path.join(get_buildroot(), target_base)
+    source_dirs = set(os.path.dirname(source) for source in target.sources_relative_to_buildroot())
+
+    def root_package_prefix(source_dir):
+      source = os.path.relpath(source_dir, target_base)
+      if source == os.curdir:
+        source = ''
+      return os.path.join(source_root, source), source.replace(os.sep, '.')
+    return set(map(root_package_prefix, source_dirs))
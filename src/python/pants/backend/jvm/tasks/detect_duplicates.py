@@ -5,9 +5,13 @@
 from __future__ import (nested_scopes, generators, division, absolute_import, with_statement,
                         print_function, unicode_literals)
 
-from collections import defaultdict
+from collections import defaultdict, namedtuple
 from contextlib import closing
+import hashlib
+import json
 import os
+from multiprocessing.pool import ThreadPool
+import uuid
 from zipfile import ZipFile
 
 from pex.compatibility import to_bytes
@@ -15,15 +19,102 @@ from pex.compatibility import to_bytes
 from pants.backend.jvm.tasks.jvm_binary_task import JvmBinaryTask
 from pants.base.exceptions import TaskError
 from pants.java.jar.manifest import Manifest
+from pants.util.dirutil import safe_mkdir
 
 
 EXCLUDED_FILES = ['dependencies,license,notice,.DS_Store,notice.txt,cmdline.arg.info.txt.1,'
                   'license.txt']
 
 
+class JarEntryIndex(object):
+  """Lists the files in jars, remembering the listings between runs.
+
+  Each jar's listing is stored in a file of its own under the index dir, along with the size and
+  mtime of the jar it was taken from.  A jar is only opened again once either of those change.
+  """
+
+  def __init__(self, index_dir=None):
+    """
+    :param string index_dir: The directory to store listings under; if None listings are only
+      remembered for the life of this index.
+    """
+    self._index_dir = index_dir
+    self._entries_by_jar = {}
+
+  def populate(self, jar_paths, workers=1):
+    """Lists all the given jars that have not been listed yet, up to workers at a time."""
+    unlisted = [path for path in set(jar_paths) if path not in self._entries_by_jar]
+    workers = min(workers, len(unlisted))
+    if workers <= 1:
+      for path in unlisted:
+        self.entries(path)
+    else:
+      pool = ThreadPool(processes=workers)
+      try:
+        # We need to specify a timeout explicitly, because otherwise python ignores SIGINT when
+        # waiting on a condition variable, so we won't be able to ctrl-c out.
+        pool.map_async(self.entries, unlisted, chunksize=1).get(timeout=1000000000)
+      finally:
+        pool.close()
+        pool.join()
+
+  def entries(self, jar_path):
+    """Returns the names of the files in the given jar, leaving out directories and the manifest.
+
+    :param string jar_path: The path of the jar to list.
+    :returns: A frozenset of unicode entry names.
+    """
+    entries = self._entries_by_jar.get(jar_path)
+    if entries is None:
+      entries = self._load(jar_path)
+      self._entries_by_jar[jar_path] = entries
+    return entries
+
+  def _load(self, jar_path):
+    stat = os.stat(jar_path)
+    stamp = [stat.st_size, int(stat.st_mtime)]
+    if self._index_dir:
+      listing_path = os.path.join(self._index_dir,
+                                  hashlib.sha1(to_bytes(jar_path)).hexdigest() + '.json')
+      try:
+        with open(listing_path) as fp:
+          listing = json.load(fp)
+        if listing['path'] == jar_path and listing['stamp'] == stamp:
+          return frozenset(listing['entries'])
+      except (IOError, KeyError, TypeError, ValueError):
+        pass
+
+    entries = frozenset(self._list(jar_path))
+    if self._index_dir:
+      # Several runs may list the same jar at once, so each writes a file of its own and renames
+      # it into place.
+      safe_mkdir(self._index_dir)
+      tmp_listing_path = '{0}.{1}'.format(listing_path, uuid.uuid4().hex)
+      with open(tmp_listing_path, 'w') as fp:
+        json.dump(dict(path=jar_path, stamp=stamp, entries=sorted(entries)), fp)
+      os.rename(tmp_listing_path, listing_path)
+    return entries
+
+  @staticmethod
+  def _list(jar_path):
+    with closing(ZipFile(jar_path)) as jar:
+      for qualified_file_name in jar.namelist():
+        # Zip entry names can come in any encoding and in practice we find some jars that have
+        # utf-8 encoded entry names, some not.  As a result we cannot simply decode in all cases
+        # and need to do this to_bytes(...).decode('utf-8') dance to stay safe across all entry
+        # name flavors and under all supported pythons.
+        decoded_file_name = to_bytes(qualified_file_name).decode('utf-8')
+        if not DuplicateDetector._isdir(decoded_file_name) and Manifest.PATH != decoded_file_name:
+          yield decoded_file_name
+
+
 class DuplicateDetector(JvmBinaryTask):
   """ Detect classes and resources with the same qualified name on the classpath. """
 
+  # The jars each file on an external classpath comes from, and the files found in several of them.
+  ExternalArtifacts = namedtuple('ExternalArtifacts', ['artifacts_by_file_name',
+                                                       'conflicts_by_artifacts'])
+
   @staticmethod
   def _isdir(name):
     return name[-1] == '/'
@@ -39,6 +130,8 @@ class DuplicateDetector(JvmBinaryTask):
                   'instances of this flag.')
     register('--max-dups', type=int, default=10,
              help='Maximum number of duplicate classes to display per artifact.')
+    register('--workers', type=int, default=4,
+             help='List up to this many external jars at once.')
 
   def __init__(self, *args, **kwargs):
     super(DuplicateDetector, self).__init__(*args, **kwargs)
@@ -46,33 +139,62 @@ class DuplicateDetector(JvmBinaryTask):
     excludes = self.get_options().excludes
     self._excludes = set([x.lower() for exclude in excludes for x in exclude.split(',')])
     self._max_dups = int(self.get_options().max_dups)
+    self._workers = max(1, self.get_options().workers)
+    self._jar_entry_index = JarEntryIndex(os.path.join(self.workdir, 'jar_entries')
+                                          if self.workdir else None)
+    self._external_artifacts_by_classpath = {}
 
   def prepare(self, round_manager):
     round_manager.require_data('resources_by_target')
     round_manager.require_data('classes_by_target')
 
   def execute(self):
-    for binary_target in filter(self.is_binary, self.context.targets()):
+    binary_targets = filter(self.is_binary, self.context.targets())
+
+    # Binaries mostly share their external jars, so each jar is listed just once, up front.
+    self._jar_entry_index.populate([os.path.join(basedir, externaljar)
+                                    for binary_target in binary_targets
+                                    for basedir, externaljar
+                                    in self.list_external_jar_dependencies(binary_target)],
+                                   workers=self._workers)
+
+    for binary_target in binary_targets:
       self.detect_duplicates_for_target(binary_target)
 
   def detect_duplicates_for_target(self, binary_target):
-    artifacts_by_file_name = defaultdict(set)
-
     # Extract external dependencies on libraries (jars)
     external_deps = self._get_external_dependencies(binary_target)
-    for (file_name, targets) in external_deps.items():
-      artifacts_by_file_name[file_name].update(targets)
 
     # Extract internal dependencies on classes and resources
     internal_deps = self._get_internal_dependencies(binary_target)
-    for (file_name, targets) in internal_deps.items():
-      artifacts_by_file_name[file_name].update(targets)
 
-    self._is_conflicts(artifacts_by_file_name, binary_target)
+    conflicts_by_artifacts = self._merge_conflicts(external_deps, internal_deps)
+    self._report_conflicts(conflicts_by_artifacts, binary_target)
+
+  @staticmethod
+  def _merge_conflicts(external_artifacts, internal_artifacts_by_file_name):
+    """Adds the conflicts between a binary's own files and its jars to the conflicts among its jars.
+
+    The conflicts among the jars are shared by every binary with the same external classpath, so
+    only the files the binary has in common with its jars need to be looked at per binary.
+    """
+    conflicts_by_artifacts = defaultdict(set)
+    for artifacts, file_names in external_artifacts.conflicts_by_artifacts.items():
+      conflicts_by_artifacts[artifacts].update(file_names)
+    for (file_name, targets) in internal_artifacts_by_file_name.items():
+      jars = external_artifacts.artifacts_by_file_name.get(file_name)
+      if jars:
+        if len(jars) > 1:
+          conflicts_by_artifacts[tuple(sorted(jars))].discard(file_name)
+        conflicts_by_artifacts[tuple(sorted(jars | targets))].add(file_name)
+    return dict((artifacts, file_names)
+                for artifacts, file_names in conflicts_by_artifacts.items() if file_names)
 
   def _is_conflicts(self, artifacts_by_file_name, binary_target):
     conflicts_by_artifacts = self._get_conflicts_by_artifacts(artifacts_by_file_name)
+    return self._report_conflicts(conflicts_by_artifacts, binary_target)
 
+  def _report_conflicts(self, conflicts_by_artifacts, binary_target):
     if len(conflicts_by_artifacts) > 0:
       self._log_conflicts(conflicts_by_artifacts, binary_target)
       if self._fail_fast:
@@ -100,25 +222,26 @@ class DuplicateDetector(JvmBinaryTask):
     return artifacts_by_file_name
 
   def _get_external_dependencies(self, binary_target):
-    artifacts_by_file_name = defaultdict(set)
-    for basedir, externaljar in  self.list_external_jar_dependencies(binary_target):
-      external_dep = os.path.join(basedir, externaljar)
-      self.context.log.debug('  scanning %s' % external_dep)
-      with closing(ZipFile(external_dep)) as dep_zip:
-        for qualified_file_name in dep_zip.namelist():
-          # Zip entry names can come in any encoding and in practice we find some jars that have
-          # utf-8 encoded entry names, some not.  As a result we cannot simply decode in all cases
-          # and need to do this to_bytes(...).decode('utf-8') dance to stay safe across all entry
-          # name flavors and under all supported pythons.
-          decoded_file_name = to_bytes(qualified_file_name).decode('utf-8')
-          if os.path.basename(decoded_file_name).lower() in self._excludes:
-            continue
-          jar_name = os.path.basename(external_dep)
-          if (not self._isdir(decoded_file_name)) and Manifest.PATH != decoded_file_name:
+    external_deps = [os.path.join(basedir, externaljar)
+                     for basedir, externaljar in self.list_external_jar_dependencies(binary_target)]
+    classpath = frozenset(external_deps)
+    external_artifacts = self._external_artifacts_by_classpath.get(classpath)
+    if external_artifacts is None:
+      artifacts_by_file_name = defaultdict(set)
+      for external_dep in external_deps:
+        self.context.log.debug('  scanning %s' % external_dep)
+        jar_name = os.path.basename(external_dep)
+        for decoded_file_name in self._jar_entry_index.entries(external_dep):
+          if os.path.basename(decoded_file_name).lower() not in self._excludes:
             artifacts_by_file_name[decoded_file_name].add(jar_name)
-    return artifacts_by_file_name
+      external_artifacts = self.ExternalArtifacts(
+          artifacts_by_file_name=artifacts_by_file_name,
+          conflicts_by_artifacts=self._get_conflicts_by_artifacts(artifacts_by_file_name))
+      self._external_artifacts_by_classpath[classpath] = external_artifacts
+    return external_artifacts
 
-  def _get_conflicts_by_artifacts(self, artifacts_by_file_name):
+  @staticmethod
+  def _get_conflicts_by_artifacts(artifacts_by_file_name):
     conflicts_by_artifacts = defaultdict(set)
     for (file_name, artifacts) in artifacts_by_file_name.items():
       if (not artifacts) or len(artifacts) < 2: continue
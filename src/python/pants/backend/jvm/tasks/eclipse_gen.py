@@ -10,11 +10,15 @@ import pkgutil
 from collections import defaultdict
 
 from twitter.common.collections import OrderedSet
+from twitter.common.lang import Compatibility
 
 from pants.base.build_environment import get_buildroot
 from pants.base.generator import Generator, TemplateData
 from pants.backend.jvm.tasks.ide_gen import IdeGen
-from pants.util.dirutil import safe_delete, safe_mkdir, safe_open
+from pants.util.dirutil import safe_delete, safe_mkdir
+
+
+StringIO = Compatibility.StringIO
 
 
 _TEMPLATE_BASEDIR = os.path.join('templates', 'eclipse')
@@ -140,8 +144,9 @@ class EclipseGen(IdeGen):
     )
 
     def apply_template(output_path, template_relpath, **template_data):
-      with safe_open(output_path, 'w') as output:
-        Generator(pkgutil.get_data(__name__, template_relpath), **template_data).write(output)
+      output = StringIO()
+      Generator(pkgutil.get_data(__name__, template_relpath), **template_data).write(output)
+      self.update_file(output_path, output.getvalue())
 
     apply_template(self.project_filename, self.project_template, project=configured_project)
     apply_template(self.classpath_filename, self.classpath_template, classpath=configured_classpath)
@@ -151,8 +156,8 @@ class EclipseGen(IdeGen):
     apply_template(self.coreprefs_filename, self.coreprefs_template, project=configured_project)
 
     for resource in _SETTINGS:
-      with safe_open(os.path.join(self.cwd, '.settings', resource), 'w') as prefs:
-        prefs.write(pkgutil.get_data(__name__, os.path.join(_TEMPLATE_BASEDIR, resource)))
+      self.update_file(os.path.join(self.cwd, '.settings', resource),
+                       pkgutil.get_data(__name__, os.path.join(_TEMPLATE_BASEDIR, resource)))
 
     factorypath = TemplateData(
       project_name=self.project_name,
@@ -8,7 +8,6 @@ from __future__ import (nested_scopes, generators, division, absolute_import, wi
 from collections import defaultdict
 import logging
 import os
-import shutil
 
 from twitter.common.collections.orderedset import OrderedSet
 
@@ -19,8 +18,10 @@ from pants.backend.jvm.tasks.jvm_binary_task import JvmBinaryTask
 from pants.backend.jvm.tasks.jvm_tool_task_mixin import JvmToolTaskMixin
 from pants.base.build_environment import get_buildroot
 from pants.base.exceptions import TaskError
+from pants.base.hash_utils import hash_file
 from pants.base.source_root import SourceRoot
-from pants.util.dirutil import safe_mkdir, safe_walk
+from pants.fs.materialize import materialize
+from pants.util.dirutil import safe_delete, safe_mkdir, safe_open, safe_walk
 
 logger = logging.getLogger(__name__)
 
@@ -216,12 +217,57 @@ class IdeGen(JvmBinaryTask, JvmToolTaskMixin):
       str(t) for t in self.context.targets())
     )
 
+  @staticmethod
+  def link_jars(jar_dir, jars, allow_hardlink=False):
+    """Makes jar_dir hold exactly the given jars.
+
+    Jars are materialized as cheaply as the filesystem allows instead of being copied, and jars
+    already materialized with the same contents by a previous run are left alone, so regenerating
+    a project only pays for the jars that changed.
+
+    :param string jar_dir: The directory to hold the jars.
+    :param dict jars: Maps the name of each jar in jar_dir to the path of the jar to materialize.
+    :param bool allow_hardlink: ``True`` if the jars are never modified in place and so may be
+      hardlinked.
+    """
+    safe_mkdir(jar_dir)
+    for name in os.listdir(jar_dir):
+      if name not in jars:
+        safe_delete(os.path.join(jar_dir, name))
+
+    for name, jar in jars.items():
+      linked_jar = os.path.join(jar_dir, name)
+      if os.path.isfile(linked_jar):
+        jar_stat, linked_stat = os.stat(jar), os.stat(linked_jar)
+        if ((jar_stat.st_dev, jar_stat.st_ino) == (linked_stat.st_dev, linked_stat.st_ino) or
+            # Internal jars are rebuilt in place, possibly to the same size within the same
+            # second, so only their contents tell whether a reflink or copy is stale.
+            (jar_stat.st_size == linked_stat.st_size and
+             hash_file(jar) == hash_file(linked_jar))):
+          continue
+      materialize(jar, linked_jar, allow_hardlink=allow_hardlink)
+
+  @staticmethod
+  def update_file(path, contents):
+    """Writes contents to the file at path unless it already holds exactly those contents.
+
+    Leaving unchanged project files alone keeps IDEs from needlessly reloading the project.
+
+    :returns: ``True`` if the file was written.
+    """
+    if os.path.isfile(path):
+      with open(path, 'rb') as fp:
+        if fp.read() == contents:
+          return False
+    with safe_open(path, 'wb') as fp:
+      fp.write(contents)
+    return True
+
   def map_internal_jars(self, targets):
     internal_jar_dir = os.path.join(self.gen_project_workdir, 'internal-libs')
-    safe_mkdir(internal_jar_dir, clean=True)
-
     internal_source_jar_dir = os.path.join(self.gen_project_workdir, 'internal-libsources')
-    safe_mkdir(internal_source_jar_dir, clean=True)
+    linked_jars = {}
+    linked_source_jars = {}
 
     internal_jars = self.context.products.get('jars')
     internal_source_jars = self.context.products.get('source_jars')
@@ -234,7 +280,7 @@ class IdeGen(JvmBinaryTask, JvmToolTaskMixin):
 
           jar = jars[0]
           cp_jar = os.path.join(internal_jar_dir, jar)
-          shutil.copy(os.path.join(base, jar), cp_jar)
+          linked_jars[jar] = os.path.join(base, jar)
 
           cp_source_jar = None
           mappings = internal_source_jars.get(target)
@@ -246,10 +292,14 @@ class IdeGen(JvmBinaryTask, JvmToolTaskMixin):
                 )
               jar = jars[0]
               cp_source_jar = os.path.join(internal_source_jar_dir, jar)
-              shutil.copy(os.path.join(base, jar), cp_source_jar)
+              linked_source_jars[jar] = os.path.join(base, jar)
 
           self._project.internal_jars.add(ClasspathEntry(cp_jar, source_jar=cp_source_jar))
 
+    # Internal jars may be updated in place by later builds, so they must not be hardlinked.
+    self.link_jars(internal_jar_dir, linked_jars)
+    self.link_jars(internal_source_jar_dir, linked_source_jars)
+
   def _get_jar_paths(self, jars=None, confs=None):
     """Returns a list of dicts containing the paths of various jar file resources.
 
@@ -273,37 +323,40 @@ class IdeGen(JvmBinaryTask, JvmToolTaskMixin):
 
   def map_external_jars(self):
     external_jar_dir = os.path.join(self.gen_project_workdir, 'external-libs')
-    safe_mkdir(external_jar_dir, clean=True)
-
     external_source_jar_dir = os.path.join(self.gen_project_workdir, 'external-libsources')
-    safe_mkdir(external_source_jar_dir, clean=True)
-
     external_javadoc_jar_dir = os.path.join(self.gen_project_workdir, 'external-libjavadoc')
-    safe_mkdir(external_javadoc_jar_dir, clean=True)
+    linked_jars = {}
+    linked_source_jars = {}
+    linked_javadoc_jars = {}
 
     confs = ['default', 'sources', 'javadoc']
     for entry in self._get_jar_paths(confs=confs):
       jar = entry.get('default')
       if jar:
         cp_jar = os.path.join(external_jar_dir, os.path.basename(jar))
-        shutil.copy(jar, cp_jar)
+        linked_jars[os.path.basename(jar)] = jar
 
         cp_source_jar = None
         source_jar = entry.get('sources')
         if source_jar:
           cp_source_jar = os.path.join(external_source_jar_dir, os.path.basename(source_jar))
-          shutil.copy(source_jar, cp_source_jar)
+          linked_source_jars[os.path.basename(source_jar)] = source_jar
 
         cp_javadoc_jar = None
         javadoc_jar = entry.get('javadoc')
         if javadoc_jar:
           cp_javadoc_jar = os.path.join(external_javadoc_jar_dir, os.path.basename(javadoc_jar))
-          shutil.copy(javadoc_jar, cp_javadoc_jar)
+          linked_javadoc_jars[os.path.basename(javadoc_jar)] = javadoc_jar
 
         self._project.external_jars.add(ClasspathEntry(cp_jar,
                                                        source_jar=cp_source_jar,
                                                        javadoc_jar=cp_javadoc_jar))
 
+    # External jars come from the ivy cache, which never modifies its jars in place.
+    self.link_jars(external_jar_dir, linked_jars, allow_hardlink=True)
+    self.link_jars(external_source_jar_dir, linked_source_jars, allow_hardlink=True)
+    self.link_jars(external_javadoc_jar_dir, linked_javadoc_jars, allow_hardlink=True)
+
   def execute(self):
     """Stages IDE project artifacts to a project directory and generates IDE configuration files."""
     self._prepare_project()
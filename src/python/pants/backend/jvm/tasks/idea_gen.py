@@ -7,7 +7,6 @@ from __future__ import (nested_scopes, generators, division, absolute_import, wi
 
 import os
 import pkgutil
-import shutil
 import tempfile
 from xml.dom import minidom
 
@@ -253,8 +252,10 @@ class IdeaGen(IdeGen):
     self.context.log.info('Generated IntelliJ project in {directory}'
                            .format(directory=self.gen_project_workdir))
 
-    shutil.move(ipr, self.project_filename)
-    shutil.move(iml, self.module_filename)
+    for generated, filename in ((ipr, self.project_filename), (iml, self.module_filename)):
+      with open(generated, 'rb') as fp:
+        self.update_file(filename, fp.read())
+      os.remove(generated)
     return self.project_filename if self.open else None
 
   def _generate_to_tempfile(self, generator):
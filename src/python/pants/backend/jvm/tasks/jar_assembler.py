@@ -0,0 +1,220 @@
+# coding=utf-8
+# Copyright 2014 Pants project contributors (see CONTRIBUTORS.md).
+# Licensed under the Apache License, Version 2.0 (see LICENSE).
+
+from __future__ import (nested_scopes, generators, division, absolute_import, with_statement,
+                        print_function, unicode_literals)
+
+from itertools import islice
+import os
+import time
+import zlib
+from zipfile import ZIP_DEFLATED, ZIP_STORED, ZipFile, ZipInfo
+
+from twitter.common.collections.ordereddict import OrderedDict
+
+from pants.backend.jvm.targets.jvm_binary import Duplicate, JarRules, Skip
+from pants.fs.archive import copy_entry, deflate, map_in_order, write_compressed
+from pants.java.jar.manifest import Manifest
+from pants.util.contextutil import open_zip
+from pants.util.dirutil import safe_walk
+from pants.util.strutil import ensure_text
+
+
+class _FileSource(object):
+  def __init__(self, path):
+    self.path = path
+
+  def read(self):
+    with open(self.path, 'rb') as fp:
+      return fp.read()
+
+
+class _BytesSource(object):
+  def __init__(self, contents):
+    self.contents = contents
+
+  def read(self):
+    return self.contents
+
+
+class _JarSource(object):
+  def __init__(self, jar, zinfo):
+    self.jar = jar
+    self.zinfo = zinfo
+
+  def read(self):
+    return self.jar.read(self.zinfo)
+
+
+class JarAssembler(object):
+  """Writes new jars in-process from files and the entries of other jars.
+
+  The entries of other jars are copied over byte for byte, still compressed, so only the files
+  being added and any duplicate entries that must be concatenated are ever compressed.  Those are
+  compressed on a pool of threads, and every entry is written in the order it was added.  Skips and
+  duplicates are handled according to `JarRules`, as the jar tool handles them.
+  """
+
+  # Files larger than this are streamed into the jar by zipfile rather than compressed in memory.
+  _MAX_PARALLEL_ENTRY_BYTES = 16 * 1024 * 1024
+
+  # Entries are compressed in small batches to amortize the hand-off cost of the many tiny class
+  # files in a typical jar.
+  _BATCH_SIZE = 32
+
+  _DIR_MODE = (0o40755 << 16) | 0x10
+  _FILE_MODE = 0o100644 << 16
+
+  def __init__(self, jar_rules=None, compressed=True, workers=1):
+    """
+    :param jar_rules: The rules for skipping and resolving duplicate entries; `JarRules.default()`
+      if not specified.
+    :param bool compressed: True to deflate the jar's entries, False to store them uncompressed.
+    :param int workers: The number of threads to compress entries on.
+    """
+    jar_rules = jar_rules or JarRules.default()
+    self._skip_patterns = [rule.apply_pattern for rule in jar_rules.rules if isinstance(rule, Skip)]
+    self._duplicate_rules = [rule for rule in jar_rules.rules if isinstance(rule, Duplicate)]
+    self._default_dup_action = jar_rules.default_dup_action
+    self._compress_type = ZIP_DEFLATED if compressed else ZIP_STORED
+    self._workers = max(1, workers or 1)
+
+  def assemble(self, path, manifest, files=None, jars=None):
+    """Writes a jar to path, replacing any existing file there.
+
+    :param string path: The path to write the jar to.
+    :param bytes manifest: The contents of the jar's manifest.
+    :param files: A list of (src, dest) pairs to add to the jar.  A src file is added at dest and
+      the files under a src directory are added at their path relative to it, prefixed by dest if
+      that is not None.
+    :param jars: A list of paths of jars whose entries should be added to the jar, save for their
+      manifests.
+    :raises: `Duplicate.Error` if a duplicate entry is found that the rules say to fail on.
+    """
+    source_jars = []
+    try:
+      for jar_path in jars or ():
+        source_jars.append(ZipFile(jar_path))
+      # Duplicates must be resolved up front so a jar is never left part-written by a FAIL rule.
+      plan = [(Manifest.PATH, [_BytesSource(manifest)])]
+      plan.extend(self._resolve_duplicates(self._entries(files or (), source_jars)))
+
+      timestamp = time.localtime()[0:6]
+      with open_zip(path, 'w', compression=self._compress_type, allowZip64=True) as jar:
+        dirs = set()
+        for (name, source, _), prepared in self._prepare(self._jobs(plan)):
+          self._write_parents(jar, name, dirs, timestamp)
+          if prepared is None:
+            if isinstance(source, _JarSource):
+              copy_entry(jar, source.jar, source.zinfo, arcname=name)
+            else:
+              jar.write(source.path, name)
+          else:
+            date_time, mode, size, crc, compressed = prepared
+            zinfo = ZipInfo(name, date_time or timestamp)
+            zinfo.external_attr = mode or self._FILE_MODE
+            zinfo.compress_type = self._compress_type
+            write_compressed(jar, zinfo, size, crc, compressed)
+    finally:
+      for source_jar in source_jars:
+        source_jar.close()
+
+  def _entries(self, files, source_jars):
+    for src, dest in files:
+      if os.path.isdir(src):
+        for root, dirs, names in safe_walk(src):
+          dirs.sort()
+          for name in sorted(names):
+            full_path = os.path.join(root, name)
+            relpath = os.path.relpath(full_path, src)
+            yield os.path.join(dest, relpath) if dest else relpath, _FileSource(full_path)
+      else:
+        yield dest, _FileSource(src)
+
+    for source_jar in source_jars:
+      for zinfo in source_jar.infolist():
+        # Directory entries are recreated for the entries that end up in the jar.
+        if not zinfo.filename.endswith('/'):
+          yield zinfo.filename, _JarSource(source_jar, zinfo)
+
+  def _resolve_duplicates(self, entries):
+    sources_by_name = OrderedDict()
+    for name, source in entries:
+      name = ensure_text(name)
+      if name != Manifest.PATH and not any(p.search(name) for p in self._skip_patterns):
+        sources_by_name.setdefault(name, []).append(source)
+
+    for name, sources in sources_by_name.items():
+      if len(sources) > 1:
+        action = self._duplicate_action(name)
+        if action is Duplicate.FAIL:
+          raise Duplicate.Error(name)
+        elif action is Duplicate.SKIP:
+          sources = sources[:1]
+        elif action is Duplicate.REPLACE:
+          sources = sources[-1:]
+      yield name, sources
+
+  def _duplicate_action(self, name):
+    for rule in self._duplicate_rules:
+      if rule.apply_pattern.search(name):
+        return rule.action
+    return self._default_dup_action
+
+  def _jobs(self, plan):
+    for name, sources in plan:
+      if len(sources) == 1:
+        source = sources[0]
+        if isinstance(source, _FileSource):
+          # Read and compressed on a worker.
+          yield name, source, None
+          continue
+        if isinstance(source, _JarSource) and source.zinfo.compress_type == self._compress_type:
+          # Copied as-is.
+          yield name, source, None
+          continue
+      # Zips cannot be read from several threads at once, so any jar entries that must be
+      # decompressed are read here.
+      yield name, None, b''.join(source.read() for source in sources)
+
+  def _prepare(self, jobs):
+    batches = iter(lambda: list(islice(jobs, self._BATCH_SIZE)), [])
+    if self._workers > 1:
+      prepared_batches = map_in_order(self._workers, self._prepare_batch, batches)
+    else:
+      prepared_batches = ((batch, self._prepare_batch(batch)) for batch in batches)
+    for batch, prepared_batch in prepared_batches:
+      for job, prepared in zip(batch, prepared_batch):
+        yield job, prepared
+
+  def _prepare_batch(self, batch):
+    return [self._prepare_job(job) for job in batch]
+
+  def _prepare_job(self, job):
+    _, source, data = job
+    date_time = mode = None
+    if isinstance(source, _JarSource):
+      return None
+    if isinstance(source, _FileSource):
+      st = os.stat(source.path)
+      if st.st_size > self._MAX_PARALLEL_ENTRY_BYTES:
+        return None
+      date_time = time.localtime(st.st_mtime)[0:6]
+      mode = (st.st_mode & 0xFFFF) << 16
+      data = source.read()
+    if self._compress_type == ZIP_DEFLATED:
+      size, crc, compressed = deflate(data)
+    else:
+      size, crc, compressed = len(data), zlib.crc32(data) & 0xffffffff, data
+    return date_time, mode, size, crc, compressed
+
+  def _write_parents(self, jar, name, dirs, timestamp):
+    parent = name.rsplit('/', 1)[0] if '/' in name else None
+    if parent is None or parent in dirs:
+      return
+    self._write_parents(jar, parent, dirs, timestamp)
+    dirs.add(parent)
+    zinfo = ZipInfo(parent + '/', timestamp)
+    zinfo.external_attr = self._DIR_MODE
+    jar.writestr(zinfo, b'')
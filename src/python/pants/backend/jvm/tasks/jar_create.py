@@ -6,14 +6,19 @@ from __future__ import (nested_scopes, generators, division, absolute_import, wi
                         print_function, unicode_literals)
 
 from contextlib import contextmanager
+import hashlib
 import os
 
 from pants.backend.jvm.targets.jvm_binary import JvmBinary
 from pants.backend.jvm.tasks.jar_task import JarTask
 from pants.base.exceptions import TaskError
+from pants.base.fingerprint_strategy import FingerprintStrategy
+from pants.base.hash_utils import hash_file
+from pants.base.worker_pool import Work
 from pants.base.workunit import WorkUnit
 from pants.fs.fs import safe_filename
-from pants.util.dirutil import safe_mkdir
+from pants.util.dirutil import safe_delete, safe_mkdir
+from pants.util.strutil import ensure_binary
 
 
 def is_jvm_binary(target):
@@ -43,6 +48,57 @@ def jarname(target, extension='.jar'):
   return safe_filename(id_, extension, max_length=200)
 
 
+class JarCreateFingerprintStrategy(FingerprintStrategy):
+  """A FingerprintStrategy that keys targets on the contents of the products jarred for them.
+
+  The products are the same classes and resources `JarTask.JarBuilder` adds to a target's jar, so
+  a target's jar is only rebuilt when what would go in it changes.  Targets with no products are
+  not fingerprinted, since no jar is made for them.
+  """
+
+  def __init__(self, classes_by_target, resources_by_target, compressed):
+    """
+    :param classes_by_target: The class products of targets.
+    :param resources_by_target: The resource products of targets.
+    :param bool compressed: Whether the jars are compressed.
+    """
+    self._classes_by_target = classes_by_target
+    self._resources_by_target = resources_by_target
+    self._compressed = compressed
+
+  def _products(self, target):
+    target_products = [self._classes_by_target.get(target), self._resources_by_target.get(target)]
+    if target.has_resources:
+      target_products.extend(self._resources_by_target.get(r) for r in target.resources)
+    return [products for products in target_products if products]
+
+  def compute_fingerprint(self, target):
+    target_products = self._products(target)
+    if not target_products:
+      return None
+
+    hasher = hashlib.sha1()
+    # The payload covers anything else that makes it into the jar, like a java agent's manifest.
+    hasher.update(target.payload.fingerprint() or b'')
+    hasher.update(b'compressed' if self._compressed else b'stored')
+    for products in target_products:
+      for root, rel_paths in products.rel_paths():
+        for rel_path in rel_paths:
+          hasher.update(ensure_binary(rel_path))
+          hasher.update(b'\0')
+          hash_file(os.path.join(root, rel_path), digest=hasher)
+    return hasher.hexdigest()
+
+  def __hash__(self):
+    return hash((type(self), self._compressed))
+
+  def __eq__(self, other):
+    return (type(self) == type(other) and
+            self._classes_by_target is other._classes_by_target and
+            self._resources_by_target is other._resources_by_target and
+            self._compressed == other._compressed)
+
+
 class JarCreate(JarTask):
   """Jars jvm libraries and optionally their sources and their docs."""
 
@@ -51,6 +107,8 @@ class JarCreate(JarTask):
     super(JarCreate, cls).register_options(register)
     register('--compressed', default=True, action='store_true',
              help='Create compressed jars.')
+    register('--workers', type=int, default=1,
+             help='Create up to this many jars at once.')
 
   @classmethod
   def product_types(cls):
@@ -62,25 +120,80 @@ class JarCreate(JarTask):
     self.compressed = self.get_options().compressed
     self._jar_builder = self.prepare_jar_builder()
     self._jars = {}
+    self.setup_artifact_cache()
 
   def execute(self):
     safe_mkdir(self.workdir)
 
-    with self.context.new_workunit(name='jar-create', labels=[WorkUnit.MULTITOOL]):
-      for target in self.context.targets(is_jvm_library):
-        jar_name = jarname(target)
-        jar_path = os.path.join(self.workdir, jar_name)
-        with self.create_jar(target, jar_path) as jarfile:
-          if self._jar_builder.add_target(jarfile, target):
-            self.context.products.get('jars').add(target, self.workdir).append(jar_name)
-
-  @contextmanager
-  def create_jar(self, target, path):
+    targets = self.context.targets(is_jvm_library)
+    jar_path_by_target = {}
+    for target in targets:
+      jar_path = os.path.join(self.workdir, jarname(target))
+      self._check_unique(target, jar_path)
+      jar_path_by_target[target] = jar_path
+
+    fingerprint_strategy = JarCreateFingerprintStrategy(
+        self.context.products.get_data('classes_by_target'),
+        self.context.products.get_data('resources_by_target'),
+        self.compressed)
+
+    with self.invalidated(targets, fingerprint_strategy=fingerprint_strategy) as invalidation_check:
+      invalid_targets = set(vt.target for vt in invalidation_check.invalid_vts)
+      # A valid target's jar may still have been cleaned out from under us.
+      stale_vts = [vt for vt in invalidation_check.all_vts
+                   if vt.target in invalid_targets or not os.path.exists(
+                       jar_path_by_target[vt.target])]
+
+      with self.context.new_workunit(name='jar-create', labels=[WorkUnit.MULTITOOL]):
+        created = self._create_jars([vt.target for vt in stale_vts], jar_path_by_target)
+
+      if self.artifact_cache_writes_enabled():
+        self.update_artifact_cache([(vt, [jar_path_by_target[vt.target]])
+                                    for vt, jarred in zip(stale_vts, created) if jarred])
+
+      for vt in invalidation_check.all_vts:
+        jar_path = jar_path_by_target[vt.target]
+        if os.path.exists(jar_path):
+          self.context.products.get('jars').add(vt.target, self.workdir).append(
+              os.path.basename(jar_path))
+
+  def _create_jars(self, targets, jar_path_by_target):
+    """Creates the jars of the given targets, up to --workers at a time.
+
+    :returns: A list of whether a jar was created for each target, in order.
+    """
+    def create(target, executor=None):
+      jar_path = jar_path_by_target[target]
+      safe_delete(jar_path)
+      with self.create_jar(target, jar_path, executor=executor) as jarfile:
+        return bool(self._jar_builder.add_target(jarfile, target))
+
+    workers = min(self.get_options().workers, len(targets))
+    if workers <= 1:
+      return [create(target) for target in targets]
+
+    jar_tool_instances = self.java_executor_instances(workers)
+
+    def create_with_own_jar_tool(target):
+      with jar_tool_instances() as instance:
+        return create(target, executor=self.create_java_executor(instance=instance))
+
+    pool = self.context.run_tracker.new_worker_pool(num_workers=workers)
+    try:
+      return pool.submit_work_and_wait(Work(create_with_own_jar_tool,
+                                            [(target,) for target in targets]))
+    finally:
+      pool.shutdown()
+
+  def _check_unique(self, target, path):
     existing = self._jars.setdefault(path, target)
     if target != existing:
       raise TaskError('Duplicate name: target %s tried to write %s already mapped to target %s' % (
         target, path, existing
       ))
-    self._jars[path] = target
-    with self.open_jar(path, overwrite=True, compressed=self.compressed) as jar:
+
+  @contextmanager
+  def create_jar(self, target, path, executor=None):
+    self._check_unique(target, path)
+    with self.open_jar(path, overwrite=True, compressed=self.compressed, executor=executor) as jar:
       yield jar
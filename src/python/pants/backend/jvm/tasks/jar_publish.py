@@ -5,19 +5,24 @@
 from __future__ import (nested_scopes, generators, division, absolute_import, with_statement,
                         print_function, unicode_literals)
 
-from collections import defaultdict
+from collections import defaultdict, namedtuple
 import functools
 import getpass
 import hashlib
+import json
 import logging
+from multiprocessing.pool import ThreadPool
 import os
 import pkgutil
 import shutil
 import sys
+import threading
 import traceback
 
+import six
 from twitter.common.collections import OrderedDict, OrderedSet
 from twitter.common.config import Properties
+from twitter.common.lang import Compatibility
 from twitter.common.log.options import LogOptions
 
 from pants.scm.scm import Scm
@@ -35,11 +40,18 @@ from pants.base.build_graph import sort_targets
 from pants.base.exceptions import TaskError
 from pants.base.generator import Generator, TemplateData
 from pants.base.target import Target
+from pants.base.workunit import WorkUnit
 from pants.ivy.bootstrapper import Bootstrapper
 from pants.ivy.ivy import Ivy
-from pants.util.dirutil import safe_mkdir, safe_open, safe_rmtree
+from pants.java.executor import SubprocessExecutor
+from pants.util.dirutil import safe_delete, safe_mkdir, safe_open, safe_rmtree
 from pants.util.strutil import ensure_text
 
+if Compatibility.PY3:
+  import queue
+else:
+  import Queue as queue
+
 
 class PushDb(object):
   @staticmethod
@@ -142,6 +154,60 @@ class PushDb(object):
       Properties.dump(self._props, props)
 
 
+class PublishJournal(object):
+  """An append-only record of the artifacts uploaded by a publish that has not yet completed.
+
+  A publish that is interrupted part way through - by an upload failure, a failed pushdb commit or
+  a ctrl-c - can be re-run and will skip the uploads the journal says already succeeded.
+  """
+
+  def __init__(self, path):
+    """
+    :param string path: The path of the journal file; need not exist yet.
+    """
+    self._path = path
+    self._lock = threading.Lock()
+    self._uploads = set()
+    if os.path.exists(path):
+      with open(path, 'r') as fp:
+        for line in fp:
+          try:
+            self._uploads.add(tuple(json.loads(line)))
+          except ValueError:
+            # The last line of a journal may be partial if pants was killed while appending to it.
+            pass
+
+  @staticmethod
+  def _upload(coordinate, fingerprint, destination):
+    return coordinate, fingerprint, destination
+
+  def has_uploaded(self, coordinate, fingerprint, destination):
+    """Returns True if the given version of an artifact was uploaded to destination."""
+    with self._lock:
+      return self._upload(coordinate, fingerprint, destination) in self._uploads
+
+  def record_upload(self, coordinate, fingerprint, destination):
+    """Durably records the upload of the given version of an artifact to destination.
+
+    :param string coordinate: The ivy coordinate, including revision, of the uploaded artifact.
+    :param string fingerprint: The pushdb fingerprint of the uploaded artifact.
+    :param string destination: Identifies the repository the artifact was uploaded to.
+    """
+    upload = self._upload(coordinate, fingerprint, destination)
+    with self._lock:
+      with safe_open(self._path, 'a') as fp:
+        fp.write(json.dumps(upload) + '\n')
+        fp.flush()
+        os.fsync(fp.fileno())
+      self._uploads.add(upload)
+
+  def clear(self):
+    """Forgets all uploads; called once a publish has completed."""
+    with self._lock:
+      safe_delete(self._path)
+      self._uploads.clear()
+
+
 class DependencyWriter(object):
   """
     Builds up a template data representing a target and applies this to a template to produce a
@@ -401,6 +467,9 @@ class JarPublish(JarTask, ScmPublish):
                   'maven coordinate [org]#[name] or target. '
                   'For example: --restart-at=com.twitter.common#quantity '
                   'Or: --restart-at=src/java/com/twitter/common/base')
+    register('--workers', type=int, default=1,
+             help='Stage and upload up to this many artifacts concurrently.  Artifacts are only '
+                  'uploaded once the artifacts they depend on have been.')
 
   def __init__(self, *args, **kwargs):
     super(JarPublish, self).__init__(*args, **kwargs)
@@ -408,6 +477,9 @@ class JarPublish(JarTask, ScmPublish):
                         self.context.config.getlist(self._CONFIG_SECTION,
                                                     'restrict_push_branches'))
     self.cachedir = os.path.join(self.workdir, 'cache')
+    # The journal must survive the clean-all a re-run of an interrupted publish is likely to do.
+    self._journal_path = os.path.join(self.context.config.getdefault('pants_distdir'),
+                                      'publish.journal')
 
     self._jvmargs = self.context.config.getlist(self._CONFIG_SECTION, 'ivy_jvmargs', default=[])
 
@@ -541,7 +613,7 @@ class JarPublish(JarTask, ScmPublish):
     if not repo.get('auth'):
       return self._jvmargs
 
-    jvm_args = self._jvmargs
+    jvm_args = list(self._jvmargs)
     user = repo.get('username')
     password = repo.get('password')
     if user and password:
@@ -552,9 +624,14 @@ class JarPublish(JarTask, ScmPublish):
                       (repo.get('resolver'), repo.get('help', '')))
     return jvm_args
 
-  def publish(self, ivyxml_path, jar, entry, repo, published):
+  def publish(self, ivyxml_path, jar, entry, repo, published, instance=None):
     """Run ivy to publish a jar.  ivyxml_path is the path to the ivy file; published
-    is a list of jars published so far (including this one). entry is a pushdb entry."""
+    is a list of jars published so far (including this one). entry is a pushdb entry.
+
+    Concurrent publishes must each pass a distinct executor instance (see
+    java_executor_instances); each instance has an ivy cache and ivy nailgun of its own.
+    Publishes to authenticated repos always run ivy in a jvm of its own instead.
+    """
     jvm_args = self._ivy_jvm_args(repo)
     resolver = repo['resolver']
     path = repo.get('path')
@@ -564,7 +641,10 @@ class JarPublish(JarTask, ScmPublish):
     except Bootstrapper.Error as e:
       raise TaskError('Failed to push {0}! {1}'.format(pushdb_coordinate(jar, entry), e))
 
-    ivysettings = self.generate_ivysettings(ivy, published, publish_local=path)
+    ivysettings = self.generate_ivysettings(
+      ivy, published, publish_local=path,
+      path=os.path.join(os.path.dirname(ivyxml_path), 'ivysettings.xml'),
+      cachedir=self.cachedir if instance is None else os.path.join(self.cachedir, instance))
     args = [
       '-settings', ivysettings,
       '-ivy', ivyxml_path,
@@ -582,8 +662,15 @@ class JarPublish(JarTask, ScmPublish):
     if self.local_snapshot:
       args.append('-overwrite')
 
+    # Credentials are passed to ivy as jvm options.  A nailgun server would keep them on its command
+    # line for as long as it lives, and would be respawned for each set of credentials.
+    if repo.get('auth'):
+      executor = SubprocessExecutor(self._dist)
+    else:
+      executor = self.create_java_executor(instance=instance)
+
     try:
-      ivy.execute(jvm_options=jvm_args, args=args,
+      ivy.execute(jvm_options=jvm_args, args=args, executor=executor,
                   workunit_factory=self.context.new_workunit, workunit_name='jar-publish')
     except Ivy.Error as e:
       raise TaskError('Failed to push {0}! {1}'.format(pushdb_coordinate(jar, entry), e))
@@ -640,14 +727,14 @@ class JarPublish(JarTask, ScmPublish):
 
       return ivyxml
 
-    def stage_artifacts(tgt, jar, version, changelog):
+    def stage_artifacts(tgt, jar, version, changelog, executor=None):
       DEFAULT_IVY_TYPE = 'jar'
       DEFAULT_CLASSIFIER = ''
       DEFAULT_EXTENSION = 'jar'
 
       self._copy_artifact(tgt, jar, version, typename='jars')
-      self.create_source_jar(tgt, jar, version)
-      doc_jar = self.create_doc_jar(tgt, jar, version)
+      self.create_source_jar(tgt, jar, version, executor=executor)
+      doc_jar = self.create_doc_jar(tgt, jar, version, executor=executor)
 
       confs = set(repo['confs'])
       extra_confs = []
@@ -725,6 +812,8 @@ class JarPublish(JarTask, ScmPublish):
 
     safe_rmtree(self.workdir)
     published = []
+    stages = []  # Artifacts to stage, in publish order.
+    uploads = []  # Artifacts to upload once staged, in publish order.
     skip = (self.restart_at is not None)
     for target in exported_targets:
       pushdb, dbfile, repo = get_db(target)
@@ -763,13 +852,13 @@ class JarPublish(JarTask, ScmPublish):
 
       if no_changes and not self.force:
         print('No changes for {0}'.format(pushdb_coordinate(jar, oldentry)))
-        stage_artifacts(target, jar, oldentry.version().version(), changelog)
+        stages.append(self.Stage(target, jar, oldentry.version().version(), changelog))
       elif skip:
         print('Skipping %s to resume at %s' % (
           jar_coordinate(jar, (newentry.version() if self.force else oldentry.version()).version()),
           coordinate(self.restart_at[0], self.restart_at[1])
         ))
-        stage_artifacts(target, jar, oldentry.version().version(), changelog)
+        stages.append(self.Stage(target, jar, oldentry.version().version(), changelog))
       else:
         if not self.dryrun:
           # Confirm push looks good
@@ -782,56 +871,204 @@ class JarPublish(JarTask, ScmPublish):
           if not self.confirm_push(coordinate(jar.org, jar.name), newentry.version()):
             raise TaskError('User aborted push')
 
+        # Dependents staged later must see this new version.
         pushdb.set_entry(target, newentry)
-        ivyxml = stage_artifacts(target, jar, newentry.version().version(), changelog)
+        stage = self.Stage(target, jar, newentry.version().version(), changelog)
+        stages.append(stage)
 
         if self.dryrun:
           print('Skipping publish of {0} in test mode.'.format(pushdb_coordinate(jar, newentry)))
         else:
-          self.publish(ivyxml, jar=jar, entry=newentry, repo=repo, published=published)
-
-          if self.commit:
-            org = jar.org
-            name = jar.name
-            rev = newentry.version().version()
-            args = dict(
-              org=org,
-              name=name,
-              rev=rev,
-              coordinate=coordinate(org, name, rev),
-              user=getpass.getuser(),
-              cause='with forced revision' if (org, name) in self.overrides else '(autoinc)'
-            )
-
-            pushdb.dump(dbfile)
-            self.commit_pushdb(coordinate(org, name, rev))
-            scm_exception = None
-            for attempt in range(self.get_options().scm_push_attempts):
-              try:
-                self.context.log.debug("Trying scm push")
-                self.scm.push()
-                break # success
-              except Scm.RemoteException as scm_exception:
-                self.context.log.debug("Scm push failed, trying to refresh")
-                # This might fail in the event that there is a real conflict, throwing
-                # a Scm.LocalException (in case of a rebase failure) or a Scm.RemoteException
-                # in the case of a fetch failure.  We'll directly raise a local exception,
-                # since we can't fix it by retrying, but if we do, we want to display the
-                # remote exception that caused the refresh as well just in case the user cares.
-                # Remote exceptions probably indicate network or configuration issues, so
-                # we'll let them propagate
-                try:
-                  self.scm.refresh(leave_clean=True)
-                except Scm.LocalException as local_exception:
-                  exc = traceback.format_exc(scm_exception)
-                  self.context.log.debug("SCM exception while pushing: %s" % exc)
-                  raise local_exception
-
-            else:
-              raise scm_exception
-
-            self.scm.tag('%(org)s-%(name)s-%(rev)s' % args,
-                         message='Publish of %(coordinate)s initiated by %(user)s %(cause)s' % args)
+          uploads.append(self.Upload(stage, newentry, repo, dbfile, published=list(published)))
+
+    workers = max(1, self.get_options().workers)
+    ivyxmls = self._stage(stages, stage_artifacts, workers)
+    if self.dryrun:
+      return
+
+    journal = PublishJournal(self._journal_path)
+    ivy_instances = self.java_executor_instances(min(workers, len(uploads)), family='ivy')
+
+    def upload(upload):
+      jar, entry, repo = upload.stage.jar, upload.entry, upload.repo
+      destination = '%s:%s' % (repo['resolver'], repo.get('path') or '')
+      if journal.has_uploaded(pushdb_coordinate(jar, entry), entry.fingerprint, destination):
+        print('Already published {0} to {1}.'.format(pushdb_coordinate(jar, entry), destination))
+        return
+      with ivy_instances() as instance:
+        self.publish(ivyxmls[upload.stage.target], jar=jar, entry=entry, repo=repo,
+                     published=upload.published, instance=instance)
+      journal.record_upload(pushdb_coordinate(jar, entry), entry.fingerprint, destination)
+
+    # The pushdbs as committed so far; those above already hold the versions of every artifact
+    # still to be uploaded.
+    committed_pushdbs = {}
+
+    def commit(upload):
+      if not self.commit:
+        return
+      target, jar, entry = upload.stage.target, upload.stage.jar, upload.entry
+      dbfile = upload.dbfile
+      if dbfile not in committed_pushdbs:
+        committed_pushdbs[dbfile] = PushDb.load(dbfile) if os.path.exists(dbfile) else PushDb()
+      pushdb = committed_pushdbs[dbfile]
+      pushdb.set_entry(target, entry)
+
+      org = jar.org
+      name = jar.name
+      rev = entry.version().version()
+      args = dict(
+        org=org,
+        name=name,
+        rev=rev,
+        coordinate=coordinate(org, name, rev),
+        user=getpass.getuser(),
+        cause='with forced revision' if (org, name) in self.overrides else '(autoinc)'
+      )
+
+      pushdb.dump(dbfile)
+      self.commit_pushdb(coordinate(org, name, rev))
+      scm_exception = None
+      for attempt in range(self.get_options().scm_push_attempts):
+        try:
+          self.context.log.debug("Trying scm push")
+          self.scm.push()
+          break # success
+        except Scm.RemoteException as scm_exception:
+          self.context.log.debug("Scm push failed, trying to refresh")
+          # This might fail in the event that there is a real conflict, throwing
+          # a Scm.LocalException (in case of a rebase failure) or a Scm.RemoteException
+          # in the case of a fetch failure.  We'll directly raise a local exception,
+          # since we can't fix it by retrying, but if we do, we want to display the
+          # remote exception that caused the refresh as well just in case the user cares.
+          # Remote exceptions probably indicate network or configuration issues, so
+          # we'll let them propagate
+          try:
+            self.scm.refresh(leave_clean=True)
+          except Scm.LocalException as local_exception:
+            exc = traceback.format_exc(scm_exception)
+            self.context.log.debug("SCM exception while pushing: %s" % exc)
+            raise local_exception
+
+      else:
+        raise scm_exception
+
+      self.scm.tag('%(org)s-%(name)s-%(rev)s' % args,
+                   message='Publish of %(coordinate)s initiated by %(user)s %(cause)s' % args)
+
+    self._upload(uploads, upload, commit, workers)
+    journal.clear()
+
+  Stage = namedtuple('Stage', ['target', 'jar', 'version', 'changelog'])
+
+  Upload = namedtuple('Upload', ['stage', 'entry', 'repo', 'dbfile', 'published'])
+
+  def _stage(self, stages, stage_artifacts, workers):
+    """Stages the artifacts for each stage, up to workers at a time.
+
+    :returns: A dict from target to the path of its staged ivy.xml.
+    """
+    workers = min(workers, len(stages))
+    if workers <= 1:
+      ivyxmls = [stage_artifacts(stage.target, stage.jar, stage.version, stage.changelog)
+                 for stage in stages]
+    else:
+      jar_tool_instances = self.java_executor_instances(workers)
+      with self.context.new_workunit(name='stage', labels=[WorkUnit.MULTITOOL]) as workunit:
+        def stage(stage):
+          self.context.run_tracker.register_thread(workunit)
+          with jar_tool_instances() as instance:
+            return stage_artifacts(stage.target, stage.jar, stage.version, stage.changelog,
+                                   executor=self.create_java_executor(instance=instance))
+
+        pool = ThreadPool(processes=workers)
+        try:
+          # We need to specify a timeout explicitly, because otherwise python ignores SIGINT when
+          # waiting on a condition variable, so we won't be able to ctrl-c out.
+          ivyxmls = pool.map_async(stage, stages, chunksize=1).get(timeout=1000000000)
+        finally:
+          pool.close()
+          pool.join()
+    return dict((stage.target, ivyxml) for stage, ivyxml in zip(stages, ivyxmls))
+
+  def _upload(self, uploads, upload, commit, workers):
+    """Runs up to workers uploads at a time, committing each upload in publish order.
+
+    An upload starts as soon as the uploads of the artifacts it depends on have succeeded, so no
+    artifact is uploaded before its dependencies.  Each upload is committed once it and every upload
+    before it have succeeded.  After a failure no new uploads are started, but those in flight are
+    allowed to complete before the failure is raised.
+    """
+    workers = min(workers, len(uploads))
+    if workers <= 1:
+      for each in uploads:
+        upload(each)
+        commit(each)
+      return
+
+    # Uploads hold unhashable repo dicts, so they are tracked by their index in uploads.
+    index_by_target = dict((each.stage.target, i) for i, each in enumerate(uploads))
+    waiting_on = {}
+    dependents = defaultdict(list)
+    for i, each in enumerate(uploads):
+      dependencies = set(index_by_target[dep] for dep in each.stage.target.closure()
+                         if dep in index_by_target and dep != each.stage.target)
+      waiting_on[i] = len(dependencies)
+      for dependency in dependencies:
+        dependents[dependency].append(i)
+
+    completed = queue.Queue()
+    failure = None
+    with self.context.new_workunit(name='upload', labels=[WorkUnit.MULTITOOL]) as workunit:
+      def run(i):
+        self.context.run_tracker.register_thread(workunit)
+        try:
+          upload(uploads[i])
+          completed.put((i, None))
+        except Exception:
+          completed.put((i, sys.exc_info()))
+
+      pool = ThreadPool(processes=workers)
+      try:
+        ready = [i for i in range(len(uploads)) if waiting_on[i] == 0]
+        running = 0
+        succeeded = set()
+        next_commit = 0
+        while ready or running:
+          if not failure:
+            for i in ready:
+              pool.apply_async(run, (i, ))
+            running += len(ready)
+          ready = []
+          if not running:
+            break
+
+          # We need to specify a timeout explicitly, because otherwise python ignores SIGINT when
+          # waiting on a condition variable, so we won't be able to ctrl-c out.
+          i, exc_info = completed.get(timeout=1000000000)
+          running -= 1
+          if exc_info:
+            failure = failure or exc_info
+            continue
+
+          succeeded.add(i)
+          for dependent in dependents[i]:
+            waiting_on[dependent] -= 1
+            if waiting_on[dependent] == 0:
+              ready.append(dependent)
+
+          while not failure and next_commit in succeeded:
+            try:
+              commit(uploads[next_commit])
+              next_commit += 1
+            except Exception:
+              failure = sys.exc_info()
+      finally:
+        pool.close()
+        pool.join()
+
+    if failure:
+      six.reraise(*failure)
 
   def artifact_path(self, jar, version, name=None, suffix='', extension='jar', artifact_ext=''):
     return os.path.join(self.workdir, jar.org, jar.name + artifact_ext,
@@ -935,24 +1172,24 @@ class JarPublish(JarTask, ScmPublish):
     return ensure_text(self.scm.changelog(from_commit=sha,
                                           files=target.sources_relative_to_buildroot()))
 
-  def generate_ivysettings(self, ivy, publishedjars, publish_local=None):
+  def generate_ivysettings(self, ivy, publishedjars, publish_local=None, path=None, cachedir=None):
     if ivy.ivy_settings is None:
       raise TaskError('A custom ivysettings.xml with writeable resolvers is required for '
                       'publishing, but none was configured.')
     template_relpath = os.path.join('templates', 'jar_publish', 'ivysettings.mustache')
     template = pkgutil.get_data(__name__, template_relpath)
-    with safe_open(os.path.join(self.workdir, 'ivysettings.xml'), 'w') as wrapper:
+    with safe_open(path or os.path.join(self.workdir, 'ivysettings.xml'), 'w') as wrapper:
       generator = Generator(template,
                             ivysettings=ivy.ivy_settings,
                             dir=self.workdir,
-                            cachedir=self.cachedir,
+                            cachedir=cachedir or self.cachedir,
                             published=[TemplateData(org=jar.org, name=jar.name)
                                        for jar in publishedjars],
                             publish_local=publish_local)
       generator.write(wrapper)
       return wrapper.name
 
-  def create_source_jar(self, target, open_jar, version):
+  def create_source_jar(self, target, open_jar, version, executor=None):
     # TODO(Tejal Desai) pantsbuild/pants/65: Avoid creating 2 jars with java sources for a
     # scala_library with java_sources. Currently publish fails fast if scala_library owning
     # java sources pointed by java_library target also provides an artifact. However, jar_create
@@ -964,7 +1201,7 @@ class JarPublish(JarTask, ScmPublish):
         yield os.path.join(abs_source_root, source), source
 
     jar_path = self.artifact_path(open_jar, version, suffix='-sources')
-    with self.open_jar(jar_path, overwrite=True, compressed=True) as open_jar:
+    with self.open_jar(jar_path, overwrite=True, compressed=True, executor=executor) as open_jar:
       for abs_source, rel_source in abs_and_relative_sources(target):
         open_jar.write(abs_source, rel_source)
 
@@ -987,13 +1224,13 @@ class JarPublish(JarTask, ScmPublish):
   def _scala_doc(self, target):
     return self.context.products.get('scaladoc').get(target)
 
-  def create_doc_jar(self, target, open_jar, version):
+  def create_doc_jar(self, target, open_jar, version, executor=None):
     """Returns a doc jar if either scala or java docs are available for the given target."""
     javadoc = self._java_doc(target)
     scaladoc = self._scala_doc(target)
     if javadoc or scaladoc:
       jar_path = self.artifact_path(open_jar, version, suffix='-javadoc')
-      with self.open_jar(jar_path, overwrite=True, compressed=True) as open_jar:
+      with self.open_jar(jar_path, overwrite=True, compressed=True, executor=executor) as open_jar:
         def add_docs(docs):
           if docs:
             for basedir, doc_files in docs.items():
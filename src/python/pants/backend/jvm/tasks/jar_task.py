@@ -14,11 +14,14 @@ from twitter.common.collections import maybe_list
 from twitter.common.lang import AbstractClass, Compatibility
 
 from pants.backend.jvm.targets.jvm_binary import Duplicate, Skip, JarRules
+from pants.backend.jvm.tasks.jar_assembler import JarAssembler
 from pants.backend.jvm.tasks.nailgun_task import NailgunTask
 from pants.base.exceptions import TaskError
 from pants.base.workunit import WorkUnit
+from pants.fs.materialize import unshare
 from pants.java.jar.manifest import Manifest
 from pants.util.contextutil import temporary_dir
+from pants.util.dirutil import safe_delete
 
 
 class Jar(object):
@@ -180,6 +183,31 @@ class Jar(object):
 
       yield args
 
+  def _assemble(self, path, assembler):
+    """Writes this jar to path with the given `JarAssembler`, unless nothing was added to it.
+
+    :returns: True if a jar was written.
+    """
+    if not (self._main or self._classpath or self._manifest or self._entries or self._jars):
+      return False
+
+    with temporary_dir() as stage_dir:
+      if self._manifest:
+        with open(self._manifest.materialize(stage_dir), 'rb') as fp:
+          manifest = Manifest(fp.read())
+      else:
+        manifest = Manifest()
+        manifest.addentry(Manifest.MANIFEST_VERSION, '1.0')
+        manifest.addentry(Manifest.CREATED_BY, 'pants')
+      if self._main:
+        manifest.addentry(Manifest.MAIN_CLASS, self._main)
+      if self._classpath:
+        manifest.addentry(Manifest.CLASS_PATH, ' '.join(self._classpath))
+
+      files = [(entry.materialize(stage_dir), entry.dest) for entry in self._entries]
+      assembler.assemble(path, manifest.contents(), files=files, jars=self._jars)
+    return True
+
 
 class JarTask(NailgunTask):
   """A baseclass for tasks that need to create or update jars.
@@ -228,7 +256,8 @@ class JarTask(NailgunTask):
     round_manager.require_data('classes_by_target')
 
   @contextmanager
-  def open_jar(self, path, overwrite=False, compressed=True, jar_rules=None):
+  def open_jar(self, path, overwrite=False, compressed=True, jar_rules=None, executor=None,
+               in_process=False, workers=1):
     """Yields a Jar that will be written when the context exits.
 
     :param string path: the path to the jar file
@@ -236,13 +265,33 @@ class JarTask(NailgunTask):
       update the pre-existing jar at ``path``
     :param bool compressed: entries added to the jar should be compressed; ``True`` by default
     :param jar_rules: an optional set of rules for handling jar exclusions and duplicates
+    :param executor: an optional java executor to run the jar tool with; this task's default
+      executor if not specified
+    :param bool in_process: write the jar with a `JarAssembler` rather than the jar tool, copying
+      the entries of jars added to it without recompressing them; only supported along with
+      ``overwrite``
+    :param int workers: the number of threads to compress new entries on when ``in_process``
     """
+    if in_process and not overwrite:
+      raise ValueError('Jars can only be assembled in-process when overwriting them.')
+
     jar = Jar()
     try:
       yield jar
     except jar.Error as e:
       raise TaskError('Failed to write to jar at %s: %s' % (path, e))
 
+    if in_process:
+      assembler = JarAssembler(jar_rules=jar_rules, compressed=compressed, workers=workers)
+      try:
+        # Replace rather than rewrite path, so the write never reaches through a hardlink.
+        safe_delete(path)
+        with self.context.new_workunit(name='jar-assembler'):
+          jar._assemble(path, assembler)
+      except Duplicate.Error as e:
+        raise TaskError('Failed to write to jar at %s: %s' % (path, e))
+      return
+
     with jar._render_jar_tool_args() as args:
       if args:  # Don't build an empty jar
         args.append('-update=%s' % self._flag(not overwrite))
@@ -271,13 +320,17 @@ class JarTask(NailgunTask):
 
         args.append(path)
 
+        # The jar tool may rewrite path in place; never let that reach through a hardlink.
+        unshare(path)
+
         jvm_args = self.context.config.getlist('jar-tool', 'jvm_args', default=['-Xmx64M'])
         self.runjava(self.tool_classpath('jar-tool'),
                      'com.twitter.common.jar.tool.Main',
                      jvm_options=jvm_args,
                      args=args,
                      workunit_name='jar-tool',
-                     workunit_labels=[WorkUnit.TOOL, WorkUnit.JVM, WorkUnit.NAILGUN])
+                     workunit_labels=[WorkUnit.TOOL, WorkUnit.JVM, WorkUnit.NAILGUN],
+                     executor=executor)
 
   class JarBuilder(AbstractClass):
     """A utility to aid in adding the classes and resources associated with targets to a jar."""
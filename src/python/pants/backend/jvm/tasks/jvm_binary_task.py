@@ -6,6 +6,7 @@ from __future__ import (nested_scopes, generators, division, absolute_import, wi
                         print_function, unicode_literals)
 from contextlib import contextmanager
 
+import multiprocessing
 import os
 
 from twitter.common.collections.ordereddict import OrderedDict
@@ -31,6 +32,16 @@ class JvmBinaryTask(JarTask):
     if main is not None:
       jar.main(main)
 
+  @classmethod
+  def register_options(cls, register):
+    super(JvmBinaryTask, cls).register_options(register)
+    register('--copy-jar-entries', default=True, action='store_true',
+             help='Assemble monolithic jars in-process, copying the entries of dependency jars '
+                  'without recompressing them, rather than with the jar tool.')
+    register('--jar-workers', type=int, default=multiprocessing.cpu_count(),
+             help='Compress the classes and resources added to monolithic jars on this many '
+                  'threads.  Only used with --copy-jar-entries.')
+
   def __init__(self, *args, **kwargs):
     super(JvmBinaryTask, self).__init__(*args, **kwargs)
     self._jar_builder = self.prepare_jar_builder()
@@ -59,7 +70,7 @@ class JvmBinaryTask(JarTask):
 
     :param binary: The jvm_binary target to operate on.
     :param path: Write the output jar here, overwriting an existing file, if any.
-    :param with_external_deps: If True, unpack external jar deps and add their classes to the jar.
+    :param with_external_deps: If True, add the entries of external jar deps to the jar.
     """
     # TODO(benjy): There's actually nothing here that requires 'binary' to be a jvm_binary.
     # It could be any target. And that might actually be useful.
@@ -68,7 +79,9 @@ class JvmBinaryTask(JarTask):
       with self.open_jar(path,
                          jar_rules=binary.deploy_jar_rules,
                          overwrite=True,
-                         compressed=True) as jar:
+                         compressed=True,
+                         in_process=self.get_options().copy_jar_entries,
+                         workers=self.get_options().jar_workers) as jar:
 
         with self.context.new_workunit(name='add-internal-classes'):
           self._jar_builder.add_target(jar, binary, recursive=True)
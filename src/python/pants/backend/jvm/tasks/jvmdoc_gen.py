@@ -7,20 +7,99 @@ from __future__ import (nested_scopes, generators, division, absolute_import, wi
 
 import collections
 import contextlib
+import hashlib
 import multiprocessing
 import os
+import re
 import subprocess
 
 
 from pants import binary_util
 from pants.backend.jvm.tasks.jvm_task import JvmTask
+from pants.base.build_environment import get_buildroot
+from pants.base.cache_manager import VersionedTargetSet
 from pants.base.exceptions import TaskError
+from pants.base.fingerprint_strategy import FingerprintStrategy
+from pants.base.hash_utils import hash_file
 from pants.util.dirutil import safe_mkdir, safe_walk
 
 
 Jvmdoc = collections.namedtuple('Jvmdoc', ['tool_name', 'product_type'])
 
 
+class JvmdocFingerprintStrategy(FingerprintStrategy):
+  """A FingerprintStrategy that also keys targets on the doc tool's classpath and options."""
+
+  def __init__(self, doc_data):
+    """
+    :param doc_data: A list of strings describing how docs are generated, such as the doc tool
+      options and classpath.  Order matters.
+    """
+    self.doc_data = tuple(doc_data)
+
+  def compute_fingerprint(self, target):
+    target_fp = target.payload.fingerprint()
+    if target_fp is None:
+      return None
+
+    hasher = hashlib.sha1()
+    hasher.update(target_fp)
+    for datum in self.doc_data:
+      hasher.update(datum.encode('utf-8'))
+      hasher.update(b'\0')
+    return hasher.hexdigest()
+
+  def __hash__(self):
+    return hash((type(self), self.doc_data))
+
+  def __eq__(self, other):
+    return type(self) == type(other) and self.doc_data == other.doc_data
+
+
+_HEAP_SIZE_RE = re.compile(r'^-Xmx(\d+)([kKmMgG]?)$')
+_HEAP_SIZE_UNITS = {'': 1, 'k': 1 << 10, 'm': 1 << 20, 'g': 1 << 30}
+
+
+def jvm_heap_size(jvm_options, physical_memory):
+  """Returns the maximum heap size in bytes of a JVM run with the given options.
+
+  :param list jvm_options: The options the JVM is run with.
+  :param int physical_memory: The physical memory of the machine the JVM runs on, in bytes.
+  """
+  for jvm_option in reversed(jvm_options):
+    match = _HEAP_SIZE_RE.match(jvm_option)
+    if match:
+      return int(match.group(1)) * _HEAP_SIZE_UNITS[match.group(2).lower()]
+  # The JVM defaults its maximum heap to a quarter of physical memory.
+  return physical_memory // 4
+
+
+def classpath_entry_key(entry, buildroot):
+  """Returns a key for a classpath entry that does not depend on where the buildroot lives.
+
+  Entries under the buildroot are keyed by their path relative to it.  Files outside of it, such as
+  jars in the ivy cache, are keyed by a digest of their contents so that docs can be shared through
+  the artifact cache by checkouts and caches in different places.
+
+  :param str entry: The path of a classpath entry.
+  :param str buildroot: The path of the buildroot.
+  """
+  relpath = os.path.relpath(os.path.abspath(entry), buildroot)
+  if relpath != os.pardir and not relpath.startswith(os.pardir + os.sep):
+    return relpath
+  if os.path.isfile(entry):
+    return 'sha1:{0}'.format(hash_file(entry))
+  return entry
+
+
+def physical_memory():
+  """Returns the physical memory of this machine in bytes, or None if it can't be determined."""
+  try:
+    return os.sysconf(str('SC_PAGE_SIZE')) * os.sysconf(str('SC_PHYS_PAGES'))
+  except (AttributeError, OSError, ValueError):
+    return None
+
+
 class JvmdocGen(JvmTask):
   @classmethod
   def jvmdoc(cls):
@@ -53,6 +132,11 @@ class JvmdocGen(JvmTask):
     register('--ignore-failure', default=False, action='store_true',
              help='Do not consider {0} errors to be build errors.'.format(tool_name))
 
+    register('--workers', type=int, default=0,
+             help='Run up to this many {0} processes concurrently when generating {0} for each '
+                  'target individually.  By default runs as many as there are cores and physical '
+                  'memory for the heaps of their JVMs.'.format(tool_name))
+
     # TODO(John Sirois): This supports the JarPublish task and is an abstraction leak.
     # It allows folks doing a local-publish to skip an expensive and un-needed step.
     # Remove this flag and instead support conditional requirements being registered against
@@ -75,6 +159,9 @@ class JvmdocGen(JvmTask):
     self.combined = self.open or options.combined
     self.ignore_failure = options.ignore_failure
     self.skip = options.skip
+    self.workers = options.workers
+
+    self.setup_artifact_cache()
 
   def prepare(self, round_manager):
     # TODO(John Sirois): this is a fake requirement in order to force compile run before this
@@ -104,25 +191,41 @@ class JvmdocGen(JvmTask):
       return language_predicate(tgt) and (self._include_codegen or not tgt.is_codegen)
 
     targets = self.context.targets()
-    with self.invalidated(filter(docable, targets)) as invalidation_check:
+    classpath = self.classpath(confs=self.confs)
+    with self.invalidated(filter(docable, targets),
+                          fingerprint_strategy=self._fingerprint_strategy(classpath)
+                          ) as invalidation_check:
       safe_mkdir(self.workdir)
-      classpath = self.classpath(confs=self.confs)
 
-      def find_jvmdoc_targets():
-        invalid_targets = set()
-        for vt in invalidation_check.invalid_vts:
-          invalid_targets.update(vt.targets)
+      def find_jvmdoc_targets(vts):
+        found_targets = set()
+        for vt in vts:
+          found_targets.update(vt.targets)
 
         if self.transitive:
-          return invalid_targets
+          return found_targets
         else:
-          return set(invalid_targets).intersection(set(self.context.target_roots))
+          return set(found_targets).intersection(set(self.context.target_roots))
 
-      jvmdoc_targets = list(filter(docable, find_jvmdoc_targets()))
       if self.combined:
-        self._generate_combined(classpath, jvmdoc_targets, create_jvmdoc_command)
+        # The doc tools can't merge separately generated docs into one set, so combined docs are
+        # always generated for all the targets at once, and cached as a whole.
+        if invalidation_check.invalid_vts:
+          jvmdoc_targets = list(filter(docable, find_jvmdoc_targets(invalidation_check.all_vts)))
+          if self._generate_combined(classpath, jvmdoc_targets, create_jvmdoc_command):
+            if self.artifact_cache_writes_enabled():
+              combined_vts = VersionedTargetSet.from_versioned_targets(invalidation_check.all_vts)
+              self.update_artifact_cache([(combined_vts, [self._combined_gendir()])])
+        if self.open:
+          binary_util.ui_open(os.path.join(self._combined_gendir(), 'index.html'))
       else:
-        self._generate_individual(classpath, jvmdoc_targets, create_jvmdoc_command)
+        jvmdoc_targets = list(filter(docable, find_jvmdoc_targets(invalidation_check.invalid_vts)))
+        generated_targets = self._generate_individual(classpath, jvmdoc_targets,
+                                                      create_jvmdoc_command)
+        if generated_targets and self.artifact_cache_writes_enabled():
+          self.update_artifact_cache([(vt, [self._gendir(vt.target)])
+                                      for vt in invalidation_check.invalid_vts
+                                      if vt.target in generated_targets])
 
     if catalog:
       for target in targets:
@@ -132,19 +235,37 @@ class JvmdocGen(JvmTask):
           jvmdocs.extend(os.path.relpath(os.path.join(root, f), gendir) for f in files)
         self.context.products.get(self.jvmdoc().product_type).add(target, gendir, jvmdocs)
 
+  def check_artifact_cache_for(self, invalidation_check):
+    if self.combined:
+      return [VersionedTargetSet.from_versioned_targets(invalidation_check.all_vts)]
+    else:
+      return super(JvmdocGen, self).check_artifact_cache_for(invalidation_check)
+
+  def _fingerprint_strategy(self, classpath):
+    buildroot = get_buildroot()
+    doc_data = [self.jvmdoc().tool_name,
+                'combined' if self.combined else 'individual',
+                'transitive' if self.transitive else 'roots']
+    doc_data.extend(self.jvm_options)
+    doc_data.extend(self.args)
+    doc_data.extend(classpath_entry_key(entry, buildroot) for entry in classpath)
+    return JvmdocFingerprintStrategy(doc_data)
+
   def _generate_combined(self, classpath, targets, create_jvmdoc_command):
-    gendir = os.path.join(self.workdir, 'combined')
+    """Returns True if combined docs were generated for the targets."""
+    gendir = self._combined_gendir()
     if targets:
       safe_mkdir(gendir, clean=True)
       command = create_jvmdoc_command(classpath, gendir, *targets)
       if command:
         self.context.log.debug("Running create_jvmdoc in %s with %s" % (gendir, " ".join(command)))
         result, gendir = create_jvmdoc(command, gendir)
-        self._handle_create_jvmdoc_result(targets, result, command)
-    if self.open:
-      binary_util.ui_open(os.path.join(gendir, 'index.html'))
+        return self._handle_create_jvmdoc_result(targets, result, command)
+    return False
 
   def _generate_individual(self, classpath, targets, create_jvmdoc_command):
+    """Returns the set of targets docs were generated for."""
+    generated_targets = set()
     jobs = {}
     for target in targets:
       gendir = self._gendir(target)
@@ -153,8 +274,8 @@ class JvmdocGen(JvmTask):
         jobs[gendir] = (target, command)
 
     if jobs:
-      with contextlib.closing(
-            multiprocessing.Pool(processes=min(len(jobs), multiprocessing.cpu_count()))) as pool:
+      workers = self._worker_count(len(jobs))
+      with contextlib.closing(multiprocessing.Pool(processes=workers)) as pool:
         # map would be a preferable api here but fails after the 1st batch with an internal:
         # ...
         #  File "...src/python/pants/backend/core/tasks/jar_create.py", line 170, in javadocjar
@@ -175,27 +296,46 @@ class JvmdocGen(JvmTask):
           for future in futures:
             result, gendir = future.get()
             target, command = jobs[gendir]
-            self._handle_create_jvmdoc_result([target], result, command)
+            if self._handle_create_jvmdoc_result([target], result, command):
+              generated_targets.add(target)
         finally:
           # In the event of an exception, we want to call terminate() because otherwise
           # we get errors on exit when multiprocessing tries to do it, because what
           # is dead may never die.
           pool.terminate()
           self.context.log.debug("End multiprocessing section")
+    return generated_targets
+
+  def _worker_count(self, num_jobs):
+    workers = self.workers
+    if workers <= 0:
+      workers = multiprocessing.cpu_count()
+      memory = physical_memory()
+      if memory:
+        # Each doc tool process is a JVM, and a handful of them can exhaust memory well before
+        # they exhaust the cores.
+        workers = min(workers, memory // jvm_heap_size(self.jvm_options, memory))
+    return max(1, min(num_jobs, workers))
 
   def _handle_create_jvmdoc_result(self, targets, result, command):
+    """Returns True if the docs were generated successfully."""
     if result != 0:
       targetlist = ", ".join(map(str, targets))
       message = 'Failed to process %s for %s [%d]: %s' % (
                 self.jvmdoc().tool_name, targetlist, result, command)
       if self.ignore_failure:
         self.context.log.warn(message)
+        return False
       else:
         raise TaskError(message)
+    return True
 
   def _gendir(self, target):
     return os.path.join(self.workdir, target.id)
 
+  def _combined_gendir(self):
+    return os.path.join(self.workdir, 'combined')
+
 
 def create_jvmdoc(command, gendir):
   try:
@@ -6,8 +6,11 @@ from __future__ import (nested_scopes, generators, division, absolute_import, wi
                         print_function, unicode_literals)
 
 from abc import abstractproperty
+from contextlib import contextmanager
 import os
 
+from twitter.common.lang import Compatibility
+
 from pants.backend.jvm.tasks.jvm_tool_task_mixin import JvmToolTaskMixin
 from pants.backend.core.tasks.task import Task, TaskBase
 from pants.base.exceptions import TaskError
@@ -16,6 +19,11 @@ from pants.java.distribution.distribution import Distribution
 from pants.java.executor import SubprocessExecutor
 from pants.java.nailgun_executor import NailgunExecutor
 
+if Compatibility.PY3:
+  import queue
+else:
+  import Queue as queue
+
 
 class NailgunTaskBase(TaskBase, JvmToolTaskMixin):
 
@@ -60,18 +68,51 @@ class NailgunTaskBase(TaskBase, JvmToolTaskMixin):
   def nailgun_is_enabled(self):
     return self.context.config.getbool(self.config_section, 'use_nailgun', default=True)
 
-  def create_java_executor(self):
+  def create_java_executor(self, instance=None):
     """Create java executor that uses this task's ng daemon, if allowed.
 
     Call only in execute() or later. TODO: Enforce this.
+
+    :param instance: Names one of several ng daemons for this task.  A nailgun server runs one java
+      main at a time, so tasks that run java concurrently should use a distinct instance for each
+      concurrent run (see java_executor_instances).
     """
     if self.nailgun_is_enabled and self.get_options().ng_daemons:
       classpath = os.pathsep.join(self.tool_classpath('nailgun-server'))
-      client = NailgunExecutor(self._executor_workdir, classpath, distribution=self._dist)
+      workdir = (self._executor_workdir if instance is None
+                 else '%s-%s' % (self._executor_workdir, instance))
+      client = NailgunExecutor(workdir, classpath, distribution=self._dist)
     else:
       client = SubprocessExecutor(self._dist)
     return client
 
+  def java_executor_instances(self, workers, family=None):
+    """Returns a context manager that reserves an executor instance for the calling thread.
+
+    Up to workers threads may hold an instance at once and each holds a distinct one, so the
+    executors they create with create_java_executor each have a nailgun server of their own.
+
+    :param int workers: The maximum number of threads that will hold an instance at once.
+    :param string family: Names this set of instances, so that sets used to run different tools
+      don't share nailgun servers.  By default a lone worker is handed the task's regular instance.
+    """
+    if workers > 1:
+      names = ['%s-%d' % (family, i) if family else i for i in range(workers)]
+    else:
+      names = [family]
+    instances = queue.Queue()
+    for name in names:
+      instances.put(name)
+
+    @contextmanager
+    def reserve():
+      instance = instances.get()
+      try:
+        yield instance
+      finally:
+        instances.put(instance)
+    return reserve
+
   @property
   def jvm_args(self):
     """Default jvm args the nailgun will be launched with.
@@ -82,14 +123,16 @@ class NailgunTaskBase(TaskBase, JvmToolTaskMixin):
     return self.context.config.getlist('nailgun', 'jvm_args', default=[])
 
   def runjava(self, classpath, main, jvm_options=None, args=None, workunit_name=None,
-              workunit_labels=None):
+              workunit_labels=None, executor=None):
     """Runs the java main using the given classpath and args.
 
     If --no-ng-daemons is specified then the java main is run in a freshly spawned subprocess,
     otherwise a persistent nailgun server dedicated to this Task subclass is used to speed up
     amortized run times.
+
+    :param executor: The java executor to run the main with; this task's default executor if None.
     """
-    executor = self.create_java_executor()
+    executor = executor or self.create_java_executor()
     try:
       return util.execute_java(classpath=classpath,
                                main=main,
@@ -102,6 +145,22 @@ class NailgunTaskBase(TaskBase, JvmToolTaskMixin):
     except executor.Error as e:
       raise TaskError(e)
 
+  def concurrent_runjava(self, workers):
+    """Returns a version of runjava that may be called from up to workers threads at once.
+
+    Each concurrent call runs in a java process of its own; with nailgun enabled each of the workers
+    gets a persistent nailgun server of its own.  The calling threads must be registered with the
+    run tracker (see RunTracker.register_thread) so their workunits have a parent.
+
+    :param int workers: The maximum number of concurrent calls that will be made.
+    """
+    instances = self.java_executor_instances(workers)
+
+    def runjava(*args, **kwargs):
+      with instances() as instance:
+        return self.runjava(*args, executor=self.create_java_executor(instance=instance), **kwargs)
+    return runjava
+
 
 class NailgunTask(NailgunTaskBase, Task):
   # TODO(John Sirois): This just prevents ripple - maybe inline
@@ -7,13 +7,20 @@ from __future__ import (nested_scopes, generators, division, absolute_import, wi
 
 import os
 import re
+import tempfile
 
+from pants.backend.jvm.tasks.checkstyle_report import log_messages, parse_report
 from pants.backend.jvm.tasks.jvm_tool_task_mixin import JvmToolTaskMixin
 from pants.backend.jvm.tasks.nailgun_task import NailgunTask
+from pants.base.build_environment import get_buildroot
+from pants.base.build_invalidator import BuildInvalidator, CacheKey
 from pants.base.config import Config
 from pants.base.exceptions import TaskError
+from pants.base.hash_utils import hash_all, hash_file
 from pants.base.target import Target
+from pants.base.workunit import WorkUnit
 from pants.process.xargs import Xargs
+from pants.util.dirutil import safe_mkdir
 
 
 class Scalastyle(NailgunTask, JvmToolTaskMixin):
@@ -33,6 +40,9 @@ class Scalastyle(NailgunTask, JvmToolTaskMixin):
     (e.g.: com/twitter/mybird/MyBird.scala). If not specified,
     all scala sources in the targets will be checked. If the file
     doesn't exist, the task will throw.
+
+  Sources that scalastyle finds nothing to report about are remembered, and are only checked
+  again once their contents, the scalastyle config or the scalastyle tool itself change.
   """
 
   _CONFIG_SECTION = 'scalastyle'
@@ -49,6 +59,8 @@ class Scalastyle(NailgunTask, JvmToolTaskMixin):
   def register_options(cls, register):
     super(Scalastyle, cls).register_options(register)
     register('--skip', action='store_true', help='Skip scalastyle.')
+    register('--workers', type=int, default=1,
+             help='Check sources in up to this many concurrent scalastyle runs.')
     cls.register_jvm_tool(register, 'scalastyle')
 
   def __init__(self, *args, **kwargs):
@@ -145,6 +157,18 @@ class Scalastyle(NailgunTask, JvmToolTaskMixin):
 
     return scala_sources
 
+  def _tool_fingerprint(self, classpath):
+    with open(self._scalastyle_config, 'rb') as fp:
+      config = fp.read()
+    return hash_all([config] + [hash_file(path) for path in classpath])
+
+  def _cache_key(self, source, tool_fingerprint):
+    # Sources are keyed by a digest of their path, since the invalidator's ids must be filenames.
+    return CacheKey(id=hash_all([source]),
+                    hash=hash_all([hash_file(os.path.join(get_buildroot(), source)),
+                                   tool_fingerprint]),
+                    num_chunking_units=1)
+
   def execute(self):
     if self._should_skip:
       self.context.log.info('Skipping scalastyle.')
@@ -160,13 +184,59 @@ class Scalastyle(NailgunTask, JvmToolTaskMixin):
     for source in scala_sources:
       self.context.log.debug('  {source}'.format(source=source))
 
-    if scala_sources:
+    if not scala_sources:
+      return
+
+    classpath = self.tool_classpath('scalastyle')
+    tool_fingerprint = self._tool_fingerprint(classpath)
+    invalidator = BuildInvalidator(os.path.join(self.workdir, 'checked'))
+    cache_keys = dict((source, self._cache_key(source, tool_fingerprint))
+                      for source in scala_sources)
+    invalid_sources = [source for source in scala_sources
+                       if invalidator.needs_update(cache_keys[source])]
+    if not invalid_sources:
+      self.context.log.info('All {count} scala sources are unchanged since they last passed '
+                            'scalastyle.'.format(count=len(scala_sources)))
+      return
+    self.context.log.info('Checking {invalid} of {count} scala sources.'.format(
+      invalid=len(invalid_sources), count=len(scala_sources)))
+
+    results_dir = os.path.join(self.workdir, 'results')
+    safe_mkdir(results_dir, clean=True)
+    workers = max(1, self.get_options().workers)
+    runjava = self.concurrent_runjava(workers)
+    messages = []  # Appended to from concurrent shards; list.extend is atomic.
+    checked_sources = []
+
+    with self.context.new_workunit(name='scalastyle', labels=[WorkUnit.MULTITOOL]) as workunit:
       def call(srcs):
-        cp = self.tool_classpath('scalastyle')
-        return self.runjava(classpath=cp,
-                            main=self._MAIN,
-                            args=['-c', self._scalastyle_config] + srcs)
-      result = Xargs(call).execute(scala_sources)
-      if result != 0:
-        raise TaskError('java {entry} ... exited non-zero ({exit_code})'.format(
-          entry=Scalastyle._MAIN, exit_code=result))
+        self.context.run_tracker.register_thread(workunit)
+        fd, xml_output = tempfile.mkstemp(dir=results_dir, suffix='.xml')
+        os.close(fd)
+        result = runjava(classpath=classpath,
+                         main=self._MAIN,
+                         args=['-c', self._scalastyle_config, '--xmlOutput', xml_output] + srcs)
+        try:
+          messages.extend(parse_report(xml_output))
+          checked_sources.extend(srcs)
+        except TaskError as e:
+          # Without results no source can be marked as passing, but the exit code still counts.
+          self.context.log.warn(str(e))
+          if result == 0:
+            result = 1
+        return result
+
+      result = Xargs(call, parallelism=workers, fail_fast=False).execute(invalid_sources)
+
+    log_messages(self.context.log, messages)
+
+    # Sources with anything at all to report are checked again next time so that their warnings
+    # keep being shown.
+    reported_sources = set(message.source for message in messages)
+    for source in checked_sources:
+      if source not in reported_sources:
+        invalidator.update(cache_keys[source])
+
+    if result != 0:
+      raise TaskError('java {entry} ... exited non-zero ({exit_code})'.format(
+        entry=Scalastyle._MAIN, exit_code=result))
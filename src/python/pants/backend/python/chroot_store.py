@@ -0,0 +1,98 @@
+# coding=utf-8
+# Copyright 2014 Pants project contributors (see CONTRIBUTORS.md).
+# Licensed under the Apache License, Version 2.0 (see LICENSE).
+
+from __future__ import (nested_scopes, generators, division, absolute_import, with_statement,
+                        print_function, unicode_literals)
+
+import errno
+import json
+import os
+import stat
+import tempfile
+
+from pants.fs.materialize import materialize
+from pants.util.dirutil import safe_mkdir, safe_rmtree
+
+
+class ChrootStore(object):
+  """A persistent store of PEX chroot layers.
+
+  A layer is a set of labelled chroot files plus the distributions they hold, stored under a key
+  that digests all the inputs used to build them.  Layers are linked into PEX chroots instead of
+  being rebuilt, so a key must change whenever any of those inputs do.
+
+  Stored files are private, read-only copies: later edits to the files a layer was built from
+  can't alter it, and nothing can write through a link from a chroot back into the store.
+  """
+
+  _MANIFEST = 'layer.json'
+  _FILES = 'files'
+
+  def __init__(self, root):
+    """
+    :param string root: The directory to store layers under.
+    """
+    self._root = root
+
+  def _layer_dir(self, key):
+    return os.path.join(self._root, key[:2], key[2:])
+
+  def link(self, key, builder):
+    """Links the layer stored under key into the given PEXBuilder's chroot.
+
+    :param string key: The key of the layer to link.
+    :param builder: The unfrozen PEXBuilder to link the layer into.
+    :returns: ``True`` if the layer was linked, ``False`` if there is no layer stored under key.
+    """
+    layer_dir = self._layer_dir(key)
+    try:
+      with open(os.path.join(layer_dir, self._MANIFEST)) as fp:
+        manifest = json.load(fp)
+    except (IOError, OSError, ValueError):
+      return False
+
+    files_dir = os.path.join(layer_dir, self._FILES)
+    chroot = builder.chroot()
+    for label, filenames in manifest['filesets'].items():
+      for filename in filenames:
+        chroot.link(os.path.join(files_dir, filename), filename, label=label or None)
+    for dist_name, dist_hash in manifest['distributions'].items():
+      builder.info.add_distribution(dist_name, dist_hash)
+    return True
+
+  def store(self, key, builder):
+    """Stores the contents of the given PEXBuilder's chroot as the layer for key.
+
+    If a layer is already stored under key it is kept and builder is ignored.
+
+    :param string key: The key to store the layer under.
+    :param builder: The unfrozen PEXBuilder whose chroot holds the layer.
+    """
+    layer_dir = self._layer_dir(key)
+    if os.path.exists(layer_dir):
+      return
+
+    safe_mkdir(os.path.dirname(layer_dir))
+    tmp_dir = tempfile.mkdtemp(dir=os.path.dirname(layer_dir), prefix='.%s.' % os.path.basename(key))
+    try:
+      filesets = {}
+      for label, filenames in builder.chroot().filesets.items():
+        for filename in filenames:
+          dst = os.path.join(tmp_dir, self._FILES, filename)
+          materialize(os.path.join(builder.path(), filename), dst, allow_hardlink=False)
+          os.chmod(dst, os.stat(dst).st_mode & ~(stat.S_IWUSR | stat.S_IWGRP | stat.S_IWOTH))
+        filesets[label or ''] = sorted(filenames)
+
+      manifest = dict(filesets=filesets, distributions=dict(builder.info.distributions))
+      with open(os.path.join(tmp_dir, self._MANIFEST), 'w') as fp:
+        json.dump(manifest, fp)
+
+      # The manifest is in place before the rename, so readers never see a partial layer.
+      os.rename(tmp_dir, layer_dir)
+    except OSError as e:
+      # Another process stored the same layer first.
+      if e.errno not in (errno.EEXIST, errno.ENOTEMPTY):
+        raise
+    finally:
+      safe_rmtree(tmp_dir)
@@ -5,9 +5,13 @@
 from __future__ import (nested_scopes, generators, division, absolute_import, with_statement,
                         print_function, unicode_literals)
 
+import json
+import multiprocessing
+from multiprocessing.pool import ThreadPool
 import os
 from pkg_resources import Requirement
 import shutil
+import tempfile
 
 from pex.archiver import Archiver
 from pex.crawler import Crawler
@@ -18,7 +22,7 @@ from pex.package import EggPackage, SourcePackage
 
 from pants.backend.python.python_setup import PythonSetup
 from pants.backend.python.resolver import context_from_config, fetchers_from_config
-from pants.util.dirutil import safe_mkdir
+from pants.util.dirutil import safe_delete, safe_mkdir
 
 
 # TODO(wickman) Create a safer version of this and add to twitter.common.dirutil
@@ -96,19 +100,87 @@ def _failsafe_parse(requirement):
     return Requirement.parse(requirement)
 
 
-def _resolve(config, interpreter, logger=print):
-  """Resolve and cache an interpreter with a setuptools and wheel capability."""
-
+def _required_extras(config):
+  """Returns the setuptools and wheel requirements every cached interpreter must satisfy."""
   setuptools_requirement = _failsafe_parse(
       'setuptools==%s' % config.get('python-setup', 'setuptools_version', default='5.4.1'))
   wheel_requirement = _failsafe_parse(
       'wheel==%s' % config.get('python-setup', 'wheel_version', default='0.23.0'))
+  return setuptools_requirement, wheel_requirement
+
+
+def _resolve(config, interpreter, logger=print):
+  """Resolve and cache an interpreter with a setuptools and wheel capability."""
+
+  setuptools_requirement, wheel_requirement = _required_extras(config)
 
   interpreter = _resolve_interpreter(config, interpreter, setuptools_requirement, logger=logger)
   if interpreter:
     return _resolve_interpreter(config, interpreter, wheel_requirement, logger=logger)
 
 
+class _InterpreterIndex(object):
+  """A persistent index of what is known about python binaries, keyed by binary path.
+
+  An entry records a binary's identity, or None if it could not be identified, and optionally the
+  extras it was resolved with.  Entries are only trusted while the binary's mtime, size and inode
+  are unchanged.
+  """
+
+  def __init__(self, path):
+    self._path = path
+    self._entries = self._load()
+    self._dirty = False
+
+  def _load(self):
+    try:
+      with open(self._path) as fp:
+        entries = json.load(fp)
+    except (IOError, OSError, ValueError):
+      return {}
+    return entries if isinstance(entries, dict) else {}
+
+  @staticmethod
+  def _fingerprint(binary):
+    try:
+      st = os.stat(binary)
+    except OSError:
+      return None
+    return [st.st_mtime, st.st_size, st.st_ino]
+
+  def get(self, binary):
+    """Returns the entry recorded for binary, or None if there is none or binary has changed."""
+    entry = self._entries.get(binary)
+    if entry is None or entry.get('fingerprint') != self._fingerprint(binary):
+      return None
+    return entry
+
+  def update(self, binary, **fields):
+    """Records fields for binary, discarding any entry recorded for an earlier version of it."""
+    fingerprint = self._fingerprint(binary)
+    if fingerprint is None:
+      return
+    entry = self.get(binary) or dict(fingerprint=fingerprint)
+    entry.update(fields)
+    self._entries[binary] = entry
+    self._dirty = True
+
+  def save(self):
+    """Writes the index back to disk if it has changed."""
+    if not self._dirty:
+      return
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(self._path),
+                               prefix='.%s.' % os.path.basename(self._path))
+    try:
+      with os.fdopen(fd, 'w') as fp:
+        json.dump(self._entries, fp)
+      os.rename(tmp, self._path)
+    except (IOError, OSError):
+      safe_delete(tmp)
+      raise
+    self._dirty = False
+
+
 class PythonInterpreterCache(object):
   @staticmethod
   def _cache_dir(config):
@@ -137,6 +209,8 @@ class PythonInterpreterCache(object):
       return compatibilities
     return [min(compatibilities)] if compatibilities else []
 
+  _INDEX = 'index.json'
+
   def __init__(self, config, logger=None):
     self._path = self._cache_dir(config)
     self._config = config
@@ -144,6 +218,7 @@ class PythonInterpreterCache(object):
     self._interpreters = set()
     self._logger = logger or (lambda msg: True)
     self._default_filters = (PythonInterpreterCache._interpreter_requirement(config) or b'',)
+    self._index = _InterpreterIndex(os.path.join(self._path, self._INDEX))
 
   @property
   def interpreters(self):
@@ -159,25 +234,87 @@ class PythonInterpreterCache(object):
       return None
     interpreter = PythonInterpreter(executable, identity)
     if self._matches(interpreter, filters):
-      return _resolve(self._config, interpreter, logger=self._logger)
+      return self._resolve(interpreter)
     return None
 
+  def _resolve(self, interpreter):
+    entry = self._index.get(interpreter.binary)
+    if entry and entry.get('identity') == str(interpreter.identity) and 'extras' in entry:
+      extras = dict(((key, version), location) for key, version, location in entry['extras'])
+      resolved = PythonInterpreter(interpreter.binary, interpreter.identity, extras=extras)
+      if (resolved.satisfies(list(_required_extras(self._config))) and
+          all(os.path.exists(location) for location in extras.values())):
+        return resolved
+
+    resolved = _resolve(self._config, interpreter, logger=self._logger)
+    if resolved:
+      self._index.update(interpreter.binary,
+                         identity=str(interpreter.identity),
+                         extras=[[key, version, location]
+                                 for (key, version), location in resolved.extras.items()])
+    return resolved
+
   def _setup_interpreter(self, interpreter):
     interpreter_dir = os.path.join(self._path, str(interpreter.identity))
     safe_mkdir(interpreter_dir)
     _safe_link(interpreter.binary, os.path.join(interpreter_dir, 'python'))
-    return _resolve(self._config, interpreter, logger=self._logger)
+    return self._resolve(interpreter)
 
   def _setup_cached(self, filters):
     for interpreter_dir in os.listdir(self._path):
       path = os.path.join(self._path, interpreter_dir)
+      if not os.path.isdir(path):
+        continue
       pi = self._interpreter_from_path(path, filters)
       if pi:
         self._logger('Detected interpreter %s: %s' % (pi.binary, str(pi.identity)))
         self._interpreters.add(pi)
 
+  def _probe(self, binary):
+    try:
+      return PythonInterpreter.from_binary(binary)
+    except Exception as e:
+      self._logger('Could not identify %s: %s' % (binary, e))
+      return None
+
+  def _find_interpreters(self, paths):
+    """Finds the interpreters on paths as `PythonInterpreter.all` does.
+
+    Binaries recorded in the index are not executed again unless they have changed since; the
+    rest are probed concurrently.
+    """
+    binaries = [fn for path in paths for fn in PythonInterpreter.expand_path(path)
+                if any(matcher.match(os.path.basename(fn)) for matcher in PythonInterpreter.REGEXEN)]
+
+    identities = {}
+    to_probe = []
+    for binary in binaries:
+      entry = self._index.get(binary)
+      if entry is None:
+        to_probe.append(binary)
+      elif entry['identity'] is not None:
+        identities[binary] = PythonIdentity.from_path(entry['identity'])
+
+    if to_probe:
+      pool = ThreadPool(processes=min(len(to_probe), multiprocessing.cpu_count()))
+      try:
+        # We need to specify a timeout explicitly, because otherwise python ignores SIGINT when
+        # waiting on a condition variable, so we won't be able to ctrl-c out.
+        probed = pool.map_async(self._probe, to_probe, chunksize=1).get(timeout=1000000000)
+      finally:
+        pool.close()
+        pool.join()
+      for binary, interpreter in zip(to_probe, probed):
+        identity = interpreter.identity if interpreter else None
+        self._index.update(binary, identity=str(identity) if identity else None)
+        if identity:
+          identities[binary] = identity
+
+    return PythonInterpreter.filter([PythonInterpreter(binary, identities[binary])
+                                     for binary in binaries if binary in identities])
+
   def _setup_paths(self, paths, filters):
-    for interpreter in self._matching(PythonInterpreter.all(paths), filters):
+    for interpreter in self._matching(self._find_interpreters(paths), filters):
       identity_str = str(interpreter.identity)
       path = os.path.join(self._path, identity_str)
       pi = self._interpreter_from_path(path, filters)
@@ -212,14 +349,17 @@ class PythonInterpreterCache(object):
     has_setup = False
     filters = self._default_filters if not any(filters) else filters
     setup_paths = paths or os.getenv('PATH').split(os.pathsep)
-    self._setup_cached(filters)
-    if force:
-      has_setup = True
-      self._setup_paths(setup_paths, filters)
-    matches = list(self.matches(filters))
-    if len(matches) == 0 and not has_setup:
-      self._setup_paths(setup_paths, filters)
+    try:
+      self._setup_cached(filters)
+      if force:
+        has_setup = True
+        self._setup_paths(setup_paths, filters)
       matches = list(self.matches(filters))
+      if len(matches) == 0 and not has_setup:
+        self._setup_paths(setup_paths, filters)
+        matches = list(self.matches(filters))
+    finally:
+      self._index.save()
     if len(matches) == 0:
       self._logger('Found no valid interpreters!')
     return matches
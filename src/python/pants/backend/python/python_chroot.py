@@ -6,11 +6,15 @@ from __future__ import (nested_scopes, generators, division, absolute_import, wi
                         print_function, unicode_literals)
 
 from collections import defaultdict
+import errno
+import hashlib
 import logging
 import os
 import shutil
 import sys
 import tempfile
+import threading
+import time
 
 from pex.interpreter import PythonInterpreter
 from pex.pex_builder import PEXBuilder
@@ -22,22 +26,116 @@ from pants.backend.codegen.targets.python_thrift_library import PythonThriftLibr
 from pants.backend.core.targets.dependencies import Dependencies
 from pants.backend.core.targets.prep_command import PrepCommand
 from pants.backend.python.antlr_builder import PythonAntlrBuilder
+from pants.backend.python.chroot_store import ChrootStore
 from pants.backend.python.python_requirement import PythonRequirement
 from pants.backend.python.python_setup import PythonSetup
-from pants.backend.python.resolver import resolve_multi
+from pants.backend.python.resolver import get_platforms, resolve_multi
 from pants.backend.python.targets.python_binary import PythonBinary
 from pants.backend.python.targets.python_library import PythonLibrary
 from pants.backend.python.targets.python_requirement_library import PythonRequirementLibrary
 from pants.backend.python.targets.python_tests import PythonTests
 from pants.backend.python.thrift_builder import PythonThriftBuilder
 from pants.base.build_environment import get_buildroot
-from pants.base.build_invalidator import BuildInvalidator, CacheKeyGenerator
+from pants.base.build_invalidator import CacheKeyGenerator
 from pants.base.config import Config
 from pants.util.dirutil import safe_mkdir, safe_rmtree
 
 
 logger = logging.getLogger(__name__)
 
+
+def _unique_distributions(distributions):
+  locations = set()
+  for platform, dist_set in distributions.items():
+    for dist in dist_set:
+      if dist.location not in locations:
+        yield dist
+      locations.add(dist.location)
+
+
+def _chroot_store(config):
+  return ChrootStore(PythonSetup(config).scratch_dir('chroot_cache', default_name='chroots'))
+
+
+def _layer_key(*components):
+  hasher = hashlib.sha1()
+  for component in components:
+    hasher.update(component.encode('utf-8'))
+    hasher.update(b'\0')
+  return hasher.hexdigest()
+
+
+class RequirementsCache(object):
+  """Shares requirement resolution amongst chroots, both within a run and across runs.
+
+  The distributions resolved for each unique (requirement set, interpreter, platforms) are stored
+  once as a chroot layer that every chroot needing the same set is then layered over.
+  """
+
+  def __init__(self, config=None, ttl=3600):
+    """
+    :param config: The pants :class:`Config`; the cached config by default.
+    :param int ttl: Time in seconds before resolutions involving open-ended requirements, e.g.
+      "flask>=0.2", are redone.  Defaults to 3600.
+    """
+    self._config = config
+    self._ttl = ttl
+    # Each requirement set is resolved at most once at a time; distinct sets resolve concurrently.
+    self._lock = threading.Lock()
+    self._key_locks = defaultdict(threading.Lock)
+
+  def _key(self, config, requirements, interpreter, platforms, find_links):
+    platforms = get_platforms(platforms or config.getlist('python-setup', 'platforms', ['current']))
+    components = ['requirements', str(interpreter.identity)]
+    components.extend(sorted(set(req.cache_key() for req in requirements)))
+    components.append('platforms')
+    components.extend(sorted(platforms))
+    components.append('repos')
+    components.extend(config.getlist('python-repos', 'repos', []))
+    components.extend(config.getlist('python-repos', 'indices', []))
+    components.extend(sorted(find_links or ()))
+    if not all(len(req.specs) == 1 and req.specs[0][0] == '==' for req in requirements):
+      # Open-ended requirements are only good for the current ttl period.
+      components.append(str(int(time.time() // self._ttl)))
+    return _layer_key(*components)
+
+  def dump(self, builder, requirements, interpreter, platforms=None, find_links=None):
+    """Adds the distributions resolved for requirements to the given PEXBuilder.
+
+    :param builder: The unfrozen PEXBuilder to add the distributions to.
+    :param requirements: The :class:`PythonRequirement` objects to resolve.
+    :param interpreter: The :class:`PythonInterpreter` to resolve for.
+    :param platforms: The platforms to resolve for; the configured defaults if None.
+    :param find_links: Additional paths to search for source packages during resolution.
+    """
+    config = self._config or Config.from_cache()
+    store = _chroot_store(config)
+    key = self._key(config, requirements, interpreter, platforms, find_links)
+    if store.link(key, builder):
+      return
+
+    with self._lock:
+      key_lock = self._key_locks[key]
+    with key_lock:
+      # Another thread may have stored the layer while we waited.
+      if store.link(key, builder):
+        return
+
+      layer = PEXBuilder(interpreter=interpreter)
+      try:
+        distributions = resolve_multi(config,
+                                      requirements,
+                                      interpreter=interpreter,
+                                      platforms=platforms,
+                                      find_links=find_links)
+        for dist in _unique_distributions(distributions):
+          layer.add_distribution(dist)
+        store.store(key, layer)
+      finally:
+        layer.chroot().delete()
+    store.link(key, builder)
+
+
 class PythonChroot(object):
   _VALID_DEPENDENCIES = {
     PrepCommand: 'prep',
@@ -51,6 +149,9 @@ class PythonChroot(object):
 
   MEMOIZED_THRIFTS = {}
 
+  # Chroots may be dumped concurrently; codegen writes to a shared egg cache.
+  _GENERATE_LOCK = threading.RLock()
+
   class InvalidDependencyException(Exception):
     def __init__(self, target):
       Exception.__init__(self, "Not a valid Python dependency! Found: %s" % target)
@@ -60,7 +161,12 @@ class PythonChroot(object):
                extra_requirements=None,
                builder=None,
                platforms=None,
-               interpreter=None):
+               interpreter=None,
+               requirements_cache=None):
+    """
+    :param requirements_cache: An optional :class:`RequirementsCache` to share resolved
+      distributions through; by default this chroot uses its own.
+    """
     self._config = Config.from_cache()
     self._targets = targets
     self._extra_requirements = list(extra_requirements) if extra_requirements else []
@@ -68,6 +174,8 @@ class PythonChroot(object):
     self._interpreter = interpreter or PythonInterpreter.get()
     self._builder = builder or PEXBuilder(os.path.realpath(tempfile.mkdtemp()),
                                           interpreter=self._interpreter)
+    self._requirements_cache = requirements_cache or RequirementsCache(self._config)
+    self._store = _chroot_store(self._config)
 
     # Note: unrelated to the general pants artifact cache.
     self._egg_cache_root = os.path.join(
@@ -75,7 +183,6 @@ class PythonChroot(object):
         str(self._interpreter.identity))
 
     self._key_generator = CacheKeyGenerator()
-    self._build_invalidator = BuildInvalidator( self._egg_cache_root)
 
   def delete(self):
     """Deletes this chroot from disk if it has been dumped."""
@@ -98,15 +205,37 @@ class PythonChroot(object):
   def path(self):
     return os.path.realpath(self._builder.path())
 
+  def _library_layer_key(self, library):
+    # Sources are compiled to .pyc by this interpreter, so its version is an input too.
+    components = ['library', sys.version, library.id, library.target_base,
+                  library.invalidation_hash()]
+    for resources_tgt in library.resources:
+      components.extend([resources_tgt.id, resources_tgt.target_base,
+                         resources_tgt.invalidation_hash()])
+    return _layer_key(*components)
+
   def _dump_library(self, library):
+    self.debug('  Dumping library: %s' % library)
+    key = self._library_layer_key(library)
+    if self._store.link(key, self._builder):
+      return
+
+    layer = PEXBuilder(interpreter=self._interpreter)
+    try:
+      self._dump_library_files(library, layer)
+      self._store.store(key, layer)
+    finally:
+      layer.chroot().delete()
+    self._store.link(key, self._builder)
+
+  def _dump_library_files(self, library, builder):
     def copy_to_chroot(base, path, add_function):
       src = os.path.join(get_buildroot(), base, path)
       add_function(src, path)
 
-    self.debug('  Dumping library: %s' % library)
     for relpath in library.sources_relative_to_source_root():
       try:
-        copy_to_chroot(library.target_base, relpath, self._builder.add_source)
+        copy_to_chroot(library.target_base, relpath, builder.add_source)
       except OSError as e:
         logger.error("Failed to copy {path} for library {library}"
                      .format(path=os.path.join(library.target_base, relpath),
@@ -117,7 +246,7 @@ class PythonChroot(object):
       for resource_file_from_source_root in resources_tgt.sources_relative_to_source_root():
         try:
           copy_to_chroot(resources_tgt.target_base, resource_file_from_source_root,
-                         self._builder.add_resource)
+                         builder.add_resource)
         except OSError as e:
           logger.error("Failed to copy {path} for resource {resource}"
                        .format(path=os.path.join(resources_tgt.target_base,
@@ -129,20 +258,27 @@ class PythonChroot(object):
     self.debug('  Dumping requirement: %s' % req)
     self._builder.add_requirement(req)
 
-  def _dump_distribution(self, dist):
-    self.debug('  Dumping distribution: .../%s' % os.path.basename(dist.location))
-    self._builder.add_distribution(dist)
-
   def _generate_requirement(self, library, builder_cls):
     library_key = self._key_generator.key_for_target(library)
     builder = builder_cls(library, get_buildroot(), self._config, '-' + library_key.hash[:8])
 
-    cache_dir = os.path.join(self._egg_cache_root, library_key.id)
-    if self._build_invalidator.needs_update(library_key):
-      sdist = builder.build(interpreter=self._interpreter)
-      safe_mkdir(cache_dir)
-      shutil.copy(sdist, os.path.join(cache_dir, os.path.basename(sdist)))
-      self._build_invalidator.update(library_key)
+    # Generated sdists are stored by the digest of their IDL, so any sdist already generated for
+    # the same sources is reused.
+    cache_dir = os.path.join(self._egg_cache_root, library_key.hash)
+    with self._GENERATE_LOCK:
+      if not os.path.isdir(cache_dir):
+        sdist = builder.build(interpreter=self._interpreter)
+        safe_mkdir(self._egg_cache_root)
+        tmp_dir = tempfile.mkdtemp(dir=self._egg_cache_root, prefix='.%s.' % library_key.hash)
+        try:
+          shutil.copy(sdist, os.path.join(tmp_dir, os.path.basename(sdist)))
+          os.rename(tmp_dir, cache_dir)
+        except OSError as e:
+          # Another process generated the same sdist first.
+          if e.errno not in (errno.EEXIST, errno.ENOTEMPTY):
+            raise
+        finally:
+          safe_rmtree(tmp_dir)
 
     return PythonRequirement(builder.requirement_string(), repository=cache_dir, use_2to3=True)
 
@@ -176,8 +312,9 @@ class PythonChroot(object):
     generated_reqs = OrderedSet()
     if targets['thrifts']:
       for thr in set(targets['thrifts']):
-        if thr not in self.MEMOIZED_THRIFTS:
-          self.MEMOIZED_THRIFTS[thr] = self._generate_thrift_requirement(thr)
+        with self._GENERATE_LOCK:
+          if thr not in self.MEMOIZED_THRIFTS:
+            self.MEMOIZED_THRIFTS[thr] = self._generate_thrift_requirement(thr)
         generated_reqs.add(self.MEMOIZED_THRIFTS[thr])
 
       generated_reqs.add(PythonRequirement('thrift', use_2to3=True))
@@ -202,19 +339,11 @@ class PythonChroot(object):
       if req.repository:
         find_links.append(req.repository)
 
-    distributions = resolve_multi(
-         self._config,
-         reqs_to_build,
-         interpreter=self._interpreter,
-         platforms=self._platforms,
-         find_links=find_links)
-
-    locations = set()
-    for platform, dist_set in distributions.items():
-      for dist in dist_set:
-        if dist.location not in locations:
-          self._dump_distribution(dist)
-        locations.add(dist.location)
+    self._requirements_cache.dump(self._builder,
+                                  reqs_to_build,
+                                  self._interpreter,
+                                  platforms=self._platforms,
+                                  find_links=find_links)
 
     if len(targets['binaries']) > 1:
       print('WARNING: Target has multiple python_binary targets!', file=sys.stderr)
@@ -5,6 +5,10 @@
 from __future__ import (nested_scopes, generators, division, absolute_import, with_statement,
                         print_function, unicode_literals)
 
+from collections import defaultdict
+from multiprocessing.pool import ThreadPool
+import threading
+
 from pex.fetcher import Fetcher, PyPIFetcher
 from pex.crawler import Crawler
 from pex.http import Context
@@ -35,6 +39,38 @@ def context_from_config(config):
   return Context.get()
 
 
+class _SharedContext(Context):
+  """Wraps a Context so that concurrent resolves share their network traffic.
+
+  Index pages are read once and their content remembered, and concurrent fetches of the same link
+  are collapsed into a single download.
+  """
+
+  def __init__(self, context):
+    self._context = context
+    self._lock = threading.Lock()
+    self._link_locks = defaultdict(threading.Lock)
+    self._contents = {}
+
+  def _link_lock(self, link):
+    with self._lock:
+      return self._link_locks[link.url]
+
+  def open(self, link):
+    return self._context.open(link)
+
+  def content(self, link):
+    with self._link_lock(link):
+      if link.url not in self._contents:
+        # Failed reads raise and so are retried by the next caller.
+        self._contents[link.url] = self._context.content(link)
+      return self._contents[link.url]
+
+  def fetch(self, link, into=None):
+    with self._link_lock(link):
+      return self._context.fetch(link, into=into)
+
+
 def resolve_multi(config,
                   requirements,
                   interpreter=None,
@@ -57,6 +93,8 @@ def resolve_multi(config,
                  "flask>=0.2" if a matching distribution is available on disk.  Defaults
                  to 3600.
      :param find_links: Additional paths to search for source packages during resolution.
+
+     Each platform is resolved concurrently; the resolves share index page crawls and downloads.
   """
   distributions = dict()
   interpreter = interpreter or PythonInterpreter.get()
@@ -68,10 +106,10 @@ def resolve_multi(config,
   fetchers = fetchers_from_config(config)
   if find_links:
     fetchers.extend(Fetcher([path]) for path in find_links)
-  context = context_from_config(config)
+  context = _SharedContext(context_from_config(config))
 
-  for platform in platforms:
-    distributions[platform] = resolve(
+  def resolve_for(platform):
+    return resolve(
         requirements=requirements,
         interpreter=interpreter,
         fetchers=fetchers,
@@ -80,4 +118,18 @@ def resolve_multi(config,
         cache=cache,
         cache_ttl=ttl)
 
+  if len(platforms) == 1:
+    distributions[platforms[0]] = resolve_for(platforms[0])
+    return distributions
+
+  pool = ThreadPool(processes=len(platforms))
+  try:
+    # We need to specify a timeout explicitly, because otherwise python ignores SIGINT when
+    # waiting on a condition variable, so we won't be able to ctrl-c out.
+    results = pool.map_async(resolve_for, platforms, chunksize=1).get(timeout=1000000000)
+  finally:
+    pool.close()
+    pool.join()
+
+  distributions.update(zip(platforms, results))
   return distributions
@@ -5,30 +5,77 @@
 from __future__ import (nested_scopes, generators, division, absolute_import, with_statement,
                         print_function, unicode_literals)
 
+import hashlib
 import os
+import shutil
 
 from pants.base.exceptions import TaskError
+from pants.base.fingerprint_strategy import FingerprintStrategy
 from pants.base.workunit import WorkUnit
 from pants.backend.python.test_builder import PythonTestBuilder
 from pants.backend.python.targets.python_tests import PythonTests
 from pants.backend.python.tasks.python_task import PythonTask
 from pants.util.contextutil import environment_as
+from pants.util.dirutil import safe_mkdir, safe_mkdir_for, safe_rmtree
 from pants.util.strutil import safe_shlex_split
 
 
+class PythonTestFingerprintStrategy(FingerprintStrategy):
+  """A FingerprintStrategy that also keys test targets on the environment their tests run in."""
+
+  def __init__(self, run_data):
+    """
+    :param run_data: A list of strings describing the test run, such as the interpreter identity
+      and the pytest args.  Order matters.
+    """
+    self.run_data = tuple(run_data)
+
+  def compute_fingerprint(self, target):
+    target_fp = target.payload.fingerprint()
+
+    if not isinstance(target, PythonTests):
+      return target_fp
+
+    hasher = hashlib.sha1()
+    hasher.update(target_fp)
+    for datum in self.run_data:
+      hasher.update(datum.encode('utf-8'))
+      hasher.update(b'\0')
+    return hasher.hexdigest()
+
+  def __hash__(self):
+    return hash((type(self), self.run_data))
+
+  def __eq__(self, other):
+    return type(self) == type(other) and self.run_data == other.run_data
+
+
 class PytestRun(PythonTask):
+  # Environment variables that change how tests run and so what their results are.
+  _CACHE_KEY_ENV_VARS = ('JUNIT_XML_BASE', 'PANTS_PY_COVERAGE', 'PYTHONPATH')
+
   @classmethod
   def register_options(cls, register):
     super(PytestRun, cls).register_options(register)
     register('--fast', action='store_true', default=True,
              help='Run all tests in a single chroot. If turned off, each test target will '
                   'create a new chroot, which will be much slower.')
+    register('--workers', type=int, default=1,
+             help='If --fast is turned off, run up to this many test targets concurrently.')
     register('--options', action='append', help='Pass these options to pytest.')
+    register('--cache-results', action='store_true', default=False,
+             help='Skip test targets that passed before and whose sources, dependencies, '
+                  'interpreter and pytest args have not changed since, restoring their saved '
+                  'results instead.  Results are shared through the artifact cache if configured.')
 
   @classmethod
   def supports_passthru_args(cls):
     return True
 
+  def __init__(self, *args, **kwargs):
+    super(PytestRun, self).__init__(*args, **kwargs)
+    self.setup_artifact_cache()
+
   def execute(self):
     def is_python_test(target):
       # Note that we ignore PythonTestSuite, because we'll see the PythonTests targets
@@ -46,20 +93,115 @@ class PytestRun(PythonTask):
       args = [] if self.get_options().no_colors else ['--color', 'yes']
       for options in self.get_options().options + self.get_passthru_args():
         args.extend(safe_shlex_split(options))
-      test_builder = PythonTestBuilder(targets=test_targets,
-                                       args=args,
-                                       interpreter=self.interpreter,
-                                       fast=self.get_options().fast,
-                                       debug=debug)
-      with self.context.new_workunit(name='run',
-                                     labels=[WorkUnit.TOOL, WorkUnit.TEST]) as workunit:
-        # pytest uses py.io.terminalwriter for output. That class detects the terminal
-        # width and attempts to use all of it. However we capture and indent the console
-        # output, leading to weird-looking line wraps. So we trick the detection code
-        # into thinking the terminal window is narrower than it is.
-        cols = os.environ.get('COLUMNS', 80)
-        with environment_as(COLUMNS=str(int(cols) - 30)):
-          stdout = workunit.output('stdout') if workunit else None
-          stderr = workunit.output('stderr') if workunit else None
-          if test_builder.run(stdout=stdout, stderr=stderr):
-            raise TaskError()
+      if self.get_options().cache_results:
+        self._run_cached(test_targets, args, debug)
+      else:
+        self._run(test_targets, args, debug)
+
+  def _run(self, targets, args, debug, result_callback=None):
+    test_builder = PythonTestBuilder(targets=targets,
+                                     args=args,
+                                     interpreter=self.interpreter,
+                                     fast=self.get_options().fast,
+                                     debug=debug,
+                                     workers=self.get_options().workers,
+                                     result_callback=result_callback,
+                                     test_event_callback=self._record_test_event)
+    with self.context.new_workunit(name='run',
+                                   labels=[WorkUnit.TOOL, WorkUnit.TEST]) as workunit:
+      # pytest uses py.io.terminalwriter for output. That class detects the terminal
+      # width and attempts to use all of it. However we capture and indent the console
+      # output, leading to weird-looking line wraps. So we trick the detection code
+      # into thinking the terminal window is narrower than it is.
+      cols = os.environ.get('COLUMNS', 80)
+      with environment_as(COLUMNS=str(int(cols) - 30)):
+        stdout = workunit.output('stdout') if workunit else None
+        stderr = workunit.output('stderr') if workunit else None
+        if test_builder.run(stdout=stdout, stderr=stderr):
+          raise TaskError()
+
+  def _record_test_event(self, name, outcome, duration):
+    self.context.run_tracker.test_timings.add_timing(name, duration, outcome)
+
+  def _run_cached(self, targets, args, debug):
+    # A target is only marked valid once its results are saved, so that they can be restored when
+    # it is skipped.  In fast mode all targets share one junit xml file and one set of coverage
+    # data, so targets only have results of their own when neither is asked for.
+    if self.get_options().fast and (os.getenv('JUNIT_XML_BASE') or
+                                    'PANTS_PY_COVERAGE' in os.environ):
+      self.context.log.warn('Test results are not cached in --fast mode when junit xml or '
+                            'coverage results are requested.')
+      self._run(targets, args, debug)
+      return
+
+    run_data = [str(self.interpreter.identity)] + args
+    run_data.extend('%s=%s' % (name, os.environ.get(name, '')) for name in self._CACHE_KEY_ENV_VARS)
+
+    with self.invalidated(targets,
+                          invalidate_dependents=True,
+                          partition_size_hint=0,
+                          fingerprint_strategy=PythonTestFingerprintStrategy(run_data),
+                          silent=True) as invalidation_check:
+      cached_targets = [vt.target for vt in invalidation_check.all_vts if vt.valid]
+      if cached_targets:
+        self._report_targets('Skipping tests with cached results for ', cached_targets, '.')
+        for target in cached_targets:
+          self._restore_results(target)
+
+      invalid_vts_by_target = dict((vt.target, vt) for vt in invalidation_check.invalid_vts)
+      if not invalid_vts_by_target:
+        return
+
+      vts_artifactfiles_pairs = []
+
+      def record_result(target, result):
+        vt = invalid_vts_by_target.get(target)
+        if vt and result.success:
+          vts_artifactfiles_pairs.append((vt, [self._save_results(target)]))
+          vt.update()
+
+      try:
+        self._run([vt.target for vt in invalidation_check.invalid_vts], args, debug,
+                  result_callback=record_result)
+      finally:
+        if vts_artifactfiles_pairs and self.artifact_cache_writes_enabled():
+          self.update_artifact_cache(vts_artifactfiles_pairs)
+
+  def _results_dir(self, target):
+    return os.path.join(self.workdir, 'results', target.id)
+
+  def _save_results(self, target):
+    results_dir = self._results_dir(target)
+    safe_mkdir(results_dir, clean=True)
+
+    junit_xml = PythonTestBuilder.junit_xml_path([target])
+    if junit_xml and os.path.isfile(junit_xml):
+      shutil.copy(junit_xml, os.path.join(results_dir, 'junit.xml'))
+
+    if 'PANTS_PY_COVERAGE' in os.environ:
+      if os.path.isfile('.coverage'):
+        shutil.copy('.coverage', os.path.join(results_dir, 'coverage.data'))
+      coverage_report = PythonTestBuilder.coverage_report_dir([target])
+      if os.path.isdir(coverage_report):
+        shutil.copytree(coverage_report, os.path.join(results_dir, 'coverage'))
+
+    return results_dir
+
+  def _restore_results(self, target):
+    results_dir = self._results_dir(target)
+
+    junit_xml = PythonTestBuilder.junit_xml_path([target])
+    saved_junit_xml = os.path.join(results_dir, 'junit.xml')
+    if junit_xml and os.path.isfile(saved_junit_xml):
+      safe_mkdir_for(junit_xml)
+      shutil.copy(saved_junit_xml, junit_xml)
+
+    if 'PANTS_PY_COVERAGE' in os.environ:
+      saved_coverage_data = os.path.join(results_dir, 'coverage.data')
+      if os.path.isfile(saved_coverage_data):
+        shutil.copy(saved_coverage_data, '.coverage')
+      saved_coverage_report = os.path.join(results_dir, 'coverage')
+      if os.path.isdir(saved_coverage_report):
+        coverage_report = PythonTestBuilder.coverage_report_dir([target])
+        safe_rmtree(coverage_report)
+        shutil.copytree(saved_coverage_report, coverage_report)
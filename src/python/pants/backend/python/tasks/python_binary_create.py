@@ -5,16 +5,23 @@
 from __future__ import (nested_scopes, generators, division, absolute_import, with_statement,
                         print_function, unicode_literals)
 
+from multiprocessing.pool import ThreadPool
 import os
 import time
 
-from pants.backend.python.python_chroot import PythonChroot
+from pants.backend.python.python_chroot import PythonChroot, RequirementsCache
 from pants.backend.python.targets.python_binary import PythonBinary
 from pants.backend.python.tasks.python_task import PythonTask
 from pants.base.exceptions import TaskError
 
 
 class PythonBinaryCreate(PythonTask):
+  @classmethod
+  def register_options(cls, register):
+    super(PythonBinaryCreate, cls).register_options(register)
+    register('--workers', type=int, default=1,
+             help='Build up to this many binaries concurrently.')
+
   @staticmethod
   def is_binary(target):
     return isinstance(target, PythonBinary)
@@ -35,26 +42,66 @@ class PythonBinaryCreate(PythonTask):
                         '%s and %s both have the name %s.' % (binary, names[name], name))
       names[name] = binary
 
-    for binary in binaries:
-      self.create_binary(binary)
+    if not binaries:
+      return
+
+    # Interpreter selection and run info are not thread-safe, so they are settled up front.
+    interpreters = [self.select_interpreter_for_targets(binary.closure()) for binary in binaries]
+    build_properties = self._build_properties()
+    requirements_cache = RequirementsCache(self.context.config)
 
-  def create_binary(self, binary):
-    interpreter = self.select_interpreter_for_targets(binary.closure())
+    def create_binary(binary_and_interpreter):
+      binary, interpreter = binary_and_interpreter
+      self.create_binary(binary,
+                         interpreter=interpreter,
+                         build_properties=build_properties,
+                         requirements_cache=requirements_cache)
 
+    work = list(zip(binaries, interpreters))
+    workers = min(max(1, self.get_options().workers), len(work))
+    if workers == 1:
+      for binary_and_interpreter in work:
+        create_binary(binary_and_interpreter)
+    else:
+      pool = ThreadPool(processes=workers)
+      try:
+        # We need to specify a timeout explicitly, because otherwise python ignores SIGINT when
+        # waiting on a condition variable, so we won't be able to ctrl-c out.
+        pool.map_async(create_binary, work, chunksize=1).get(timeout=1000000000)
+      finally:
+        pool.close()
+        pool.join()
+
+  def _build_properties(self):
     run_info = self.context.run_tracker.run_info
     build_properties = {}
     build_properties.update(run_info.add_basic_info(run_id=None, timestamp=time.time()))
     build_properties.update(run_info.add_scm_info())
+    return build_properties
+
+  def create_binary(self, binary, interpreter=None, build_properties=None,
+                    requirements_cache=None):
+    """Builds the pex for binary at <dist>/<name>.pex.
+
+    :param binary: The :class:`PythonBinary` target to build.
+    :param interpreter: The interpreter to build for; selected from the binary's closure if None.
+    :param dict build_properties: The build properties to stamp the pex with; gathered from the
+      current run if None.
+    :param requirements_cache: An optional :class:`RequirementsCache` to share resolved
+      distributions through.
+    """
+    interpreter = interpreter or self.select_interpreter_for_targets(binary.closure())
 
     pexinfo = binary.pexinfo.copy()
-    pexinfo.build_properties = build_properties
+    pexinfo.build_properties = build_properties or self._build_properties()
 
     with self.temporary_pex_builder(pex_info=pexinfo, interpreter=interpreter) as builder:
       chroot = PythonChroot(
         targets=[binary],
         builder=builder,
         platforms=binary.platforms,
-        interpreter=interpreter)
+        interpreter=interpreter,
+        requirements_cache=requirements_cache)
 
       pex_path = os.path.join(self._distdir, '%s.pex' % binary.name)
       chroot.dump()
@@ -12,10 +12,15 @@ except ImportError:
 
 from contextlib import contextmanager
 import itertools
+import json
 import logging
+from multiprocessing.pool import ThreadPool
 import os
 import shutil
+import sys
 from textwrap import dedent
+import threading
+import time
 import traceback
 
 from pex.interpreter import PythonInterpreter
@@ -23,7 +28,7 @@ from pex.pex import PEX
 from pex.pex_builder import PEXBuilder
 from twitter.common.lang import Compatibility
 
-from pants.backend.python.python_chroot import PythonChroot
+from pants.backend.python.python_chroot import PythonChroot, RequirementsCache
 from pants.backend.python.python_requirement import PythonRequirement
 from pants.backend.python.targets.python_tests import PythonTests
 from pants.base.config import Config
@@ -67,7 +72,19 @@ class PythonTestBuilder(object):
     PythonRequirement('unittest2py3k', version_filter=lambda py, pl: py.startswith('3'))
   ]
 
-  def __init__(self, targets, args, interpreter=None, fast=False, debug=False):
+  def __init__(self, targets, args, interpreter=None, fast=False, debug=False, workers=None,
+               result_callback=None, test_event_callback=None):
+    """
+    :param int workers: The maximum number of test targets to run concurrently when not in fast
+      mode; 1 by default.  Each concurrently run target has its output captured and replayed
+      whole, in target order.
+    :param result_callback: An optional function called with each test target and its
+      :class:`PythonTestResult` as results come in.  In fast mode every target is reported with
+      the result of the single shared run.
+    :param test_event_callback: An optional function called with the name, outcome and duration in
+      seconds of each individual test as pytest reports it.  Outcomes are one of 'passed',
+      'skipped' or 'failed'.  May be called from multiple threads when workers is more than 1.
+    """
     self._targets = targets
     self._args = args
     self._interpreter = interpreter or PythonInterpreter.get()
@@ -78,33 +95,111 @@ class PythonTestBuilder(object):
     self._fast = fast
 
     self._debug = debug
+    self._workers = max(1, workers or 1)
+    self._result_callback = result_callback
+    self._test_event_callback = test_event_callback
+
+    # Targets with the same requirements share a single resolve.
+    self._requirements_cache = RequirementsCache()
 
   def run(self, stdout=None, stderr=None):
-    if self._fast:
-      return 0 if self._run_tests(self._targets, stdout, stderr).success else 1
-    else:
-      results = {}
-      # Coverage often throws errors despite tests succeeding, so force failsoft in that case.
-      fail_hard = ('PANTS_PYTHON_TEST_FAILSOFT' not in os.environ and
-                   'PANTS_PY_COVERAGE' not in os.environ)
-      for target in self._targets:
-        if isinstance(target, PythonTests):
-          rv = self._run_tests([target], stdout, stderr)
+    # The pytest runner we use accepts a --pdb argument that will launch an interactive pdb
+    # session on any test failure.  In order to support use of this pass-through flag we must
+    # turn off stdin buffering that otherwise occurs.  Setting the PYTHONUNBUFFERED env var to
+    # any value achieves this in python2.7.  We'll need a different solution when we support
+    # running pants under CPython 3 which does not unbuffer stdin using this trick.
+    # NB: This is set once up front since the environment is shared by all test runner threads.
+    with environment_as(PYTHONUNBUFFERED='1'):
+      if self._fast:
+        rv = self._run_tests(self._targets, stdout, stderr)
+        if self._result_callback:
+          for target in self._targets:
+            if isinstance(target, PythonTests):
+              self._result_callback(target, rv)
+        return 0 if rv.success else 1
+      else:
+        results = {}
+        # Coverage often throws errors despite tests succeeding, so force failsoft in that case.
+        coverage = 'PANTS_PY_COVERAGE' in os.environ
+        fail_hard = 'PANTS_PYTHON_TEST_FAILSOFT' not in os.environ and not coverage
+        targets = [target for target in self._targets if isinstance(target, PythonTests)]
+        # Coverage runs combine data in the working directory, so they can only be run serially.
+        if self._workers == 1 or coverage or len(targets) <= 1:
+          runs = self._run_serially(targets, fail_hard, stdout, stderr)
+        else:
+          runs = self._run_concurrently(targets, fail_hard, stdout, stderr)
+        for target, rv in runs:
           results[target.id] = rv
+          if self._result_callback:
+            self._result_callback(target, rv)
+        for target in sorted(results):
+          # TODO: Replace print() calls in this file with logging.
+          print('%-80s.....%10s' % (target, results[target]), file=stdout)
+        return 0 if all(rc.success for rc in results.values()) else 1
+
+  def _run_serially(self, targets, fail_hard, stdout, stderr):
+    for target in targets:
+      rv = self._run_tests([target], stdout, stderr)
+      yield target, rv
+      if not rv.success and fail_hard:
+        return
+
+  def _run_concurrently(self, targets, fail_hard, stdout, stderr):
+    cancelled = threading.Event()
+
+    def run_target(target):
+      if cancelled.is_set():
+        return None
+      with temporary_file() as out:
+        with temporary_file() as err:
+          try:
+            rv = self._run_tests([target], out, err)
+          except Exception:
+            cancelled.set()
+            raise
           if not rv.success and fail_hard:
-            break
-      for target in sorted(results):
-        # TODO: Replace print() calls in this file with logging.
-        print('%-80s.....%10s' % (target, results[target]), file=stdout)
-      return 0 if all(rc.success for rc in results.values()) else 1
+            cancelled.set()
+          out.seek(0)
+          err.seek(0)
+          return rv, out.read(), err.read()
 
-  @contextmanager
-  def _maybe_emit_junit_xml(self, targets):
-    args = []
+    pool = ThreadPool(processes=min(self._workers, len(targets)))
+    try:
+      runs = pool.imap(run_target, targets)
+      for target in targets:
+        # We need to specify a timeout explicitly, because otherwise python ignores SIGINT when
+        # waiting on a condition variable, so we won't be able to ctrl-c out.
+        run = runs.next(timeout=1000000000)
+        if run is not None:
+          rv, out, err = run
+          (stdout or sys.stdout).write(out)
+          (stderr or sys.stderr).write(err)
+          yield target, rv
+    finally:
+      pool.close()
+      pool.join()
+
+  @staticmethod
+  def junit_xml_path(targets):
+    """Returns the path junit xml results for a run of targets are written to, if any."""
     xml_base = os.getenv('JUNIT_XML_BASE')
     if xml_base and targets:
       xml_base = os.path.realpath(xml_base)
-      xml_path = os.path.join(xml_base, Target.maybe_readable_identify(targets) + '.xml')
+      return os.path.join(xml_base, Target.maybe_readable_identify(targets) + '.xml')
+    return None
+
+  @staticmethod
+  def coverage_report_dir(targets):
+    """Returns the directory the html coverage report for a run of targets is written to."""
+    relpath = Target.maybe_readable_identify(targets)
+    pants_distdir = Config.from_cache().getdefault('pants_distdir')
+    return os.path.join(pants_distdir, 'coverage', relpath)
+
+  @contextmanager
+  def _maybe_emit_junit_xml(self, targets):
+    args = []
+    xml_path = self.junit_xml_path(targets)
+    if xml_path:
       safe_mkdir(os.path.dirname(xml_path))
       args.append('--junitxml=%s' % xml_path)
     yield args
@@ -277,13 +372,48 @@ class PythonTestBuilder(object):
           # consider combining coverage files from all runs in this Tasks's execute and then
           # producing just 1 console and 1 html report whether or not the tests are run in fast
           # mode.
-          relpath = Target.maybe_readable_identify(targets)
-          pants_distdir = Config.from_cache().getdefault('pants_distdir')
-          target_dir = os.path.join(pants_distdir, 'coverage', relpath)
+          target_dir = self.coverage_report_dir(targets)
           safe_mkdir(target_dir)
           pex.run(args=['html', '-i', '--rcfile', coverage_rc, '-d', target_dir],
                   stdout=stdout, stderr=stderr)
 
+  # A pytest plugin that appends a json line holding the name, outcome and total duration of each
+  # test to the file named by --pants-test-events as soon as the test completes.
+  _TEST_EVENTS_PLUGIN = 'pants_test_events'
+  _TEST_EVENTS_PLUGIN_SOURCE = dedent(b"""
+    import json
+
+    _events = []
+    _results = {}
+
+    def pytest_addoption(parser):
+      parser.addoption('--pants-test-events', dest='pants_test_events', default=None,
+                       help='Append per-test results to this file.')
+
+    def pytest_configure(config):
+      if config.option.pants_test_events:
+        _events.append(open(config.option.pants_test_events, 'a'))
+
+    def pytest_unconfigure(config):
+      while _events:
+        _events.pop().close()
+
+    def pytest_runtest_logreport(report):
+      if not _events:
+        return
+      outcome, duration = _results.get(report.nodeid, ('passed', 0.0))
+      if report.outcome == 'failed' or (report.outcome == 'skipped' and outcome == 'passed'):
+        outcome = report.outcome
+      duration += getattr(report, 'duration', 0.0)
+      if report.when == 'teardown':
+        _results.pop(report.nodeid, None)
+        _events[0].write(json.dumps(dict(name=report.nodeid, outcome=outcome, duration=duration)))
+        _events[0].write('\\n')
+        _events[0].flush()
+      else:
+        _results[report.nodeid] = outcome, duration
+    """)
+
   @contextmanager
   def _test_runner(self, targets, stdout, stderr):
     builder = PEXBuilder(interpreter=self._interpreter)
@@ -293,9 +423,14 @@ class PythonTestBuilder(object):
       extra_requirements=self._TESTING_TARGETS,
       builder=builder,
       platforms=('current',),
-      interpreter=self._interpreter)
+      interpreter=self._interpreter,
+      requirements_cache=self._requirements_cache)
     try:
       builder = chroot.dump()
+      if self._test_event_callback:
+        builder.chroot().write(self._TEST_EVENTS_PLUGIN_SOURCE,
+                               '%s.py' % self._TEST_EVENTS_PLUGIN,
+                               label='source')
       builder.freeze()
       pex = PEX(builder.path(), interpreter=self._interpreter)
       with self._maybe_emit_junit_xml(targets) as junit_args:
@@ -317,21 +452,48 @@ class PythonTestBuilder(object):
       return PythonTestResult.rc(0)
 
     with self._test_runner(targets, stdout, stderr) as (pex, test_args):
-      args = ['-s'] if self._debug else []
-      args.extend(test_args)
-      args.extend(self._args)
-      args.extend(sources)
+      with self._maybe_stream_test_events() as (events_args, poll_events):
+        args = ['-s'] if self._debug else []
+        args.extend(test_args)
+        args.extend(events_args)
+        args.extend(self._args)
+        args.extend(sources)
+
+        try:
+          process = pex.run(args=args, blocking=False, setsid=True, stdout=stdout, stderr=stderr)
+          while process.poll() is None:
+            poll_events()
+            time.sleep(self._EVENT_POLL_INTERVAL_SECS)
+          return PythonTestResult.rc(process.returncode)
+        except Exception:
+          print('Failed to run test!', file=stderr)
+          traceback.print_exc()
+          return PythonTestResult.exception()
+
+  _EVENT_POLL_INTERVAL_SECS = 0.1
 
-      try:
-        # The pytest runner we use accepts a --pdb argument that will launch an interactive pdb
-        # session on any test failure.  In order to support use of this pass-through flag we must
-        # turn off stdin buffering that otherwise occurs.  Setting the PYTHONUNBUFFERED env var to
-        # any value achieves this in python2.7.  We'll need a different solution when we support
-        # running pants under CPython 3 which does not unbuffer stdin using this trick.
-        with environment_as(PYTHONUNBUFFERED='1'):
-          rc = pex.run(args=args, setsid=True, stdout=stdout, stderr=stderr)
-          return PythonTestResult.rc(rc)
-      except Exception:
-        print('Failed to run test!', file=stderr)
-        traceback.print_exc()
-        return PythonTestResult.exception()
+  @contextmanager
+  def _maybe_stream_test_events(self):
+    """Yields the pytest args needed to report per-test events and a function that passes any new
+    events on to the test event callback.
+    """
+    if not self._test_event_callback:
+      yield [], lambda: None
+      return
+
+    with temporary_file() as events:
+      events.close()
+      with open(events.name) as fp:
+        def poll_events():
+          for line in iter(fp.readline, b''):
+            if not line.endswith(b'\n'):
+              # The event is still being written; pick it up whole next time round.
+              fp.seek(-len(line), os.SEEK_CUR)
+              return
+            event = json.loads(line)
+            self._test_event_callback(event['name'], event['outcome'], event['duration'])
+
+        try:
+          yield ['-p', self._TEST_EVENTS_PLUGIN, '--pants-test-events=%s' % events.name], poll_events
+        finally:
+          poll_events()
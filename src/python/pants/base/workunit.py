@@ -100,6 +100,9 @@ class WorkUnit(object):
     # E.g., a tool invocation may have 'stdout', 'stderr', 'debug_log' etc.
     self._outputs = {}  # name -> output buffer.
 
+    # If set, passed the output name and content of each write to one of our outputs.
+    self._output_listener = None
+
     # Do this last, as the parent's _self_time() might get called before we're
     # done initializing ourselves.
     # TODO: Ensure that a parent can't be ended before all its children are.
@@ -148,13 +151,23 @@ class WorkUnit(object):
     if name not in self._outputs:
       path = os.path.join(self.run_tracker.info_dir, 'tool_outputs', '%s.%s' % (self.id, name))
       safe_mkdir_for(path)
-      self._outputs[name] = FileBackedRWBuf(path)
+      listener = self._output_listener
+      on_write = (lambda s: listener(name, s)) if listener else None
+      self._outputs[name] = FileBackedRWBuf(path, listener=on_write)
     return self._outputs[name]
 
   def outputs(self):
     """Returns the map of output name -> output buffer."""
     return self._outputs
 
+  def set_output_listener(self, listener):
+    """Sets a callable to pass the output name and content of each write to an output created
+    from now on.
+
+    Content written to outputs with a listener is not returned by their read() methods.
+    """
+    self._output_listener = listener
+
   def choose(self, aborted_val, failure_val, warning_val, success_val, unknown_val):
     """Returns one of the 5 arguments, depending on our outcome."""
     return WorkUnit.choose_for_outcome(self._outcome,
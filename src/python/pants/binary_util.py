@@ -5,9 +5,11 @@
 from __future__ import (nested_scopes, generators, division, absolute_import, with_statement,
                         print_function, unicode_literals)
 
-from contextlib import closing, contextmanager
+from contextlib import contextmanager
+import hashlib
 import os
 import subprocess
+import threading
 
 import posixpath
 from twitter.common import log
@@ -16,15 +18,14 @@ from twitter.common.lang import Compatibility
 
 from pants.base.config import Config
 from pants.base.exceptions import TaskError
+from pants.net.http.fetcher import Fetcher
 from pants.util.contextutil import temporary_file
 from pants.util.dirutil import chmod_plus_x, safe_delete, safe_open
 
 if Compatibility.PY3:
-  import urllib.request as urllib_request
-  import urllib.error as urllib_error
+  import queue
 else:
-  import urllib2 as urllib_request
-  import urllib2 as urllib_error
+  import Queue as queue
 
 
 _ID_BY_OS = {
@@ -60,8 +61,21 @@ class BinaryUtil(object):
   class NoBaseUrlsError(TaskError):
     """Indicates that no urls were specified in pants.ini."""
 
+  class _Cancelled(Exception):
+    """Raised from within a mirror race to abandon a download another mirror already won."""
+
+  class _RaceListener(Fetcher.Listener):
+    """Aborts a streaming download as soon as another mirror has won the race."""
+
+    def __init__(self, race_won):
+      self._race_won = race_won
+
+    def recv_chunk(self, data):
+      if self._race_won.is_set():
+        raise BinaryUtil._Cancelled()
+
   def __init__(self, bootstrap_dir=None, baseurls=None, timeout=None, config=None,
-               binary_base_path_strategy=None):
+               binary_base_path_strategy=None, fetcher=None):
     """Creates a BinaryUtil with the given settings to define binary lookup behavior.
 
     Relevant settings may either be specified in the arguments, or will be loaded from the given
@@ -79,6 +93,8 @@ class BinaryUtil(object):
       behavior. Takes in parameters (base_path, version, name) and returns a relative path to a
       binary. This relative path is used both for appending to the baseurl to determine the full url
       to the binary, and as the path to the subfolder the binary is stored in under the bootstrap_dir.
+    :param fetcher: Optional :class:`pants.net.http.fetcher.Fetcher` used to stream binaries to
+      disk; defaults to a Fetcher backed by the requests module.
     """
     if bootstrap_dir is None or baseurls is None or timeout is None:
       config = config or Config.from_cache()
@@ -94,6 +110,7 @@ class BinaryUtil(object):
     self._timeout = timeout
     self._baseurls = baseurls
     self._binary_base_path_strategy = binary_base_path_strategy
+    self._fetcher = fetcher or Fetcher()
 
   def select_binary_base_path(self, base_path, version, name):
     """Base path used to select the binary file, exposed for associated unit tests."""
@@ -110,45 +127,14 @@ class BinaryUtil(object):
     raise BinaryUtil.MissingMachineInfo('No {binary} binary found for: {machine_info}'
         .format(binary=name, machine_info=(sysname, release, machine)))
 
-  @contextmanager
-  def select_binary_stream(self, base_path, version, name, url_opener=None):
-    """Select a binary matching the current os and architecture.
-
-    :param url_opener: Optional argument used only for testing, to 'pretend' to open urls.
-    :returns: a 'stream' to download it from a support directory. The returned 'stream' is actually
-      a lambda function which returns the files binary contents.
-    :raises: :class:`pants.binary_util.BinaryUtil.BinaryNotFound` if no binary of the given version
-      and name could not be found.
-    """
-    baseurls = self._baseurls
-    if not baseurls:
-      raise BinaryUtil.NoBaseUrlsError(
-          'No urls are defined under pants_support_baseurls in the DEFAULT section of pants.ini.')
-    timeout_secs = self._timeout
-    binary_path = self.select_binary_base_path(base_path, version, name)
-    if url_opener is None:
-      url_opener = lambda u: closing(urllib_request.urlopen(u, timeout=timeout_secs))
-
-    downloaded_successfully = False
-    accumulated_errors = []
-    for baseurl in OrderedSet(baseurls): # Wrap in OrderedSet because duplicates are wasteful.
-      url = posixpath.join(baseurl, binary_path)
-      log.info('Attempting to fetch {name} binary from: {url} ...'.format(name=name, url=url))
-      try:
-        with url_opener(url) as binary:
-          log.info('Fetched {name} binary from: {url} .'.format(name=name, url=url))
-          downloaded_successfully = True
-          yield lambda: binary.read()
-          break
-      except (IOError, urllib_error.HTTPError, urllib_error.URLError, ValueError) as e:
-        accumulated_errors.append('Failed to fetch binary from {url}: {error}'
-                                  .format(url=url, error=e))
-    if not downloaded_successfully:
-      raise BinaryUtil.BinaryNotFound((base_path, version, name), accumulated_errors)
-
-  def select_binary(self, base_path, version, name):
+  def select_binary(self, base_path, version, name, checksum=None):
     """Selects a binary matching the current os and architecture.
 
+    If the binary is not already bootstrapped it is streamed to disk from all configured base urls
+    concurrently; the first mirror to deliver a complete (and if requested, verified) binary wins
+    and the downloads from the remaining mirrors are abandoned.
+
+    :param checksum: An optional hex sha1 digest the downloaded binary must match.
     :raises: :class:`pants.binary_util.BinaryUtil.BinaryNotFound` if no binary of the given version
       and name could be found.
     """
@@ -157,13 +143,12 @@ class BinaryUtil(object):
     binary_path = self.select_binary_base_path(base_path, version, name)
     bootstrapped_binary_path = os.path.join(bootstrap_dir, binary_path)
     if not os.path.exists(bootstrapped_binary_path):
-      downloadpath = bootstrapped_binary_path + '~'
+      downloadpath, errors = self._race_mirrors(binary_path, bootstrapped_binary_path, checksum)
+      if downloadpath is None:
+        raise BinaryUtil.BinaryNotFound((base_path, version, name), errors)
       try:
-        with self.select_binary_stream(base_path, version, name) as stream:
-          with safe_open(downloadpath, 'wb') as bootstrapped_binary:
-            bootstrapped_binary.write(stream())
-          os.rename(downloadpath, bootstrapped_binary_path)
-          chmod_plus_x(bootstrapped_binary_path)
+        os.rename(downloadpath, bootstrapped_binary_path)
+        chmod_plus_x(bootstrapped_binary_path)
       finally:
         safe_delete(downloadpath)
 
@@ -171,6 +156,76 @@ class BinaryUtil(object):
               .format(binary=name, path=bootstrapped_binary_path))
     return bootstrapped_binary_path
 
+  def _race_mirrors(self, binary_path, bootstrapped_binary_path, checksum):
+    """Streams binary_path from every base url concurrently, keeping the first good download.
+
+    :returns: A tuple of the path of the winning download, or None if no mirror succeeded, and the
+      list of errors encountered.
+    """
+    baseurls = self._baseurls
+    if not baseurls:
+      raise BinaryUtil.NoBaseUrlsError(
+          'No urls are defined under pants_support_baseurls in the DEFAULT section of pants.ini.')
+
+    # Wrap in OrderedSet because duplicates are wasteful.
+    urls = [posixpath.join(baseurl, binary_path) for baseurl in OrderedSet(baseurls)]
+    race_won = threading.Event()
+    claim_lock = threading.Lock()
+    results = queue.Queue()
+
+    def race(index, url):
+      downloadpath = '{path}.{index}~'.format(path=bootstrapped_binary_path, index=index)
+      checksum_listener = Fetcher.ChecksumListener(digest=hashlib.sha1())
+      listener = checksum_listener.wrap(self._RaceListener(race_won))
+      won = False
+      try:
+        log.info('Attempting to fetch {path} binary from: {url} ...'.format(path=binary_path,
+                                                                           url=url))
+        self._fetcher.download(url,
+                               listener=listener,
+                               path_or_fd=downloadpath,
+                               timeout_secs=self._timeout)
+        if checksum and checksum_listener.checksum != checksum:
+          raise ValueError('Expected sha1 {expected} but got {actual}'
+                           .format(expected=checksum, actual=checksum_listener.checksum))
+        with claim_lock:
+          if not race_won.is_set():
+            race_won.set()
+            won = True
+        if won:
+          log.info('Fetched {path} binary from: {url} .'.format(path=binary_path, url=url))
+          results.put((downloadpath, None))
+        else:
+          results.put((None, None))
+      except self._Cancelled:
+        results.put((None, None))
+      except (IOError, Fetcher.Error, ValueError) as e:
+        results.put((None, 'Failed to fetch binary from {url}: {error}'.format(url=url, error=e)))
+      except Exception as e:
+        results.put((None, 'Unexpected error fetching binary from {url}: {error}'
+                           .format(url=url, error=e)))
+      finally:
+        if not won:
+          safe_delete(downloadpath)
+          safe_delete(downloadpath + '.part')
+          safe_delete(downloadpath + '.part.source')
+
+    for index, url in enumerate(urls):
+      racer = threading.Thread(target=race, args=(index, url))
+      racer.daemon = True
+      racer.start()
+
+    errors = []
+    for _ in urls:
+      # An explicit timeout keeps the wait interruptible with ctrl-c.
+      downloadpath, error = results.get(timeout=1000000000)
+      if downloadpath:
+        # Losing racers notice the win on their next chunk and clean up after themselves.
+        return downloadpath, errors
+      if error:
+        errors.append(error)
+    return None, errors
+
 
 @contextmanager
 def safe_args(args,
@@ -6,27 +6,43 @@ from __future__ import (nested_scopes, generators, division, absolute_import, wi
                         print_function, unicode_literals)
 
 from collections import namedtuple
+import heapq
 import os
+import sys
 
+import six
 from twitter.common.collections.orderedset import OrderedSet
 from twitter.common.collections.ordereddict import OrderedDict
+from twitter.common.lang import Compatibility
 
 from pants.base.exceptions import TaskError
+from pants.base.worker_pool import Work
 from pants.base.workunit import WorkUnit
 from pants.engine.engine import Engine
 from pants.engine.round_manager import RoundManager
 
+if Compatibility.PY3:
+  import queue
+else:
+  import Queue as queue
+
 
 class GoalExecutor(object):
-  def __init__(self, context, goal, tasks_by_name):
+  def __init__(self, context, goal, tasks_by_name, goal_dependencies=()):
     self._context = context
     self._goal = goal
     self._tasks_by_name = tasks_by_name
+    self._goal_dependencies = frozenset(goal_dependencies)
 
   @property
   def goal(self):
     return self._goal
 
+  @property
+  def goal_dependencies(self):
+    """The goals whose products this goal's tasks require."""
+    return self._goal_dependencies
+
   def attempt(self, explain):
     """Attempts to execute the goal's tasks in installed order.
 
@@ -67,40 +83,46 @@ class RoundEngine(Engine):
   GoalInfo = namedtuple('GoalInfo', ['goal', 'tasks_by_name', 'goal_dependencies'])
 
   def _topological_sort(self, goal_info_by_goal):
-    dependees_by_goal = OrderedDict()
-
-    def add_dependee(goal, dependee=None):
-      dependees = dependees_by_goal.get(goal)
-      if dependees is None:
-        dependees = set()
-        dependees_by_goal[goal] = dependees
-      if dependee:
-        dependees.add(dependee)
-
+    # Goals are yielded dependees first.  Amongst the goals whose dependees have all been yielded,
+    # the one seen first in goal_info_by_goal order always goes next.
+    index_by_goal = OrderedDict()
     for goal, goal_info in goal_info_by_goal.items():
-      add_dependee(goal)
+      index_by_goal.setdefault(goal, len(index_by_goal))
+      for dependency in goal_info.goal_dependencies:
+        index_by_goal.setdefault(dependency, len(index_by_goal))
+
+    unsatisfied_by_goal = dict((goal, 0) for goal in index_by_goal)
+    for goal_info in goal_info_by_goal.values():
       for dependency in goal_info.goal_dependencies:
-        add_dependee(dependency, goal)
+        unsatisfied_by_goal[dependency] += 1
 
+    ready = [(index, goal) for goal, index in index_by_goal.items()
+             if unsatisfied_by_goal[goal] == 0]
+    heapq.heapify(ready)
     satisfied = set()
-    while dependees_by_goal:
-      count = len(dependees_by_goal)
-      for goal, dependees in dependees_by_goal.items():
-        unsatisfied = len(dependees - satisfied)
-        if unsatisfied == 0:
-          satisfied.add(goal)
-          dependees_by_goal.pop(goal)
-          yield goal_info_by_goal[goal]
-          break
-      if len(dependees_by_goal) == count:
-        for dependees in dependees_by_goal.values():
-          dependees.difference_update(satisfied)
-        # TODO(John Sirois): Do a better job here and actually collect and print cycle paths
-        # between Goals/Tasks.  The developer can most directly address that data.
-        raise self.GoalCycleError('Cycle detected in goal dependencies:\n\t{0}'
-                                   .format('\n\t'.join('{0} <- {1}'.format(goal, list(dependees))
-                                                       for goal, dependees
-                                                       in dependees_by_goal.items())))
+    while ready:
+      _, goal = heapq.heappop(ready)
+      satisfied.add(goal)
+      goal_info = goal_info_by_goal[goal]
+      yield goal_info
+      for dependency in goal_info.goal_dependencies:
+        unsatisfied_by_goal[dependency] -= 1
+        if unsatisfied_by_goal[dependency] == 0:
+          heapq.heappush(ready, (index_by_goal[dependency], dependency))
+
+    if len(satisfied) < len(index_by_goal):
+      dependees_by_goal = OrderedDict((goal, set()) for goal in index_by_goal
+                                      if goal not in satisfied)
+      for goal, goal_info in goal_info_by_goal.items():
+        if goal not in satisfied:
+          for dependency in goal_info.goal_dependencies:
+            dependees_by_goal[dependency].add(goal)
+      # TODO(John Sirois): Do a better job here and actually collect and print cycle paths
+      # between Goals/Tasks.  The developer can most directly address that data.
+      raise self.GoalCycleError('Cycle detected in goal dependencies:\n\t{0}'
+                                 .format('\n\t'.join('{0} <- {1}'.format(goal, list(dependees))
+                                                     for goal, dependees
+                                                     in dependees_by_goal.items())))
 
   def _visit_goal(self, goal, context, goal_info_by_goal):
     if goal in goal_info_by_goal:
@@ -163,7 +185,8 @@ class RoundEngine(Engine):
       self._visit_goal(goal, context, goal_info_by_goal)
 
     for goal_info in reversed(list(self._topological_sort(goal_info_by_goal))):
-      yield GoalExecutor(context, goal_info.goal, goal_info.tasks_by_name)
+      yield GoalExecutor(context, goal_info.goal, goal_info.tasks_by_name,
+                         goal_info.goal_dependencies)
 
   def attempt(self, context, goals):
     goal_executors = list(self._prepare(context, goals))
@@ -175,6 +198,13 @@ class RoundEngine(Engine):
       print('Goal Execution Order:\n\n%s\n' % execution_goals)
       print('Goal [TaskRegistrar->Task] Order:\n')
 
+    goal_workers = context.options.for_global_scope().goal_workers
+    if explain or goal_workers <= 1 or len(goal_executors) == 1:
+      self._attempt_serially(context, goal_executors, explain)
+    else:
+      self._attempt_concurrently(context, goal_executors, goal_workers)
+
+  def _attempt_serially(self, context, goal_executors, explain):
     serialized_goals_executors = [ge for ge in goal_executors if ge.goal.serialize]
     outer_lock_holder = serialized_goals_executors[-1] if serialized_goals_executors else None
 
@@ -189,3 +219,81 @@ class RoundEngine(Engine):
     finally:
       if outer_lock_holder:
         context.release_lock()
+
+  def _schedule(self, goal_executors):
+    """Returns the goals each goal executor must wait for, keyed by goal.
+
+    A goal waits for the goals whose products it requires, so goals requested on the command line
+    that share no products - think `checkstyle compile` - run concurrently.  Exclusive goals - think
+    `clean-all compile` - also wait for every goal ordered before them and are waited for by every
+    goal ordered after them, so they keep their serial execution order and run alone.
+    """
+    waits_by_goal = OrderedDict()
+    preceding = set()
+    last_exclusive = None
+    for goal_executor in goal_executors:
+      goal = goal_executor.goal
+      waits = set(goal_executor.goal_dependencies)
+      if goal.exclusive:
+        waits.update(preceding)
+        last_exclusive = goal
+      elif last_exclusive:
+        waits.add(last_exclusive)
+      waits_by_goal[goal] = waits
+      preceding.add(goal)
+    return waits_by_goal
+
+  def _attempt_concurrently(self, context, goal_executors, goal_workers):
+    waits_by_goal = self._schedule(goal_executors)
+    goal_executor_by_goal = OrderedDict((ge.goal, ge) for ge in goal_executors)
+
+    serialized_goals = set(ge.goal for ge in goal_executors if ge.goal.serialize)
+    if serialized_goals:
+      context.acquire_lock()
+
+    done = queue.Queue()
+
+    def attempt(goal_executor):
+      try:
+        goal_executor.attempt(explain=False)
+        done.put((goal_executor.goal, None))
+      except BaseException:
+        done.put((goal_executor.goal, sys.exc_info()))
+
+    pool = context.run_tracker.new_worker_pool(num_workers=goal_workers)
+    running = set()
+    completed = set()
+    failure = None
+    try:
+      while True:
+        if failure is None:
+          # Submit in serial execution order so ties break the way they do when run serially.
+          for goal, goal_executor in goal_executor_by_goal.items():
+            if goal not in running and goal not in completed and waits_by_goal[goal] <= completed:
+              running.add(goal)
+              pool.submit_async_work(Work(attempt, [(goal_executor,)]))
+        if not running:
+          break
+
+        # We need to specify a timeout explicitly, because otherwise python ignores SIGINT when
+        # waiting on a condition variable, so we won't be able to ctrl-c out.
+        goal, exc_info = done.get(timeout=1000000000)
+        running.discard(goal)
+        if exc_info:
+          # Let the goals already running finish, but start no more.
+          failure = failure or exc_info
+        else:
+          completed.add(goal)
+          if serialized_goals and serialized_goals <= completed:
+            context.release_lock()
+            serialized_goals = None
+    except:
+      pool.abort()
+      raise
+    finally:
+      if serialized_goals:
+        context.release_lock()
+    pool.shutdown()
+
+    if failure:
+      six.reraise(*failure)
@@ -8,16 +8,25 @@ from __future__ import (nested_scopes, generators, division, absolute_import, wi
 
 """Support for wholesale archive creation and extraction in a uniform API across archive types."""
 
+from collections import deque
+import copy
+import gzip
+import io
+from itertools import islice
+from multiprocessing.pool import ThreadPool
 import os
+import struct
+import time
+import zlib
 
 from abc import abstractmethod
-from zipfile import ZIP_DEFLATED
+from zipfile import ZIP_DEFLATED, BadZipfile, ZipInfo, sizeFileHeader, structFileHeader
 
 from twitter.common.collections.ordereddict import OrderedDict
 from twitter.common.lang import AbstractClass
 
 from pants.util.contextutil import open_tar, open_zip
-from pants.util.dirutil import safe_walk
+from pants.util.dirutil import safe_mkdir, safe_walk
 from pants.util.strutil import ensure_text
 
 
@@ -35,6 +44,84 @@ class Archiver(AbstractClass):
     """
 
 
+def map_in_order(workers, func, items):
+  """Yields (item, func(item)) for each item, in order, computing func on a pool of worker threads.
+
+  At most a few results per worker are held in memory at any one time.
+  """
+  pool = ThreadPool(processes=workers)
+  try:
+    pending = deque()
+    for item in items:
+      pending.append((item, pool.apply_async(func, (item,))))
+      if len(pending) > workers * 4:
+        item, result = pending.popleft()
+        # An explicit timeout keeps the wait interruptible with ctrl-c.
+        yield item, result.get(timeout=1000000000)
+    while pending:
+      item, result = pending.popleft()
+      yield item, result.get(timeout=1000000000)
+  finally:
+    pool.terminate()
+    pool.join()
+
+
+class _ParallelGzipWriter(object):
+  """A write-only file-like object that gzips fixed size blocks of its input concurrently.
+
+  The output is a multi-member gzip stream, which gzip, tar and python's gzip module all read as
+  the concatenation of the members.
+  """
+
+  _BLOCK_SIZE = 1024 * 1024
+
+  @staticmethod
+  def _gzip(block):
+    member = io.BytesIO()
+    with gzip.GzipFile(fileobj=member, mode='wb', mtime=0) as gz:
+      gz.write(block)
+    return member.getvalue()
+
+  def __init__(self, fileobj, workers):
+    self._fileobj = fileobj
+    self._workers = workers
+    self._pool = ThreadPool(processes=workers)
+    self._pending = deque()
+    self._buffer = []
+    self._buffered = 0
+
+  def write(self, data):
+    self._buffer.append(data)
+    self._buffered += len(data)
+    if self._buffered >= self._BLOCK_SIZE:
+      data = b''.join(self._buffer)
+      self._buffer = []
+      self._buffered = 0
+      for i in range(0, len(data), self._BLOCK_SIZE):
+        self._submit(data[i:i + self._BLOCK_SIZE])
+
+  def _submit(self, block):
+    self._pending.append(self._pool.apply_async(self._gzip, (block,)))
+    self._drain(self._workers * 2)
+
+  def _drain(self, max_pending):
+    while len(self._pending) > max_pending:
+      # An explicit timeout keeps the wait interruptible with ctrl-c.
+      self._fileobj.write(self._pending.popleft().get(timeout=1000000000))
+
+  def close(self):
+    """Writes out all remaining data and shuts down the compression threads."""
+    try:
+      if self._buffered:
+        self._submit(b''.join(self._buffer))
+        self._buffer = []
+        self._buffered = 0
+      self._drain(0)
+    finally:
+      self._pool.terminate()
+      self._pool.join()
+
+
 class TarArchiver(Archiver):
   """An archiver that stores files in a tar file with optional compression."""
 
@@ -43,32 +130,56 @@ class TarArchiver(Archiver):
     with open_tar(path, errorlevel=1) as tar:
       tar.extractall(outdir)
 
-  def __init__(self, mode, extension):
+  def __init__(self, mode, extension, workers=None):
+    """
+    :param string mode: The tarfile mode to create archives with.
+    :param string extension: The archive file extension.
+    :param int workers: If more than 1, gzip compressed archives are written as a multi-member gzip
+      stream compressed on this many threads.
+    """
     Archiver.__init__(self)
     self.mode = mode
     self.extension = extension
+    self.workers = workers
 
   def create(self, basedir, outdir, name, prefix=None):
     basedir = ensure_text(basedir)
     tarpath = os.path.join(outdir, '%s.%s' % (ensure_text(name), self.extension))
-    with open_tar(tarpath, self.mode, dereference=True, errorlevel=1) as tar:
-      tar.add(basedir, arcname=prefix or '.')
+    if self.mode == 'w:gz' and (self.workers or 1) > 1:
+      with open(tarpath, 'wb') as fp:
+        gzip_writer = _ParallelGzipWriter(fp, self.workers)
+        try:
+          with open_tar(gzip_writer, 'w|', dereference=True, errorlevel=1) as tar:
+            tar.add(basedir, arcname=prefix or '.')
+        finally:
+          gzip_writer.close()
+    else:
+      with open_tar(tarpath, self.mode, dereference=True, errorlevel=1) as tar:
+        tar.add(basedir, arcname=prefix or '.')
     return tarpath
 
 
 class ZipArchiver(Archiver):
   """An archiver that stores files in a zip file with optional compression."""
 
+  # Files larger than this are always deflated by a streaming zip.write rather than in memory on a
+  # worker thread.
+  _MAX_PARALLEL_ENTRY_BYTES = 16 * 1024 * 1024
+
+  _BATCH_SIZE = 32
+
   @classmethod
-  def extract(cls, path, outdir, filter_func=None):
+  def extract(cls, path, outdir, filter_func=None, workers=None):
     """Extract from a zip file, with an optional filter
 
     :param string path: path to the zipfile to extract from
     :param string outdir: directory to extract files into
     :param function filter_func: optional filter with the filename as the parameter.  Returns True if
       the file should be extracted.
+    :param int workers: optional number of threads to extract entries with, 1 by default.
     """
     with open_zip(path) as archive_file:
+      names = []
       for name in archive_file.namelist():
         # While we're at it, we also perform this safety test.
         if name.startswith(b'/') or name.startswith(b'..'):
@@ -79,26 +190,196 @@ class ZipArchiver(Archiver):
         # TODO(Eric Ayers) Pants no longer builds with python 2.6. Can this be removed?
         if not name.endswith(b'/'):
           if (not filter_func or filter_func(name)):
-            archive_file.extract(name, outdir)
+            names.append(name)
+
+      if not workers or workers <= 1 or len(names) <= 1:
+        for name in names:
+          archive_file.extract(name, outdir)
+        return
+
+    # Create all parent dirs up front so concurrent extracts don't race to create them.
+    for parent in set(os.path.dirname(name) for name in names):
+      safe_mkdir(os.path.join(outdir, parent))
+
+    def extract_all(partition):
+      # ZipFile objects are not safe to share across threads, so each gets its own.
+      with open_zip(path) as partition_file:
+        for name in partition:
+          partition_file.extract(name, outdir)
+
+    workers = min(workers, len(names))
+    pool = ThreadPool(processes=workers)
+    try:
+      partitions = [names[i::workers] for i in range(workers)]
+      # An explicit timeout keeps the wait interruptible with ctrl-c.
+      pool.map_async(extract_all, partitions, chunksize=1).get(timeout=1000000000)
+    finally:
+      pool.close()
+      pool.join()
 
-  def __init__(self, compression):
+  def __init__(self, compression, workers=None):
+    """
+    :param compression: The zipfile compression type.
+    :param int workers: If more than 1, entries are deflated concurrently on this many threads and
+      written to the archive in the same deterministic order as a serial archive.
+    """
     Archiver.__init__(self)
     self.compression = compression
+    self.workers = workers
 
   def create(self, basedir, outdir, name, prefix=None):
     zippath = os.path.join(outdir, '%s.zip' % name)
     with open_zip(zippath, 'w', compression=ZIP_DEFLATED) as zip:
-      for root, _, files in safe_walk(basedir):
-        root = ensure_text(root)
-        for file in files:
-          file = ensure_text(file)
-          full_path = os.path.join(root, file)
-          relpath = os.path.relpath(full_path, basedir)
-          if prefix:
-            relpath = os.path.join(ensure_text(prefix), relpath)
+      entries = self._entries(basedir, prefix)
+      if (self.workers or 1) > 1:
+        self._write_parallel(zip, entries)
+      else:
+        for full_path, relpath in entries:
           zip.write(full_path, relpath)
     return zippath
 
+  def _entries(self, basedir, prefix):
+    for root, dirs, files in safe_walk(basedir):
+      # Walk in sorted order so archives are deterministic.
+      dirs.sort()
+      root = ensure_text(root)
+      for file in sorted(files):
+        file = ensure_text(file)
+        full_path = os.path.join(root, file)
+        relpath = os.path.relpath(full_path, basedir)
+        if prefix:
+          relpath = os.path.join(ensure_text(prefix), relpath)
+        yield full_path, relpath
+
+  @classmethod
+  def _deflate(cls, entry):
+    full_path, _ = entry
+    if os.path.getsize(full_path) > cls._MAX_PARALLEL_ENTRY_BYTES:
+      return None
+    with open(full_path, 'rb') as fp:
+      return deflate(fp.read())
+
+  @classmethod
+  def _deflate_batch(cls, batch):
+    return [cls._deflate(entry) for entry in batch]
+
+  def _write_parallel(self, zip, entries):
+    # Deflate entries in small batches to amortize the hand-off cost of the many tiny files typical
+    # of class and resource trees.
+    batches = iter(lambda: list(islice(entries, self._BATCH_SIZE)), [])
+    for batch, deflated_batch in map_in_order(self.workers, self._deflate_batch, batches):
+      for index, (full_path, relpath) in enumerate(batch):
+        deflated = deflated_batch[index]
+        if deflated is None:
+          zip.write(full_path, relpath)
+        else:
+          size, crc, compressed = deflated
+          write_deflated(zip, full_path, relpath, size, crc, compressed)
+
+
+def deflate(data):
+  """Deflates data just as `zipfile` does for a `ZIP_DEFLATED` entry.
+
+  zlib releases the GIL while compressing, so this can usefully be run on several threads at once.
+
+  :param bytes data: The uncompressed entry data.
+  :returns: A tuple of the uncompressed size, the CRC-32 of the data and its raw deflate stream.
+  """
+  compressor = zlib.compressobj(zlib.Z_DEFAULT_COMPRESSION, zlib.DEFLATED, -15)
+  compressed = compressor.compress(data) + compressor.flush()
+  return len(data), zlib.crc32(data) & 0xffffffff, compressed
+
+
+def write_deflated(zip, path, arcname, size, crc, compressed):
+  """Writes an already deflated entry for the file at path to the open zip under arcname.
+
+  This mirrors `ZipFile.write` for small files without deflating the data again.
+
+  :param zip: A `zipfile.ZipFile` open for writing.
+  :param string path: The path of the file the entry was deflated from; used for its timestamp and
+    permissions.
+  :param string arcname: The path of the entry in the archive.
+  :param int size: The uncompressed size of the entry.
+  :param int crc: The CRC-32 of the uncompressed entry data.
+  :param bytes compressed: The raw deflate stream of the entry data.
+  """
+  st = os.stat(path)
+  arcname = os.path.normpath(os.path.splitdrive(arcname)[1]).lstrip(os.sep)
+  zinfo = ZipInfo(arcname, time.localtime(st.st_mtime)[0:6])
+  zinfo.external_attr = (st.st_mode & 0xFFFF) << 16
+  zinfo.compress_type = ZIP_DEFLATED
+  write_compressed(zip, zinfo, size, crc, compressed)
+
+
+def write_compressed(zip, zinfo, size, crc, compressed):
+  """Writes an entry whose data is already compressed as its zinfo says to the open zip.
+
+  :param zip: A `zipfile.ZipFile` open for writing.
+  :param zinfo: The `zipfile.ZipInfo` of the entry, with its name, timestamp, permissions and
+    compress_type filled in.
+  :param int size: The uncompressed size of the entry.
+  :param int crc: The CRC-32 of the uncompressed entry data.
+  :param bytes compressed: The entry data, compressed with the zinfo's compress_type.
+  """
+  zinfo.file_size = size
+  zinfo.compress_size = len(compressed)
+  zinfo.CRC = crc
+  _start_entry(zip, zinfo)
+  zip.fp.write(compressed)
+  _finish_entry(zip, zinfo)
+
+
+_COPY_CHUNK_BYTES = 1024 * 1024
+
+# The offsets of the name and extra field lengths in a local file header.
+_FH_FILENAME_LENGTH = 10
+_FH_EXTRA_FIELD_LENGTH = 11
+
+
+def copy_entry(zip, source, zinfo, arcname=None):
+  """Copies an entry from one zip to another byte for byte, without decompressing it.
+
+  :param zip: A `zipfile.ZipFile` open for writing.
+  :param source: A `zipfile.ZipFile` open for reading that contains the entry.
+  :param zinfo: The `zipfile.ZipInfo` of the entry in source.
+  :param string arcname: The path to give the entry in zip; the path it has in source by default.
+  """
+  if zinfo.flag_bits & 0x1:
+    raise ValueError('Cannot copy encrypted entry {0}.'.format(zinfo.filename))
+
+  source.fp.seek(zinfo.header_offset)
+  header = struct.unpack(structFileHeader, source.fp.read(sizeFileHeader))
+  source.fp.seek(header[_FH_FILENAME_LENGTH] + header[_FH_EXTRA_FIELD_LENGTH], os.SEEK_CUR)
+
+  copy = ZipInfo(arcname or zinfo.filename, zinfo.date_time)
+  copy.external_attr = zinfo.external_attr
+  copy.compress_type = zinfo.compress_type
+  copy.file_size = zinfo.file_size
+  copy.compress_size = zinfo.compress_size
+  copy.CRC = zinfo.CRC
+  _start_entry(zip, copy)
+  remaining = zinfo.compress_size
+  while remaining > 0:
+    chunk = source.fp.read(min(remaining, _COPY_CHUNK_BYTES))
+    if not chunk:
+      raise BadZipfile('Truncated entry {0}.'.format(zinfo.filename))
+    zip.fp.write(chunk)
+    remaining -= len(chunk)
+  _finish_entry(zip, copy)
+
+
+def _start_entry(zip, zinfo):
+  zinfo.flag_bits = 0x00
+  zinfo.header_offset = zip.fp.tell()
+  zip._writecheck(zinfo)
+  zip._didModify = True
+  zip.fp.write(zinfo.FileHeader())
+
+
+def _finish_entry(zip, zinfo):
+  zip.filelist.append(zinfo)
+  zip.NameToInfo[zinfo.filename] = zinfo
+
 
 TAR = TarArchiver('w:', 'tar')
 TGZ = TarArchiver('w:gz', 'tar.gz')
@@ -110,9 +391,12 @@ _ARCHIVER_BY_TYPE = OrderedDict(tar=TGZ, tgz=TGZ, tbz2=TBZ2, zip=ZIP)
 TYPE_NAMES = frozenset(_ARCHIVER_BY_TYPE.keys())
 
 
-def archiver(typename):
+def archiver(typename, workers=None):
   """Returns Archivers in common configurations.
 
+  If workers is more than 1, the archiver compresses zip entries or gzip blocks on that many
+  threads.
+
   The typename must correspond to one of the following:
   'tar'   Returns a tar archiver that applies no compression and emits .tar files.
   'tgz'   Returns a tar archiver that applies gzip compression and emits .tar.gz files.
@@ -122,4 +406,7 @@ def archiver(typename):
   archiver = _ARCHIVER_BY_TYPE.get(typename)
   if not archiver:
     raise ValueError('No archiver registered for %r' % typename)
+  if (workers or 1) > 1:
+    archiver = copy.copy(archiver)
+    archiver.workers = workers
   return archiver
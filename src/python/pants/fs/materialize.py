@@ -0,0 +1,139 @@
+# coding=utf-8
+# Copyright 2014 Pants project contributors (see CONTRIBUTORS.md).
+# Licensed under the Apache License, Version 2.0 (see LICENSE).
+
+from __future__ import (nested_scopes, generators, division, absolute_import, with_statement,
+                        print_function, unicode_literals)
+
+"""Materializes files into output layouts as cheaply as the filesystem allows.
+
+Files are hardlinked when permitted, cloned copy-on-write (reflinked) when the filesystem supports
+it and copied in full otherwise.  Hardlinks share an inode with their source, so in-place writes to
+either path would show up in the other.  The inode's permissions are shared too and so are left
+alone - the source may well be an ivy cache entry ivy needs to rewrite.  Instead, any existing
+destination is unlinked rather than written through, and `unshare` must be called on a materialized
+path before it is modified in place.
+"""
+
+import errno
+import fcntl
+import os
+import shutil
+import stat
+import sys
+import tempfile
+
+from pants.util.dirutil import safe_delete, safe_mkdir, safe_mkdir_for
+
+
+HARDLINK = 'hardlink'
+REFLINK = 'reflink'
+COPY = 'copy'
+
+# The linux FICLONE ioctl request number: _IOW(0x94, 9, int).
+_FICLONE = 0x40049409
+
+# Errors indicating a link or clone is not possible here, rather than that something is wrong.
+_UNSUPPORTED_ERRNOS = frozenset(getattr(errno, name) for name in ('EXDEV', 'EPERM', 'EACCES',
+                                                                  'EMLINK', 'EINVAL', 'ENOTTY',
+                                                                  'ENOSYS', 'EOPNOTSUPP',
+                                                                  'ENOTSUP', 'EBADF')
+                                if hasattr(errno, name))
+
+
+def _hardlink(src, dst):
+  try:
+    os.link(src, dst)
+  except OSError as e:
+    if e.errno in _UNSUPPORTED_ERRNOS:
+      return False
+    raise
+  return True
+
+
+def _reflink(src, dst):
+  if not sys.platform.startswith('linux'):
+    return False
+
+  try:
+    with open(src, 'rb') as src_fh:
+      with open(dst, 'wb') as dst_fh:
+        fcntl.ioctl(dst_fh.fileno(), _FICLONE, src_fh.fileno())
+  except (IOError, OSError) as e:
+    safe_delete(dst)
+    if e.errno in _UNSUPPORTED_ERRNOS:
+      return False
+    raise
+  shutil.copystat(src, dst)
+  return True
+
+
+def materialize(src, dst, allow_hardlink=True):
+  """Materializes the contents of the file at src as the file at dst.
+
+  Any existing file or link at dst is removed first so that nothing is written through it.
+
+  :param string src: The path of the file to materialize; symlinks are resolved.
+  :param string dst: The path to materialize the file at; parent directories are created as needed.
+  :param bool allow_hardlink: ``True`` to allow dst to share src's inode.  Pass ``False`` when src
+    may be modified in place by something that does not `unshare` it first.
+  :returns: The strategy used; one of `HARDLINK`, `REFLINK` or `COPY`.
+  """
+  src = os.path.realpath(src)
+  safe_mkdir_for(dst)
+  if os.path.lexists(dst):
+    os.unlink(dst)
+
+  if allow_hardlink and _hardlink(src, dst):
+    return HARDLINK
+  if _reflink(src, dst):
+    return REFLINK
+  shutil.copy2(src, dst)
+  return COPY
+
+
+def materialize_tree(src, dst, allow_hardlink=True):
+  """Materializes the file at src as dst, or each file under the directory at src beneath dst.
+
+  Symlinked files and directories under src are followed.
+
+  :param string src: The path of the file or directory to materialize.
+  :param string dst: The path to materialize src at.
+  :param bool allow_hardlink: As for `materialize`.
+  """
+  if not os.path.isdir(src):
+    materialize(src, dst, allow_hardlink=allow_hardlink)
+    return
+
+  if os.path.islink(dst) or (os.path.lexists(dst) and not os.path.isdir(dst)):
+    os.unlink(dst)
+  for root, _, files in os.walk(src, followlinks=True):
+    reldir = os.path.relpath(root, src)
+    safe_mkdir(os.path.normpath(os.path.join(dst, reldir)))
+    for name in files:
+      materialize(os.path.join(root, name), os.path.normpath(os.path.join(dst, reldir, name)),
+                  allow_hardlink=allow_hardlink)
+
+
+def unshare(path):
+  """Ensures the file at path has an inode of its own so that it is safe to modify in place.
+
+  If path is hardlinked elsewhere it is replaced with a private, writeable copy; otherwise it is
+  left untouched.
+
+  :param string path: The path of the file to unshare.
+  :returns: ``True`` if path was replaced with a private copy.
+  """
+  if os.path.islink(path) or not os.path.isfile(path) or os.stat(path).st_nlink <= 1:
+    return False
+
+  fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), prefix='.%s.' % os.path.basename(path))
+  os.close(fd)
+  try:
+    shutil.copy2(path, tmp)
+    os.chmod(tmp, os.stat(tmp).st_mode | stat.S_IWUSR)
+    os.rename(tmp, path)
+  except:
+    safe_delete(tmp)
+    raise
+  return True
@@ -0,0 +1,81 @@
+# coding=utf-8
+# Copyright 2014 Pants project contributors (see CONTRIBUTORS.md).
+# Licensed under the Apache License, Version 2.0 (see LICENSE).
+
+from __future__ import (nested_scopes, generators, division, absolute_import, with_statement,
+                        print_function, unicode_literals)
+
+import os
+import threading
+from collections import defaultdict
+
+from pants.util.dirutil import safe_mkdir_for
+
+
+class AggregatedTestTimings(object):
+  """Aggregates the timings and outcomes of individual tests over a pants run.
+
+  A test run more than once has its timings summed and keeps its worst outcome.  Results may be
+  added from multiple threads.
+
+  If path is not None, appends each result to that file as it comes in, through a handle that is
+  held open until close() at the end of the run.  Useful for finding slow tests."""
+
+  # Test outcomes, from best to worst.
+  OUTCOMES = ('passed', 'skipped', 'failed')
+
+  def __init__(self, path=None):
+    # Map test name -> timing in seconds (a float)
+    self._timings_by_test = defaultdict(float)
+    self._outcomes_by_test = {}
+    self._lock = threading.Lock()
+    self._path = path
+    self._file = None
+    self._closed = False
+    if self._path:
+      safe_mkdir_for(self._path)
+
+  def add_timing(self, label, secs, outcome):
+    """Aggregate timings by test.
+
+    label - the name of the test.
+    secs - a double, so fractional seconds are allowed.
+    outcome - one of OUTCOMES.
+    """
+    with self._lock:
+      self._timings_by_test[label] += secs
+      previous = self._outcomes_by_test.get(label)
+      if previous is None or self._rank(outcome) > self._rank(previous):
+        self._outcomes_by_test[label] = outcome
+      if self._path and not self._closed:
+        # Check existence in case we're a clean-all. We don't want to write anything in that case.
+        if self._file is None and os.path.exists(os.path.dirname(self._path)):
+          # Line buffered, so each result is in the file as soon as it comes in.
+          self._file = open(self._path, 'a', 1)
+        if self._file:
+          self._file.write('%.3f %s %s\n' % (secs, outcome, label))
+
+  def close(self):
+    """Closes the file results are appended to.  Results added afterwards are only aggregated."""
+    with self._lock:
+      self._closed = True
+      if self._file:
+        self._file.close()
+        self._file = None
+
+  def _rank(self, outcome):
+    return self.OUTCOMES.index(outcome) if outcome in self.OUTCOMES else len(self.OUTCOMES)
+
+  def get_all(self):
+    """Returns all the test timings, sorted in decreasing order.
+
+    Each value is a dict: { label: <test name>, timing: <timing in seconds>, outcome: <outcome> }
+    """
+    with self._lock:
+      return [{'label': label, 'timing': timing, 'outcome': self._outcomes_by_test[label]}
+              for label, timing in sorted(self._timings_by_test.items(),
+                                          key=lambda x: x[1], reverse=True)]
+
+  def slowest(self, n):
+    """Returns the n slowest tests, in the form returned by get_all."""
+    return self.get_all()[:n]
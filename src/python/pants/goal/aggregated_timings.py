@@ -6,20 +6,35 @@ from __future__ import (nested_scopes, generators, division, absolute_import, wi
                         print_function, unicode_literals)
 
 import os
+import threading
+import time
 from collections import defaultdict
 
-from pants.util.dirutil import safe_mkdir_for
+from pants.util.dirutil import safe_delete, safe_mkdir_for
 
 
 class AggregatedTimings(object):
   """Aggregates timings over multiple invocations of 'similar' work.
 
-  If filepath is not none, stores the timings in that file. Useful for finding bottlenecks."""
+  If filepath is not none, stores the timings in that file. Useful for finding bottlenecks.
+
+  While the run is in progress each timing is appended to a log alongside that file, in batches.
+  The file itself is written from the aggregated timings by close() at the end of the run."""
+
+  # Pending timings are appended to the log once there are this many of them, or once this many
+  # seconds have passed since the last append.
+  _FLUSH_BATCH_SIZE = 1000
+  _FLUSH_INTERVAL_SECS = 5
+
   def __init__(self, path=None):
     # Map path -> timing in seconds (a float)
     self._timings_by_path = defaultdict(float)
     self._tool_labels = set()
     self._path = path
+    self._log_path = '%s.log' % path if path else None
+    self._pending = []
+    self._last_flush = time.time()
+    self._lock = threading.RLock()
     safe_mkdir_for(self._path)
 
   def add_timing(self, label, secs, is_tool=False):
@@ -28,19 +43,42 @@ class AggregatedTimings(object):
     secs - a double, so fractional seconds are allowed.
     is_tool - whether this label represents a tool invocation.
     """
-    self._timings_by_path[label] += secs
-    if is_tool:
-      self._tool_labels.add(label)
-    # Check existence in case we're a clean-all. We don't want to write anything in that case.
-    if self._path and os.path.exists(os.path.dirname(self._path)):
-      with open(self._path, 'w') as f:
-        for x in self.get_all():
-          f.write('%(label)s: %(timing)s\n' % x)
+    with self._lock:
+      self._timings_by_path[label] += secs
+      if is_tool:
+        self._tool_labels.add(label)
+      if self._path:
+        self._pending.append('%r %d %s\n' % (secs, is_tool, label))
+        if (len(self._pending) >= self._FLUSH_BATCH_SIZE or
+            time.time() - self._last_flush >= self._FLUSH_INTERVAL_SECS):
+          self.flush()
+
+  def flush(self):
+    """Appends any pending timings to the log."""
+    with self._lock:
+      # Check existence in case we're a clean-all. We don't want to write anything in that case.
+      if self._pending and os.path.exists(os.path.dirname(self._path)):
+        with open(self._log_path, 'a') as f:
+          f.writelines(self._pending)
+      self._pending = []
+      self._last_flush = time.time()
+
+  def close(self):
+    """Writes the aggregated timings to the file, replacing the log."""
+    with self._lock:
+      if self._path:
+        self.flush()
+        if os.path.exists(os.path.dirname(self._path)):
+          with open(self._path, 'w') as f:
+            for x in self.get_all():
+              f.write('%(label)s: %(timing)s\n' % x)
+          safe_delete(self._log_path)
 
   def get_all(self):
     """Returns all the timings, sorted in decreasing order.
 
     Each value is a dict: { path: <path>, timing: <timing in seconds> }
     """
-    return [{ 'label': x[0], 'timing': x[1], 'is_tool': x[0] in self._tool_labels}
-            for x in sorted(self._timings_by_path.items(), key=lambda x: x[1], reverse=True)]
+    with self._lock:
+      return [{ 'label': x[0], 'timing': x[1], 'is_tool': x[0] in self._tool_labels}
+              for x in sorted(self._timings_by_path.items(), key=lambda x: x[1], reverse=True)]
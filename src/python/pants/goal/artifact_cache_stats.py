@@ -6,6 +6,8 @@ from __future__ import (nested_scopes, generators, division, absolute_import, wi
                         print_function, unicode_literals)
 
 import os
+import threading
+import time
 from collections import defaultdict, namedtuple
 
 from pants.util.dirutil import safe_mkdir
@@ -17,12 +19,23 @@ CacheStat = namedtuple('CacheStat', ['hit_targets', 'miss_targets'])
 class ArtifactCacheStats(object):
   """Tracks the hits and misses in the artifact cache.
 
-  If dir is specified, writes the hits and misses to files in that dir."""
+  If dir is specified, appends the hits and misses to files in that dir.  Appends are batched, so
+  flush() or close() must be called to be sure the files are up to date."""
+
+  # Pending hits and misses are appended once there are this many of them, or once this many
+  # seconds have passed since the last append.
+  _FLUSH_BATCH_SIZE = 1000
+  _FLUSH_INTERVAL_SECS = 5
+
   def __init__(self, dir=None):
     def init_stat():
       return CacheStat([],[])
     self.stats_per_cache = defaultdict(init_stat)
     self._dir = dir
+    self._pending_by_path = defaultdict(list)
+    self._num_pending = 0
+    self._last_flush = time.time()
+    self._lock = threading.RLock()
     safe_mkdir(self._dir)
 
   def add_hit(self, cache_name, tgt):
@@ -34,21 +47,42 @@ class ArtifactCacheStats(object):
   def get_all(self):
     """Returns the cache stats as a list of dicts."""
     ret = []
-    for cache_name, stat in self.stats_per_cache.items():
-      ret.append({
-        'cache_name': cache_name,
-        'num_hits': len(stat.hit_targets),
-        'num_misses': len(stat.miss_targets),
-        'hits': stat.hit_targets,
-        'misses': stat.miss_targets
-      })
+    with self._lock:
+      for cache_name, stat in self.stats_per_cache.items():
+        ret.append({
+          'cache_name': cache_name,
+          'num_hits': len(stat.hit_targets),
+          'num_misses': len(stat.miss_targets),
+          'hits': list(stat.hit_targets),
+          'misses': list(stat.miss_targets)
+        })
     return ret
 
+  def flush(self):
+    """Appends any pending hits and misses to their files."""
+    with self._lock:
+      if self._dir and os.path.exists(self._dir):  # Check existence in case of a clean-all.
+        for path, lines in self._pending_by_path.items():
+          with open(path, 'a') as f:
+            f.writelines(lines)
+      self._pending_by_path.clear()
+      self._num_pending = 0
+      self._last_flush = time.time()
+
+  def close(self):
+    """Appends any pending hits and misses at the end of the run."""
+    self.flush()
+
   # hit_or_miss is the appropriate index in CacheStat, i.e., 0 for hit, 1 for miss.
   def _add_stat(self, hit_or_miss, cache_name, tgt):
-    self.stats_per_cache[cache_name][hit_or_miss].append(tgt.address.reference())
-    if self._dir and os.path.exists(self._dir):  # Check existence in case of a clean-all.
-      suffix = 'misses' if hit_or_miss else 'hits'
-      with open(os.path.join(self._dir, '%s.%s' % (cache_name, suffix)), 'a') as f:
-        f.write(tgt.address.reference())
-        f.write('\n')
+    reference = tgt.address.reference()
+    with self._lock:
+      self.stats_per_cache[cache_name][hit_or_miss].append(reference)
+      if self._dir:
+        suffix = 'misses' if hit_or_miss else 'hits'
+        path = os.path.join(self._dir, '%s.%s' % (cache_name, suffix))
+        self._pending_by_path[path].append('%s\n' % reference)
+        self._num_pending += 1
+        if (self._num_pending >= self._FLUSH_BATCH_SIZE or
+            time.time() - self._last_flush >= self._FLUSH_INTERVAL_SECS):
+          self.flush()
@@ -56,6 +56,7 @@ class _Goal(object):
     self.name = name
     self.description = None
     self.serialize = False
+    self.exclusive = False
     self._task_type_by_name = {}  # name -> Task subclass.
     self._ordered_task_names = []  # The task names, in the order imposed by registration.
 
@@ -119,6 +120,15 @@ class _Goal(object):
     self.description = description
     return self
 
+  def as_exclusive(self):
+    """Never run this goal concurrently with other goals.
+
+    For goals, like clean-all, that change the workdir other goals read and write.  An exclusive
+    goal runs after the goals ordered before it and before the goals ordered after it.
+    """
+    self.exclusive = True
+    return self
+
   def uninstall_task(self, name):
     """Removes the named task from this goal.
 
@@ -17,6 +17,7 @@ from pants.reporting.plaintext_reporter import PlainTextReporter
 from pants.reporting.quiet_reporter import QuietReporter
 from pants.reporting.report import Report, ReportingError
 from pants.reporting.reporting_server import ReportingServerManager
+from pants.reporting.trace_reporter import TraceReporter
 from pants.util.dirutil import safe_mkdir, safe_rmtree
 
 
@@ -115,3 +116,8 @@ def update_reporting(options, is_quiet_task, run_tracker):
     logfile_reporter.emit(buffered_output)
     logfile_reporter.flush()
     run_tracker.report.add_reporter('logfile', logfile_reporter)
+
+  if options.trace:
+    # Workunits are recorded as they end, so those started before now are still traced.
+    settings = TraceReporter.Settings(log_level=log_level, trace_dir=run_tracker.info_dir)
+    run_tracker.report.add_reporter('trace', TraceReporter(run_tracker, settings))
@@ -6,6 +6,7 @@ from __future__ import (nested_scopes, generators, division, absolute_import, wi
                         print_function, unicode_literals)
 
 import os
+import threading
 from collections import defaultdict
 
 from twitter.common.collections import OrderedSet
@@ -85,6 +86,10 @@ class Products(object):
   which tasks produce which products and which tasks consume them. Currently it's quite difficult
   to match up 'requires' calls to the producers of those requirements, especially when the 'typename'
   is in a variable, not a literal.
+
+  Goals that don't depend on each other may run concurrently, so products can be registered,
+  created and added to from several threads at once.  The payloads themselves are not guarded; a
+  task only reads a product once the goal producing it has finished.
   """
   class ProductMapping(object):
     """Maps products of a given type by target. Each product is a map from basedir to a list of
@@ -94,6 +99,7 @@ class Products(object):
     def __init__(self, typename):
       self.typename = typename
       self.by_target = defaultdict(lambda: defaultdict(list))
+      self._lock = threading.RLock()
 
     def empty(self):
       return len(self.by_target) == 0
@@ -107,10 +113,11 @@ class Products(object):
         If product_paths is omitted, the current mutable list of mapped products for this target
         and basedir is returned for appending.
       """
-      if product_paths is not None:
-        self.by_target[target][basedir].extend(product_paths)
-      else:
-        return self.by_target[target][basedir]
+      with self._lock:
+        if product_paths is not None:
+          self.by_target[target][basedir].extend(product_paths)
+        else:
+          return self.by_target[target][basedir]
 
     def has(self, target):
       """Returns whether we have a mapping for the specified target."""
@@ -130,7 +137,8 @@ class Products(object):
         If no mapping exists, returns an empty map whose values default to empty lists. So you
         can use the result without checking for None.
       """
-      return self.by_target[target]
+      with self._lock:
+        return self.by_target[target]
 
     def itermappings(self):
       """
@@ -162,25 +170,30 @@ class Products(object):
     self.data_products = {}  # type -> arbitrary object.
     self.required_data_products = set()
 
+    self._lock = threading.RLock()
+
   def require(self, typename, predicate=None):
     """Registers a requirement that file products of the given type by mapped.
 
     If a target predicate is supplied, only targets matching the predicate are mapped.
     """
-    if predicate:
-      self.predicates_for_type[typename].append(predicate)
-    return self.products.setdefault(typename, Products.ProductMapping(typename))
+    with self._lock:
+      if predicate:
+        self.predicates_for_type[typename].append(predicate)
+      return self.products.setdefault(typename, Products.ProductMapping(typename))
 
   def isrequired(self, typename):
     """Returns a predicate that selects targets required for the given type if mappings are required.
 
     Otherwise returns None.
     """
-    if typename not in self.products:
-      return None
+    with self._lock:
+      if typename not in self.products:
+        return None
+      predicates = list(self.predicates_for_type[typename])
     def combine(first, second):
       return lambda target: first(target) or second(target)
-    return reduce(combine, self.predicates_for_type[typename], lambda target: False)
+    return reduce(combine, predicates, lambda target: False)
 
   def get(self, typename):
     """Returns a ProductMapping for the given type name."""
@@ -191,7 +204,8 @@ class Products(object):
 
     typename: the name of a data product that should be generated.
     """
-    self.required_data_products.add(typename)
+    with self._lock:
+      self.required_data_products.add(typename)
 
   def is_required_data(self, typename):
     """ Checks if a particular data product is required by any tasks."""
@@ -207,8 +221,9 @@ class Products(object):
 
     If the product isn't found, returns None, unless init_func is set, in which case the product's
     value is set to the return value of init_func(), and returned."""
-    if typename not in self.data_products:
-      if not init_func:
-        return None
-      self.data_products[typename] = init_func()
-    return self.data_products.get(typename)
+    with self._lock:
+      if typename not in self.data_products:
+        if not init_func:
+          return None
+        self.data_products[typename] = init_func()
+      return self.data_products.get(typename)
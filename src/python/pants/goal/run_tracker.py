@@ -21,6 +21,7 @@ from pants.base.config import Config
 from pants.base.run_info import RunInfo
 from pants.base.worker_pool import SubprocPool, WorkerPool
 from pants.base.workunit import WorkUnit
+from pants.goal.aggregated_test_timings import AggregatedTestTimings
 from pants.goal.aggregated_timings import AggregatedTimings
 from pants.goal.artifact_cache_stats import ArtifactCacheStats
 from pants.reporting.report import Report
@@ -60,17 +61,20 @@ class RunTracker(object):
     stats_upload_timeout = config.getdefault('stats_upload_timeout', default=2)
     num_foreground_workers = config.getdefault('num_foreground_workers', default=8)
     num_background_workers = config.getdefault('num_background_workers', default=8)
+    num_slowest_tests = config.getdefault('num_slowest_tests', default=10)
     return cls(info_dir,
                stats_upload_url=stats_upload_url,
                num_foreground_workers=num_foreground_workers,
-               num_background_workers=num_background_workers)
+               num_background_workers=num_background_workers,
+               num_slowest_tests=num_slowest_tests)
 
   def __init__(self,
                info_dir,
                stats_upload_url=None,
                stats_upload_timeout=2,
                num_foreground_workers=8,
-               num_background_workers=8):
+               num_background_workers=8,
+               num_slowest_tests=10):
     self.run_timestamp = time.time()  # A double, so we get subsecond precision for ids.
     cmd_line = ' '.join(['./pants'] + sys.argv[1:])
 
@@ -108,6 +112,12 @@ class RunTracker(object):
     self.artifact_cache_stats = \
       ArtifactCacheStats(os.path.join(self.info_dir, 'artifact_cache_stats'))
 
+    # Time spent in individual tests, e.g. the test functions run by pytest.
+    self.test_timings = AggregatedTestTimings(os.path.join(self.info_dir, 'test_timings'))
+
+    # Number of slowest tests to summarize at the end of the run.
+    self._num_slowest_tests = num_slowest_tests
+
     # Number of threads for foreground work.
     self._num_foreground_workers = num_foreground_workers
 
@@ -239,7 +249,8 @@ class RunTracker(object):
         'run_info': json.dumps(self.run_info.get_as_dict()),
         'cumulative_timings': json.dumps(self.cumulative_timings.get_all()),
         'self_timings': json.dumps(self.self_timings.get_all()),
-        'artifact_cache_stats': json.dumps(self.artifact_cache_stats.get_all())
+        'artifact_cache_stats': json.dumps(self.artifact_cache_stats.get_all()),
+        'test_timings': json.dumps(self.test_timings.get_all())
         }
 
       headers = {"Content-type": "application/x-www-form-urlencoded", "Accept": "text/plain"}
@@ -285,12 +296,23 @@ class RunTracker(object):
     self.report.end_workunit(self._main_root_workunit)
     self._main_root_workunit.end()
 
+    # All workunits have ended, so the timings and cache stats are final.
+    self.cumulative_timings.close()
+    self.self_timings.close()
+    self.artifact_cache_stats.close()
+    self.test_timings.close()
+
     outcome = self._main_root_workunit.outcome()
     if self._background_root_workunit:
       outcome = min(outcome, self._background_root_workunit.outcome())
     outcome_str = WorkUnit.outcome_string(outcome)
     log_level = WorkUnit.choose_for_outcome(outcome, Report.ERROR, Report.ERROR,
                                             Report.WARN, Report.INFO, Report.INFO)
+    slowest_tests = self.test_timings.slowest(self._num_slowest_tests)
+    if slowest_tests:
+      self.log(Report.INFO, 'Slowest %d tests:' % len(slowest_tests))
+      for test in slowest_tests:
+        self.log(Report.INFO, '  %(timing).3f %(outcome)s %(label)s' % test)
     self.log(log_level, outcome_str)
 
     if self.run_info.get_info('outcome') is None:
@@ -309,6 +331,17 @@ class RunTracker(object):
                                                 num_workers=self._num_foreground_workers)
     return self._foreground_worker_pool
 
+  def new_worker_pool(self, num_workers):
+    """Returns a new pool whose work is accounted for under the calling thread's current workunit.
+
+    Unlike the shared foreground pool, work on this pool may itself submit foreground work and wait
+    for it without risk of starving the pool.  The caller owns the pool and must shut it down (or
+    abort it) when done.
+    """
+    return WorkerPool(parent_workunit=self._threadlocal.current_workunit,
+                      run_tracker=self,
+                      num_workers=num_workers)
+
   def get_background_root_workunit(self):
     if self._background_root_workunit is None:
       self._background_root_workunit = WorkUnit(run_tracker=self, parent=None, labels=[],
@@ -8,6 +8,7 @@ from __future__ import (nested_scopes, generators, division, absolute_import, wi
 import hashlib
 import os
 import shutil
+import threading
 
 from twitter.common import log
 
@@ -83,6 +84,7 @@ class Bootstrapper(object):
     self._timeout_secs = self._config.getint('ivy', 'bootstrap_fetch_timeout_secs', default=1)
     self._version_or_ivyxml = self._config.get('ivy', 'ivy_profile', default=self._DEFAULT_VERSION)
     self._classpath = None
+    self._classpath_lock = threading.Lock()
 
   def ivy(self, java_executor=None, bootstrap_workunit_factory=None):
     """Returns an ivy instance bootstrapped by this bootstrapper.
@@ -101,9 +103,11 @@ class Bootstrapper(object):
 
     :raises: Bootstrapper.Error if the classpath could not be bootstrapped
     """
-    if not self._classpath:
-      self._classpath = self._bootstrap_ivy_classpath(executor, workunit_factory)
-    return self._classpath
+    # Ivy may be run from several threads at once; only the first should bootstrap it.
+    with self._classpath_lock:
+      if not self._classpath:
+        self._classpath = self._bootstrap_ivy_classpath(executor, workunit_factory)
+      return self._classpath
 
   @property
   def _ivy_settings(self):
@@ -7,15 +7,17 @@ from __future__ import (nested_scopes, generators, division, absolute_import, wi
 
 from contextlib import closing, contextmanager
 import hashlib
+import json
 import os
 import sys
 import tempfile
+import threading
 import time
 
 import requests
 from twitter.common.lang import Compatibility
 
-from pants.util.dirutil import safe_open
+from pants.util.dirutil import safe_delete, safe_open
 
 
 class Fetcher(object):
@@ -190,6 +192,142 @@ class Fetcher(object):
         sys.stdout.write(' %.3fs\n' % (time.time() - self._start))
         sys.stdout.flush()
 
+  class _ResumingListener(Listener):
+    """A Listener that writes to a partial download file that may be appended to across attempts.
+
+    The wrapped listener sees a single status, the full data stream in order and a single finished
+    callback no matter how many attempts it takes to download all the data.
+
+    The url and ETag, if any, of the data are recorded in a `<path>.source` file alongside the
+    partial download file.  A partial download file left by a different url is discarded, as is one
+    whose ETag no longer matches the server's.
+    """
+
+    def __init__(self, listener, path, url):
+      self._listener = listener
+      self._path = path
+      self._source_path = path + '.source'
+      self._url = url
+      self._fh = None
+      self._written = 0
+      self._etag = None
+      self._response_etag = None
+      self._forwarded = 0
+      self._reported = False
+
+      if os.path.exists(path):
+        source = self._read_source()
+        if source and source.get('url') == url:
+          self._written = os.path.getsize(path)
+          self._etag = source.get('etag')
+        else:
+          self.discard()
+
+    @property
+    def offset(self):
+      """The number of bytes already saved to the partial download file."""
+      return self._written
+
+    @property
+    def etag(self):
+      """The ETag of the data saved to the partial download file, if known."""
+      return self._etag
+
+    def response_etag(self, etag):
+      """Records the ETag of the response whose status is reported next."""
+      self._response_etag = etag
+
+    def status(self, code, content_length=None):
+      if code not in (requests.codes.ok, requests.codes.partial_content):
+        if not self._reported:
+          self._listener.status(code, content_length=content_length)
+        return
+
+      if code == requests.codes.partial_content:
+        if self._etag and self._response_etag != self._etag:
+          # The server ignored our If-Range validator and sent a range of different content.
+          self.discard()
+          if self._forwarded:
+            raise Fetcher.PermanentError('The content of %s changed during the download'
+                                         % self._url)
+          raise Fetcher.TransientError('The content of %s changed since it was partially '
+                                       'downloaded' % self._url)
+        total = self._written + content_length if content_length is not None else None
+        self._fh = safe_open(self._path, 'ab')
+      else:
+        # Either a fresh download or the server ignored our Range request; start over.
+        total = content_length
+        self._written = 0
+        self._fh = safe_open(self._path, 'wb')
+      self._etag = self._response_etag
+      self._write_source()
+
+      if not self._reported:
+        self._listener.status(requests.codes.ok, content_length=total)
+        self._reported = True
+
+      if self._forwarded < self._written:
+        # Replay data saved by earlier attempts that the listener has not seen yet.
+        with open(self._path, 'rb') as fp:
+          fp.seek(self._forwarded)
+          while self._forwarded < self._written:
+            data = fp.read(min(64 * 1024, self._written - self._forwarded))
+            self._listener.recv_chunk(data)
+            self._forwarded += len(data)
+
+    def recv_chunk(self, data):
+      self._fh.write(data)
+      start = self._written
+      self._written += len(data)
+      if self._written > self._forwarded:
+        self._listener.recv_chunk(data[self._forwarded - start:] if self._forwarded > start
+                                  else data)
+        self._forwarded = self._written
+
+    def finished(self):
+      self.close()
+      self._listener.finished()
+
+    def close(self):
+      if self._fh:
+        self._fh.close()
+        self._fh = None
+
+    def discard(self):
+      """Deletes the partial download file and its source record."""
+      self.close()
+      safe_delete(self._path)
+      safe_delete(self._source_path)
+      self._written = 0
+      self._etag = None
+
+    def _read_source(self):
+      try:
+        with open(self._source_path) as fp:
+          return json.load(fp)
+      except (IOError, ValueError):
+        return None
+
+    def _write_source(self):
+      with safe_open(self._source_path, 'w') as fp:
+        json.dump({'url': self._url, 'etag': self._etag}, fp)
+
+  class _RangeListener(Listener):
+    """A Listener that writes a single byte range response into its slot of a pre-sized file."""
+
+    def __init__(self, fh):
+      self._fh = fh
+      self.written = 0
+
+    def status(self, code, content_length=None):
+      if code != requests.codes.partial_content:
+        raise Fetcher.PermanentError('Expected a partial content response, got %d' % code,
+                                     response_code=code)
+
+    def recv_chunk(self, data):
+      self._fh.write(data)
+      self.written += len(data)
+
   def __init__(self, requests_api=None):
     """Creates a Fetcher that uses the given requests api object.
 
@@ -207,20 +345,34 @@ class Fetcher(object):
     :param timeout_secs: the maximum time to wait for data to be available, 1 second by default
     :raises: Fetcher.Error if there was a problem fetching all data from the given url
     """
-    chunk_size_bytes = chunk_size_bytes or 10 * 1024
-    timeout_secs = timeout_secs or 1.0
-
     if not isinstance(listener, self.Listener):
       raise ValueError('listener must be a Listener instance, given %s' % listener)
 
+    self._fetch(url, listener, chunk_size_bytes, timeout_secs)
+
+  def _fetch(self, url, listener, chunk_size_bytes, timeout_secs, start=None, end=None,
+             if_range=None, etag_callback=None):
+    chunk_size_bytes = chunk_size_bytes or 10 * 1024
+    timeout_secs = timeout_secs or 1.0
+
     try:
-      with closing(self._requests.get(url, stream=True, timeout=timeout_secs)) as resp:
-        if resp.status_code != requests.codes.ok:
+      if start is None:
+        resp = self._requests.get(url, stream=True, timeout=timeout_secs)
+      else:
+        headers = {'Range': 'bytes=%d-%s' % (start, '' if end is None else end)}
+        if if_range:
+          headers['If-Range'] = if_range
+        resp = self._requests.get(url, stream=True, timeout=timeout_secs, headers=headers)
+      with closing(resp):
+        if (resp.status_code != requests.codes.ok and
+            not (start is not None and resp.status_code == requests.codes.partial_content)):
           listener.status(resp.status_code)
           raise self.PermanentError('GET request to %s failed with status code %d'
                                     % (url, resp.status_code),
                                     response_code=resp.status_code)
 
+        if etag_callback:
+          etag_callback(resp.headers.get('etag'))
         size = resp.headers.get('content-length')
         listener.status(resp.status_code, content_length=int(size) if size else None)
 
@@ -229,38 +381,161 @@ class Fetcher(object):
           listener.recv_chunk(data)
           read_bytes += len(data)
         if size and read_bytes != int(size):
-          raise self.Error('Expected %s bytes, read %d' % (size, read_bytes))
+          # A short read is a connection cut off mid-stream, so it's worth retrying.
+          raise self.TransientError('Expected %s bytes, read %d' % (size, read_bytes))
         listener.finished()
     except requests.RequestException as e:
       exception_factory = (self.TransientError if isinstance(e, self._TRANSIENT_EXCEPTION_TYPES)
                            else self.PermanentError)
       raise exception_factory('Problem GETing data from %s: %s' % (url, e))
 
-  def download(self, url, listener=None, path_or_fd=None, chunk_size_bytes=None, timeout_secs=None):
+  def download(self, url, listener=None, path_or_fd=None, chunk_size_bytes=None, timeout_secs=None,
+               max_retries=None, ranges=None, min_range_size_bytes=None):
     """Downloads data from the given URL.
 
     By default data is downloaded to a temporary file.
 
+    When downloading to a path, data is first streamed to a `<path>.part` file.  If the download
+    fails with a `Fetcher.TransientError` the partial file is kept and the download is resumed from
+    where it left off with an HTTP Range request, both for in-process retries and for any later
+    download of the same url to the same path.  Resumes send the ETag of the partial data, if the
+    server provided one, as an If-Range validator so changed content is downloaded afresh.  The
+    listener always sees the complete data stream in order.
+
     :param string url: the url to GET data from
     :param listener: an optional listener to notify of all download lifecycle events
     :param path_or_fd: an optional file path or open file descriptor to write data to
     :param chunk_size_bytes: the chunk size to use for buffering data
     :param timeout_secs: the maximum time to wait for data to be available
+    :param int max_retries: the number of times to resume a download interrupted by a transient
+      error, 0 by default; only supported when downloading to a path
+    :param int ranges: the number of concurrent byte range requests to split large downloads into
+      when the server supports them, 1 by default; only supported when downloading to a path
+    :param int min_range_size_bytes: the minimum content length of a download to split into byte
+      ranges, 10 MB by default
     :returns: the path to the file data was downloaded to.
     :raises: Fetcher.Error if there was a problem downloading all data from the given url.
     """
-    @contextmanager
-    def download_fp(_path_or_fd):
-      if _path_or_fd and not isinstance(_path_or_fd, Compatibility.string):
-        yield _path_or_fd, _path_or_fd.name
-      else:
-        if not _path_or_fd:
-          fd, _path_or_fd = tempfile.mkstemp()
-          os.close(fd)
-        with safe_open(_path_or_fd, 'w') as fp:
-          yield fp, _path_or_fd
-
-    with download_fp(path_or_fd) as (fp, path):
-      listener = self.DownloadListener(fp).wrap(listener)
-      self.fetch(url, listener, chunk_size_bytes=chunk_size_bytes, timeout_secs=timeout_secs)
-      return path
+    listener = listener or self.Listener()
+    if path_or_fd and not isinstance(path_or_fd, Compatibility.string):
+      self.fetch(url, self.DownloadListener(path_or_fd).wrap(listener),
+                 chunk_size_bytes=chunk_size_bytes, timeout_secs=timeout_secs)
+      return path_or_fd.name
+
+    path = path_or_fd
+    if not path:
+      fd, path = tempfile.mkstemp()
+      os.close(fd)
+
+    partial_path = path + '.part'
+    resuming_listener = self._ResumingListener(listener, partial_path, url)
+    if (ranges or 1) > 1 and not resuming_listener.offset:
+      size = self._ranged_content_length(url, timeout_secs)
+      if size and size >= (min_range_size_bytes or 10 * 1024 * 1024):
+        self._download_ranges(url, listener, path, size, ranges, chunk_size_bytes, timeout_secs,
+                              max_retries or 0)
+        resuming_listener.discard()
+        return path
+
+    retries = 0
+    try:
+      while True:
+        try:
+          start = resuming_listener.offset or None
+          self._fetch(url, resuming_listener, chunk_size_bytes, timeout_secs, start=start,
+                      if_range=resuming_listener.etag if start else None,
+                      etag_callback=resuming_listener.response_etag)
+          break
+        except self.TransientError:
+          if retries >= (max_retries or 0):
+            raise
+          retries += 1
+        finally:
+          resuming_listener.close()
+    except self.TransientError:
+      # Keep the partial download around for a later resume.
+      raise
+    except Exception:
+      resuming_listener.discard()
+      raise
+
+    os.rename(partial_path, path)
+    # Drop the source record of the now complete partial download.
+    resuming_listener.discard()
+    return path
+
+  def _ranged_content_length(self, url, timeout_secs):
+    """Returns the content length of url if the server supports byte range requests for it."""
+    try:
+      resp = self._requests.head(url, timeout=timeout_secs or 1.0, allow_redirects=True)
+    except requests.RequestException:
+      return None
+    if resp.status_code != requests.codes.ok or resp.headers.get('accept-ranges') != 'bytes':
+      return None
+    size = resp.headers.get('content-length')
+    return int(size) if size else None
+
+  def _download_ranges(self, url, listener, path, size, ranges, chunk_size_bytes, timeout_secs,
+                       max_retries):
+    """Downloads size bytes from url into path using concurrent byte range requests.
+
+    The listener is notified in order: each range is replayed from disk as soon as it and all the
+    ranges before it have been downloaded.
+    """
+    range_size = -(-size // ranges)
+    bounds = [(start, min(start + range_size, size) - 1) for start in range(0, size, range_size)]
+    done = [threading.Event() for _ in bounds]
+    errors = [None] * len(bounds)
+
+    fd, ranged_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)),
+                                       prefix=os.path.basename(path) + '.')
+    os.close(fd)
+
+    def fetch_range(index, start, end):
+      try:
+        with open(ranged_path, 'r+b') as fh:
+          fh.seek(start)
+          range_listener = self._RangeListener(fh)
+          retries = 0
+          while True:
+            try:
+              self._fetch(url, range_listener, chunk_size_bytes, timeout_secs,
+                          start=start + range_listener.written, end=end)
+              break
+            except self.TransientError:
+              if retries >= max_retries:
+                raise
+              retries += 1
+      except Exception as e:
+        errors[index] = e
+      finally:
+        done[index].set()
+
+    try:
+      with open(ranged_path, 'r+b') as fh:
+        fh.truncate(size)
+      for index, (start, end) in enumerate(bounds):
+        fetcher = threading.Thread(target=fetch_range, args=(index, start, end))
+        fetcher.daemon = True
+        fetcher.start()
+
+      listener.status(requests.codes.ok, content_length=size)
+      read_size = chunk_size_bytes or 10 * 1024
+      for index, (start, end) in enumerate(bounds):
+        # Wait with a timeout to stay interruptible with ctrl-c.
+        while not done[index].wait(1.0):
+          pass
+        if errors[index]:
+          raise errors[index]
+        # A fresh handle per range ensures no stale read-ahead of a range still being written.
+        with open(ranged_path, 'rb') as fh:
+          fh.seek(start)
+          remaining = end - start + 1
+          while remaining > 0:
+            data = fh.read(min(read_size, remaining))
+            listener.recv_chunk(data)
+            remaining -= len(data)
+      listener.finished()
+      os.rename(ranged_path, path)
+    finally:
+      safe_delete(ranged_path)
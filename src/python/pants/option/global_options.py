@@ -15,6 +15,11 @@ def register_global_options(register):
            help='Times tasks and goals and outputs a report.')
   register('-e', '--explain', action='store_true',
            help='Explain the execution of goals.')
+  register('--goal-workers', type=int, default=1, metavar='<count>',
+           help='Run up to this many goals concurrently once the goals producing the products they '
+                'require have finished.  Goals that change the workdir, like clean-all, always '
+                'run on their own in command line order.  The default of 1 runs goals serially '
+                'in a deterministic order, which is useful when debugging.')
 
   # TODO: After moving to the new options system these abstraction leaks can go away.
   register('-k', '--kill-nailguns', action='store_true',
@@ -28,6 +33,8 @@ def register_global_options(register):
            help='Set the logging level.')
   register('-q', '--quiet', action='store_true',
            help='Squelches all console output apart from errors.')
+  register('--trace', action='store_true',
+           help="Write a Chrome trace and a flamegraph of this run's workunits to its info dir.")
   register('-i', '--interpreter', default=[], action='append', metavar='<requirement>',
            help="Constrain what Python interpreters to use.  Uses Requirement format from "
                 "pkg_resources, e.g. 'CPython>=2.6,<3' or 'PyPy'. By default, no constraints "
@@ -6,7 +6,39 @@ from __future__ import (nested_scopes, generators, division, absolute_import, wi
                         print_function, unicode_literals)
 
 import errno
+from multiprocessing.pool import ThreadPool
+import os
+import struct
 import subprocess
+import threading
+
+from pants.util.strutil import ensure_binary
+
+
+# Each argv and envp entry costs its bytes, a NUL terminator and a pointer in the exec'd process.
+_POINTER_BYTES = struct.calcsize(str('P'))
+
+# Room left in the argument space for the command itself when it is not known up front.
+_DEFAULT_HEADROOM_BYTES = 8 * 1024
+
+
+def _arg_max():
+  try:
+    return os.sysconf(str('SC_ARG_MAX'))
+  except (AttributeError, ValueError, OSError):
+    # The historical linux limit; well under what modern systems allow.
+    return 128 * 1024
+
+
+def _args_bytes(args):
+  return sum(len(ensure_binary(arg)) + 1 + _POINTER_BYTES for arg in args)
+
+
+def _env_bytes(env=None):
+  env = os.environ if env is None else env
+  # Each entry is laid out as key=value.
+  return sum(len(ensure_binary(key)) + len(ensure_binary(value)) + 2 + _POINTER_BYTES
+             for key, value in env.items())
 
 
 class Xargs(object):
@@ -14,44 +46,129 @@ class Xargs(object):
 
   Specifically allows encapsulated commands to be passed very large argument lists by chunking up
   the argument lists into a minimal set and then invoking the encapsulated command against each
-  chunk in turn.
+  chunk, optionally running several chunks concurrently.
   """
 
   @classmethod
-  def subprocess(cls, cmd, **kwargs):
+  def subprocess(cls, cmd, parallelism=None, fail_fast=True, **kwargs):
     """Creates an xargs engine that uses subprocess.call to execute the given cmd array with extra
     arg chunks.
+
+    :param int parallelism: The maximum number of chunks to execute concurrently.
+    :param bool fail_fast: Whether to stop executing chunks after the first failure.
     """
     def call(args):
       return subprocess.call(cmd + args, **kwargs)
-    return cls(call)
+    max_chunk_bytes = _arg_max() - _env_bytes(kwargs.get('env')) - _args_bytes(cmd)
+    return cls(call, parallelism=parallelism, fail_fast=fail_fast, max_chunk_bytes=max_chunk_bytes)
 
-  def __init__(self, cmd):
+  def __init__(self, cmd, parallelism=None, fail_fast=True, max_chunk_bytes=None):
     """Creates an xargs engine that calls cmd with argument chunks.
 
     :param cmd: A function that can execute a command line in the form of a list of strings
-      passed as its sole argument.
+      passed as its sole argument.  If parallelism is more than 1 it will be called concurrently
+      from multiple threads.
+    :param int parallelism: The maximum number of chunks to execute concurrently, 1 by default.
+      When more than 1, args are split into at least this many chunks.
+    :param bool fail_fast: If True (the default), no further chunks are started once one chunk
+      fails.  Otherwise all chunks are executed.
+    :param int max_chunk_bytes: The maximum size of the argument list passed to cmd in one call;
+      defaults to ARG_MAX less the current environment size and some headroom for the command.
+      Chunks that still fail with E2BIG are split further.
     """
     self._cmd = cmd
+    self._parallelism = max(1, parallelism or 1)
+    self._fail_fast = fail_fast
+    if max_chunk_bytes is None:
+      max_chunk_bytes = _arg_max() - _env_bytes() - _DEFAULT_HEADROOM_BYTES
+    self._max_chunk_bytes = max_chunk_bytes
 
   def _split_args(self, args):
     half = len(args) // 2
     return args[:half], args[half:]
 
+  def _chunk_args(self, args):
+    chunks = []
+    chunk = []
+    chunk_bytes = 0
+    for arg in args:
+      arg_bytes = _args_bytes([arg])
+      if chunk and chunk_bytes + arg_bytes > self._max_chunk_bytes:
+        chunks.append(chunk)
+        chunk = []
+        chunk_bytes = 0
+      chunk.append(arg)
+      chunk_bytes += arg_bytes
+    if chunk or not chunks:
+      chunks.append(chunk)
+
+    if len(chunks) < self._parallelism and len(args) > len(chunks):
+      # Spread the args out so every available worker gets a share.
+      count = min(self._parallelism, len(args))
+      size = -(-len(args) // count)
+      chunks = [args[i:i + size] for i in range(0, len(args), size)]
+    return chunks
+
   def execute(self, args):
     """Executes the configured cmd passing args in one or more rounds xargs style.
 
     :param list args: Extra arguments to pass to cmd.
+    :returns: 0 if all chunks succeeded, otherwise the result of the first failed chunk in argument
+      order.
     """
-    all_args = list(args)
+    chunks = self._chunk_args(list(args))
+    if self._parallelism == 1 or len(chunks) == 1:
+      return self._first_failure(list(self._execute_serially(chunks)))
+    else:
+      return self._first_failure(self._execute_concurrently(chunks))
+
+  def _first_failure(self, results):
+    for result in results:
+      if result:
+        return result
+    return 0
+
+  def _execute_serially(self, chunks):
+    for chunk in chunks:
+      result = self._execute_chunk(chunk)
+      yield result
+      if result != 0 and self._fail_fast:
+        return
+
+  def _execute_concurrently(self, chunks):
+    cancelled = threading.Event()
+
+    def execute_chunk(chunk):
+      if cancelled.is_set():
+        return None
+      try:
+        result = self._execute_chunk(chunk)
+      except Exception:
+        cancelled.set()
+        raise
+      if result != 0 and self._fail_fast:
+        cancelled.set()
+      return result
+
+    pool = ThreadPool(processes=min(self._parallelism, len(chunks)))
+    try:
+      # We need to specify a timeout explicitly, because otherwise python ignores SIGINT when
+      # waiting on a condition variable, so we won't be able to ctrl-c out.
+      return pool.map_async(execute_chunk, chunks, chunksize=1).get(timeout=1000000000)
+    finally:
+      pool.close()
+      pool.join()
+
+  def _execute_chunk(self, args):
     try:
-      return self._cmd(all_args)
+      return self._cmd(args)
     except OSError as e:
       if errno.E2BIG == e.errno:
-        args1, args2 = self._split_args(all_args)
-        result = self.execute(args1)
-        if result != 0:
+        args1, args2 = self._split_args(args)
+        result = self._execute_chunk(args1)
+        if result != 0 and self._fail_fast:
           return result
-        return self.execute(args2)
+        result2 = self._execute_chunk(args2)
+        return result or result2
       else:
         raise e
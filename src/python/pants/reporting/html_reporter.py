@@ -107,6 +107,9 @@ class HtmlReporter(Reporter):
     # ... and we're done.
     self._emit(s)
 
+  # The number of slowest tests to show in the report.
+  _MAX_TEST_TIMINGS = 100
+
   # CSS classes from pants.css that we use to style the header text to reflect the outcome.
   _outcome_css_classes = ['aborted', 'failure', 'warning', 'success', 'unknown']
 
@@ -146,6 +149,18 @@ class HtmlReporter(Reporter):
     self._overwrite('cumulative_timings', render_timings(self.run_tracker.cumulative_timings))
     self._overwrite('self_timings', render_timings(self.run_tracker.self_timings))
 
+    # Update the slowest tests.  There may be thousands of tests, so we only show the slowest.
+    def render_test_timings(test_timings):
+      timings_dict = test_timings.slowest(HtmlReporter._MAX_TEST_TIMINGS)
+      for item in timings_dict:
+        item['timing_string'] = '%.3f' % item['timing']
+      args = {
+        'timings': timings_dict
+      }
+      return self._renderer.render_name('test_timings', args)
+
+    self._overwrite('test_timings', render_test_timings(self.run_tracker.test_timings))
+
     # Update the artifact cache stats.
     def render_cache_stats(artifact_cache_stats):
       def fix_detail_id(e, _id):
@@ -7,7 +7,13 @@ from __future__ import (nested_scopes, generators, division, absolute_import, wi
 
 import threading
 
-from twitter.common.threading import PeriodicThread
+from twitter.common.collections.ordereddict import OrderedDict
+from twitter.common.lang import Compatibility
+
+if Compatibility.PY3:
+  import queue
+else:
+  import Queue as queue
 
 
 class ReportingError(Exception):
@@ -32,10 +38,21 @@ class Report(object):
     s = s.upper()
     return Report._log_level_name_map.get(s, Report.INFO)
 
+  # Writers block once this many writes to workunit outputs are waiting to be emitted, so that a
+  # slow reporter holds back tool output instead of letting it queue up without bound.
+  _MAX_PENDING_OUTPUTS = 10000
+
+  # How often to poll outputs that can't push their writes, and how often writers blocked on a
+  # full queue check that the emitter is still there to drain it.
+  _POLL_PERIOD_SECS = 0.5
+
   def __init__(self):
-    # We periodically emit newly gathered output from tool invocations.
-    self._emitter_thread = \
-      PeriodicThread(target=self.flush, name='output-emitter', period_secs=0.5)
+    # Writes to workunit outputs are queued as they happen and emitted in batches by a single
+    # thread.  That thread also polls the outputs that can't push their writes.
+    self._pending_outputs = queue.Queue(maxsize=self._MAX_PENDING_OUTPUTS)
+    self._outputs_pending = threading.Event()
+    self._closed = threading.Event()
+    self._emitter_thread = threading.Thread(target=self._emit_outputs, name='output-emitter')
     self._emitter_thread.daemon = True
 
     # Map from workunit id to workunit.
@@ -68,6 +85,7 @@ class Report(object):
       return ret
 
   def start_workunit(self, workunit):
+    workunit.set_output_listener(lambda label, s: self._output_written(workunit, label, s))
     with self._lock:
       self._workunits[workunit.id] = workunit
       for reporter in self._reporters.values():
@@ -83,6 +101,9 @@ class Report(object):
         reporter.handle_log(workunit, level, *msg_elements)
 
   def end_workunit(self, workunit):
+    # Pick up anything tools wrote to the workunit's outputs that is still on its way.
+    for output in workunit.outputs().values():
+      output.close_fileno()
     with self._lock:
       self._notify()  # Make sure we flush everything reported until now.
       for reporter in self._reporters.values():
@@ -95,19 +116,59 @@ class Report(object):
       self._notify()
 
   def close(self):
-    self._emitter_thread.stop()
+    self._closed.set()
+    self._outputs_pending.set()
+    if self._emitter_thread.is_alive():
+      self._emitter_thread.join()
     with self._lock:
       self._notify()  # One final time.
       for reporter in self._reporters.values():
         reporter.close()
 
+  def _output_written(self, workunit, label, s):
+    # Called by the writing thread without the output's lock held, but in the order writes to the
+    # output were made.
+    item = (workunit, label, s)
+    while True:
+      try:
+        self._pending_outputs.put(item, timeout=self._POLL_PERIOD_SECS)
+        break
+      except queue.Full:
+        # If the emitter died - a reporter raised - nothing will ever make room.  The output is
+        # still in the workunit's output file, and the failure resurfaces when the workunit ends.
+        if not self._emitter_thread.is_alive():
+          return
+    if not self._outputs_pending.is_set():
+      self._outputs_pending.set()
+
+  def _emit_outputs(self):
+    while not self._closed.is_set():
+      self._outputs_pending.wait(self._POLL_PERIOD_SECS)
+      self._outputs_pending.clear()
+      self.flush()
+
   def _notify(self):
     # Notify for output in all workunits. Note that output may be coming in from workunits other
     # than the current one, if work is happening in parallel.
     # Assumes self._lock is held by the caller.
+    pending = OrderedDict()  # (workunit id, label) -> list of strings written, in order.
+    while True:
+      try:
+        workunit, label, s = self._pending_outputs.get_nowait()
+      except queue.Empty:
+        break
+      if workunit.id in self._workunits:
+        pending.setdefault((workunit.id, label), []).append(s)
+
     for workunit in self._workunits.values():
       for label, output in workunit.outputs().items():
-        s = output.read()
-        if len(s) > 0:
-          for reporter in self._reporters.values():
-            reporter.handle_output(workunit, label, s)
+        if not output.pushes_writes:
+          s = output.read()
+          if len(s) > 0:
+            pending.setdefault((workunit.id, label), []).append(s)
+
+    for (workunit_id, label), strings in pending.items():
+      workunit = self._workunits[workunit_id]
+      s = b''.join(strings)
+      for reporter in self._reporters.values():
+        reporter.handle_output(workunit, label, s)
@@ -0,0 +1,83 @@
+# coding=utf-8
+# Copyright 2014 Pants project contributors (see CONTRIBUTORS.md).
+# Licensed under the Apache License, Version 2.0 (see LICENSE).
+
+from __future__ import (nested_scopes, generators, division, absolute_import, with_statement,
+                        print_function, unicode_literals)
+
+import json
+import os
+import threading
+from collections import defaultdict, namedtuple
+
+from pants.base.workunit import WorkUnit
+from pants.reporting.reporter import Reporter
+
+
+class TraceReporter(Reporter):
+  """Writes the workunits of a run out as traces once the run is over.
+
+  Two files are written to the trace dir:
+
+  trace.json: The workunits as complete events in the Chrome trace-event format, one track per
+    thread they ran on.  Load it in chrome://tracing to see what ran when, and on which thread.
+  flamegraph.txt: The self time of each workunit path, in microseconds, as collapsed stacks.  Feed
+    it to flamegraph.pl to see where the time went.
+  """
+
+  Settings = namedtuple('Settings', Reporter.Settings._fields + ('trace_dir', ))
+
+  TRACE_FILE = 'trace.json'
+  FLAMEGRAPH_FILE = 'flamegraph.txt'
+
+  def __init__(self, run_tracker, settings):
+    Reporter.__init__(self, run_tracker, settings)
+    self._events = []
+    self._tids = {}  # thread ident -> (tid, thread name).
+    self._self_micros_by_stack = defaultdict(int)
+
+  def end_workunit(self, workunit):
+    """Implementation of Reporter callback."""
+    # A workunit is always ended by the thread that started it.
+    thread = threading.current_thread()
+    if thread.ident not in self._tids:
+      self._tids[thread.ident] = (len(self._tids) + 1, thread.name)
+    tid, _ = self._tids[thread.ident]
+
+    args = {'outcome': WorkUnit.outcome_string(workunit.outcome())}
+    if workunit.cmd:
+      args['cmd'] = workunit.cmd
+    self._events.append({
+      'name': workunit.name,
+      'cat': 'main' if self.is_under_main_root(workunit) else 'background',
+      'ph': 'X',
+      'ts': self._micros(workunit.start_time - self.run_tracker.run_timestamp),
+      'dur': self._micros(workunit.duration()),
+      'pid': 1,
+      'tid': tid,
+      'args': args,
+    })
+
+    # Children that ran concurrently can add up to more than their parent's duration.
+    self_time = max(0, workunit.duration() - sum(child.duration() for child in workunit.children))
+    stack = ';'.join(reversed([w.name for w in workunit.ancestors()]))
+    self._self_micros_by_stack[stack] += self._micros(self_time)
+
+  def close(self):
+    """Implementation of Reporter callback."""
+    # Make sure we're not immediately after a clean-all.
+    if not os.path.isdir(self.settings.trace_dir):
+      return
+
+    thread_names = [{'name': 'thread_name', 'ph': 'M', 'pid': 1, 'tid': tid, 'args': {'name': name}}
+                    for tid, name in sorted(self._tids.values())]
+    with open(os.path.join(self.settings.trace_dir, self.TRACE_FILE), 'w') as fp:
+      json.dump({'traceEvents': thread_names + self._events, 'displayTimeUnit': 'ms'}, fp)
+
+    with open(os.path.join(self.settings.trace_dir, self.FLAMEGRAPH_FILE), 'w') as fp:
+      for stack, micros in sorted(self._self_micros_by_stack.items()):
+        if micros > 0:
+          fp.write('%s %d\n' % (stack, micros))
+
+  def _micros(self, secs):
+    return int(round(secs * 1000000))
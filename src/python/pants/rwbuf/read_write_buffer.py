@@ -5,6 +5,8 @@
 from __future__ import (nested_scopes, generators, division, absolute_import, with_statement,
                         print_function, unicode_literals)
 
+import fcntl
+import os
 import threading
 
 from twitter.common.lang import Compatibility
@@ -16,11 +18,26 @@ class _RWBuf(object):
   """An unbounded read-write buffer.
 
   Can be used as a file-like object for reading and writing.
-  Subclasses implement write functionality."""
-  def __init__(self, io):
+  Subclasses implement write functionality.
+
+  If a listener is given it is passed each string written, as an alternative to polling with
+  read().  Strings passed to the listener are not returned by read() as well."""
+  def __init__(self, io, listener=None):
     self._lock = threading.Lock()
+    # Held while passing a write to the listener, so that the listener sees writes in the order
+    # they were made without the buffer being locked while it runs.
+    self._listener_lock = threading.Lock()
     self._io = io
     self._readpos = 0
+    self._listener = listener
+
+  @property
+  def pushes_writes(self):
+    """Whether everything written to this buffer is passed to its listener.
+
+    If not, new content must be polled for with read().
+    """
+    return self._listener is not None
 
   def read(self, size=-1):
     with self._lock:
@@ -36,8 +53,18 @@ class _RWBuf(object):
 
   def write(self, s):
     with self._lock:
-      self.do_write(str(s))
+      s = str(s)
+      self.do_write(s)
       self._io.flush()
+      listener = self._listener
+      if listener:
+        self._readpos = self._io.tell()
+        self._listener_lock.acquire()
+    if listener:
+      try:
+        listener(s)
+      finally:
+        self._listener_lock.release()
 
   def flush(self):
     with self._lock:
@@ -55,8 +82,8 @@ class InMemoryRWBuf(_RWBuf):
 
   Can be used as a file-like object for reading and writing. Note that it can't be used in
   situations that require a real file (e.g., redirecting stdout/stderr of subprocess.Popen())."""
-  def __init__(self):
-    _RWBuf.__init__(self, StringIO())
+  def __init__(self, listener=None):
+    _RWBuf.__init__(self, StringIO(), listener=listener)
     self._writepos = 0
 
   def do_write(self, s):
@@ -70,10 +97,63 @@ class FileBackedRWBuf(_RWBuf):
 
   Can be used as a file-like object for reading and writing the underlying file. Has a fileno,
   so you can redirect stdout/stderr of subprocess.Popen() etc. to this object. This is useful
-  when you want to poll the output of long-running subprocesses in a separate thread."""
-  def __init__(self, backing_file):
-    _RWBuf.__init__(self, open(backing_file, 'a+'))
-    self.fileno = self._io.fileno
+  when you want to poll the output of long-running subprocesses in a separate thread.
+
+  If the buffer has a listener, its fileno is the write end of a pipe pumped into write() by a
+  thread of its own, so that writes made through the fileno reach the listener too."""
+
+  # How long to wait on close for writes already made through the fileno to be pumped.  Only
+  # reached if something outlives its workunit still holding the fileno, like a daemonized child.
+  _PUMP_JOIN_TIMEOUT_SECS = 10
+
+  def __init__(self, backing_file, listener=None):
+    _RWBuf.__init__(self, open(backing_file, 'a+'), listener=listener)
+    self._pipe_writer = None
+    self._pump = None
+
+  def fileno(self):
+    if not self._listener:
+      return self._io.fileno()
+    with self._lock:
+      if self._pipe_writer is None:
+        reader, self._pipe_writer = os.pipe()
+        # Keep other subprocesses from inheriting the pipe and holding it open; a subprocess the
+        # fileno is handed to still gets it, as a dup.
+        for fd in (reader, self._pipe_writer):
+          fcntl.fcntl(fd, fcntl.F_SETFD, fcntl.fcntl(fd, fcntl.F_GETFD) | fcntl.FD_CLOEXEC)
+        self._pump = threading.Thread(target=self._pump_pipe, args=(reader,),
+                                      name='rwbuf-pump-%d' % reader)
+        self._pump.daemon = True
+        self._pump.start()
+      return self._pipe_writer
+
+  def _pump_pipe(self, reader):
+    try:
+      while True:
+        data = os.read(reader, 65536)
+        if not data:
+          break
+        self.write(data)
+    except ValueError:
+      pass  # Closed while data was still arriving, eg: from a daemonized child.
+    finally:
+      os.close(reader)
+
+  def close_fileno(self):
+    """Stops writes through the fileno and waits for those already made to reach the buffer.
+
+    A later call to fileno() hands out a fresh one.
+    """
+    with self._lock:
+      writer, self._pipe_writer = self._pipe_writer, None
+      pump, self._pump = self._pump, None
+    if writer is not None:
+      os.close(writer)
+      pump.join(self._PUMP_JOIN_TIMEOUT_SECS)
+
+  def close(self):
+    self.close_fileno()
+    _RWBuf.close(self)
 
   def do_write(self, s):
     self._io.write(s)
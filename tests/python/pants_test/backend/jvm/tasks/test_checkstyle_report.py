@@ -0,0 +1,59 @@
+# coding=utf-8
+# Copyright 2014 Pants project contributors (see CONTRIBUTORS.md).
+# Licensed under the Apache License, Version 2.0 (see LICENSE).
+
+from __future__ import (nested_scopes, generators, division, absolute_import, with_statement,
+                        print_function, unicode_literals)
+
+import os
+from textwrap import dedent
+
+from pants.backend.jvm.tasks.checkstyle_report import Message, log_messages, parse_report
+from pants.base.exceptions import TaskError
+from pants_test.base_test import BaseTest
+
+
+class RecordingLog(object):
+  def __init__(self):
+    self.lines = []
+
+  def error(self, text):
+    self.lines.append('ERROR ' + text)
+
+  def warn(self, text):
+    self.lines.append('WARN ' + text)
+
+
+class CheckstyleReportTest(BaseTest):
+  def test_parse_report(self):
+    report = self.create_file(
+      relpath='report.xml',
+      contents=dedent('''
+        <?xml version="1.0" encoding="UTF-8"?>
+        <checkstyle version="5.0">
+         <file name="{buildroot}/a/Fail.java">
+          <error line="8" column="1" severity="error" message="Tab" source="TabChecker"/>
+          <error severity="warning" message="Too long" source="FileLengthChecker"/>
+         </file>
+         <file name="a/Pass.java">
+         </file>
+        </checkstyle>
+      '''.format(buildroot=self.build_root)).strip())
+
+    self.assertEqual([Message('a/Fail.java', 8, 'error', 'Tab'),
+                      Message('a/Fail.java', 0, 'warning', 'Too long')],
+                     parse_report(report))
+
+  def test_parse_report_missing(self):
+    with self.assertRaises(TaskError):
+      parse_report(os.path.join(self.build_root, 'does_not_exist.xml'))
+
+  def test_log_messages_sorted(self):
+    log = RecordingLog()
+    log_messages(log, [Message('b/B.java', 1, 'error', 'Tab'),
+                       Message('a/A.java', 10, 'warning', 'Too long'),
+                       Message('a/A.java', 2, 'error', 'Tab')])
+    self.assertEqual(['ERROR a/A.java:2: error: Tab',
+                      'WARN a/A.java:10: warning: Too long',
+                      'ERROR b/B.java:1: error: Tab'],
+                     log.lines)
@@ -5,10 +5,14 @@
 from __future__ import (nested_scopes, generators, division, absolute_import, with_statement,
                         print_function, unicode_literals)
 
+import os
+
 from pants.backend.jvm.targets.java_library import JavaLibrary
 from pants.backend.jvm.targets.java_tests import JavaTests
-from pants.backend.jvm.tasks.ide_gen import Project, SourceSet
+from pants.backend.jvm.tasks.ide_gen import IdeGen, Project, SourceSet
 from pants.base.source_root import SourceRoot
+from pants.util.contextutil import temporary_dir
+from pants.util.dirutil import touch
 from pants_test.base_test import BaseTest
 
 
@@ -42,3 +46,50 @@ class IdeGenTest(BaseTest):
     source_set2 = SourceSet("repo-root", "path/to/build", "com/pants/project", True)
     # Don't consider the test flag
     self.assertEquals(source_set1, source_set2)
+
+  def test_link_jars(self):
+    with temporary_dir() as src_dir:
+      with temporary_dir() as jar_dir:
+        def write(path, contents):
+          with open(path, 'w') as fp:
+            fp.write(contents)
+
+        a = os.path.join(src_dir, 'a.jar')
+        b = os.path.join(src_dir, 'b.jar')
+        write(a, 'a')
+        write(b, 'b')
+        touch(os.path.join(jar_dir, 'stale.jar'))
+
+        IdeGen.link_jars(jar_dir, {'a.jar': a, 'b.jar': b})
+        self.assertEqual(['a.jar', 'b.jar'], sorted(os.listdir(jar_dir)))
+        linked_a = os.path.join(jar_dir, 'a.jar')
+        with open(linked_a) as fp:
+          self.assertEqual('a', fp.read())
+
+        # Unchanged jars are left alone, changed jars are materialized again.
+        linked_a_ino = os.stat(linked_a).st_ino
+        write(b, 'bb')
+        IdeGen.link_jars(jar_dir, {'a.jar': a, 'b.jar': b})
+        self.assertEqual(linked_a_ino, os.stat(linked_a).st_ino)
+        with open(os.path.join(jar_dir, 'b.jar')) as fp:
+          self.assertEqual('bb', fp.read())
+
+        # A same-size rebuild within the same second is still picked up.
+        b_stat = os.stat(b)
+        write(b, 'cc')
+        os.utime(b, (b_stat.st_atime, b_stat.st_mtime))
+        IdeGen.link_jars(jar_dir, {'a.jar': a, 'b.jar': b})
+        with open(os.path.join(jar_dir, 'b.jar')) as fp:
+          self.assertEqual('cc', fp.read())
+
+        IdeGen.link_jars(jar_dir, {'a.jar': a})
+        self.assertEqual(['a.jar'], os.listdir(jar_dir))
+
+  def test_update_file(self):
+    with temporary_dir() as project_dir:
+      path = os.path.join(project_dir, 'project', 'project.ipr')
+      self.assertTrue(IdeGen.update_file(path, b'<project/>'))
+      self.assertFalse(IdeGen.update_file(path, b'<project/>'))
+      self.assertTrue(IdeGen.update_file(path, b'<project></project>'))
+      with open(path, 'rb') as fp:
+        self.assertEqual(b'<project></project>', fp.read())
@@ -0,0 +1,86 @@
+# coding=utf-8
+# Copyright 2014 Pants project contributors (see CONTRIBUTORS.md).
+# Licensed under the Apache License, Version 2.0 (see LICENSE).
+
+from __future__ import (nested_scopes, generators, division, absolute_import, with_statement,
+                        print_function, unicode_literals)
+
+import os
+
+from mock import Mock, patch
+
+from pants.backend.python.targets.python_library import PythonLibrary
+from pants.backend.python.targets.python_tests import PythonTests
+from pants.backend.python.tasks.pytest_run import PythonTestFingerprintStrategy, PytestRun
+from pants.backend.python.test_builder import PythonTestResult
+from pants.util.contextutil import environment_as, temporary_dir
+from pants_test.base_test import BaseTest
+from pants_test.task_test_base import TaskTestBase
+
+
+class PythonTestFingerprintStrategyTest(BaseTest):
+  def test_run_data_differs_from_no_data(self):
+    a = self.make_target(':a', target_type=PythonTests, sources=[])
+    hash_no_data = PythonTestFingerprintStrategy([]).compute_fingerprint(a)
+    hash_data = PythonTestFingerprintStrategy(['CPython-2.7.8']).compute_fingerprint(a)
+    self.assertNotEquals(hash_no_data, hash_data)
+
+  def test_run_data_order_matters(self):
+    a = self.make_target(':a', target_type=PythonTests, sources=[])
+    hash_ab = PythonTestFingerprintStrategy(['-k', 'ab']).compute_fingerprint(a)
+    hash_ba = PythonTestFingerprintStrategy(['ab', '-k']).compute_fingerprint(a)
+    self.assertNotEquals(hash_ab, hash_ba)
+
+  def test_use_default_for_non_test_target(self):
+    a = self.make_target(':a', target_type=PythonLibrary, sources=[])
+    hash_no_data = PythonTestFingerprintStrategy([]).compute_fingerprint(a)
+    hash_data = PythonTestFingerprintStrategy(['CPython-2.7.8']).compute_fingerprint(a)
+    self.assertEquals(hash_no_data, hash_data)
+
+  def test_hashing_and_equality(self):
+    self.assertEqual(PythonTestFingerprintStrategy(['a']), PythonTestFingerprintStrategy(('a',)))
+    self.assertEqual(hash(PythonTestFingerprintStrategy(['a'])),
+                     hash(PythonTestFingerprintStrategy(('a',))))
+    self.assertNotEqual(PythonTestFingerprintStrategy(['a']), PythonTestFingerprintStrategy(['b']))
+
+
+class PytestRunCachedTest(TaskTestBase):
+  @classmethod
+  def task_type(cls):
+    return PytestRun
+
+  def setUp(self):
+    super(PytestRunCachedTest, self).setUp()
+    self.set_options(fast=True, cache_results=True, interpreter=[], read_artifact_caches=None,
+                     write_artifact_caches=None)
+    self.create_file('tests/test_a.py', 'def test_a(): pass')
+    self.tests = self.make_target('tests:a', target_type=PythonTests, sources=['test_a.py'])
+    self.workdir = os.path.join(self.build_root, '.pants.d', 'pytest')
+
+  def run_cached(self):
+    """Runs the tests with results cached, returning the targets whose tests were run."""
+    task = self.create_task(self.context(target_roots=[self.tests]), self.workdir)
+    run_targets = []
+
+    def run(targets, args, debug, result_callback=None):
+      run_targets.extend(targets)
+      if result_callback:
+        for target in targets:
+          result_callback(target, PythonTestResult.rc(0))
+
+    with patch.object(type(task), 'interpreter', Mock(identity='CPython-2.7.8')):
+      with patch.object(task, '_run', side_effect=run):
+        task._run_cached([self.tests], [], debug=False)
+    return run_targets
+
+  def test_passed_tests_skipped(self):
+    self.assertEqual([self.tests], self.run_cached())
+    self.assertEqual([], self.run_cached())
+
+  def test_fast_junit_xml_results_not_cached(self):
+    # All targets share one junit xml file in fast mode, so there are no per-target results to
+    # restore and the tests must run again.
+    with temporary_dir() as xml_base:
+      with environment_as(JUNIT_XML_BASE=xml_base):
+        self.assertEqual([self.tests], self.run_cached())
+        self.assertEqual([self.tests], self.run_cached())
@@ -37,9 +37,11 @@ class PythonTestBuilderTestBase(BaseTest):
         return cached_interpreter
     raise RuntimeError('Could not find suitable interpreter to run tests.')
 
-  def run_tests(self, targets, args=None, fast=True, debug=False):
+  def run_tests(self, targets, args=None, fast=True, debug=False, workers=None,
+                result_callback=None, test_event_callback=None):
     test_builder = PythonTestBuilder(
-        targets, args or [], fast=fast, debug=debug, interpreter=self._cache_current_interpreter())
+        targets, args or [], fast=fast, debug=debug, interpreter=self._cache_current_interpreter(),
+        workers=workers, result_callback=result_callback, test_event_callback=test_event_callback)
 
     with pushd(self.build_root):
       return test_builder.run()
@@ -170,6 +172,50 @@ class PythonTestBuilderTest(PythonTestBuilderTestBase):
   def test_mixed(self):
     self.assertEqual(1, self.run_tests(targets=[self.green, self.red]))
 
+  def test_mixed_concurrent(self):
+    self.assertEqual(1, self.run_tests(targets=[self.green, self.red], fast=False, workers=2))
+
+  def test_concurrent_failsoft(self):
+    report_basedir = os.path.join(self.build_root, 'dist', 'junit')
+    with environment_as(JUNIT_XML_BASE=report_basedir, PANTS_PYTHON_TEST_FAILSOFT='1'):
+      self.assertEqual(1, self.run_tests(targets=[self.green, self.red, self.all],
+                                         fast=False,
+                                         workers=2))
+
+      # Every target ran in its own chroot and reported separately.
+      files = glob.glob(os.path.join(report_basedir, '*.xml'))
+      self.assertEqual(3, len(files))
+
+  def test_result_callback(self):
+    results = {}
+
+    def record_result(target, result):
+      results[target] = result.success
+
+    with environment_as(PANTS_PYTHON_TEST_FAILSOFT='1'):
+      self.assertEqual(1, self.run_tests(targets=[self.green, self.red],
+                                         fast=False,
+                                         result_callback=record_result))
+    self.assertEqual({self.green: True, self.red: False}, results)
+
+    results.clear()
+    self.assertEqual(1, self.run_tests(targets=[self.green, self.red],
+                                       result_callback=record_result))
+    self.assertEqual({self.green: False, self.red: False}, results)
+
+  def test_test_event_callback(self):
+    events = {}
+
+    def record_event(name, outcome, duration):
+      self.assertGreaterEqual(duration, 0)
+      events[name] = outcome
+
+    self.assertEqual(1, self.run_tests(targets=[self.green, self.red],
+                                       test_event_callback=record_event))
+    self.assertEqual({'tests/test_core_green.py::CoreGreenTest::test_one': 'passed',
+                      'tests/test_core_red.py::test_two': 'failed'},
+                     events)
+
   def test_junit_xml(self):
     # We expect xml of the following form:
     # <testsuite errors=[Ne] failures=[Nf] skips=[Ns] tests=[Nt] ...>
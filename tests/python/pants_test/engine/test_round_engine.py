@@ -6,9 +6,12 @@ from __future__ import (nested_scopes, generators, division, absolute_import, wi
                         print_function, unicode_literals)
 
 import itertools
+import threading
 
 from pants.backend.core.tasks.task import Task
+from pants.base.exceptions import TaskError
 from pants.engine.round_engine import RoundEngine
+from pants.goal.goal import Goal
 from pants_test.base_test import BaseTest
 from pants_test.engine.base_engine_test import EngineTestBase
 
@@ -17,7 +20,7 @@ class RoundEngineTest(EngineTestBase, BaseTest):
   def setUp(self):
     super(RoundEngineTest, self).setUp()
 
-    self.set_options_for_scope('', explain=False)
+    self.set_options_for_scope('', explain=False, goal_workers=1)
     self._context = self.context()
     self.assertTrue(self._context.is_unlocked())
 
@@ -37,7 +40,11 @@ class RoundEngineTest(EngineTestBase, BaseTest):
   def execute_action(self, tag):
     return 'execute', tag, self._context
 
-  def record(self, tag, product_types=None, required_data=None):
+  def run_goals_concurrently(self, goal_workers=4):
+    self.set_options_for_scope('', goal_workers=goal_workers)
+    self._context = self.context()
+
+  def record(self, tag, product_types=None, required_data=None, on_execute=None):
     class RecordingTask(Task):
       def __init__(me, *args, **kwargs):
         super(RecordingTask, me).__init__(*args, **kwargs)
@@ -53,12 +60,15 @@ class RoundEngineTest(EngineTestBase, BaseTest):
         self.actions.append(self.prepare_action(tag))
 
       def execute(me):
+        if on_execute:
+          on_execute()
         self.actions.append(self.execute_action(tag))
 
     return RecordingTask
 
-  def install_task(self, name, product_types=None, goal=None, required_data=None):
-    task = self.record(name, product_types, required_data)
+  def install_task(self, name, product_types=None, goal=None, required_data=None,
+                   on_execute=None):
+    task = self.record(name, product_types, required_data, on_execute)
     return super(RoundEngineTest, self).install_task(name=name, action=task, goal=goal)
 
   def assert_actions(self, *expected_execute_ordering):
@@ -184,4 +194,99 @@ class RoundEngineTest(EngineTestBase, BaseTest):
 
     self.assert_actions('task1', 'task2', 'task3')
 
+  def test_concurrent_goals_respect_product_dependencies(self):
+    self.run_goals_concurrently()
+    self.install_task('task1', goal='goal1', product_types=['1'])
+    self.install_task('task2', goal='goal2', product_types=['2'], required_data=['1'])
+    self.install_task('task3', goal='goal3', product_types=['3'], required_data=['2'])
+    self.install_task('task4', goal='goal4', required_data=['1', '3'])
+
+    self.engine.attempt(self._context, self.as_goals('goal4'))
+
+    self.assert_actions('task1', 'task2', 'task3', 'task4')
+
+  def test_requested_goals_without_product_dependencies_run_concurrently(self):
+    self.run_goals_concurrently()
+    started = dict(task1=threading.Event(), task2=threading.Event())
+    overlapped = []
+
+    def rendezvous(tag, other):
+      def on_execute():
+        started[tag].set()
+        overlapped.append(started[other].wait(10))
+      return on_execute
+
+    self.install_task('task1', goal='goal1', on_execute=rendezvous('task1', 'task2'))
+    self.install_task('task2', goal='goal2', on_execute=rendezvous('task2', 'task1'))
+
+    self.engine.attempt(self._context, self.as_goals('goal1', 'goal2'))
+
+    self.assertEqual([True, True], overlapped)
+
+  def test_independent_goals_run_concurrently(self):
+    self.run_goals_concurrently()
+    started = dict(task1=threading.Event(), task2=threading.Event())
+    overlapped = []
+
+    def rendezvous(tag, other):
+      def on_execute():
+        started[tag].set()
+        overlapped.append(started[other].wait(10))
+      return on_execute
+
+    self.install_task('task1', goal='goal1', product_types=['1'],
+                      on_execute=rendezvous('task1', 'task2'))
+    self.install_task('task2', goal='goal2', product_types=['2'],
+                      on_execute=rendezvous('task2', 'task1'))
+    self.install_task('task3', goal='goal3', required_data=['1', '2'])
+
+    self.engine.attempt(self._context, self.as_goals('goal3'))
+
+    self.assertEqual([True, True], overlapped)
+    self.assertEqual(self.execute_action('task3'), self.actions[-1])
+
+  def assert_exclusive_goal_runs_alone(self, *goals):
+    self.run_goals_concurrently()
+    started = dict((goal, threading.Event()) for goal in goals)
+    overlapped = []
+
+    def run_alone(goal):
+      def on_execute():
+        started[goal].set()
+        overlapped.extend(started[other].wait(0.5) for other in goals
+                          if other != goal and not started[other].is_set())
+      return on_execute
+
+    self.install_task('clean', goal='clean-all', on_execute=run_alone('clean-all'))
+    self.install_task('compile', goal='compile', product_types=['classes'],
+                      on_execute=run_alone('compile'))
+    Goal.by_name('clean-all').as_exclusive()
+
+    self.engine.attempt(self._context, self.as_goals(*goals))
+
+    self.assertEqual([False], overlapped)
+    return [tag for action, tag, _ in self.actions if action == 'execute']
+
+  def test_exclusive_goal_runs_before_later_goals(self):
+    self.assertEqual(['clean', 'compile'],
+                     self.assert_exclusive_goal_runs_alone('clean-all', 'compile'))
+
+  def test_exclusive_goal_runs_after_earlier_goals(self):
+    self.assertEqual(['compile', 'clean'],
+                     self.assert_exclusive_goal_runs_alone('compile', 'clean-all'))
+
+  def test_concurrent_goal_failure(self):
+    self.run_goals_concurrently()
+
+    def fail():
+      raise TaskError('task1 failed')
+
+    self.install_task('task1', goal='goal1', product_types=['1'], on_execute=fail)
+    self.install_task('task2', goal='goal2', product_types=['2'])
+    self.install_task('task3', goal='goal3', required_data=['1', '2'])
+
+    with self.assertRaises(TaskError):
+      self.engine.attempt(self._context, self.as_goals('goal3'))
 
+    self.assertNotIn(self.execute_action('task1'), self.actions)
+    self.assertNotIn(self.execute_action('task3'), self.actions)
@@ -0,0 +1,60 @@
+# coding=utf-8
+# Copyright 2014 Pants project contributors (see CONTRIBUTORS.md).
+# Licensed under the Apache License, Version 2.0 (see LICENSE).
+
+from __future__ import (nested_scopes, generators, division, absolute_import, with_statement,
+                        print_function, unicode_literals)
+
+import multiprocessing
+import os
+import random
+import sys
+
+from pants.fs.archive import archiver
+from pants.util.contextutil import Timer, temporary_dir
+from pants.util.dirutil import safe_open
+
+
+def create_tree(root, num_files, seed=42):
+  """Creates num_files files of semi-compressible content spread over a few levels of dirs."""
+  rand = random.Random(seed)
+  words = ['class', 'def', 'import', 'return', 'self', 'value', 'pants', 'target', 'jar', 'zip']
+  for i in range(num_files):
+    path = os.path.join(root, 'd{0}'.format(i % 100), 'e{0}'.format(i % 7), 'f{0}.txt'.format(i))
+    with safe_open(path, 'w') as fp:
+      fp.write(' '.join(rand.choice(words) for _ in range(rand.randint(10, 2000))))
+
+
+def main():
+  """Times serial vs. parallel archive creation and extraction over a synthetic file tree.
+
+  To run:
+
+  ./pants goal run tests/python/pants_test/fs:archive_benchmark -- \
+    [number of files, 50000 by default] [number of workers, the cpu count by default]
+  """
+  num_files = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+  workers = int(sys.argv[2]) if len(sys.argv) > 2 else multiprocessing.cpu_count()
+
+  with temporary_dir() as fromdir:
+    with Timer() as timer:
+      create_tree(fromdir, num_files)
+    print('Created {0} files in {1:.2f}s'.format(num_files, timer.elapsed))
+
+    for typename in ('zip', 'tgz'):
+      for label, count in (('serial', None), ('{0} workers'.format(workers), workers)):
+        archive_type = archiver(typename, workers=count)
+        with temporary_dir() as archivedir:
+          with Timer() as timer:
+            archive = archive_type.create(fromdir, archivedir, 'archive')
+          print('{0} create ({1}): {2:.2f}s, {3} bytes'.format(typename, label, timer.elapsed,
+                                                             os.path.getsize(archive)))
+          if typename == 'zip':
+            with temporary_dir() as todir:
+              with Timer() as timer:
+                archive_type.extract(archive, todir, workers=count)
+              print('{0} extract ({1}): {2:.2f}s'.format(typename, label, timer.elapsed))
+
+
+if __name__ == '__main__':
+  main()
@@ -5,12 +5,14 @@
 from __future__ import (nested_scopes, generators, division, absolute_import, with_statement,
                         print_function, unicode_literals)
 
+import filecmp
 import os
 import unittest2 as unittest
+from zipfile import ZIP_DEFLATED, ZIP_STORED, ZipInfo
 
-from pants.fs.archive import TAR, TBZ2, TGZ, ZIP
-from pants.util.contextutil import temporary_dir
-from pants.util.dirutil import safe_mkdir, safe_walk, touch
+from pants.fs.archive import (TAR, TBZ2, TGZ, ZIP, TarArchiver, ZipArchiver, archiver, copy_entry)
+from pants.util.contextutil import open_zip, temporary_dir
+from pants.util.dirutil import safe_mkdir, safe_open, safe_walk, touch
 
 
 class ArchiveTest(unittest.TestCase):
@@ -23,7 +25,7 @@ class ArchiveTest(unittest.TestCase):
       listing.update(os.path.normpath(os.path.join(relpath, f)) for f in files)
     return listing
 
-  def round_trip(self, archiver, empty_dirs):
+  def round_trip(self, archiver, empty_dirs, **extract_kwargs):
     def test_round_trip(prefix=None):
       with temporary_dir() as fromdir:
         safe_mkdir(os.path.join(fromdir, 'a/b/c'))
@@ -34,7 +36,7 @@ class ArchiveTest(unittest.TestCase):
         with temporary_dir() as archivedir:
           archive = archiver.create(fromdir, archivedir, 'archive', prefix=prefix)
           with temporary_dir() as todir:
-            archiver.extract(archive, todir)
+            archiver.extract(archive, todir, **extract_kwargs)
             fromlisting = self._listtree(fromdir, empty_dirs)
             if prefix:
               fromlisting = set(os.path.join(prefix, x) for x in fromlisting)
@@ -66,3 +68,53 @@ class ArchiveTest(unittest.TestCase):
         with temporary_dir() as todir:
           ZIP.extract(archive, todir, filter_func=do_filter)
           self.assertEquals(set(['allowed.txt']), self._listtree(todir, empty_dirs=False))
+
+  def test_parallel_zip(self):
+    self.round_trip(ZipArchiver(ZIP_DEFLATED, workers=4), empty_dirs=False, workers=4)
+
+  def test_parallel_tgz(self):
+    self.round_trip(TarArchiver('w:gz', 'tar.gz', workers=4), empty_dirs=True)
+
+  def test_archiver_workers(self):
+    self.assertIs(ZIP, archiver('zip'))
+    parallel_zip = archiver('zip', workers=2)
+    self.assertIsInstance(parallel_zip, ZipArchiver)
+    self.assertEqual(2, parallel_zip.workers)
+    self.assertIsNone(ZIP.workers)
+
+  def test_parallel_zip_deterministic(self):
+    with temporary_dir() as fromdir:
+      for i in range(50):
+        with safe_open(os.path.join(fromdir, 'd{0}'.format(i % 7), 'f{0}.txt'.format(i)), 'w') as fp:
+          fp.write('content {0}\n'.format(i) * i)
+      with temporary_dir() as archivedir:
+        serial = ZIP.create(fromdir, archivedir, 'serial')
+        parallel = ZipArchiver(ZIP_DEFLATED, workers=4).create(fromdir, archivedir, 'parallel')
+        self.assertTrue(filecmp.cmp(serial, parallel, shallow=False))
+
+  def test_copy_entry(self):
+    with temporary_dir() as archivedir:
+      source_path = os.path.join(archivedir, 'source.zip')
+      with open_zip(source_path, 'w', compression=ZIP_DEFLATED) as source:
+        source.writestr('a/b.txt', b'b' * 1000)
+        source.writestr('文件.txt', '文件'.encode('utf-8'))
+        stored = ZipInfo('c.txt')
+        stored.compress_type = ZIP_STORED
+        source.writestr(stored, b'c')
+
+      copy_path = os.path.join(archivedir, 'copy.zip')
+      with open_zip(source_path) as source:
+        with open_zip(copy_path, 'w') as copy:
+          for zinfo in source.infolist():
+            copy_entry(copy, source, zinfo)
+          copy_entry(copy, source, source.getinfo('c.txt'), arcname='d/c.txt')
+
+      with open_zip(copy_path) as copy:
+        self.assertIsNone(copy.testzip())
+        self.assertEqual(['a/b.txt', '文件.txt', 'c.txt', 'd/c.txt'], copy.namelist())
+        self.assertEqual(b'b' * 1000, copy.read('a/b.txt'))
+        self.assertEqual('文件'.encode('utf-8'), copy.read('文件.txt'))
+        self.assertEqual(b'c', copy.read('d/c.txt'))
+        self.assertEqual(ZIP_DEFLATED, copy.getinfo('a/b.txt').compress_type)
+        self.assertLess(copy.getinfo('a/b.txt').compress_size, 1000)
+        self.assertEqual(ZIP_STORED, copy.getinfo('d/c.txt').compress_type)
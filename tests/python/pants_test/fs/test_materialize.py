@@ -0,0 +1,112 @@
+# coding=utf-8
+# Copyright 2014 Pants project contributors (see CONTRIBUTORS.md).
+# Licensed under the Apache License, Version 2.0 (see LICENSE).
+
+from __future__ import (nested_scopes, generators, division, absolute_import, with_statement,
+                        print_function, unicode_literals)
+
+import os
+import unittest2 as unittest
+
+from pants.fs.materialize import COPY, HARDLINK, REFLINK, materialize, materialize_tree, unshare
+from pants.util.contextutil import temporary_dir
+from pants.util.dirutil import safe_open, touch
+
+
+class MaterializeTest(unittest.TestCase):
+  def write(self, path, contents):
+    with safe_open(path, 'w') as fp:
+      fp.write(contents)
+
+  def read(self, path):
+    with open(path) as fp:
+      return fp.read()
+
+  def test_hardlink(self):
+    with temporary_dir() as tmpdir:
+      src = os.path.join(tmpdir, 'cache', 'a.jar')
+      dst = os.path.join(tmpdir, 'bundle', 'libs', 'a.jar')
+      self.write(src, 'jar')
+
+      self.assertEqual(HARDLINK, materialize(src, dst))
+      self.assertEqual('jar', self.read(dst))
+      self.assertTrue(os.path.samefile(src, dst))
+      # The shared inode must stay writeable for the source's owner, eg: ivy.
+      self.assertTrue(os.access(src, os.W_OK))
+
+  def test_no_hardlink(self):
+    with temporary_dir() as tmpdir:
+      src = os.path.join(tmpdir, 'a.txt')
+      dst = os.path.join(tmpdir, 'bundle', 'a.txt')
+      self.write(src, 'a')
+
+      self.assertIn(materialize(src, dst, allow_hardlink=False), (REFLINK, COPY))
+      self.assertEqual('a', self.read(dst))
+      self.assertFalse(os.path.samefile(src, dst))
+
+      # A clone or copy is independent of its source.
+      self.write(dst, 'b')
+      self.assertEqual('a', self.read(src))
+
+  def test_resolves_symlinks(self):
+    with temporary_dir() as tmpdir:
+      src = os.path.join(tmpdir, 'a.jar')
+      link = os.path.join(tmpdir, 'link.jar')
+      dst = os.path.join(tmpdir, 'bundle', 'a.jar')
+      self.write(src, 'jar')
+      os.symlink(src, link)
+
+      materialize(link, dst)
+      self.assertFalse(os.path.islink(dst))
+      self.assertTrue(os.path.samefile(src, dst))
+
+  def test_replaces_existing_dst_without_writing_through_it(self):
+    with temporary_dir() as tmpdir:
+      src = os.path.join(tmpdir, 'a.txt')
+      other = os.path.join(tmpdir, 'other.txt')
+      dst = os.path.join(tmpdir, 'dst.txt')
+      self.write(src, 'a')
+      self.write(other, 'other')
+      os.link(other, dst)
+
+      materialize(src, dst, allow_hardlink=False)
+      self.assertEqual('a', self.read(dst))
+      self.assertEqual('other', self.read(other))
+
+  def test_materialize_tree(self):
+    with temporary_dir() as tmpdir:
+      src = os.path.join(tmpdir, 'config')
+      self.write(os.path.join(src, 'a.properties'), 'a')
+      self.write(os.path.join(src, 'sub', 'b.properties'), 'b')
+      touch(os.path.join(src, 'empty', 'c'))
+      dst = os.path.join(tmpdir, 'bundle', 'config')
+
+      materialize_tree(src, dst)
+      self.assertEqual('a', self.read(os.path.join(dst, 'a.properties')))
+      self.assertEqual('b', self.read(os.path.join(dst, 'sub', 'b.properties')))
+      self.assertTrue(os.path.isfile(os.path.join(dst, 'empty', 'c')))
+
+      materialize_tree(os.path.join(src, 'a.properties'), os.path.join(tmpdir, 'a.properties'))
+      self.assertEqual('a', self.read(os.path.join(tmpdir, 'a.properties')))
+
+  def test_unshare(self):
+    with temporary_dir() as tmpdir:
+      src = os.path.join(tmpdir, 'cache', 'a.jar')
+      dst = os.path.join(tmpdir, 'bundle', 'a.jar')
+      self.write(src, 'jar')
+      materialize(src, dst)
+
+      self.assertTrue(unshare(dst))
+      self.assertFalse(os.path.samefile(src, dst))
+      self.assertEqual('jar', self.read(dst))
+      self.assertEqual(['a.jar'], os.listdir(os.path.dirname(dst)))
+
+      self.write(dst, 'changed')
+      self.assertEqual('jar', self.read(src))
+
+  def test_unshare_noop(self):
+    with temporary_dir() as tmpdir:
+      path = os.path.join(tmpdir, 'a.jar')
+      touch(path)
+      self.assertFalse(unshare(path))
+      self.assertFalse(unshare(os.path.join(tmpdir, 'missing.jar')))
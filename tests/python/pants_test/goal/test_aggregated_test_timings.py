@@ -0,0 +1,42 @@
+# coding=utf-8
+# Copyright 2014 Pants project contributors (see CONTRIBUTORS.md).
+# Licensed under the Apache License, Version 2.0 (see LICENSE).
+
+from __future__ import (nested_scopes, generators, division, absolute_import, with_statement,
+                        print_function, unicode_literals)
+
+import os
+import unittest2 as unittest
+
+from pants.goal.aggregated_test_timings import AggregatedTestTimings
+from pants.util.contextutil import temporary_dir
+
+
+class AggregatedTestTimingsTest(unittest.TestCase):
+  def test_aggregation(self):
+    timings = AggregatedTestTimings()
+    timings.add_timing('test_a', 1.0, 'passed')
+    timings.add_timing('test_b', 2.0, 'skipped')
+    timings.add_timing('test_a', 1.5, 'failed')
+    timings.add_timing('test_a', 0.5, 'passed')
+
+    self.assertEqual([{'label': 'test_a', 'timing': 3.0, 'outcome': 'failed'},
+                      {'label': 'test_b', 'timing': 2.0, 'outcome': 'skipped'}],
+                     timings.get_all())
+    self.assertEqual(['test_a'], [timing['label'] for timing in timings.slowest(1)])
+
+  def test_results_appended_to_file(self):
+    with temporary_dir() as tmpdir:
+      path = os.path.join(tmpdir, 'test_timings')
+      timings = AggregatedTestTimings(path)
+      timings.add_timing('test_a', 1.0, 'passed')
+      timings.add_timing('test_a', 0.25, 'failed')
+
+      with open(path) as fp:
+        self.assertEqual(['1.000 passed test_a', '0.250 failed test_a'], fp.read().splitlines())
+
+      timings.close()
+      timings.add_timing('test_b', 2.0, 'passed')
+      with open(path) as fp:
+        self.assertEqual(['1.000 passed test_a', '0.250 failed test_a'], fp.read().splitlines())
+      self.assertEqual(['test_b', 'test_a'], [timing['label'] for timing in timings.get_all()])
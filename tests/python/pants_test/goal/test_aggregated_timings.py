@@ -0,0 +1,68 @@
+# coding=utf-8
+# Copyright 2014 Pants project contributors (see CONTRIBUTORS.md).
+# Licensed under the Apache License, Version 2.0 (see LICENSE).
+
+from __future__ import (nested_scopes, generators, division, absolute_import, with_statement,
+                        print_function, unicode_literals)
+
+import os
+import unittest2 as unittest
+
+from pants.goal.aggregated_timings import AggregatedTimings
+from pants.util.contextutil import temporary_dir
+
+
+class AggregatedTimingsTest(unittest.TestCase):
+  def read(self, path):
+    with open(path) as fp:
+      return fp.read()
+
+  def test_aggregation(self):
+    with temporary_dir() as tmpdir:
+      timings = AggregatedTimings(os.path.join(tmpdir, 'timings'))
+      timings.add_timing('main:compile', 1.0)
+      timings.add_timing('main:compile:javac', 2.0, is_tool=True)
+      timings.add_timing('main:compile', 2.5)
+
+      self.assertEqual([{'label': 'main:compile', 'timing': 3.5, 'is_tool': False},
+                        {'label': 'main:compile:javac', 'timing': 2.0, 'is_tool': True}],
+                       timings.get_all())
+
+  def test_timings_logged_in_batches(self):
+    with temporary_dir() as tmpdir:
+      path = os.path.join(tmpdir, 'timings')
+      timings = AggregatedTimings(path)
+      timings._FLUSH_BATCH_SIZE = 2
+      timings._FLUSH_INTERVAL_SECS = 60
+
+      timings.add_timing('a', 1.0)
+      self.assertFalse(os.path.exists(path + '.log'))
+      timings.add_timing('b', 2.0, is_tool=True)
+      self.assertEqual('1.0 0 a\n2.0 1 b\n', self.read(path + '.log'))
+
+      timings.add_timing('a', 1.5)
+      timings.flush()
+      self.assertEqual('1.0 0 a\n2.0 1 b\n1.5 0 a\n', self.read(path + '.log'))
+      self.assertFalse(os.path.exists(path))
+
+  def test_close_compacts_log(self):
+    with temporary_dir() as tmpdir:
+      path = os.path.join(tmpdir, 'timings')
+      timings = AggregatedTimings(path)
+      timings.add_timing('a', 1.0)
+      timings.add_timing('b', 2.0)
+      timings.add_timing('a', 1.5)
+      timings.close()
+
+      self.assertEqual('a: 2.5\nb: 2.0\n', self.read(path))
+      self.assertFalse(os.path.exists(path + '.log'))
+
+  def test_clean_all(self):
+    with temporary_dir() as tmpdir:
+      path = os.path.join(tmpdir, 'info', 'timings')
+      timings = AggregatedTimings(path)
+      os.rmdir(os.path.dirname(path))
+      timings.add_timing('a', 1.0)
+      timings.close()
+
+      self.assertEqual([], os.listdir(tmpdir))
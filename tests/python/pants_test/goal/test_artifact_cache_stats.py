@@ -0,0 +1,48 @@
+# coding=utf-8
+# Copyright 2014 Pants project contributors (see CONTRIBUTORS.md).
+# Licensed under the Apache License, Version 2.0 (see LICENSE).
+
+from __future__ import (nested_scopes, generators, division, absolute_import, with_statement,
+                        print_function, unicode_literals)
+
+import os
+import unittest2 as unittest
+
+from pants.base.address import SyntheticAddress
+from pants.goal.artifact_cache_stats import ArtifactCacheStats
+from pants.util.contextutil import temporary_dir
+
+
+class FakeTarget(object):
+  def __init__(self, spec):
+    self.address = SyntheticAddress.parse(spec)
+
+
+class ArtifactCacheStatsTest(unittest.TestCase):
+  def read(self, path):
+    with open(path) as fp:
+      return fp.read()
+
+  def test_stats_appended_in_batches(self):
+    with temporary_dir() as tmpdir:
+      stats = ArtifactCacheStats(tmpdir)
+      stats._FLUSH_BATCH_SIZE = 3
+      stats._FLUSH_INTERVAL_SECS = 60
+
+      stats.add_hit('default', FakeTarget('a:x'))
+      stats.add_miss('default', FakeTarget('b:x'))
+      self.assertEqual([], os.listdir(tmpdir))
+      stats.add_hit('default', FakeTarget('c:x'))
+      self.assertEqual('a:x\nc:x\n', self.read(os.path.join(tmpdir, 'default.hits')))
+      self.assertEqual('b:x\n', self.read(os.path.join(tmpdir, 'default.misses')))
+
+      stats.add_miss('default', FakeTarget('d:x'))
+      stats.close()
+      self.assertEqual('b:x\nd:x\n', self.read(os.path.join(tmpdir, 'default.misses')))
+
+      self.assertEqual([{'cache_name': 'default',
+                         'num_hits': 2,
+                         'num_misses': 2,
+                         'hits': ['a:x', 'c:x'],
+                         'misses': ['b:x', 'd:x']}],
+                       stats.get_all())
@@ -5,8 +5,14 @@
 from __future__ import (nested_scopes, generators, division, absolute_import, with_statement,
                         print_function, unicode_literals)
 
-from contextlib import closing
+from contextlib import closing, contextmanager
+import BaseHTTPServer
+import hashlib
+import json
 import os
+import re
+import SocketServer
+import threading
 
 import mox
 import pytest
@@ -14,7 +20,7 @@ import requests
 from twitter.common.lang import Compatibility
 
 from pants.net.http.fetcher import Fetcher
-from pants.util.contextutil import temporary_file
+from pants.util.contextutil import temporary_dir, temporary_file
 
 
 class FetcherTest(mox.MoxTestBase):
@@ -201,3 +207,254 @@ class FetcherTest(mox.MoxTestBase):
       self.assertEqual(path, fd.name)
       with open(path) as fp:
         self.assertEqual(downloaded, fp.read())
+
+  def expect_ranged_get(self, url, start, chunks, status_code=206, chunk_size_bytes=1024,
+                        timeout_secs=60, if_range=None, etag=None):
+    response = self.mox.CreateMock(requests.Response)
+    headers = {'Range': 'bytes=%d-' % start}
+    if if_range:
+      headers['If-Range'] = if_range
+    self.requests.get(url, stream=True, timeout=timeout_secs,
+                      headers=headers).AndReturn(response)
+    response.status_code = status_code
+    response.headers = {'content-length': str(sum(map(len, chunks)))}
+    if etag:
+      response.headers['etag'] = etag
+    if status_code in (200, 206):
+      response.iter_content(chunk_size=chunk_size_bytes).AndReturn(chunks)
+    response.close()
+
+  def test_download_resume_after_transient_error(self):
+    def interrupted():
+      yield '01234'
+      raise requests.Timeout()
+
+    self.requests.get('http://foo', stream=True, timeout=60).AndReturn(self.response)
+    self.response.status_code = 200
+    self.response.headers = {'content-length': '11'}
+    self.response.iter_content(chunk_size=1024).AndReturn(interrupted())
+    self.response.close()
+    self.expect_ranged_get('http://foo', 5, ['56789', 'a'])
+
+    self.listener.status(200, content_length=11)
+    self.listener.recv_chunk('01234')
+    self.listener.recv_chunk('56789')
+    self.listener.recv_chunk('a')
+    self.listener.finished()
+
+    self.mox.ReplayAll()
+
+    with temporary_dir() as tmpdir:
+      path = os.path.join(tmpdir, 'download')
+      self.fetcher.download('http://foo', listener=self.listener, path_or_fd=path,
+                            chunk_size_bytes=1024, timeout_secs=60, max_retries=1)
+      with open(path) as fp:
+        self.assertEqual('0123456789a', fp.read())
+      self.assertFalse(os.path.exists(path + '.part'))
+
+  def write_partial(self, path, data, url='http://foo', etag=None):
+    with open(path + '.part', 'w') as fp:
+      fp.write(data)
+    with open(path + '.part.source', 'w') as fp:
+      json.dump({'url': url, 'etag': etag}, fp)
+
+  def test_download_resume_partial_file(self):
+    self.expect_ranged_get('http://foo', 5, ['56789', 'a'])
+
+    # The data saved by an earlier attempt is replayed to the listener first.
+    self.listener.status(200, content_length=11)
+    self.listener.recv_chunk('01234')
+    self.listener.recv_chunk('56789')
+    self.listener.recv_chunk('a')
+    self.listener.finished()
+
+    self.mox.ReplayAll()
+
+    with temporary_dir() as tmpdir:
+      path = os.path.join(tmpdir, 'download')
+      self.write_partial(path, '01234')
+      self.fetcher.download('http://foo', listener=self.listener, path_or_fd=path,
+                            chunk_size_bytes=1024, timeout_secs=60)
+      with open(path) as fp:
+        self.assertEqual('0123456789a', fp.read())
+
+  def test_download_resume_range_unsupported(self):
+    self.expect_ranged_get('http://foo', 4, ['0123456789', 'a'], status_code=200)
+
+    self.listener.status(200, content_length=11)
+    self.listener.recv_chunk('0123456789')
+    self.listener.recv_chunk('a')
+    self.listener.finished()
+
+    self.mox.ReplayAll()
+
+    with temporary_dir() as tmpdir:
+      path = os.path.join(tmpdir, 'download')
+      self.write_partial(path, '0123')
+      self.fetcher.download('http://foo', listener=self.listener, path_or_fd=path,
+                            chunk_size_bytes=1024, timeout_secs=60)
+      with open(path) as fp:
+        self.assertEqual('0123456789a', fp.read())
+
+  def test_download_transient_error_keeps_partial_file(self):
+    self.requests.get('http://foo', stream=True, timeout=60).AndReturn(self.response)
+    self.response.status_code = 200
+    self.response.headers = {'content-length': '11', 'etag': '"v1"'}
+    self.response.iter_content(chunk_size=1024).AndReturn(['01234'])
+    self.response.close()
+
+    self.mox.ReplayAll()
+
+    with temporary_dir() as tmpdir:
+      path = os.path.join(tmpdir, 'download')
+      with pytest.raises(self.fetcher.TransientError):
+        self.fetcher.download('http://foo', path_or_fd=path, chunk_size_bytes=1024,
+                              timeout_secs=60)
+      with open(path + '.part') as fp:
+        self.assertEqual('01234', fp.read())
+      with open(path + '.part.source') as fp:
+        self.assertEqual({'url': 'http://foo', 'etag': '"v1"'}, json.load(fp))
+
+  def test_download_permanent_error_removes_partial_file(self):
+    self.expect_ranged_get('http://foo', 5, [], status_code=416)
+
+    self.mox.ReplayAll()
+
+    with temporary_dir() as tmpdir:
+      path = os.path.join(tmpdir, 'download')
+      self.write_partial(path, '01234')
+      with pytest.raises(self.fetcher.PermanentError):
+        self.fetcher.download('http://foo', path_or_fd=path, chunk_size_bytes=1024,
+                              timeout_secs=60)
+      self.assertFalse(os.path.exists(path + '.part'))
+      self.assertFalse(os.path.exists(path + '.part.source'))
+
+  def test_download_discards_partial_file_from_other_url(self):
+    chunks = self.expect_get('http://foo', chunk_size_bytes=1024, timeout_secs=60)
+    for chunk in chunks:
+      self.listener.recv_chunk(chunk)
+    self.listener.finished()
+    self.response.close()
+
+    self.mox.ReplayAll()
+
+    with temporary_dir() as tmpdir:
+      path = os.path.join(tmpdir, 'download')
+      self.write_partial(path, 'abcde', url='http://bar')
+      self.fetcher.download('http://foo', listener=self.listener, path_or_fd=path,
+                            chunk_size_bytes=1024, timeout_secs=60)
+      with open(path) as fp:
+        self.assertEqual(''.join(chunks), fp.read())
+      self.assertFalse(os.path.exists(path + '.part.source'))
+
+  def test_download_resume_if_range(self):
+    self.expect_ranged_get('http://foo', 5, ['56789', 'a'], if_range='"v1"', etag='"v1"')
+
+    self.listener.status(200, content_length=11)
+    self.listener.recv_chunk('01234')
+    self.listener.recv_chunk('56789')
+    self.listener.recv_chunk('a')
+    self.listener.finished()
+
+    self.mox.ReplayAll()
+
+    with temporary_dir() as tmpdir:
+      path = os.path.join(tmpdir, 'download')
+      self.write_partial(path, '01234', etag='"v1"')
+      self.fetcher.download('http://foo', listener=self.listener, path_or_fd=path,
+                            chunk_size_bytes=1024, timeout_secs=60)
+      with open(path) as fp:
+        self.assertEqual('0123456789a', fp.read())
+
+  def test_download_resume_etag_changed(self):
+    # The server ignores If-Range and sends a range of its new content.
+    self.requests.get('http://foo', stream=True, timeout=60,
+                      headers={'Range': 'bytes=5-', 'If-Range': '"v1"'}).AndReturn(self.response)
+    self.response.status_code = 206
+    self.response.headers = {'content-length': '5', 'etag': '"v2"'}
+    self.response.close()
+
+    self.mox.ReplayAll()
+
+    with temporary_dir() as tmpdir:
+      path = os.path.join(tmpdir, 'download')
+      self.write_partial(path, '01234', etag='"v1"')
+      with pytest.raises(self.fetcher.TransientError):
+        self.fetcher.download('http://foo', listener=self.listener, path_or_fd=path,
+                              chunk_size_bytes=1024, timeout_secs=60)
+      self.assertFalse(os.path.exists(path + '.part'))
+      self.assertFalse(os.path.exists(path + '.part.source'))
+
+
+RANGED_CONTENT = ''.join(chr(ord('a') + (i % 26)) for i in range(1000))
+
+
+class RangedHandler(BaseHTTPServer.BaseHTTPRequestHandler):
+  """Serves RANGED_CONTENT with support for single byte range requests."""
+
+  def do_HEAD(self):
+    self.send_response(200)
+    self.send_header('Accept-Ranges', 'bytes')
+    self.send_header('Content-Length', str(len(RANGED_CONTENT)))
+    self.end_headers()
+
+  def do_GET(self):
+    byte_range = self.headers.getheader('Range')
+    if not byte_range:
+      self.send_response(200)
+      content = RANGED_CONTENT
+    else:
+      start, end = re.match(r'bytes=(\d+)-(\d*)', byte_range).groups()
+      end = int(end) if end else len(RANGED_CONTENT) - 1
+      content = RANGED_CONTENT[int(start):end + 1]
+      self.server.ranges.append((int(start), end))
+      self.send_response(206)
+    self.send_header('Content-Length', str(len(content)))
+    self.end_headers()
+    self.wfile.write(content)
+
+  def log_message(self, format, *args):
+    pass
+
+
+class RangedServer(SocketServer.ThreadingMixIn, BaseHTTPServer.HTTPServer):
+  daemon_threads = True
+
+  def __init__(self, *args, **kwargs):
+    BaseHTTPServer.HTTPServer.__init__(self, *args, **kwargs)
+    self.ranges = []
+
+
+class FetcherRangesTest(mox.MoxTestBase):
+  @contextmanager
+  def ranged_server(self):
+    httpd = RangedServer(('localhost', 0), RangedHandler)
+    httpd_thread = threading.Thread(target=httpd.serve_forever)
+    httpd_thread.daemon = True
+    httpd_thread.start()
+    try:
+      yield httpd, 'http://localhost:{0}/content'.format(httpd.server_address[1])
+    finally:
+      httpd.shutdown()
+      httpd_thread.join()
+
+  def download(self, url, **kwargs):
+    checksum_listener = Fetcher.ChecksumListener(digest=hashlib.sha1())
+    with temporary_dir() as tmpdir:
+      path = Fetcher().download(url, listener=checksum_listener,
+                                path_or_fd=os.path.join(tmpdir, 'download'),
+                                chunk_size_bytes=64, timeout_secs=5, **kwargs)
+      with open(path) as fp:
+        self.assertEqual(RANGED_CONTENT, fp.read())
+      self.assertEqual(['download'], os.listdir(tmpdir))
+    self.assertEqual(hashlib.sha1(RANGED_CONTENT).hexdigest(), checksum_listener.checksum)
+
+  def test_parallel_ranges(self):
+    with self.ranged_server() as (httpd, url):
+      self.download(url, ranges=3, min_range_size_bytes=1)
+      self.assertEqual([(0, 333), (334, 667), (668, 999)], sorted(httpd.ranges))
+
+  def test_small_content_not_split(self):
+    with self.ranged_server() as (httpd, url):
+      self.download(url, ranges=3)
+      self.assertEqual([], httpd.ranges)
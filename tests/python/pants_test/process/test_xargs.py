@@ -7,6 +7,10 @@ from __future__ import (nested_scopes, generators, division, absolute_import, wi
 
 import errno
 import os
+import struct
+import threading
+import time
+import unittest2 as unittest
 
 import mox
 import pytest
@@ -87,3 +91,79 @@ class XargsTest(mox.MoxTestBase):
     self.mox.ReplayAll()
 
     self.assertEqual(42, self.xargs.execute(['one', 'two', 'three', 'four']))
+
+  def test_execute_split_no_fail_fast(self):
+    self.call(['one', 'two', 'three', 'four']).AndRaise(self.TOO_BIG)
+    self.call(['one', 'two']).AndReturn(42)
+    self.call(['three', 'four']).AndReturn(7)
+    self.mox.ReplayAll()
+
+    self.assertEqual(42, Xargs(self.call, fail_fast=False).execute(['one', 'two', 'three', 'four']))
+
+  def test_execute_precomputed_chunks(self):
+    # Each 3 byte arg costs 4 bytes plus a pointer.
+    arg_bytes = 4 + struct.calcsize(str('P'))
+    self.call(['one', 'two']).AndReturn(0)
+    self.call(['six']).AndReturn(0)
+    self.mox.ReplayAll()
+
+    xargs = Xargs(self.call, max_chunk_bytes=2 * arg_bytes)
+    self.assertEqual(0, xargs.execute(['one', 'two', 'six']))
+
+
+class ParallelXargsTest(unittest.TestCase):
+  def setUp(self):
+    self.calls = []
+    self.lock = threading.Lock()
+
+  def recording_call(self, results=None, delays=None):
+    def call(args):
+      with self.lock:
+        self.calls.append(args)
+      if delays and args[0] in delays:
+        time.sleep(delays[args[0]])
+      return (results or {}).get(args[0], 0)
+    return call
+
+  def test_spread_over_workers(self):
+    xargs = Xargs(self.recording_call(), parallelism=3)
+    self.assertEqual(0, xargs.execute(['a', 'b', 'c', 'd', 'e', 'f', 'g']))
+    self.assertEqual([['a', 'b', 'c'], ['d', 'e', 'f'], ['g']], sorted(self.calls))
+
+  def test_fewer_args_than_workers(self):
+    xargs = Xargs(self.recording_call(), parallelism=8)
+    self.assertEqual(0, xargs.execute(['a', 'b']))
+    self.assertEqual([['a'], ['b']], sorted(self.calls))
+
+  def test_deterministic_result(self):
+    # The later chunk fails first, but the result is that of the first failed chunk in arg order.
+    xargs = Xargs(self.recording_call(results={'a': 1, 'b': 2}, delays={'a': 0.2}),
+                  parallelism=2, fail_fast=False)
+    self.assertEqual(1, xargs.execute(['a', 'b']))
+
+  def test_fail_fast_cancels_outstanding(self):
+    xargs = Xargs(self.recording_call(results={'a': 1}, delays={'b': 0.2}), parallelism=2)
+    xargs._max_chunk_bytes = 1  # One arg per chunk.
+    self.assertEqual(1, xargs.execute(['a', 'b', 'c', 'd']))
+    # The 'b' chunk may or may not have started before 'a' failed, but nothing after it does.
+    self.assertIn(['a'], self.calls)
+    self.assertNotIn(['c'], self.calls)
+    self.assertNotIn(['d'], self.calls)
+
+  def test_no_fail_fast_runs_all(self):
+    xargs = Xargs(self.recording_call(results={'a': 1}), parallelism=2, fail_fast=False)
+    xargs._max_chunk_bytes = 1  # One arg per chunk.
+    self.assertEqual(1, xargs.execute(['a', 'b', 'c', 'd']))
+    self.assertEqual([['a'], ['b'], ['c'], ['d']], sorted(self.calls))
+
+  def test_exception_propagates(self):
+    def call(args):
+      raise ValueError(args[0])
+    with pytest.raises(ValueError):
+      Xargs(call, parallelism=2).execute(['a', 'b'])
+
+  def test_subprocess(self):
+    xargs = Xargs.subprocess(['true'], parallelism=2)
+    self.assertEqual(0, xargs.execute(['a', 'b', 'c']))
+    xargs = Xargs.subprocess(['false'], parallelism=2)
+    self.assertEqual(1, xargs.execute(['a', 'b', 'c']))
@@ -0,0 +1,76 @@
+# coding=utf-8
+# Copyright 2014 Pants project contributors (see CONTRIBUTORS.md).
+# Licensed under the Apache License, Version 2.0 (see LICENSE).
+
+from __future__ import (nested_scopes, generators, division, absolute_import, with_statement,
+                        print_function, unicode_literals)
+
+import os
+import unittest2 as unittest
+
+from pex.pex_builder import PEXBuilder
+
+from pants.backend.python.chroot_store import ChrootStore
+from pants.util.contextutil import temporary_dir
+from pants.util.dirutil import safe_open
+
+
+class ChrootStoreTest(unittest.TestCase):
+  def builder(self, root):
+    return PEXBuilder(path=root)
+
+  def write(self, path, contents):
+    with safe_open(path, 'w') as fp:
+      fp.write(contents)
+
+  def read(self, path):
+    with open(path) as fp:
+      return fp.read()
+
+  def test_missing(self):
+    with temporary_dir() as store_dir:
+      with temporary_dir() as chroot_dir:
+        self.assertFalse(ChrootStore(store_dir).link('deadbeef', self.builder(chroot_dir)))
+
+  def test_store_and_link(self):
+    with temporary_dir() as tmpdir:
+      src = os.path.join(tmpdir, 'src', 'foo', 'bar.py')
+      resource = os.path.join(tmpdir, 'src', 'foo', 'baz.txt')
+      self.write(src, 'x = 1\n')
+      self.write(resource, 'baz')
+
+      layer = self.builder(os.path.join(tmpdir, 'layer'))
+      layer.add_source(src, 'foo/bar.py')
+      layer.add_resource(resource, 'foo/baz.txt')
+      layer.info.add_distribution('dist-1.0.egg', 'abc')
+
+      store = ChrootStore(os.path.join(tmpdir, 'store'))
+      store.store('deadbeef', layer)
+
+      # Edits to the original sources don't leak into the stored layer.
+      self.write(src, 'x = 2\n')
+
+      builder = self.builder(os.path.join(tmpdir, 'chroot'))
+      self.assertTrue(store.link('deadbeef', builder))
+      self.assertEqual('x = 1\n', self.read(os.path.join(builder.path(), 'foo', 'bar.py')))
+      self.assertEqual('baz', self.read(os.path.join(builder.path(), 'foo', 'baz.txt')))
+      self.assertEqual(set(['foo/bar.py', 'foo/bar.pyc']), builder.chroot().get('source'))
+      self.assertEqual(set(['foo/baz.txt']), builder.chroot().get('resource'))
+      self.assertEqual({'dist-1.0.egg': 'abc'}, builder.info.distributions)
+
+      # Linked files can't be written through back into the store.
+      self.assertEqual(0, os.stat(os.path.join(builder.path(), 'foo', 'bar.py')).st_mode & 0o222)
+
+  def test_store_keeps_first_layer(self):
+    with temporary_dir() as tmpdir:
+      store = ChrootStore(os.path.join(tmpdir, 'store'))
+      for contents in ('first', 'second'):
+        src = os.path.join(tmpdir, contents)
+        self.write(src, contents)
+        layer = self.builder(os.path.join(tmpdir, 'layer-%s' % contents))
+        layer.add_resource(src, 'data.txt')
+        store.store('deadbeef', layer)
+
+      builder = self.builder(os.path.join(tmpdir, 'chroot'))
+      self.assertTrue(store.link('deadbeef', builder))
+      self.assertEqual('first', self.read(os.path.join(builder.path(), 'data.txt')))
@@ -6,12 +6,16 @@ from __future__ import (nested_scopes, generators, division, absolute_import, wi
                         print_function, unicode_literals)
 
 import contextlib
+import os
 import shutil
+import sys
 import tempfile
 import unittest2 as unittest
 
-from pants.backend.python.interpreter_cache import PythonInterpreter, PythonInterpreterCache
+from pants.backend.python.interpreter_cache import (PythonInterpreter, PythonInterpreterCache,
+                                                    _InterpreterIndex)
 from pants.util.contextutil import temporary_dir
+from pants.util.dirutil import touch
 
 import mock
 
@@ -86,3 +90,42 @@ class TestInterpreterCache(unittest.TestCase):
       cache._setup_cached = mock.Mock(side_effect=set_interpreters)
 
       self.assertEqual(cache.setup(filters=(str(interpreter.identity.requirement),)), [interpreter])
+
+  @mock.patch('pants.backend.python.interpreter_cache.PythonSetup', return_value=mock.MagicMock())
+  def test_find_interpreters_probes_once(self, MockSetup):
+    interpreter = PythonInterpreter.get()
+
+    with temporary_dir() as path:
+      with temporary_dir() as bin_dir:
+        MockSetup.return_value.scratch_dir.return_value = path
+        os.symlink(sys.executable, os.path.join(bin_dir, 'python'))
+        touch(os.path.join(bin_dir, 'python2.9'))
+
+        cache = PythonInterpreterCache(mock.MagicMock())
+        found = cache._find_interpreters([bin_dir])
+        self.assertEqual([interpreter.identity], [pi.identity for pi in found])
+        cache._index.save()
+
+        # A fresh cache trusts the index rather than executing anything again.
+        cache = PythonInterpreterCache(mock.MagicMock())
+        cache._probe = mock.Mock(side_effect=AssertionError('Unexpected probe.'))
+        found = cache._find_interpreters([bin_dir])
+        self.assertEqual([interpreter.identity], [pi.identity for pi in found])
+
+
+class TestInterpreterIndex(unittest.TestCase):
+  def test_entries_invalidated_by_change(self):
+    with temporary_dir() as path:
+      binary = os.path.join(path, 'python')
+      touch(binary)
+      index = _InterpreterIndex(os.path.join(path, 'index.json'))
+      self.assertIsNone(index.get(binary))
+
+      index.update(binary, identity='CPython-2.7.5')
+      index.save()
+      index = _InterpreterIndex(os.path.join(path, 'index.json'))
+      self.assertEqual('CPython-2.7.5', index.get(binary)['identity'])
+
+      with open(binary, 'w') as fp:
+        fp.write('changed')
+      self.assertIsNone(index.get(binary))
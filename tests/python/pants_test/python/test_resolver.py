@@ -5,11 +5,15 @@
 from __future__ import (nested_scopes, generators, division, absolute_import, with_statement,
                         print_function, unicode_literals)
 
+import threading
+import time
 import unittest2 as unittest
 
+from pex.http import Context
+from pex.link import Link
 from pex.platforms import Platform
 
-from pants.backend.python.resolver import get_platforms
+from pants.backend.python.resolver import _SharedContext, get_platforms, resolve_multi
 from pants.base.config import Config
 from pants.util.contextutil import temporary_file
 
@@ -31,3 +35,55 @@ platforms: [
     expected_platforms = [Platform.current(), 'linux-x86_64']
     self.assertEqual(set(expected_platforms),
                      set(get_platforms(self.config.getlist('python-setup', 'platforms'))))
+
+  def test_resolve_multi_platforms(self):
+    platforms = ['current', 'macosx-10.4-x86_64', 'win32']
+    distributions = resolve_multi(self.config, [], platforms=platforms)
+    self.assertEqual(set(get_platforms(platforms)), set(distributions.keys()))
+    self.assertEqual([set()] * 3, [set(dists) for dists in distributions.values()])
+
+
+class RecordingContext(Context):
+  def __init__(self):
+    self.reads = []
+    self._lock = threading.Lock()
+
+  def open(self, link):
+    raise NotImplementedError()
+
+  def content(self, link):
+    with self._lock:
+      self.reads.append(link.url)
+    if link.url.endswith('/broken'):
+      raise self.Error('Failed to read %s' % link.url)
+    # Give concurrent readers a chance to pile up.
+    time.sleep(0.01)
+    return 'content of %s' % link.url
+
+
+class SharedContextTest(unittest.TestCase):
+  def test_content_read_once(self):
+    recording = RecordingContext()
+    context = _SharedContext(recording)
+    link = Link.wrap('https://example.com/simple/foo')
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(context.content(link)))
+               for _ in range(4)]
+    for thread in threads:
+      thread.start()
+    for thread in threads:
+      thread.join()
+
+    self.assertEqual(['content of https://example.com/simple/foo'] * 4, results)
+    self.assertEqual(['https://example.com/simple/foo'], recording.reads)
+
+  def test_failures_not_remembered(self):
+    recording = RecordingContext()
+    context = _SharedContext(recording)
+    link = Link.wrap('https://example.com/broken')
+
+    for _ in range(2):
+      with self.assertRaises(Context.Error):
+        context.content(link)
+    self.assertEqual(['https://example.com/broken'] * 2, recording.reads)
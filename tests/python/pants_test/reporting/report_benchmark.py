@@ -0,0 +1,77 @@
+# coding=utf-8
+# Copyright 2014 Pants project contributors (see CONTRIBUTORS.md).
+# Licensed under the Apache License, Version 2.0 (see LICENSE).
+
+from __future__ import (nested_scopes, generators, division, absolute_import, with_statement,
+                        print_function, unicode_literals)
+
+import os
+import sys
+import threading
+
+from pants.goal.run_tracker import RunTracker
+from pants.reporting.report import Report
+from pants.reporting.reporter import Reporter
+from pants.util.contextutil import Timer, temporary_dir
+
+
+class CountingReporter(Reporter):
+  def __init__(self, run_tracker):
+    super(CountingReporter, self).__init__(run_tracker, Reporter.Settings(log_level=Report.INFO))
+    self.calls = 0
+    self.bytes = 0
+
+  def handle_output(self, workunit, label, s):
+    self.calls += 1
+    self.bytes += len(s)
+
+
+def write_outputs(run_tracker, parent_workunit, num_writes, num_threads, through_fileno):
+  def write():
+    run_tracker.register_thread(parent_workunit)
+    with run_tracker.new_workunit('tool') as workunit:
+      stdout = workunit.output('stdout')
+      for i in range(num_writes // num_threads):
+        line = 'line {0}\n'.format(i)
+        if through_fileno:
+          # As a subprocess writing to the output would.
+          os.write(stdout.fileno(), line.encode('utf-8'))
+        else:
+          stdout.write(line)
+
+  threads = [threading.Thread(target=write) for _ in range(num_threads)]
+  for thread in threads:
+    thread.start()
+  for thread in threads:
+    thread.join()
+
+
+def main():
+  """Times small writes to workunit outputs, from the write until the reporters have seen them.
+
+  To run:
+
+  ./pants goal run tests/python/pants_test/reporting:report_benchmark -- \
+    [number of writes, 10000 by default] [number of writing threads, 8 by default]
+  """
+  num_writes = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+  num_threads = int(sys.argv[2]) if len(sys.argv) > 2 else 8
+
+  for label, through_fileno in (('write', False), ('fileno', True)):
+    for threads in sorted(set([1, num_threads])):
+      with temporary_dir() as info_dir:
+        run_tracker = RunTracker(info_dir)
+        report = Report()
+        reporter = CountingReporter(run_tracker)
+        report.add_reporter('counting', reporter)
+        run_tracker.start(report)
+        with Timer() as timer:
+          with run_tracker.new_workunit('writes') as workunit:
+            write_outputs(run_tracker, workunit, num_writes, threads, through_fileno)
+          report.close()
+        print('{0} writes ({1}, {2} threads): {3:.3f}s, {4} bytes in {5} reporter calls'
+              .format(num_writes, label, threads, timer.elapsed, reporter.bytes, reporter.calls))
+
+
+if __name__ == '__main__':
+  main()
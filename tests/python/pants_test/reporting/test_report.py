@@ -0,0 +1,100 @@
+# coding=utf-8
+# Copyright 2014 Pants project contributors (see CONTRIBUTORS.md).
+# Licensed under the Apache License, Version 2.0 (see LICENSE).
+
+from __future__ import (nested_scopes, generators, division, absolute_import, with_statement,
+                        print_function, unicode_literals)
+
+from collections import defaultdict
+import os
+import threading
+import unittest2 as unittest
+
+from pants.goal.run_tracker import RunTracker
+from pants.reporting.report import Report, ReportingError
+from pants.reporting.reporter import Reporter
+from pants.util.dirutil import safe_mkdtemp, safe_rmtree
+
+
+class RecordingReporter(Reporter):
+  def __init__(self, run_tracker):
+    super(RecordingReporter, self).__init__(run_tracker, Reporter.Settings(log_level=Report.INFO))
+    self.outputs = defaultdict(str)
+    self.output_received = threading.Event()
+
+  def handle_output(self, workunit, label, s):
+    self.outputs[(workunit.name, label)] += s
+    self.output_received.set()
+
+
+class RarelyPolledReport(Report):
+  _POLL_PERIOD_SECS = 60
+
+
+class ReportTest(unittest.TestCase):
+  def setUp(self):
+    self.info_dir = safe_mkdtemp()
+    self.run_tracker = RunTracker(self.info_dir)
+    self.report = RarelyPolledReport()
+    self.reporter = RecordingReporter(self.run_tracker)
+    self.report.add_reporter('recording', self.reporter)
+    self.run_tracker.start(self.report)
+
+  def tearDown(self):
+    self.report.close()
+    safe_rmtree(self.info_dir)
+
+  def test_pushed_output(self):
+    with self.run_tracker.new_workunit('tool') as workunit:
+      stdout = workunit.output('stdout')
+      self.assertTrue(stdout.pushes_writes)
+      stdout.write('Hello ')
+      stdout.write('World')
+      self.assertEqual('', stdout.read())
+      self.assertEqual('Hello World', stdout.read_from(0))
+
+    self.assertEqual({('tool', 'stdout'): 'Hello World'}, dict(self.reporter.outputs))
+
+  def test_pushed_output_emitted_without_polling(self):
+    with self.run_tracker.new_workunit('tool') as workunit:
+      workunit.output('stdout').write('Hello')
+      self.assertTrue(self.reporter.output_received.wait(10))
+      self.assertEqual({('tool', 'stdout'): 'Hello'}, dict(self.reporter.outputs))
+
+  def test_fileno_output_pushed(self):
+    with self.run_tracker.new_workunit('tool') as workunit:
+      stderr = workunit.output('stderr')
+      self.assertTrue(stderr.pushes_writes)
+      os.write(stderr.fileno(), b'Hello')
+      self.assertTrue(self.reporter.output_received.wait(10))
+      self.assertEqual({('tool', 'stderr'): 'Hello'}, dict(self.reporter.outputs))
+      os.write(stderr.fileno(), b' World')
+
+    self.assertEqual({('tool', 'stderr'): 'Hello World'}, dict(self.reporter.outputs))
+
+  def test_writers_do_not_hang_once_the_emitter_dies(self):
+    class FailingReporter(RecordingReporter):
+      def handle_output(self, workunit, label, s):
+        raise ReportingError('Failed to report {0!r}'.format(s))
+
+    class SingleOutputReport(Report):
+      _MAX_PENDING_OUTPUTS = 1
+      _POLL_PERIOD_SECS = 0.01
+
+    report = SingleOutputReport()
+    report.add_reporter('failing', FailingReporter(self.run_tracker))
+    run_tracker = RunTracker(self.info_dir)
+    run_tracker.start(report)
+    try:
+      with self.assertRaises(ReportingError):
+        with run_tracker.new_workunit('tool') as workunit:
+          stdout = workunit.output('stdout')
+          stdout.write('a')
+          report._emitter_thread.join(10)
+          self.assertFalse(report._emitter_thread.is_alive())
+          for s in 'bcd':
+            stdout.write(s)
+          self.assertEqual('abcd', stdout.read_from(0))
+    finally:
+      report.remove_reporter('failing')
+      report.close()
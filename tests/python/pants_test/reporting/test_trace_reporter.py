@@ -0,0 +1,63 @@
+# coding=utf-8
+# Copyright 2014 Pants project contributors (see CONTRIBUTORS.md).
+# Licensed under the Apache License, Version 2.0 (see LICENSE).
+
+from __future__ import (nested_scopes, generators, division, absolute_import, with_statement,
+                        print_function, unicode_literals)
+
+import json
+import os
+import threading
+import unittest2 as unittest
+
+from pants.goal.run_tracker import RunTracker
+from pants.reporting.report import Report
+from pants.reporting.trace_reporter import TraceReporter
+from pants.util.dirutil import safe_mkdtemp, safe_rmtree
+
+
+class TraceReporterTest(unittest.TestCase):
+  def setUp(self):
+    self.info_dir = safe_mkdtemp()
+    self.run_tracker = RunTracker(self.info_dir)
+    self.report = Report()
+    settings = TraceReporter.Settings(log_level=Report.INFO, trace_dir=self.info_dir)
+    self.report.add_reporter('trace', TraceReporter(self.run_tracker, settings))
+    self.run_tracker.start(self.report)
+
+  def tearDown(self):
+    safe_rmtree(self.info_dir)
+
+  def test_trace(self):
+    with self.run_tracker.new_workunit('compile') as compile_workunit:
+      with self.run_tracker.new_workunit('javac', cmd='javac -d out'):
+        pass
+
+      def in_thread():
+        self.run_tracker.register_thread(compile_workunit)
+        with self.run_tracker.new_workunit('scalac'):
+          pass
+      thread = threading.Thread(target=in_thread, name='worker')
+      thread.start()
+      thread.join()
+    self.report.close()
+
+    with open(os.path.join(self.info_dir, TraceReporter.TRACE_FILE)) as fp:
+      trace = json.load(fp)
+    events = trace['traceEvents']
+
+    thread_names = dict((e['tid'], e['args']['name']) for e in events if e['ph'] == 'M')
+    self.assertEqual(['MainThread', 'worker'], sorted(thread_names.values()))
+
+    events_by_name = dict((e['name'], e) for e in events if e['ph'] == 'X')
+    self.assertEqual(set(['compile', 'javac', 'scalac']), set(events_by_name))
+    self.assertEqual('javac -d out', events_by_name['javac']['args']['cmd'])
+    self.assertEqual('SUCCESS', events_by_name['scalac']['args']['outcome'])
+    self.assertEqual('worker', thread_names[events_by_name['scalac']['tid']])
+    self.assertEqual('MainThread', thread_names[events_by_name['javac']['tid']])
+    self.assertLessEqual(events_by_name['compile']['ts'], events_by_name['javac']['ts'])
+
+    with open(os.path.join(self.info_dir, TraceReporter.FLAMEGRAPH_FILE)) as fp:
+      stacks = [line.rsplit(' ', 1)[0] for line in fp]
+    self.assertTrue(set(stacks) <= set(['main', 'main;compile', 'main;compile;javac',
+                                        'main;compile;scalac']))
@@ -0,0 +1,97 @@
+# coding=utf-8
+# Copyright 2014 Pants project contributors (see CONTRIBUTORS.md).
+# Licensed under the Apache License, Version 2.0 (see LICENSE).
+
+from __future__ import (nested_scopes, generators, division, absolute_import, with_statement,
+                        print_function, unicode_literals)
+
+import os
+import resource
+import sys
+
+from pants.backend.core.register import build_file_aliases as register_core
+from pants.backend.jvm.register import build_file_aliases as register_jvm
+from pants.backend.jvm.targets.jar_dependency import JarDependency
+from pants.backend.jvm.targets.jar_library import JarLibrary
+from pants.backend.jvm.targets.java_library import JavaLibrary
+from pants.backend.jvm.tasks.depmap import Depmap
+from pants.util.contextutil import Timer
+from pants_test.tasks.test_base import ConsoleTaskTest
+
+
+class DepmapBenchmark(ConsoleTaskTest):
+  @classmethod
+  def task_type(cls):
+    return Depmap
+
+  @property
+  def alias_groups(self):
+    return register_core().merge(register_jvm())
+
+  def runTest(self):
+    pass
+
+  def make_graph(self, num_targets, num_jar_libraries=50):
+    """Makes a synthetic graph of java libraries, each depending upon two others and a jar library.
+
+    :returns: The root of the graph.
+    """
+    jar_libraries = [self.make_target('3rdparty:jar{0}'.format(i),
+                                      target_type=JarLibrary,
+                                      jars=[JarDependency('org.example', 'jar{0}'.format(i), '1.0')])
+                     for i in range(num_jar_libraries)]
+
+    # Target i depends on targets 2i + 1 and 2i + 2, so the graph is only log(num_targets) deep.
+    targets = [None] * num_targets
+    for i in reversed(range(num_targets)):
+      dependencies = [targets[j] for j in (2 * i + 1, 2 * i + 2) if j < num_targets]
+      dependencies.append(jar_libraries[i % num_jar_libraries])
+      package = 'com/example/p{0}'.format(i // 100)
+      targets[i] = self.make_target('src/java/{0}:t{1}'.format(package, i),
+                                    target_type=JavaLibrary,
+                                    dependencies=dependencies,
+                                    sources=['{0}/T{1}.java'.format(package, i)])
+    return targets[0]
+
+  def project_info(self, root, workdir):
+    task = self.prepare_task(config='[DEFAULT]\npants_workdir: {0}\n'.format(workdir),
+                             args=['--test-project-info'],
+                             targets=[root],
+                             build_graph=self.build_graph,
+                             build_file_parser=self.build_file_parser,
+                             address_mapper=self.address_mapper)
+    num_bytes = 0
+    for line in task.console_output(task.context.targets()):
+      num_bytes += len(line) + 1
+    return num_bytes
+
+
+def main():
+  """Times depmap --project-info for a synthetic graph, with and without cached target info.
+
+  To run:
+
+  ./pants goal run tests/python/pants_test/tasks:depmap_benchmark -- \
+    [number of targets, 50000 by default]
+  """
+  num_targets = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+
+  benchmark = DepmapBenchmark()
+  benchmark.setUp()
+  try:
+    with Timer() as timer:
+      root = benchmark.make_graph(num_targets)
+    print('Made a graph of {0} targets: {1:.3f}s'.format(num_targets, timer.elapsed))
+
+    workdir = os.path.join(benchmark.build_root, '.pants.d')
+    for label in ('cold', 'warm'):
+      with Timer() as timer:
+        num_bytes = benchmark.project_info(root, workdir)
+      print('Project info ({0} cache): {1:.3f}s, {2} bytes'.format(label, timer.elapsed, num_bytes))
+    print('Peak RSS: {0} KB'.format(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss))
+  finally:
+    benchmark.tearDown()
+
+
+if __name__ == '__main__':
+  main()
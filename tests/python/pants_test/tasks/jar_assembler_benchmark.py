@@ -0,0 +1,102 @@
+# coding=utf-8
+# Copyright 2014 Pants project contributors (see CONTRIBUTORS.md).
+# Licensed under the Apache License, Version 2.0 (see LICENSE).
+
+from __future__ import (nested_scopes, generators, division, absolute_import, with_statement,
+                        print_function, unicode_literals)
+
+import multiprocessing
+import os
+import random
+import sys
+from zipfile import ZIP_DEFLATED
+
+from pants.backend.jvm.targets.jvm_binary import JarRules
+from pants.backend.jvm.tasks.jar_assembler import JarAssembler
+from pants.java.jar.manifest import Manifest
+from pants.util.contextutil import Timer, open_zip, temporary_dir
+from pants.util.dirutil import safe_mkdir, safe_open
+
+
+def create_jars(root, num_jars, entries_per_jar, seed=42):
+  """Creates num_jars jars of semi-compressible class-like entries, as dependency jars."""
+  rand = random.Random(seed)
+  words = ['class', 'void', 'import', 'return', 'this', 'value', 'pants', 'target', 'jar', 'zip']
+  jars = []
+  safe_mkdir(root)
+  for i in range(num_jars):
+    path = os.path.join(root, 'lib{0}.jar'.format(i))
+    with open_zip(path, 'w', compression=ZIP_DEFLATED) as jar:
+      for j in range(entries_per_jar):
+        jar.writestr('com/lib{0}/p{1}/C{2}.class'.format(i, j % 20, j),
+                     ' '.join(rand.choice(words) for _ in range(rand.randint(10, 2000))))
+    jars.append(path)
+  return jars
+
+
+def create_classes(root, num_classes, seed=42):
+  """Creates num_classes class-like files, as the binary's own classes."""
+  rand = random.Random(seed)
+  for i in range(num_classes):
+    with safe_open(os.path.join(root, 'com/app/p{0}/C{1}.class'.format(i % 50, i)), 'w') as fp:
+      fp.write(' '.join(str(rand.random()) for _ in range(rand.randint(10, 500))))
+
+
+def recompress(path, classes, jars):
+  """Writes a jar the way the jar tool does, inflating and deflating every dependency jar entry."""
+  names = set()
+  with open_zip(path, 'w', compression=ZIP_DEFLATED, allowZip64=True) as out:
+    for root, _, files in os.walk(classes):
+      for name in files:
+        full_path = os.path.join(root, name)
+        arcname = os.path.relpath(full_path, classes)
+        names.add(arcname)
+        out.write(full_path, arcname)
+    for jar_path in jars:
+      with open_zip(jar_path) as jar:
+        for zinfo in jar.infolist():
+          if zinfo.filename not in names and zinfo.filename != Manifest.PATH:
+            names.add(zinfo.filename)
+            out.writestr(zinfo.filename, jar.read(zinfo))
+
+
+def main():
+  """Times assembling a monolithic jar by copying dependency jar entries vs. recompressing them.
+
+  The recompressing assembly stands in for the jar tool, which inflates and deflates every entry
+  serially, so the comparison does not need a JVM.
+
+  To run:
+
+  ./pants goal run tests/python/pants_test/tasks:jar_assembler_benchmark -- \
+    [number of dependency jars, 100 by default] [entries per jar, 500 by default] \
+    [number of workers, the cpu count by default]
+  """
+  num_jars = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+  entries_per_jar = int(sys.argv[2]) if len(sys.argv) > 2 else 500
+  workers = int(sys.argv[3]) if len(sys.argv) > 3 else multiprocessing.cpu_count()
+
+  with temporary_dir() as root:
+    with Timer() as timer:
+      jars = create_jars(os.path.join(root, 'libs'), num_jars, entries_per_jar)
+      classes = os.path.join(root, 'classes')
+      create_classes(classes, entries_per_jar * 10)
+    print('Created {0} jars and {1} classes in {2:.2f}s'
+          .format(num_jars, entries_per_jar * 10, timer.elapsed))
+
+    out = os.path.join(root, 'out.jar')
+    with Timer() as timer:
+      recompress(out, classes, jars)
+    print('recompress: {0:.2f}s, {1} bytes'.format(timer.elapsed, os.path.getsize(out)))
+
+    manifest = Manifest()
+    manifest.addentry(Manifest.MANIFEST_VERSION, '1.0')
+    for label, count in (('serial', 1), ('{0} workers'.format(workers), workers)):
+      assembler = JarAssembler(jar_rules=JarRules.default(), workers=count)
+      with Timer() as timer:
+        assembler.assemble(out, manifest.contents(), files=[(classes, None)], jars=jars)
+      print('copy ({0}): {1:.2f}s, {2} bytes'.format(label, timer.elapsed, os.path.getsize(out)))
+
+
+if __name__ == '__main__':
+  main()
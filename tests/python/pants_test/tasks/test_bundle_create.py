@@ -5,7 +5,10 @@
 from __future__ import (nested_scopes, generators, division, absolute_import, with_statement,
                         print_function, unicode_literals)
 
-from pants.util.dirutil import safe_mkdtemp, safe_rmtree
+import os
+
+from pants.util.contextutil import temporary_dir
+from pants.util.dirutil import safe_mkdtemp, safe_open, safe_rmtree
 from pants.backend.jvm.tasks.bundle_create import BundleCreate
 from pants_test.task_test_base import TaskTestBase
 
@@ -35,10 +38,46 @@ class BundleCreateTest(TaskTestBase):
       self.options_scope: {
         'deployjar': None,
         'archive_prefix': None,
-        'archive': None
+        'archive': None,
+        'archive_workers': None,
+        'symlink': None,
       }
     }
 
     bundle_create = self.create_task(self.context(config=sample_ini_test_1, options=options),
                                      self.workdir)
     self.assertEquals(bundle_create._outdir, '/tmp/dist')
+
+  def create_bundle_task(self):
+    options = {
+      self.options_scope: {
+        'deployjar': None,
+        'archive_prefix': None,
+        'archive': None,
+        'archive_workers': None,
+        'symlink': None,
+      }
+    }
+    return self.create_task(self.context(options=options), self.workdir)
+
+  def test_source_files_not_shared(self):
+    bundle_create = self.create_bundle_task()
+    self.create_file('src/resources/config.txt', 'original')
+    source = os.path.join(self.build_root, 'src/resources/config.txt')
+    with temporary_dir() as bundle_dir:
+      bundled = os.path.join(bundle_dir, 'config.txt')
+      bundle_create._add_file(source, bundled)
+      with open(bundled, 'w') as fp:
+        fp.write('edited in the bundle')
+      with open(source) as fp:
+        self.assertEqual('original', fp.read())
+
+  def test_pants_owned_files_hardlinked(self):
+    bundle_create = self.create_bundle_task()
+    jar = os.path.join(self.build_root, '.pants.d', 'jars', 'lib.jar')
+    with safe_open(jar, 'w') as fp:
+      fp.write('jar')
+    with temporary_dir() as bundle_dir:
+      bundled = os.path.join(bundle_dir, 'libs', 'lib.jar')
+      bundle_create._add_file(jar, bundled)
+      self.assertTrue(os.path.samefile(jar, bundled))
@@ -4,6 +4,7 @@
 
 from __future__ import (nested_scopes, generators, division, absolute_import, with_statement,
                         print_function, unicode_literals)
+from collections import OrderedDict
 import json
 import os
 from textwrap import dedent
@@ -19,7 +20,8 @@ from pants.backend.jvm.targets.java_tests import JavaTests
 from pants.backend.jvm.targets.jvm_binary import JvmApp, JvmBinary
 from pants.backend.jvm.targets.jvm_target import JvmTarget
 from pants.backend.jvm.targets.scala_library import ScalaLibrary
-from pants.backend.jvm.tasks.depmap import Depmap
+from pants.backend.jvm.tasks.depmap import (Depmap, ProjectInfoCache, _encode_json,
+                                            _json_object_chunks, _lines)
 from pants.backend.python.register import build_file_aliases as register_python
 from pants.base.exceptions import TaskError
 from pants_test.tasks.test_base import ConsoleTaskTest
@@ -466,6 +468,83 @@ class ProjectInfoTest(ConsoleTaskTest):
                      result['targets']['project_info:target_type']['target_type'])
     self.assertEqual('RESOURCE', result['targets']['project_info:resource']['target_type'])
 
+  def test_cached_project_info(self):
+    target = self.target('project_info:jvm_target')
+    workdir = os.path.join(self.build_root, '.pants.d')
+
+    def project_info(*args):
+      task = self.prepare_task(config='[DEFAULT]\npants_workdir: %s\n' % workdir,
+                               args=['--test-project-info'] + list(args),
+                               targets=[target],
+                               build_graph=self.build_graph,
+                               build_file_parser=self.build_file_parser,
+                               address_mapper=self.address_mapper)
+      result = get_json(task.console_output(task.context.targets()))
+      return result['targets']['project_info:jvm_target'], task.workdir
+
+    info, task_workdir = project_info()
+    self.assertEqual('SOURCE', info['target_type'])
+
+    # Unchanged targets have their info read back from the cache.
+    cache = ProjectInfoCache(os.path.join(task_workdir, 'project_info'))
+    cache.open()
+    key = cache._index[target.id][0]
+    cache.put(target.id, key, '{"target_type": "CACHED"}')
+    cache.commit()
+    info, _ = project_info()
+    self.assertEqual('CACHED', info['target_type'])
+
+    # Info cached for one format is not reused for another.
+    info, _ = project_info('--test-project-info-formatted')
+    self.assertEqual('SOURCE', info['target_type'])
+
+  def test_project_info_cache(self):
+    cache_dir = os.path.join(self.build_root, 'project_info')
+    cache = ProjectInfoCache(cache_dir)
+    cache.open()
+    cache.put('a', 'key1', 'info a')
+    cache.put('b', 'key2', 'info b')
+    cache.commit()
+
+    cache = ProjectInfoCache(cache_dir)
+    cache.open()
+    self.assertEqual('info b', cache.get('b', 'key2'))
+    self.assertIsNone(cache.get('a', 'key2'))
+    self.assertIsNone(cache.get('c', 'key1'))
+    cache.abort()
+
+    # An aborted run leaves the cache alone, and a committed run keeps just the info it used.
+    cache = ProjectInfoCache(cache_dir)
+    cache.open()
+    self.assertEqual('info a', cache.get('a', 'key1'))
+    cache.commit()
+
+    cache = ProjectInfoCache(cache_dir)
+    cache.open()
+    self.assertEqual('info a', cache.get('a', 'key1'))
+    self.assertIsNone(cache.get('b', 'key2'))
+    cache.commit()
+    self.assertEqual(2, len(os.listdir(cache_dir)))
+
+  def test_streamed_json(self):
+    document = OrderedDict([
+      ('targets', OrderedDict([('a', {'roots': [], 'targets': ['b']}), ('b', {'roots': []})])),
+      ('empty', OrderedDict()),
+    ])
+
+    def chunks(formatted):
+      def members(obj, depth):
+        for key, value in obj.items():
+          if isinstance(value, OrderedDict):
+            yield key, _json_object_chunks(members(value, depth + 1), formatted, depth + 1)
+          else:
+            yield key, (_encode_json(value, formatted, depth + 1),)
+      return _json_object_chunks(members(document, 0), formatted)
+
+    self.assertEqual(json.dumps(document, indent=4, separators=(',', ': ')).splitlines(),
+                     list(_lines(chunks(formatted=True))))
+    self.assertEqual(json.dumps(document), ''.join(chunks(formatted=False)))
+
   def test_output_file(self):
     outfile = os.path.join(self.build_root, '.pants.d', 'test')
     self.execute_console_task(args=['--test-project-info', '--test-output-file=%s' % outfile],
@@ -8,10 +8,11 @@ from __future__ import (nested_scopes, generators, division, absolute_import, wi
 from contextlib import closing, contextmanager
 import os
 import tempfile
-from zipfile import ZipFile
+from zipfile import BadZipfile, ZipFile
 
-from pants.backend.jvm.tasks.detect_duplicates import DuplicateDetector
+from pants.backend.jvm.tasks.detect_duplicates import DuplicateDetector, JarEntryIndex
 from pants.base.exceptions import TaskError
+from pants.util.contextutil import temporary_dir
 from pants.util.dirutil import safe_rmtree, touch
 from pants_test.task_test_base import TaskTestBase
 
@@ -55,6 +56,7 @@ class DuplicateDetectorTest(TaskTestBase):
       yield test_jar, jar_with_duplicates, jar_without_duplicates, jar_with_unicode
 
     with jars() as jars:
+      self.jars = jars
       test_jar, jar_with_duplicates, jar_without_duplicates, jar_with_unicode = jars
       self.path_with_duplicates = {
           'com/twitter/Test.class': set([test_jar]),
@@ -75,7 +77,7 @@ class DuplicateDetectorTest(TaskTestBase):
   def test_duplicate_found(self):
     context = self.context(
       options={
-          self.options_scope: { 'fail_fast': False, 'excludes': [], 'max_dups' : 10 }
+          self.options_scope: { 'fail_fast': False, 'excludes': [], 'max_dups' : 10, 'workers': 1 }
       }
     )
     task = self.create_task(context, workdir=None)
@@ -85,7 +87,7 @@ class DuplicateDetectorTest(TaskTestBase):
   def test_duplicate_not_found(self):
     context = self.context(
       options={
-          self.options_scope: { 'fail_fast': False, 'excludes': [], 'max_dups' : 10 }
+          self.options_scope: { 'fail_fast': False, 'excludes': [], 'max_dups' : 10, 'workers': 1 }
       }
     )
     task = self.create_task(context, workdir=None)
@@ -95,10 +97,64 @@ class DuplicateDetectorTest(TaskTestBase):
   def test_fail_fast_error_raised(self):
     context = self.context(
       options={
-          self.options_scope: { 'fail_fast': True, 'excludes': [], 'max_dups' : 10 }
+          self.options_scope: { 'fail_fast': True, 'excludes': [], 'max_dups' : 10, 'workers': 1 }
       }
     )
     task = self.create_task(context, workdir=None)
     task.execute()
     with self.assertRaises(TaskError):
       task._is_conflicts(self.path_with_duplicates, binary_target=None)
+
+  def test_jar_entry_index(self):
+    test_jar, _, _, jar_with_unicode = self.jars
+    with temporary_dir() as index_dir:
+      index = JarEntryIndex(index_dir)
+      index.populate([test_jar, jar_with_unicode], workers=2)
+      self.assertEqual(2, len(os.listdir(index_dir)))
+
+      def entries(*names):
+        # Zip entries lose the leading / of the absolute paths the jars were written from.
+        return frozenset(os.path.join(self.base_dir, name).lstrip('/') for name in names)
+
+      self.assertEqual(entries('com/twitter/Test.class', 'com/twitter/commons/Duplicate.class'),
+                       index.entries(test_jar))
+      self.assertEqual(entries('cucumber/api/java/zh_cn/假如.class'),
+                       index.entries(jar_with_unicode))
+
+      # The listings are read back by a new index for as long as the jars look unchanged.
+      stat = os.stat(test_jar)
+      with open(test_jar, 'r+b') as fp:
+        fp.write(b'\0' * stat.st_size)
+      os.utime(test_jar, (stat.st_atime, stat.st_mtime))
+      self.assertEqual(index.entries(test_jar), JarEntryIndex(index_dir).entries(test_jar))
+
+      os.utime(test_jar, (stat.st_atime, stat.st_mtime + 1))
+      with self.assertRaises(BadZipfile):
+        JarEntryIndex(index_dir).entries(test_jar)
+
+  def test_merge_conflicts(self):
+    external_artifacts_by_file_name = {
+      'a/A.class': set(['a.jar']),
+      'b/B.class': set(['a.jar', 'b.jar']),
+      'c/C.class': set(['a.jar', 'b.jar']),
+    }
+    external_artifacts = DuplicateDetector.ExternalArtifacts(
+      artifacts_by_file_name=external_artifacts_by_file_name,
+      conflicts_by_artifacts=DuplicateDetector._get_conflicts_by_artifacts(
+        external_artifacts_by_file_name))
+    internal_artifacts_by_file_name = {
+      'a/A.class': set(['binary']),
+      'c/C.class': set(['binary']),
+      'd/D.class': set(['binary']),
+    }
+
+    self.assertEqual({
+                       ('a.jar', 'binary'): set(['a/A.class']),
+                       ('a.jar', 'b.jar'): set(['b/B.class']),
+                       ('a.jar', 'b.jar', 'binary'): set(['c/C.class']),
+                     },
+                     DuplicateDetector._merge_conflicts(external_artifacts,
+                                                        internal_artifacts_by_file_name))
+    # The conflicts shared with other binaries on the same classpath are left as they were.
+    self.assertEqual(set(['b/B.class', 'c/C.class']),
+                     external_artifacts.conflicts_by_artifacts[('a.jar', 'b.jar')])
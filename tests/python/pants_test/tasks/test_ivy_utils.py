@@ -6,14 +6,21 @@ from __future__ import (nested_scopes, generators, division, absolute_import, wi
                         print_function, unicode_literals)
 
 import logging
+import os
+import shutil
 from textwrap import dedent
+import threading
 import xml.etree.ElementTree as ET
 
 from mock import Mock
 from pants.backend.core.register import build_file_aliases as register_core
 from pants.backend.jvm.ivy_utils import IvyModuleRef, IvyUtils
 from pants.backend.jvm.register import build_file_aliases as register_jvm
+from pants.ivy.ivy import Ivy
+from pants.java.distribution.distribution import Distribution
+from pants.java.executor import Executor
 from pants.util.contextutil import temporary_file_path
+from pants.util.dirutil import safe_mkdir
 from pants_test.base_test import BaseTest
 
 
@@ -176,3 +183,166 @@ class IvyUtilsGenerateIvyTest(IvyUtilsTestBase):
 
   def assert_attributes(self, elem, **kwargs):
     self.assertEqual(dict(**kwargs), dict(elem.attrib))
+
+
+class LocalRepoExecutor(Executor):
+  """Stands in for a jvm running ivy against a local file-based repository.
+
+  Resolves the dependencies of the ivy.xml it is given from jars laid out as
+  repo/org/name/rev/name-rev.jar, copying them into the ivy cache dir and writing the -cachepath.
+  Each run waits a little for `overlap` runs to be in flight at once, and records the most it saw.
+  """
+
+  def __init__(self, repo_dir, overlap):
+    super(LocalRepoExecutor, self).__init__(distribution=Mock(spec=Distribution))
+    self._repo_dir = repo_dir
+    self._overlap = overlap
+    self._running = 0
+    self._condition = threading.Condition()
+    self.max_running = 0
+
+  def _runner(self, classpath, main, jvm_options, args, cwd=None):
+    executor = self
+
+    class Runner(self.Runner):
+      @property
+      def executor(_):
+        return executor
+
+      @property
+      def cmd(_):
+        return ' '.join([main] + jvm_options + args)
+
+      def run(_, stdout=None, stderr=None, cwd=None):
+        with self._condition:
+          self._running += 1
+          self.max_running = max(self.max_running, self._running)
+          self._condition.notify_all()
+          if self._running < self._overlap:
+            self._condition.wait(0.5)
+        try:
+          return self._resolve(jvm_options, args)
+        finally:
+          with self._condition:
+            self._running -= 1
+
+    return Runner()
+
+  def _resolve(self, jvm_options, args):
+    cache_dir = next(option.split('=', 1)[1] for option in jvm_options
+                     if option.startswith('-Divy.cache.dir='))
+    ivyxml = args[args.index('-ivy') + 1]
+    cachepath = args[args.index('-cachepath') + 1]
+
+    classpath = []
+    for dependency in ET.parse(ivyxml).getroot().findall('dependencies/dependency'):
+      org, name, rev = (dependency.get(attr) for attr in ('org', 'name', 'rev'))
+      jar = os.path.join(self._repo_dir, org, name, rev, '{0}-{1}.jar'.format(name, rev))
+      if not os.path.exists(jar):
+        return 1
+      cached_jar = os.path.join(cache_dir, org, name, 'jars', os.path.basename(jar))
+      safe_mkdir(os.path.dirname(cached_jar))
+      shutil.copy(jar, cached_jar)
+      classpath.append(cached_jar)
+
+    with open(cachepath, 'w') as fp:
+      fp.write(os.pathsep.join(classpath))
+    return 0
+
+
+class IvyUtilsExecIvyTest(IvyUtilsTestBase):
+  def setUp(self):
+    super(IvyUtilsExecIvyTest, self).setUp()
+
+    self.repo_dir = os.path.join(self.build_root, 'repo')
+    self.cache_dir = os.path.join(self.build_root, 'ivy-cache')
+    for name in ('name1', 'name2'):
+      self.create_file(os.path.join('repo', 'org1', name, 'rev1', '{0}-rev1.jar'.format(name)),
+                       contents=name)
+
+    self.add_to_build_file('src/java/targets',
+        dedent("""
+            jar_library(name='one', jars=[jar('org1', 'name1', 'rev1')])
+            jar_library(name='two', jars=[jar('org1', 'name2', 'rev1')])
+        """))
+    self.one = self.target('src/java/targets:one')
+    self.two = self.target('src/java/targets:two')
+    self.ivy_utils = IvyUtils(self.context().config, logging.Logger('test'))
+
+  def ivy_settings(self, lock_strategy):
+    return self.create_file('ivysettings-{0}.xml'.format(lock_strategy), contents=dedent("""
+        <ivysettings>
+          <caches default="default" lockStrategy="{0}">
+            <cache name="default" basedir="${{ivy.cache.dir}}"/>
+          </caches>
+        </ivysettings>
+        """).format(lock_strategy).strip())
+
+  def resolve_concurrently(self, executor, targets, lock_strategy='artifact-lock'):
+    ivy = Ivy([], java_executor=executor, ivy_settings=self.ivy_settings(lock_strategy),
+              ivy_cache_dir=self.cache_dir)
+    classpaths = {}
+    errors = []
+
+    def resolve(index, target):
+      try:
+        target_workdir = os.path.join(self.build_root, 'ivy', str(index))
+        safe_mkdir(target_workdir)
+        cachepath = os.path.join(target_workdir, 'classpath')
+        self.ivy_utils.exec_ivy(target_workdir, [target], ['-cachepath', cachepath], ivy=ivy)
+        with open(cachepath) as fp:
+          classpaths[index] = fp.read().split(os.pathsep)
+      except Exception as e:
+        errors.append(e)
+
+    threads = [threading.Thread(target=resolve, args=(index, target))
+               for index, target in enumerate(targets)]
+    for thread in threads:
+      thread.start()
+    for thread in threads:
+      thread.join()
+    self.assertEqual([], errors)
+    return [classpaths[index] for index in range(len(targets))]
+
+  def cached_jar(self, name):
+    return os.path.join(self.cache_dir, 'org1', name, 'jars', '{0}-rev1.jar'.format(name))
+
+  def test_different_modules_resolve_concurrently(self):
+    executor = LocalRepoExecutor(self.repo_dir, overlap=2)
+    classpaths = self.resolve_concurrently(executor, [self.one, self.two])
+    self.assertEqual(2, executor.max_running)
+    self.assertEqual([[self.cached_jar('name1')], [self.cached_jar('name2')]], classpaths)
+
+  def test_same_module_resolves_serially(self):
+    executor = LocalRepoExecutor(self.repo_dir, overlap=2)
+    classpaths = self.resolve_concurrently(executor, [self.one, self.one])
+    self.assertEqual(1, executor.max_running)
+    self.assertEqual([[self.cached_jar('name1')]] * 2, classpaths)
+
+  def test_different_modules_resolve_serially_without_artifact_locks(self):
+    # Without artifact locks concurrent resolves would race on the shared repository cache.
+    executor = LocalRepoExecutor(self.repo_dir, overlap=2)
+    classpaths = self.resolve_concurrently(executor, [self.one, self.two], lock_strategy='no-lock')
+    self.assertEqual(1, executor.max_running)
+    self.assertEqual([[self.cached_jar('name1')], [self.cached_jar('name2')]], classpaths)
+
+  def test_locks_artifacts(self):
+    self.assertTrue(IvyUtils.locks_artifacts(self.ivy_settings('artifact-lock')))
+    self.assertTrue(IvyUtils.locks_artifacts(self.ivy_settings('artifact-lock-nio')))
+    self.assertFalse(IvyUtils.locks_artifacts(self.ivy_settings('no-lock')))
+    self.assertFalse(IvyUtils.locks_artifacts(None))
+    self.assertFalse(IvyUtils.locks_artifacts(self.create_file('ivysettings-empty.xml',
+                                                               contents='<ivysettings/>')))
+
+    override = self.create_file('ivysettings-override.xml', contents=dedent("""
+        <ivysettings>
+          <caches default="default" lockStrategy="artifact-lock">
+            <cache name="default" basedir="${ivy.cache.dir}" lockStrategy="no-lock"/>
+          </caches>
+        </ivysettings>
+        """).strip())
+    self.assertFalse(IvyUtils.locks_artifacts(override))
+
+  def test_module_lock(self):
+    self.assertIs(IvyUtils.module_lock([self.one]), IvyUtils.module_lock([self.one]))
+    self.assertIsNot(IvyUtils.module_lock([self.one]), IvyUtils.module_lock([self.two]))
@@ -0,0 +1,129 @@
+# coding=utf-8
+# Copyright 2014 Pants project contributors (see CONTRIBUTORS.md).
+# Licensed under the Apache License, Version 2.0 (see LICENSE).
+
+from __future__ import (nested_scopes, generators, division, absolute_import, with_statement,
+                        print_function, unicode_literals)
+
+import os
+import unittest2 as unittest
+from zipfile import ZIP_DEFLATED, ZIP_STORED
+
+from pants.backend.jvm.targets.jvm_binary import Duplicate, JarRules, Skip
+from pants.backend.jvm.tasks.jar_assembler import JarAssembler
+from pants.util.contextutil import open_zip
+from pants.util.dirutil import safe_mkdtemp, safe_open, safe_rmtree
+
+
+class JarAssemblerTest(unittest.TestCase):
+  MANIFEST = b'Manifest-Version: 1.0\nCreated-By: test\n'
+
+  def setUp(self):
+    self.tmpdir = safe_mkdtemp()
+
+  def tearDown(self):
+    safe_rmtree(self.tmpdir)
+
+  def create_file(self, relpath, contents):
+    path = os.path.join(self.tmpdir, relpath)
+    with safe_open(path, 'wb') as fp:
+      fp.write(contents)
+    return path
+
+  def create_jar(self, name, entries):
+    path = os.path.join(self.tmpdir, name)
+    with open_zip(path, 'w', compression=ZIP_DEFLATED) as jar:
+      jar.writestr('META-INF/MANIFEST.MF', b'Manifest-Version: 1.0\nCreated-By: other\n')
+      for entry_name, contents in sorted(entries.items()):
+        jar.writestr(entry_name, contents)
+    return path
+
+  def assemble(self, assembler, files=None, jars=None):
+    path = os.path.join(self.tmpdir, 'out.jar')
+    assembler.assemble(path, self.MANIFEST, files=files, jars=jars)
+    return path
+
+  def test_assemble(self):
+    classes = os.path.dirname(self.create_file('classes/com/example/A.class', b'A' * 100))
+    readme = self.create_file('README', b'read me')
+    lib = self.create_jar('lib.jar', {
+      'com/example/A.class': b'not A',
+      'com/lib/B.class': b'B' * 1000,
+      'META-INF/LIB.SF': b'signature',
+      'META-INF/services/Service': b'lib.Impl\n',
+    })
+    other = self.create_jar('other.jar', {'META-INF/services/Service': b'other.Impl\n'})
+
+    jar_path = self.assemble(JarAssembler(),
+                             files=[(classes, 'com/example'), (readme, 'docs/README')],
+                             jars=[lib, other])
+
+    with open_zip(jar_path) as jar:
+      self.assertIsNone(jar.testzip())
+      self.assertEqual(['META-INF/',
+                        'META-INF/MANIFEST.MF',
+                        'com/',
+                        'com/example/',
+                        'com/example/A.class',
+                        'docs/',
+                        'docs/README',
+                        'META-INF/services/',
+                        'META-INF/services/Service',
+                        'com/lib/',
+                        'com/lib/B.class'],
+                       jar.namelist())
+      self.assertEqual(self.MANIFEST, jar.read('META-INF/MANIFEST.MF'))
+      self.assertEqual(b'A' * 100, jar.read('com/example/A.class'))
+      self.assertEqual(b'read me', jar.read('docs/README'))
+      self.assertEqual(b'lib.Impl\nother.Impl\n', jar.read('META-INF/services/Service'))
+
+      with open_zip(lib) as lib_jar:
+        copied = jar.getinfo('com/lib/B.class')
+        original = lib_jar.getinfo('com/lib/B.class')
+        self.assertEqual((original.CRC, original.compress_size, original.date_time),
+                         (copied.CRC, copied.compress_size, copied.date_time))
+
+  def test_duplicate_actions(self):
+    first = self.create_jar('first.jar', {'a': b'first'})
+    second = self.create_jar('second.jar', {'a': b'second'})
+
+    def assemble(action):
+      jar_rules = JarRules(rules=[Duplicate('^a$', action)], default_dup_action=Duplicate.FAIL)
+      with open_zip(self.assemble(JarAssembler(jar_rules), jars=[first, second])) as jar:
+        return jar.read('a')
+
+    self.assertEqual(b'first', assemble(Duplicate.SKIP))
+    self.assertEqual(b'second', assemble(Duplicate.REPLACE))
+    self.assertEqual(b'firstsecond', assemble(Duplicate.CONCAT))
+    with self.assertRaises(Duplicate.Error):
+      assemble(Duplicate.FAIL)
+
+  def test_skip(self):
+    lib = self.create_jar('lib.jar', {'a': b'a', 'b': b'b'})
+    jar_rules = JarRules(rules=[Skip('^b$')])
+    with open_zip(self.assemble(JarAssembler(jar_rules), jars=[lib])) as jar:
+      self.assertEqual(['META-INF/', 'META-INF/MANIFEST.MF', 'a'], jar.namelist())
+
+  def test_uncompressed(self):
+    lib = self.create_jar('lib.jar', {'a': b'a' * 100})
+    b = self.create_file('b', b'b' * 100)
+    jar_path = self.assemble(JarAssembler(compressed=False), files=[(b, 'b')], jars=[lib])
+    with open_zip(jar_path) as jar:
+      self.assertEqual(set([ZIP_STORED]), set(zinfo.compress_type for zinfo in jar.infolist()))
+      self.assertEqual(b'a' * 100, jar.read('a'))
+      self.assertEqual(b'b' * 100, jar.read('b'))
+
+  def test_workers(self):
+    for i in range(100):
+      self.create_file(os.path.join('classes', 'p{0}'.format(i % 7), 'C{0}.class'.format(i)),
+                       b'class {0}\n'.format(i) * i)
+    lib = self.create_jar('lib.jar', dict(('lib/L{0}'.format(i), b'lib') for i in range(50)))
+    files = [(os.path.join(self.tmpdir, 'classes'), None)]
+
+    def listing(workers):
+      jar_path = self.assemble(JarAssembler(workers=workers), files=files, jars=[lib])
+      with open_zip(jar_path) as jar:
+        self.assertIsNone(jar.testzip())
+        return [(zinfo.filename, zinfo.CRC, zinfo.compress_size) for zinfo in jar.infolist()]
+
+    self.assertEqual(listing(1), listing(4))
@@ -15,11 +15,13 @@ from pants.backend.core.targets.resources import Resources
 from pants.backend.jvm.targets.java_library import JavaLibrary
 from pants.backend.jvm.targets.jvm_binary import JvmBinary
 from pants.backend.jvm.targets.scala_library import ScalaLibrary
-from pants.backend.jvm.tasks.jar_create import JarCreate, is_jvm_library
+from pants.backend.jvm.tasks.jar_create import (JarCreate, JarCreateFingerprintStrategy,
+                                                 is_jvm_library, jarname)
 from pants.base.source_root import SourceRoot
 from pants.goal.products import MultipleRootedProducts
 from pants.util.contextutil import open_zip, temporary_dir
-from pants.util.dirutil import safe_open
+from pants.util.dirutil import safe_mkdtemp, safe_open
+from pants_test.base_test import BaseTest
 from pants_test.jvm.jar_task_test_base import JarTaskTestBase
 
 
@@ -30,7 +32,8 @@ class JarCreateTestBase(JarTaskTestBase):
 
   def setUp(self):
     super(JarCreateTestBase, self).setUp()
-    self.set_options(compressed=False)
+    self.set_options(compressed=False, workers=1, read_artifact_caches=None,
+                     write_artifact_caches=None)
 
 
 class JarCreateMiscTest(JarCreateTestBase):
@@ -50,6 +53,37 @@ class JarCreateMiscTest(JarCreateTestBase):
       self.assertFalse(is_jvm_library(target))
 
 
+class JarCreateFingerprintStrategyTest(BaseTest):
+  def test_fingerprint(self):
+    self.create_file('src/java/com/example/A.java', 'class A {}')
+    target = self.make_target('src/java/com/example:lib', JavaLibrary, sources=['A.java'])
+    classes_by_target = defaultdict(MultipleRootedProducts)
+    resources_by_target = defaultdict(MultipleRootedProducts)
+
+    def fingerprint(compressed=True):
+      strategy = JarCreateFingerprintStrategy(classes_by_target, resources_by_target, compressed)
+      return strategy.compute_fingerprint(target)
+
+    self.assertIsNone(fingerprint())
+
+    self.create_file('classes/com/example/A.class', 'A')
+    classes_by_target[target].add_rel_paths(os.path.join(self.build_root, 'classes'),
+                                            ['com/example/A.class'])
+    first = fingerprint()
+    self.assertIsNotNone(first)
+    self.assertEqual(first, fingerprint())
+    self.assertNotEqual(first, fingerprint(compressed=False))
+
+    self.create_file('classes/com/example/A.class', 'changed A')
+    second = fingerprint()
+    self.assertNotEqual(first, second)
+
+    self.create_file('resources/com/example/r.txt', 'r')
+    resources_by_target[target].add_rel_paths(os.path.join(self.build_root, 'resources'),
+                                              ['com/example/r.txt'])
+    self.assertNotEqual(second, fingerprint())
+
+
 class JarCreateExecuteTest(JarCreateTestBase):
   def java_library(self, path, name, sources, **kwargs):
     return self.create_library(path, 'java_library', name, sources, **kwargs)
@@ -152,3 +186,25 @@ class JarCreateExecuteTest(JarCreateTestBase):
                                         'b.class', 'r.txt.transformed')
               self.assert_jar_contents(context, 'jars', self.scala_lib, 'scala_foo.class',
                                         'java_foo.class')
+
+  def test_valid_jars_reused(self):
+    workdir = safe_mkdtemp(dir=self.build_root)
+    jar_path = os.path.join(workdir, jarname(self.jl))
+
+    def execute(prepare, *classes):
+      context = self.context()
+      with self.add_data(context, 'classes_by_target', self.jl, *classes):
+        with self.add_data(context, 'resources_by_target', self.res, 'r.txt.transformed'):
+          task = (self.prepare_execute(context, workdir) if prepare
+                  else self.create_task(context, workdir))
+          task.execute()
+          self.assert_jar_contents(context, 'jars', self.jl, *(classes + ('r.txt.transformed',)))
+
+    execute(True, 'a.class')
+    os.utime(jar_path, (0, 0))
+
+    execute(False, 'a.class')
+    self.assertEqual(0, os.path.getmtime(jar_path))
+
+    execute(False, 'a.class', 'b.class')
+    self.assertNotEqual(0, os.path.getmtime(jar_path))
@@ -6,6 +6,7 @@ from __future__ import (nested_scopes, generators, division, absolute_import, wi
                         print_function, unicode_literals)
 
 import os
+import threading
 import unittest2 as unittest
 
 from mock import Mock
@@ -16,12 +17,12 @@ from pants.backend.jvm.artifact import Artifact
 from pants.backend.jvm.repository import Repository
 from pants.backend.jvm.targets.jar_library import JarLibrary
 from pants.backend.jvm.targets.java_library import JavaLibrary
-from pants.backend.jvm.tasks.jar_publish import JarPublish
+from pants.backend.jvm.tasks.jar_publish import JarPublish, PublishJournal
 from pants.base.build_file_aliases import BuildFileAliases
 from pants.base.exceptions import TaskError
 from pants.scm.scm import Scm
 from pants.util.contextutil import temporary_dir
-from pants.util.dirutil import safe_mkdir, safe_walk
+from pants.util.dirutil import safe_mkdir, safe_open, safe_walk
 from pants_test.tasks.test_base import TaskTest
 
 
@@ -235,6 +236,68 @@ repos: {
     with self.assertRaises(Scm.RemoteException):
       task.execute()
 
+  def test_publish_concurrently(self):
+    targets = self._prepare_for_publishing()
+
+    # Concurrent staging hands each worker a java executor of its own.
+    config = self._get_config() + 'use_nailgun: False\n'
+    task = self.prepare_task(config=config,
+                             args=['--no-test-dryrun', '--test-workers=3'],
+                             build_graph=self.build_graph,
+                             build_file_parser=self.build_file_parser,
+                             targets=targets)
+    self._prepare_mocks(task)
+    lock = threading.Lock()
+    uploaded = []
+    tagged = []
+
+    def publish(ivyxml, jar, entry, repo, published, instance):
+      with lock:
+        uploaded.append(jar.name)
+
+    task.publish = Mock(side_effect=publish)
+    task.scm.tag = Mock(side_effect=lambda tag, message: tagged.append(tag))
+    task.execute()
+
+    # Each artifact depends on the one before it, so they are uploaded and committed in order.
+    self.assertEquals(['nail', 'shoe', 'horse'], uploaded)
+    self.assertEquals(['com.example-nail-0.0.1', 'com.example-shoe-0.0.1',
+                       'com.example-horse-0.0.1'], tagged)
+
+  def test_publish_resumes_from_journal(self):
+    targets = self._prepare_for_publishing()
+
+    with temporary_dir() as publish_dir:
+      def create_task():
+        task = self.prepare_task(args=['--test-local=%s' % publish_dir, '--no-test-dryrun'],
+                                 build_graph=self.build_graph,
+                                 build_file_parser=self.build_file_parser,
+                                 targets=targets)
+        self._prepare_mocks(task)
+        return task
+
+      task = create_task()
+      task.publish.side_effect = FailNTimes(1, TaskError, success=None)
+      # The first upload fails, so nothing is journaled.
+      with self.assertRaises(TaskError):
+        task.execute()
+
+      task = create_task()
+      task.publish.side_effect = [None, TaskError()]
+      with self.assertRaises(TaskError):
+        task.execute()
+      self.assertEquals(2, task.publish.call_count)
+
+      # Only the upload that failed and those after it are retried.
+      task = create_task()
+      task.execute()
+      self.assertEquals(2, task.publish.call_count)
+
+      # A completed publish leaves no journal behind.
+      task = create_task()
+      task.execute()
+      self.assertEquals(3, task.publish.call_count)
+
   def test_publish_local_only(self):
     with pytest.raises(TaskError) as exc:
       self.prepare_task()
@@ -259,3 +322,34 @@ class FailNTimesTest(unittest.TestCase):
       foo.bar()
 
     foo.bar()
+
+
+class PublishJournalTest(unittest.TestCase):
+  def test_journal(self):
+    with temporary_dir() as tmpdir:
+      path = os.path.join(tmpdir, 'journal')
+      journal = PublishJournal(path)
+      self.assertFalse(journal.has_uploaded('com.example#nail;0.0.1', 'abc', 'example.com:'))
+      journal.record_upload('com.example#nail;0.0.1', 'abc', 'example.com:')
+      self.assertTrue(journal.has_uploaded('com.example#nail;0.0.1', 'abc', 'example.com:'))
+
+      reloaded = PublishJournal(path)
+      self.assertTrue(reloaded.has_uploaded('com.example#nail;0.0.1', 'abc', 'example.com:'))
+      self.assertFalse(reloaded.has_uploaded('com.example#nail;0.0.1', 'def', 'example.com:'))
+      self.assertFalse(reloaded.has_uploaded('com.example#nail;0.0.1', 'abc', 'example.org:'))
+
+      reloaded.clear()
+      self.assertFalse(os.path.exists(path))
+      self.assertFalse(PublishJournal(path).has_uploaded('com.example#nail;0.0.1', 'abc',
+                                                         'example.com:'))
+
+  def test_journal_partial_line(self):
+    with temporary_dir() as tmpdir:
+      path = os.path.join(tmpdir, 'journal')
+      PublishJournal(path).record_upload('com.example#nail;0.0.1', 'abc', 'example.com:')
+      with safe_open(path, 'a') as fp:
+        fp.write('["com.example#shoe;0.0.1", "ab')
+
+      journal = PublishJournal(path)
+      self.assertTrue(journal.has_uploaded('com.example#nail;0.0.1', 'abc', 'example.com:'))
+      self.assertFalse(journal.has_uploaded('com.example#shoe;0.0.1', 'abc', 'example.com:'))
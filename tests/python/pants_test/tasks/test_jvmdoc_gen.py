@@ -6,11 +6,15 @@ from __future__ import (nested_scopes, generators, division, absolute_import, wi
                         print_function, unicode_literals)
 
 import os
+import sys
 
-from pants.backend.jvm.tasks.jvmdoc_gen import Jvmdoc, JvmdocGen
+from pants.backend.jvm.targets.java_library import JavaLibrary
+from pants.backend.jvm.tasks.jvmdoc_gen import (Jvmdoc, JvmdocGen, classpath_entry_key,
+                                                 jvm_heap_size)
 from pants.base.exceptions import TaskError
 from pants_test.task_test_base import TaskTestBase
-from pants.util.dirutil import safe_mkdtemp, safe_rmtree
+from pants.util.contextutil import temporary_dir
+from pants.util.dirutil import safe_mkdtemp, safe_open, safe_rmtree
 
 
 dummydoc = Jvmdoc(tool_name='dummydoc', product_type='dummydoc')
@@ -37,6 +41,7 @@ options = {
   'DummyJvmdocGen_open_opt': None,
   'DummyJvmdocGen_transitive_opt': None,
   'DummyJvmdocGen_skip_opt': None,
+  'DummyJvmdocGen_workers_opt': None,
 }
 
 
@@ -51,6 +56,7 @@ class JvmdocGenTest(TaskTestBase):
     super(JvmdocGenTest, self).setUp()
     self.workdir = safe_mkdtemp()
 
+    self.set_options(read_artifact_caches=None, write_artifact_caches=None)
     self.t1 = self.make_target('t1')
     context = self.context(target_roots=[self.t1])
 
@@ -78,4 +84,111 @@ class JvmdocGenTest(TaskTestBase):
       with self.assertRaises(TaskError):
         generate([], self.targets, create_jvmdoc_command_fail)
 
-      generate([], self.targets, create_jvmdoc_command_succeed)
+      self.assertTrue(generate([], self.targets, create_jvmdoc_command_succeed))
+
+  def test_jvm_heap_size(self):
+    gigabyte = 1 << 30
+    self.assertEqual(4 * gigabyte, jvm_heap_size([], 16 * gigabyte))
+    self.assertEqual(512 * (1 << 20), jvm_heap_size(['-Xmx512m'], 16 * gigabyte))
+    self.assertEqual(2 * gigabyte, jvm_heap_size(['-Xmx1G', '-Xss1m', '-Xmx2g'], 16 * gigabyte))
+    self.assertEqual(65536, jvm_heap_size(['-Xmx64k'], 16 * gigabyte))
+
+  def test_classpath_entry_key(self):
+    classes = os.path.join(self.build_root, 'dist', 'classes')
+    self.assertEqual(os.path.join('dist', 'classes'), classpath_entry_key(classes, self.build_root))
+
+    def external_jar_key(content):
+      with temporary_dir() as cache_dir:
+        jar = os.path.join(cache_dir, 'org.example', 'lib', 'jars', 'lib-1.0.jar')
+        with safe_open(jar, 'w') as fp:
+          fp.write(content)
+        return classpath_entry_key(jar, self.build_root)
+
+    # Jars outside the buildroot are keyed by content, not by where they happen to live.
+    self.assertEqual(external_jar_key('jar'), external_jar_key('jar'))
+    self.assertNotEqual(external_jar_key('jar'), external_jar_key('other jar'))
+
+
+def create_index_command(classpath, gendir, *targets):
+  # Writes an index.html listing the documented targets into gendir.
+  script = "open({0!r}, 'w').write({1!r})".format(os.path.join(gendir, 'index.html'),
+                                                  ' '.join(sorted(t.id for t in targets)))
+  return [sys.executable, '-c', script]
+
+
+def create_failing_command(classpath, gendir, *targets):
+  return [sys.executable, '-c', 'import sys; sys.exit(1)']
+
+
+class JvmdocGenArtifactCacheTest(TaskTestBase):
+  """Test that generated docs are written to and restored from the artifact cache."""
+
+  @classmethod
+  def task_type(cls):
+    return DummyJvmdocGen
+
+  def setUp(self):
+    super(JvmdocGenArtifactCacheTest, self).setUp()
+    self.artifact_cache = safe_mkdtemp()
+    self.set_options(read_artifact_caches=[self.artifact_cache],
+                     write_artifact_caches=[self.artifact_cache],
+                     read_from_artifact_cache=True,
+                     write_to_artifact_cache=True,
+                     overwrite_cache_artifacts=False)
+    self.workdir = os.path.join(self.build_root, '.pants.d', 'dummydoc')
+    self.t1 = self.java_library('t1')
+    self.t2 = self.java_library('t2')
+
+  def java_library(self, name):
+    self.create_file('src/java/{0}/{0}.java'.format(name), 'class {0} {{}}'.format(name))
+    return self.make_target('src/java/{0}'.format(name), JavaLibrary,
+                            sources=['{0}.java'.format(name)])
+
+  def tearDown(self):
+    super(JvmdocGenArtifactCacheTest, self).tearDown()
+    safe_rmtree(self.artifact_cache)
+
+  def generate_doc(self, create_jvmdoc_command):
+    context = self.context(target_roots=[self.t1, self.t2])
+    self.populate_compile_classpath(context)
+    task = self.create_task(context, self.workdir)
+    task.update_artifact_cache = self.update_artifact_cache_now(task)
+    task.generate_doc(lambda t: True, create_jvmdoc_command)
+    return task
+
+  def update_artifact_cache_now(self, task):
+    # Run the cache writes in the foreground instead of as background work.
+    def update_artifact_cache(vts_artifactfiles_pairs):
+      work = task.get_update_artifact_cache_work(vts_artifactfiles_pairs)
+      for args in work.args_tuples:
+        work.func(*args)
+    return update_artifact_cache
+
+  def assert_restored_from_cache(self, expected_docs):
+    task = self.generate_doc(create_index_command)
+    task.invalidate()
+    safe_rmtree(self.workdir)
+
+    # The doc tool would fail if it were run again, so the docs must come from the cache.
+    self.generate_doc(create_failing_command)
+    for gendir, content in expected_docs.items():
+      with open(os.path.join(self.workdir, gendir, 'index.html')) as fp:
+        self.assertEqual(content, fp.read())
+
+  def test_individual_docs_cached(self):
+    self.set_options(combined=False)
+    self.assert_restored_from_cache({self.t1.id: self.t1.id, self.t2.id: self.t2.id})
+
+  def test_combined_docs_cached(self):
+    self.set_options(combined=True)
+    self.assert_restored_from_cache({'combined': ' '.join(sorted([self.t1.id, self.t2.id]))})
+
+  def test_failed_docs_not_cached(self):
+    self.set_options(ignore_failure=True)
+    task = self.generate_doc(create_failing_command)
+    task.invalidate()
+    safe_rmtree(self.workdir)
+
+    self.generate_doc(create_index_command)
+    with open(os.path.join(self.workdir, self.t1.id, 'index.html')) as fp:
+      self.assertEqual(self.t1.id, fp.read())
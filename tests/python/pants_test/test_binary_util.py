@@ -5,49 +5,57 @@
 from __future__ import (nested_scopes, generators, division, absolute_import, with_statement,
                         print_function, unicode_literals)
 
+from contextlib import contextmanager
+import BaseHTTPServer
+import hashlib
+import SocketServer
+import threading
+import time
+
 from pants.binary_util import BinaryUtil
+from pants.util.contextutil import temporary_dir
 from pants_test.base_test import BaseTest
 
 
-class BinaryUtilTest(BaseTest):
-  """Tests binary_util's pants_support_baseurls handling."""
+# The content served by each of the mirrors simulated by MirrorHandler, keyed by mirror name.
+MIRRORS = {
+  'fast': 'FAST BINARY',
+  'slow': 'SLOW BINARY',
+  'corrupt': 'CORRUPT BINARY',
+}
 
-  class LambdaReader(object):
-    """Class which pretends to be an input stream, but is actually a lambda function."""
-    def __init__(self, func):
-      self._func = func
+SLOW_MIRROR_DELAY_SECS = 1
 
-    def __call__(self):
-      return self._func()
 
-    def read(self):
-      return self()
+class MirrorHandler(BaseHTTPServer.BaseHTTPRequestHandler):
+  """Serves binaries from simulated mirrors named by the first path component of the request.
 
-    def __enter__(self, a=None, b=None, c=None, d=None):
-      return self
+  Unknown mirrors respond with a 404 and the 'slow' mirror delays its response.
+  """
 
-    def __exit__(self, a=None, b=None, c=None, d=None):
-      pass
+  def do_GET(self):
+    mirror = self.path.lstrip('/').split('/', 1)[0]
+    if mirror not in MIRRORS:
+      self.send_error(404, 'No such mirror: {}'.format(mirror))
+      return
+    if mirror == 'slow':
+      time.sleep(SLOW_MIRROR_DELAY_SECS)
+    content = MIRRORS[mirror]
+    self.send_response(200)
+    self.send_header('Content-Length', str(len(content)))
+    self.end_headers()
+    self.wfile.write(content)
 
-  class MapReader(object):
-    """Class which pretends to be a url stream opener, but is actually a dictionary."""
-    def __init__(self, read_map):
-      self._map = read_map
+  def log_message(self, format, *args):
+    pass
 
-    def __call__(self, key):
-      if not key in self._map:
-        raise IOError("404: Virtual URL '{key}' does not exist.".format(key=key))
-      value = self._map[key]
-      return BinaryUtilTest.LambdaReader(lambda: value)
 
-    def keys(self):
-      return self._map.keys()
+class ThreadingHTTPServer(SocketServer.ThreadingMixIn, BaseHTTPServer.HTTPServer):
+  daemon_threads = True
 
-    def values(self):
-      return self._map.values()
 
-    def __getitem__(self, key):
-      return self._map[key] # Vanilla internal map access (without lambda shenanigans).
+class BinaryUtilTest(BaseTest):
+  """Tests binary_util's pants_support_baseurls handling."""
 
   def setUp(self):
     super(BinaryUtilTest, self).setUp()
@@ -70,76 +78,82 @@ class BinaryUtilTest(BaseTest):
     return self.config(overrides=clean_config('[DEFAULT]{urls}{legacy}'.format(urls=urls,
                                                                                legacy=legacy)))
 
-  @classmethod
-  def _fake_base(cls, name):
-    return 'fake-url-{name}'.format(name=name)
-
-  @classmethod
-  def _fake_url(cls, binaries, base, binary_key):
-    base_path, version, name = binaries[binary_key]
-    return '{base}/{binary}'.format(base=base,
-                                    binary=BinaryUtil().select_binary_base_path(
-                                        base_path, version, name))
-
-  def _seens_test(self, binaries, bases, reader, config=None):
-    unseen = [item for item in reader.values() if item.startswith('SEEN ')]
-    if not config:
-      config = self.config_urls(bases)
-    util = BinaryUtil(config=config)
-    for key in binaries:
-      base_path, version, name = binaries[key]
-      with util.select_binary_stream(base_path,
-                                     version,
-                                     name,
-                                     url_opener=reader) as stream:
-        self.assertEqual(stream(), 'SEEN ' + key.upper())
-        unseen.remove(stream())
-    self.assertEqual(0, len(unseen)) # Make sure we've seen all the SEENs.
-
   def test_nobases(self):
     """Tests exception handling if build support urls are improperly specified."""
+    with temporary_dir() as bootstrap_dir:
+      util = BinaryUtil(bootstrap_dir=bootstrap_dir, config=self.config_urls())
+      with self.assertRaises(BinaryUtil.NoBaseUrlsError):
+        util.select_binary('bin/foo', '4.4.3', 'foo')
+
+
+class BinaryUtilMirrorRaceTest(BaseTest):
+  """Tests binary bootstrapping against a local HTTP stand-in for slow and failing mirrors."""
+
+  @contextmanager
+  def mirror_server(self):
+    httpd = ThreadingHTTPServer(('localhost', 0), MirrorHandler)
+    httpd_thread = threading.Thread(target=httpd.serve_forever)
+    httpd_thread.daemon = True
+    httpd_thread.start()
     try:
-      util = BinaryUtil(config=self.config_urls())
-      with util.select_binary_stream('bin/foo', '4.4.3', 'foo') as stream:
-        self.fail('We should have gotten a "NoBaseUrlsError".')
-    except BinaryUtil.NoBaseUrlsError as e:
-      pass # expected
+      yield 'http://localhost:{0}'.format(httpd.server_address[1])
+    finally:
+      httpd.shutdown()
+      httpd_thread.join()
+
+  @contextmanager
+  def binary_util(self, *mirrors):
+    with self.mirror_server() as server_url:
+      with temporary_dir() as bootstrap_dir:
+        yield BinaryUtil(bootstrap_dir=bootstrap_dir,
+                         baseurls=['{0}/{1}'.format(server_url, mirror) for mirror in mirrors],
+                         timeout=SLOW_MIRROR_DELAY_SECS * 5)
+
+  def assert_selected(self, expected_content, path):
+    with open(path) as fp:
+      self.assertEqual(expected_content, fp.read())
+
+  def test_fastest_mirror_wins(self):
+    with self.binary_util('slow', 'fast') as util:
+      start = time.time()
+      path = util.select_binary('bin/foo', '1.0', 'foo')
+      self.assertLess(time.time() - start, SLOW_MIRROR_DELAY_SECS)
+      self.assert_selected(MIRRORS['fast'], path)
+
+  def test_failing_mirrors_skipped(self):
+    with self.binary_util('missing', 'slow', 'also-missing') as util:
+      self.assert_selected(MIRRORS['slow'], util.select_binary('bin/foo', '1.0', 'foo'))
 
   def test_support_url_multi(self):
-    """Tests to make sure existing base urls function as expected."""
-    config = self.config_urls([
-      'BLATANTLY INVALID URL',
-      'https://pantsbuild.github.io/binaries/reasonably-invalid-url',
-      'https://pantsbuild.github.io/binaries/build-support',
-      'https://pantsbuild.github.io/binaries/build-support', # Test duplicate entry handling.
-      'https://pantsbuild.github.io/binaries/another-invalid-url',
-    ])
-    binaries = [
-      ('bin/protobuf', '2.4.1', 'protoc',),
-    ]
-    util = BinaryUtil(config=config)
-    for base_path, version, name in binaries:
-      one = 0
-      with util.select_binary_stream(base_path, version, name) as stream:
-        stream()
-        one += 1
-      self.assertEqual(one, 1)
-
-  def test_support_url_fallback(self):
-    """Tests fallback behavior with multiple support baseurls."""
-    fake_base, fake_url = self._fake_base, self._fake_url
-    binaries = {
-      'protoc': ('bin/protobuf', '2.4.1', 'protoc',),
-      'ivy': ('bin/ivy', '4.3.7', 'ivy',),
-      'bash': ('bin/bash', '4.4.3', 'bash',),
-    }
-    bases = [fake_base('apple'), fake_base('orange'), fake_base('banana'),]
-    reader = self.MapReader({
-      fake_url(binaries, bases[0], 'protoc'): 'SEEN PROTOC',
-      fake_url(binaries, bases[0], 'ivy'): 'SEEN IVY',
-      fake_url(binaries, bases[1], 'bash'): 'SEEN BASH',
-      fake_url(binaries, bases[1], 'protoc'): 'UNSEEN PROTOC 1',
-      fake_url(binaries, bases[2], 'protoc'): 'UNSEEN PROTOC 2',
-      fake_url(binaries, bases[2], 'ivy'): 'UNSEEN IVY 2',
-    })
-    self._seens_test(binaries, bases, reader)
+    """Tests that invalid, missing and duplicate base urls are tolerated."""
+    with self.mirror_server() as server_url:
+      with temporary_dir() as bootstrap_dir:
+        util = BinaryUtil(bootstrap_dir=bootstrap_dir,
+                          baseurls=['BLATANTLY INVALID URL',
+                                    '{0}/reasonably-invalid-url'.format(server_url),
+                                    '{0}/slow'.format(server_url),
+                                    '{0}/slow'.format(server_url),  # Test duplicate entry handling.
+                                    '{0}/another-invalid-url'.format(server_url)],
+                          timeout=SLOW_MIRROR_DELAY_SECS * 5)
+        self.assert_selected(MIRRORS['slow'], util.select_binary('bin/protobuf', '2.4.1', 'protoc'))
+
+  def test_all_mirrors_fail(self):
+    with self.binary_util('missing', 'also-missing') as util:
+      with self.assertRaises(BinaryUtil.BinaryNotFound):
+        util.select_binary('bin/foo', '1.0', 'foo')
+
+  def test_checksum_verified(self):
+    slow_sha1 = hashlib.sha1(MIRRORS['slow']).hexdigest()
+    with self.binary_util('corrupt', 'slow') as util:
+      self.assert_selected(MIRRORS['slow'],
+                           util.select_binary('bin/foo', '1.0', 'foo', checksum=slow_sha1))
+
+    with self.binary_util('corrupt') as util:
+      with self.assertRaises(BinaryUtil.BinaryNotFound):
+        util.select_binary('bin/foo', '1.0', 'foo', checksum=slow_sha1)
+
+  def test_bootstrapped_binary_reused(self):
+    with self.binary_util('fast') as util:
+      path = util.select_binary('bin/foo', '1.0', 'foo')
+      util._baseurls = []
+      self.assertEqual(path, util.select_binary('bin/foo', '1.0', 'foo'))